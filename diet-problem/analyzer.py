@@ -5,20 +5,70 @@ analyzer.py - Análise e visualização dos resultados do problema da dieta
 Autor: José Brito
 """
 
+import os
+import re
+import sys
 import json
+import unicodedata
+from contextlib import nullcontext
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import pandas as pd
 import numpy as np
-from config import ALIMENTOS_DATA, RESTRICOES_RELAXADAS, NUTRIENTES
+from config import RESTRICOES_RELAXADAS, REGISTRO_NUTRIENTES, RELATORIO_CONFIG
+from catalogo import abrir_catalogo, catalogo_padrao
+from armazenamento import DietResultStore
+from paralelo import mapear_em_paralelo
+
+def sem_display():
+    """
+    Indica se não há display gráfico disponível (ex.: servidor ou CI)
+
+    Returns:
+        bool: True quando os gráficos devem ser gravados em arquivo
+    """
+    if 'agg' in plt.get_backend().lower():
+        return True
+    return sys.platform.startswith('linux') and not (os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+
+def nome_arquivo_grafico(titulo):
+    """
+    Converte o título de um gráfico em nome de arquivo (sem acentos nem espaços)
+
+    Args:
+        titulo (str): Título do gráfico
+
+    Returns:
+        str: Nome de arquivo sem extensão
+    """
+    texto = unicodedata.normalize('NFKD', titulo).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', '_', texto.lower()).strip('_') or 'grafico'
 
 class DietAnalyzer:
     """
     Classe para análise e visualização dos resultados da dieta
     """
     
-    def __init__(self):
-        """Inicializa o analisador"""
+    def __init__(self, diretorio_saida=None, formato="png", dpi=100, catalogo=None):
+        """
+        Inicializa o analisador
+        
+        Args:
+            diretorio_saida (str): Se informado, os gráficos são gravados nesse diretório
+                em figuras Agg próprias, sem janela nem troca do backend do pyplot (modo headless)
+            formato (str): Formato dos arquivos de gráfico ('png' ou 'svg')
+            dpi (int): Resolução dos arquivos PNG
+            catalogo (CatalogoAlimentos): Catálogo de alimentos (padrão: ALIMENTOS_DATA)
+        """
         self.resultados = {}
+        self.catalogo = catalogo if catalogo is not None else catalogo_padrao()
+        self.diretorio_saida = diretorio_saida
+        self.formato = formato
+        self.dpi = dpi
+        
+        if diretorio_saida:
+            os.makedirs(diretorio_saida, exist_ok=True)
         
         # Configurar matplotlib para usar fonte que suporta caracteres especiais
         plt.rcParams['font.family'] = 'DejaVu Sans'
@@ -26,28 +76,125 @@ class DietAnalyzer:
         # Check if 'seaborn-v0_8' is available, otherwise use 'default'
         plt.style.use('seaborn-v0_8' if 'seaborn-v0_8' in plt.style.available else 'default')
     
-    def carregar_resultados(self, arquivo_json):
+    def carregar_resultados(self, origem, modelo=None, colunas=None):
         """
-        Carrega resultados de um arquivo JSON
+        Carrega resultados do armazenamento ou de um arquivo JSON
         
         Args:
-            arquivo_json (str): Caminho para o arquivo JSON
+            origem (DietResultStore | str): Armazenamento de resultados ou caminho de um JSON
+            modelo (str): Modelo cuja solução mais recente será carregada (armazenamento)
+            colunas (list): Colunas ou prefixos a carregar, ex.: ['objetivo', 'compras'] (armazenamento)
             
         Returns:
             dict: Resultados carregados
         """
+        if isinstance(origem, DietResultStore):
+            resultados = origem.ultimo(modelo, colunas=colunas)
+            if resultados is None:
+                print(f"Nenhum resultado do modelo '{modelo}' em {origem.diretorio}!")
+            else:
+                print(f"Resultados de '{modelo}' carregados de {origem.diretorio}")
+            return resultados
+        
         try:
-            with open(arquivo_json, 'r', encoding='utf-8') as f:
+            with open(origem, 'r', encoding='utf-8') as f:
                 resultados = json.load(f)
-            print(f"Resultados carregados de {arquivo_json}")
+            print(f"Resultados carregados de {origem}")
             return resultados
         except FileNotFoundError:
-            print(f"Arquivo {arquivo_json} não encontrado!")
+            print(f"Arquivo {origem} não encontrado!")
             return None
         except json.JSONDecodeError:
-            print(f"Erro ao decodificar JSON em {arquivo_json}")
+            print(f"Erro ao decodificar JSON em {origem}")
             return None
     
+    def carregar_historico(self, armazenamento, colunas=None, **filtros):
+        """
+        Carrega várias soluções do armazenamento como tabela
+        
+        Args:
+            armazenamento (DietResultStore): Armazenamento de resultados
+            colunas (list): Colunas ou prefixos a carregar (padrão: todas)
+            **filtros: modelo, hash_dados, run_ids, desde, ate
+            
+        Returns:
+            pd.DataFrame: Uma linha por solução, com colunas achatadas ('compras.Aveia', ...)
+        """
+        return armazenamento.ler(colunas, **filtros)
+    
+    def _criar_figura(self, nrows=1, ncols=1, figsize=None):
+        """
+        Cria a figura e os eixos de um gráfico
+        
+        No modo headless a figura é uma Figure com canvas Agg, fora do pyplot,
+        de modo que o backend da sessão não é alterado.
+        
+        Args:
+            nrows (int): Linhas de eixos
+            ncols (int): Colunas de eixos
+            figsize (tuple): Tamanho da figura em polegadas
+            
+        Returns:
+            tuple: (figura, eixo ou matriz de eixos)
+        """
+        if not self.diretorio_saida:
+            return plt.subplots(nrows, ncols, figsize=figsize)
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        return fig, fig.subplots(nrows, ncols)
+    
+    def _finalizar_grafico(self, fig, titulo):
+        """
+        Exibe o gráfico ou, no modo headless, grava em arquivo; a figura é sempre fechada
+        
+        Args:
+            fig (Figure): Figura a finalizar
+            titulo (str): Título do gráfico (base do nome do arquivo)
+            
+        Returns:
+            str: Caminho do arquivo gravado (None quando exibido na tela)
+        """
+        if self.diretorio_saida:
+            # Figura fora do pyplot: basta gravar, não há janela a fechar
+            fig.tight_layout()
+            caminho = os.path.join(self.diretorio_saida, f"{nome_arquivo_grafico(titulo)}.{self.formato}")
+            fig.savefig(caminho, format=self.formato, dpi=self.dpi)
+            return caminho
+        try:
+            fig.tight_layout()
+            plt.show()
+        finally:
+            plt.close(fig)
+        return None
+    
+    def renderizar_lote(self, lista_resultados, nomes_solucoes=None, workers=None):
+        """
+        Grava os três gráficos de cada solução usando um pool de processos
+        
+        Cada worker cria um único DietAnalyzer headless e o reutiliza para
+        todas as soluções que recebe; as figuras são fechadas após gravadas.
+        
+        Args:
+            lista_resultados (list): Lista de dicionários com resultados
+            nomes_solucoes (list): Nomes das soluções (padrão: 'Solução 1', ...)
+            workers (int): Número de processos (padrão: número de CPUs)
+            
+        Returns:
+            list: Caminhos dos arquivos gravados, por solução
+        """
+        diretorio = self.diretorio_saida or "graficos"
+        nomes = nomes_solucoes or [f"Solução {k}" for k in range(1, len(lista_resultados) + 1)]
+        n_workers = workers or os.cpu_count() or 1
+        with self.catalogo.publicar() if n_workers > 1 else nullcontext() as publicado:
+            return mapear_em_paralelo(
+                _renderizar_solucao,
+                list(zip(lista_resultados, nomes)),
+                _criar_analisador_headless,
+                (diretorio, self.formato, self.dpi, publicado.descritor if publicado else self.catalogo),
+                workers,
+                max(1, len(nomes) // (4 * n_workers))
+            )
+    
     def criar_grafico_barras_alimentos(self, resultados, titulo="Quantidade de Alimentos Selecionados"):
         """
         Cria gráfico de barras com os alimentos selecionados
@@ -55,6 +202,9 @@ class DietAnalyzer:
         Args:
             resultados (dict): Resultados da otimização
             titulo (str): Título do gráfico
+            
+        Returns:
+            str: Caminho do arquivo gravado no modo headless (None caso contrário)
         """
         # Filtrar apenas alimentos com quantidade > 0
         alimentos_selecionados = {k: v for k, v in resultados['compras'].items() if v > 0}
@@ -64,19 +214,16 @@ class DietAnalyzer:
             return
         
         # Criar gráfico
-        fig, ax = plt.subplots(figsize=(12, 6))
+        fig, ax = self._criar_figura(figsize=(12, 6))
         
         alimentos = list(alimentos_selecionados.keys())
         quantidades = list(alimentos_selecionados.values())
         
         # Cores baseadas no preço (mais caro = mais vermelho)
-        cores = []
-        max_preco = max(ALIMENTOS_DATA.get(alimento, {}).get('preco', 0) for alimento in alimentos) if alimentos else 1
-        for alimento in alimentos:
-            preco = ALIMENTOS_DATA.get(alimento, {}).get('preco', 0)
-            # Normalizar preço para escala de cor (0-1)
-            preco_norm = preco / max_preco if max_preco > 0 else 0 # Avoid division by zero
-            cores.append(plt.cm.RdYlBu_r(preco_norm))
+        precos = self._precos(alimentos)
+        max_preco = precos.max()
+        # Normalizar preço para escala de cor (0-1)
+        cores = plt.cm.RdYlBu_r(precos / max_preco if max_preco > 0 else np.zeros_like(precos))
         
         barras = ax.bar(alimentos, quantidades, color=cores, alpha=0.7, edgecolor='black')
         
@@ -92,9 +239,8 @@ class DietAnalyzer:
         ax.grid(axis='y', alpha=0.3)
         
         # Rotacionar labels do eixo x para melhor legibilidade
-        plt.xticks(rotation=45, ha='right')
-        plt.tight_layout()
-        plt.show()
+        plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+        return self._finalizar_grafico(fig, titulo)
     
     def criar_grafico_pizza_custos(self, resultados, titulo="Distribuição de Custos por Alimento"):
         """
@@ -103,20 +249,20 @@ class DietAnalyzer:
         Args:
             resultados (dict): Resultados da otimização
             titulo (str): Título do gráfico
+            
+        Returns:
+            str: Caminho do arquivo gravado no modo headless (None caso contrário)
         """
         # Calcular custos por alimento
-        custos_alimentos = {}
-        for alimento, quantidade in resultados['compras'].items():
-            if quantidade > 0:
-                preco_unitario = ALIMENTOS_DATA.get(alimento, {}).get('preco', 0)
-                custos_alimentos[alimento] = preco_unitario * quantidade
+        compras = {k: v for k, v in resultados['compras'].items() if v > 0}
+        custos_alimentos = dict(zip(compras, self._precos(compras) * np.fromiter(compras.values(), dtype=float)))
         
         if not custos_alimentos:
             print("Nenhum custo para exibir no gráfico de pizza!")
             return
         
         # Criar gráfico
-        fig, ax = plt.subplots(figsize=(10, 8))
+        fig, ax = self._criar_figura(figsize=(10, 8))
         
         alimentos = list(custos_alimentos.keys())
         custos = list(custos_alimentos.values())
@@ -133,8 +279,7 @@ class DietAnalyzer:
             autotext.set_fontweight('bold')
         
         ax.set_title(titulo, fontsize=14, fontweight='bold')
-        plt.tight_layout()
-        plt.show()
+        return self._finalizar_grafico(fig, titulo)
     
     def criar_grafico_nutrientes(self, resultados, titulo="Nutrientes Totais vs Restrições"):
         """
@@ -143,26 +288,25 @@ class DietAnalyzer:
         Args:
             resultados (dict): Resultados da otimização
             titulo (str): Título do gráfico
+            
+        Returns:
+            str: Caminho do arquivo gravado no modo headless (None caso contrário)
         """
         nutrientes_obtidos = resultados['nutrientes_totais']
         
-        # Preparar dados
-        nutrientes_nomes = ['Energia\n(kcal)', 'Proteína\n(g)', 'Cálcio\n(mg)',
-                            'Magnésio\n(mg)', 'Vitamina C\n(mg)']
+        # Nutrientes do catálogo com algum limite, na ordem das colunas da matriz
+        n_min, n_max = self.catalogo.limites(RESTRICOES_RELAXADAS)
+        limitados = np.isfinite(n_min) | np.isfinite(n_max)
+        nutrientes = [n for n, limitado in zip(self.catalogo.nutrientes, limitados) if limitado]
+        nutrientes_nomes = [f"{REGISTRO_NUTRIENTES[n]['rotulo']}\n({REGISTRO_NUTRIENTES[n]['unidade']})"
+                            if n in REGISTRO_NUTRIENTES else n for n in nutrientes]
         
-        valores_obtidos = [
-            nutrientes_obtidos.get('energia', 0),
-            nutrientes_obtidos.get('proteina', 0),
-            nutrientes_obtidos.get('calcio', 0),
-            nutrientes_obtidos.get('magnesio', 0),
-            nutrientes_obtidos.get('vitaminaC', 0)
-        ]
-        
-        valores_min = [RESTRICOES_RELAXADAS['n_min'][i] for i in range(1, 6)]
-        valores_max = [RESTRICOES_RELAXADAS['n_max'][i] for i in range(1, 6)]
+        valores_obtidos = [nutrientes_obtidos.get(n, 0) for n in nutrientes]
+        valores_min = np.where(np.isfinite(n_min), n_min, 0)[limitados]
+        valores_max = np.where(np.isfinite(n_max), n_max, 0)[limitados]
         
         # Criar gráfico
-        fig, ax = plt.subplots(figsize=(14, 8))
+        fig, ax = self._criar_figura(figsize=(14, 8))
         
         x = np.arange(len(nutrientes_nomes))
         width = 0.25
@@ -186,13 +330,76 @@ class DietAnalyzer:
         ax.legend()
         ax.grid(axis='y', alpha=0.3)
         
-        plt.tight_layout()
-        plt.show()
+        return self._finalizar_grafico(fig, titulo)
+    
+    def criar_grafico_pareto(self, fronteira, titulo="Fronteira de Pareto: Custo x Diversidade", grade=None):
+        """
+        Cria gráfico da fronteira de Pareto entre custo e alimentos distintos
+
+        Args:
+            fronteira (pd.DataFrame): Tabela de pareto.fronteira_pareto()
+            titulo (str): Título do gráfico
+            grade (pd.DataFrame): Pontos de pareto.grade_pesos(), destacados para comparação
+
+        Returns:
+            str: Caminho do arquivo gravado no modo headless (None caso contrário)
+        """
+        if fronteira.empty:
+            print("Fronteira vazia - nada para exibir no gráfico!")
+            return
+
+        fig, ax = self._criar_figura(figsize=(12, 7))
+
+        ax.step(fronteira['distintos'], fronteira['custo'], where='pre', color='steelblue', alpha=0.5)
+        ax.scatter(fronteira['distintos'], fronteira['custo'], s=60, color='steelblue', zorder=3,
+                   label='Restrição épsilon')
+        if grade is not None and not grade.empty:
+            ax.scatter(grade['distintos'], grade['custo'], s=160, facecolors='none', edgecolors='darkorange',
+                       linewidths=2, zorder=4, label='Grade de pesos')
+
+        # Custo de cada ponto
+        for distintos, custo in zip(fronteira['distintos'], fronteira['custo']):
+            ax.annotate(f'R$ {custo:.2f}', (distintos, custo), textcoords='offset points', xytext=(0, 10),
+                        ha='center', fontsize=9)
+
+        ax.set_xlabel('Alimentos distintos', fontsize=12, fontweight='bold')
+        ax.set_ylabel('Custo (R$)', fontsize=12, fontweight='bold')
+        ax.set_title(titulo, fontsize=14, fontweight='bold')
+        ax.set_xticks(fronteira['distintos'])
+        ax.legend()
+        ax.grid(alpha=0.3)
+
+        return self._finalizar_grafico(fig, titulo)
+
+    def _precos(self, alimentos):
+        """Preços unitários alinhados com `alimentos` (0 para nomes fora do catálogo)"""
+        indices = self.catalogo.posicoes(alimentos)
+        return np.where(indices >= 0, self.catalogo.precos[indices], 0.0)
+    
+    def criar_relatorios_lote(self, resultados, diretorio=None, nomes_solucoes=None, workers=None):
+        """
+        Gera relatórios HTML/CSV de muitas soluções (ver relatorios.gerar_relatorios_lote)
+        
+        Args:
+            resultados (pd.DataFrame | list): Tabela de carregar_historico() ou lista de resultados
+            diretorio (str): Diretório de saída (padrão: 'relatorios')
+            nomes_solucoes (list): Nomes das soluções (padrão: run_id)
+            workers (int): Número de processos (padrão: número de CPUs)
+            
+        Returns:
+            dict: Caminhos do índice, dos CSVs e das páginas por solução
+        """
+        from relatorios import gerar_relatorios_lote
+        
+        return gerar_relatorios_lote(resultados, diretorio or "relatorios", nomes_solucoes,
+                                     catalogo=self.catalogo, config={'workers': workers})
     
     def criar_relatorio_completo(self, resultados, nome_arquivo="relatorio_dieta"):
         """
         Cria um relatório completo em texto
         
+        Para muitas soluções, use criar_relatorios_lote().
+        
         Args:
             resultados (dict): Resultados da otimização
             nome_arquivo (str): Nome do arquivo de saída
@@ -216,12 +423,11 @@ class DietAnalyzer:
         relatorio.append("ALIMENTOS SELECIONADOS")
         relatorio.append("-"*40)
         total_porcoes = 0
-        for alimento, quantidade in resultados['compras'].items():
-            if quantidade > 0:
-                preco_unitario = ALIMENTOS_DATA.get(alimento, {}).get('preco', 0)
-                custo_total = preco_unitario * quantidade
-                total_porcoes += quantidade
-                relatorio.append(f"{alimento:<20}: {quantidade:2} porções × R$ {preco_unitario:5.2f} = R$ {custo_total:6.2f}")
+        compras = {k: v for k, v in resultados['compras'].items() if v > 0}
+        for (alimento, quantidade), preco_unitario in zip(compras.items(), self._precos(compras)):
+            custo_total = preco_unitario * quantidade
+            total_porcoes += quantidade
+            relatorio.append(f"{alimento:<20}: {quantidade:2} porções × R$ {preco_unitario:5.2f} = R$ {custo_total:6.2f}")
         
         relatorio.append(f"\nTotal de porções: {total_porcoes}")
         relatorio.append(f"Diversidade: {resultados['estatisticas']['alimentos_selecionados']} alimentos únicos")
@@ -231,11 +437,12 @@ class DietAnalyzer:
         relatorio.append("ANÁLISE NUTRICIONAL")
         relatorio.append("-"*40)
         nutrientes = resultados['nutrientes_totais']
+        n_min, n_max = self.catalogo.limites(RESTRICOES_RELAXADAS)
         
-        for i, nome_nutriente in NUTRIENTES.items():
+        for nome_nutriente, min_req, max_req in zip(self.catalogo.nutrientes, n_min, n_max):
+            if not (np.isfinite(min_req) or np.isfinite(max_req)):
+                continue
             valor_obtido = nutrientes.get(nome_nutriente, 0)
-            min_req = RESTRICOES_RELAXADAS['n_min'][i]
-            max_req = RESTRICOES_RELAXADAS['n_max'][i]
             
             status = "✓ OK"
             if valor_obtido < min_req:
@@ -243,8 +450,8 @@ class DietAnalyzer:
             elif valor_obtido > max_req:
                 status = "⚠ ALTO"
             
-            unidade = "kcal" if nome_nutriente == "energia" else ("g" if nome_nutriente == "proteina" else "mg")
-            relatorio.append(f"{nome_nutriente.capitalize():<12}: {valor_obtido:7.1f} {unidade} (min: {min_req}, max: {max_req}) {status}")
+            unidade = REGISTRO_NUTRIENTES.get(nome_nutriente, {}).get('unidade', '')
+            relatorio.append(f"{nome_nutriente.capitalize():<12}: {valor_obtido:7.1f} {unidade} (min: {min_req:g}, max: {max_req:g}) {status}")
         
         relatorio.append("")
         
@@ -252,13 +459,13 @@ class DietAnalyzer:
         relatorio.append("RECOMENDAÇÕES")
         relatorio.append("-"*40)
         
-        if resultados['estatisticas']['alimentos_selecionados'] < len(ALIMENTOS_DATA) / 2 : # Arbitrary threshold for "low diversity"
+        if resultados['estatisticas']['alimentos_selecionados'] < len(self.catalogo) * RELATORIO_CONFIG['fracao_diversidade']:
             relatorio.append("• Considere aumentar a diversidade de alimentos para uma dieta mais equilibrada.")
         
-        if resultados['objetivo'] > 100: # Arbitrary threshold for "high cost"
+        if resultados['objetivo'] > RELATORIO_CONFIG['custo_elevado']:
             relatorio.append("• Custo elevado - considere buscar alternativas mais econômicas.")
         
-        if any(resultados['compras'].get(alimento, 0) >= 4 for alimento in ALIMENTOS_DATA if resultados['compras'].get(alimento, 0) > 0):
+        if any(quantidade >= RELATORIO_CONFIG['porcoes_dependencia'] for quantidade in compras.values()):
             relatorio.append("• Alguns alimentos estão em alta quantidade - verifique se há dependência excessiva.")
         
         relatorio.append("")
@@ -310,7 +517,7 @@ class DietAnalyzer:
         print("="*100)
         
         # Criar gráfico comparativo
-        fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 10))
+        fig, ((ax1, ax2), (ax3, ax4)) = self._criar_figura(2, 2, figsize=(15, 10))
         
         # Gráfico 1: Custo Total
         ax1.bar(df['Solução'], df['Custo Total (R$)'], color='lightblue', alpha=0.7)
@@ -336,8 +543,30 @@ class DietAnalyzer:
         ax4.set_ylabel('Proteína (g)')
         ax4.tick_params(axis='x', rotation=45)
         
-        plt.tight_layout()
-        plt.show()
+        return self._finalizar_grafico(fig, "Comparação de Soluções")
+
+def _criar_analisador_headless(diretorio, formato, dpi, catalogo):
+    """Cria, em cada worker, o analisador headless reutilizado em todas as soluções"""
+    return DietAnalyzer(diretorio, formato, dpi, abrir_catalogo(catalogo))
+
+def _renderizar_solucao(analisador, item):
+    """Grava os gráficos de uma solução no worker; um gráfico com erro não interrompe o lote"""
+    resultados, nome = item
+    graficos = (
+        (analisador.criar_grafico_barras_alimentos, f"{nome} - Alimentos Selecionados"),
+        (analisador.criar_grafico_pizza_custos, f"{nome} - Distribuição de Custos"),
+        (analisador.criar_grafico_nutrientes, f"{nome} - Análise Nutricional")
+    )
+    caminhos = []
+    for criar, titulo in graficos:
+        try:
+            caminho = criar(resultados, titulo)
+        except Exception as e:
+            print(f"Erro ao gerar gráfico '{titulo}': {e}")
+            continue
+        if caminho:
+            caminhos.append(caminho)
+    return caminhos
 
 def exemplo_analise():
     """
@@ -345,8 +574,9 @@ def exemplo_analise():
     """
     analyzer = DietAnalyzer()
     
-    resultados_basico = analyzer.carregar_resultados("resultados_basico.json")
-    resultados_diversificado = analyzer.carregar_resultados("resultados_diversificado.json")
+    armazenamento = DietResultStore()
+    resultados_basico = analyzer.carregar_resultados(armazenamento, "basico")
+    resultados_diversificado = analyzer.carregar_resultados(armazenamento, "diversificado")
     
     if resultados_basico:
         print("Analisando solução básica...")
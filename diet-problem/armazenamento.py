@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+armazenamento.py - Armazenamento colunar e incremental dos resultados da dieta
+
+Autor: José Brito
+"""
+
+import os
+import json
+import uuid
+import hashlib
+from datetime import datetime
+import pandas as pd
+
+# Campos do índice (um registro por solução)
+CAMPOS_INDICE = ('run_id', 'modelo', 'hash_dados', 'timestamp')
+
+def hash_arquivo(caminho, tamanho_bloco=1 << 20):
+    """
+    Calcula o hash SHA-256 (16 primeiros dígitos) do conteúdo de um arquivo
+
+    Args:
+        caminho (str): Caminho do arquivo
+        tamanho_bloco (int): Bytes lidos por vez
+
+    Returns:
+        str: Hash abreviado
+    """
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            h.update(bloco)
+    return h.hexdigest()[:16]
+
+def achatar(registro, prefixo=''):
+    """
+    Achata dicionários aninhados em colunas 'pai.filho'
+
+    Args:
+        registro (dict): Registro possivelmente aninhado
+        prefixo (str): Prefixo das chaves
+
+    Returns:
+        dict: Registro com uma chave por coluna
+    """
+    plano = {}
+    for chave, valor in registro.items():
+        nome = f"{prefixo}{chave}"
+        if isinstance(valor, dict):
+            plano.update(achatar(valor, f"{nome}."))
+        else:
+            plano[nome] = valor
+    return plano
+
+def aninhar(registro):
+    """
+    Desfaz achatar(): colunas 'pai.filho' voltam a dicionários aninhados
+
+    Args:
+        registro (dict): Registro achatado
+
+    Returns:
+        dict: Registro aninhado (valores ausentes são descartados)
+    """
+    aninhado = {}
+    for coluna, valor in registro.items():
+        if valor is None or (isinstance(valor, float) and valor != valor):
+            continue
+        *pais, chave = coluna.split('.')
+        destino = aninhado
+        for pai in pais:
+            destino = destino.setdefault(pai, {})
+        destino[chave] = valor
+    return aninhado
+
+def _projetar(colunas_disponiveis, colunas):
+    """Seleciona as colunas pedidas; 'compras' seleciona todas as 'compras.*'"""
+    if colunas is None:
+        return list(colunas_disponiveis)
+    return [c for c in colunas_disponiveis
+            if c in CAMPOS_INDICE or any(c == p or c.startswith(p + '.') for p in colunas)]
+
+class DietResultStore:
+    """
+    Armazenamento dos resultados em um diretório, uma linha por solução
+
+    As soluções são acrescentadas a 'resultados.jsonl' e indexadas em
+    'indice.jsonl' por run_id, modelo, hash dos dados e timestamp, com a
+    posição em bytes da linha. Leituras filtram pelo índice e só
+    decodificam as linhas selecionadas. compactar() move as linhas para
+    arquivos Parquet (quando o pyarrow está disponível), lidos apenas nas
+    colunas pedidas.
+    """
+
+    def __init__(self, diretorio="resultados"):
+        """
+        Args:
+            diretorio (str): Diretório do armazenamento (criado se não existir)
+        """
+        self.diretorio = diretorio
+        os.makedirs(diretorio, exist_ok=True)
+        self.arquivo_linhas = os.path.join(diretorio, "resultados.jsonl")
+        self.arquivo_indice = os.path.join(diretorio, "indice.jsonl")
+        self.indice = self._ler_indice()
+
+    def _ler_indice(self):
+        """Carrega o índice em memória"""
+        if not os.path.exists(self.arquivo_indice):
+            return pd.DataFrame(columns=list(CAMPOS_INDICE) + ['arquivo', 'posicao', 'tamanho'])
+        return pd.read_json(self.arquivo_indice, lines=True, convert_dates=False,
+                            dtype={'run_id': str, 'hash_dados': str, 'timestamp': str})
+
+    def adicionar(self, resultados, modelo, hash_dados=None, run_id=None):
+        """
+        Acrescenta uma solução ao armazenamento
+
+        Args:
+            resultados (dict): Resultados de DietSolver
+            modelo (str): Nome do modelo (ex.: 'basico', 'diversificado')
+            hash_dados (str): Hash dos dados de entrada (ver hash_arquivo)
+            run_id (str): Identificador da execução (gerado se omitido)
+
+        Returns:
+            str: run_id da solução gravada
+        """
+        entrada = {
+            'run_id': run_id or uuid.uuid4().hex,
+            'modelo': modelo,
+            'hash_dados': hash_dados or '',
+            'timestamp': resultados.get('timestamp') or datetime.now().isoformat()
+        }
+        linha = (json.dumps(dict(entrada, **resultados), ensure_ascii=False, default=float) + "\n").encode('utf-8')
+
+        with open(self.arquivo_linhas, 'ab') as f:
+            posicao = f.tell()
+            f.write(linha)
+
+        entrada.update({'arquivo': os.path.basename(self.arquivo_linhas), 'posicao': posicao, 'tamanho': len(linha)})
+        with open(self.arquivo_indice, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+        self.indice = pd.concat([self.indice, pd.DataFrame([entrada])], ignore_index=True)
+
+        return entrada['run_id']
+
+    def selecionar(self, modelo=None, hash_dados=None, run_ids=None, desde=None, ate=None):
+        """
+        Filtra o índice
+
+        Args:
+            modelo (str): Nome do modelo
+            hash_dados (str): Hash dos dados
+            run_ids (list): Identificadores das execuções
+            desde (str): Timestamp ISO mínimo
+            ate (str): Timestamp ISO máximo
+
+        Returns:
+            pd.DataFrame: Entradas do índice selecionadas, em ordem de gravação
+        """
+        mascara = pd.Series(True, index=self.indice.index)
+        if modelo is not None:
+            mascara &= self.indice['modelo'] == modelo
+        if hash_dados is not None:
+            mascara &= self.indice['hash_dados'] == hash_dados
+        if run_ids is not None:
+            mascara &= self.indice['run_id'].isin(list(run_ids))
+        if desde is not None:
+            mascara &= self.indice['timestamp'].astype(str) >= desde
+        if ate is not None:
+            mascara &= self.indice['timestamp'].astype(str) <= ate
+        return self.indice[mascara]
+
+    def iterar(self, **filtros):
+        """
+        Percorre de forma preguiçosa os registros completos selecionados
+
+        Args:
+            **filtros: Mesmos filtros de selecionar()
+
+        Yields:
+            dict: Registro aninhado, como gravado por adicionar()
+        """
+        selecionados = self.selecionar(**filtros)
+        for arquivo, entradas in selecionados.groupby('arquivo', sort=False):
+            caminho = os.path.join(self.diretorio, arquivo)
+            if arquivo.endswith('.parquet'):
+                tabela = pd.read_parquet(caminho)
+                tabela = tabela[tabela['run_id'].isin(entradas['run_id'])]
+                for registro in tabela.to_dict('records'):
+                    yield aninhar(registro)
+                continue
+
+            with open(caminho, 'rb') as f:
+                for posicao, tamanho in zip(entradas['posicao'], entradas['tamanho']):
+                    f.seek(int(posicao))
+                    yield json.loads(f.read(int(tamanho)).decode('utf-8'))
+
+    def ler(self, colunas=None, **filtros):
+        """
+        Lê os registros selecionados para um DataFrame, apenas com as colunas pedidas
+
+        Args:
+            colunas (list): Colunas ou prefixos (ex.: ['objetivo', 'compras']); None lê tudo
+            **filtros: Mesmos filtros de selecionar()
+
+        Returns:
+            pd.DataFrame: Uma linha por solução, com colunas achatadas
+        """
+        selecionados = self.selecionar(**filtros)
+        partes = []
+
+        for arquivo, entradas in selecionados.groupby('arquivo', sort=False):
+            caminho = os.path.join(self.diretorio, arquivo)
+            if arquivo.endswith('.parquet'):
+                import pyarrow.parquet as pq
+                nomes = _projetar(pq.read_schema(caminho).names, colunas)
+                tabela = pd.read_parquet(caminho, columns=nomes)
+                partes.append(tabela[tabela['run_id'].isin(entradas['run_id'])])
+                continue
+
+            linhas = []
+            with open(caminho, 'rb') as f:
+                for posicao, tamanho in zip(entradas['posicao'], entradas['tamanho']):
+                    f.seek(int(posicao))
+                    registro = achatar(json.loads(f.read(int(tamanho)).decode('utf-8')))
+                    linhas.append({c: registro[c] for c in _projetar(registro, colunas)})
+            partes.append(pd.DataFrame(linhas))
+
+        if not partes:
+            return pd.DataFrame(columns=list(CAMPOS_INDICE))
+        return pd.concat(partes, ignore_index=True)
+
+    def ultimo_run_id(self, modelo, hash_dados=None):
+        """
+        Retorna o run_id da solução mais recente de um modelo
+
+        Args:
+            modelo (str): Nome do modelo
+            hash_dados (str): Hash dos dados (opcional)
+
+        Returns:
+            str: run_id ou None se o modelo não tiver soluções
+        """
+        selecionados = self.selecionar(modelo=modelo, hash_dados=hash_dados)
+        if selecionados.empty:
+            return None
+        return selecionados.sort_values('timestamp', kind='stable')['run_id'].iloc[-1]
+
+    def ultimo(self, modelo, hash_dados=None, colunas=None):
+        """
+        Retorna o registro mais recente de um modelo
+
+        Args:
+            modelo (str): Nome do modelo
+            hash_dados (str): Hash dos dados (opcional)
+            colunas (list): Colunas ou prefixos a carregar (padrão: todas)
+
+        Returns:
+            dict: Registro aninhado ou None
+        """
+        run_id = self.ultimo_run_id(modelo, hash_dados)
+        if run_id is None:
+            return None
+        tabela = self.ler(colunas, run_ids=[run_id])
+        return aninhar(tabela.iloc[0].to_dict()) if len(tabela) else None
+
+    def modelos(self):
+        """
+        Lista os modelos com soluções gravadas
+
+        Returns:
+            list: Nomes dos modelos, na ordem da primeira gravação
+        """
+        return self.indice['modelo'].drop_duplicates().tolist()
+
+    def compactar(self):
+        """
+        Move as linhas do JSON Lines para um novo arquivo Parquet
+
+        Returns:
+            str: Caminho do arquivo Parquet criado, ou None se não houver o que compactar
+        """
+        pendentes = self.indice[self.indice['arquivo'] == os.path.basename(self.arquivo_linhas)]
+        if pendentes.empty:
+            return None
+
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("pyarrow não está instalado; compactação em Parquet indisponível.")
+            return None
+
+        tabela = pd.DataFrame([achatar(r) for r in self.iterar(run_ids=pendentes['run_id'])])
+        partes = [a for a in os.listdir(self.diretorio) if a.endswith('.parquet')]
+        nome_parte = f"parte-{len(partes) + 1:05d}.parquet"
+        tabela.to_parquet(os.path.join(self.diretorio, nome_parte), index=False)
+
+        # Atualizar o índice e esvaziar o JSON Lines
+        self.indice.loc[pendentes.index, 'arquivo'] = nome_parte
+        self.indice.loc[pendentes.index, 'posicao'] = range(len(pendentes))
+        self.indice.loc[pendentes.index, 'tamanho'] = 0
+        self.indice.to_json(self.arquivo_indice, orient='records', lines=True, force_ascii=False)
+        open(self.arquivo_linhas, 'w').close()
+
+        print(f"{len(pendentes)} resultados compactados em {nome_parte}")
+        return os.path.join(self.diretorio, nome_parte)
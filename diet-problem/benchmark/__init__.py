@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""
+benchmark - Suíte de desempenho do problema da dieta com instâncias sintéticas
+
+Uso (a partir de diet-problem/):
+    python -m benchmark executar --saida base.json
+    python -m benchmark comparar base.json novo.json
+
+Autor: José Brito
+"""
+
+from benchmark.instancias import gerar_instancia, SUITE_PADRAO
+from benchmark.backends import BACKENDS, backends_disponiveis
+from benchmark.suite import executar_suite, comparar_execucoes
+
+__all__ = [
+    'gerar_instancia', 'SUITE_PADRAO', 'BACKENDS', 'backends_disponiveis',
+    'executar_suite', 'comparar_execucoes'
+]
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+__main__.py - Linha de comando da suíte de desempenho (python -m benchmark)
+
+Autor: José Brito
+"""
+
+import sys
+import argparse
+from benchmark.instancias import SUITE_PADRAO
+from benchmark.backends import MODELOS, BACKENDS
+from benchmark.suite import executar_suite, comparar_execucoes
+
+def _instancia(texto):
+    """Converte 'ALIMENTOSxNUTRIENTES' (ex.: 1000x10) em tupla"""
+    alimentos, nutrientes = texto.lower().split('x')
+    return int(alimentos), int(nutrientes)
+
+def main(argv=None):
+    """
+    Executa a suíte ou compara duas execuções
+
+    Returns:
+        int: 0 em sucesso, 1 se a comparação encontrar regressões
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmark", description="Suíte de desempenho da dieta")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    executar = comandos.add_parser('executar', help="Resolve as instâncias sintéticas")
+    executar.add_argument('--instancias', nargs='+', type=_instancia,
+                          default=list(SUITE_PADRAO), help="Tamanhos no formato 1000x10")
+    executar.add_argument('--modelos', nargs='+', choices=MODELOS, default=list(MODELOS))
+    executar.add_argument('--backends', nargs='+', choices=list(BACKENDS))
+    executar.add_argument('--aperto', type=float, default=0.5, help="Aperto das restrições, em [0, 1)")
+    executar.add_argument('--sementes', nargs='+', type=int, default=[0])
+    executar.add_argument('--repeticoes', type=int, default=1)
+    executar.add_argument('--saida', default="benchmark_dieta.json", help="Arquivo JSON da execução")
+
+    comparar = comandos.add_parser('comparar', help="Compara duas execuções e aponta regressões")
+    comparar.add_argument('base')
+    comparar.add_argument('nova')
+    comparar.add_argument('--limiar', type=float, default=0.2, help="Variação relativa tolerada")
+
+    args = parser.parse_args(argv)
+
+    if args.comando == 'executar':
+        executar_suite(args.instancias, args.modelos, args.backends, args.aperto, args.sementes,
+                       args.repeticoes, args.saida)
+        return 0
+
+    tabela = comparar_execucoes(args.base, args.nova, args.limiar)
+    regressoes = tabela['veredito'].isin(['objetivo', 'regressao_tempo', 'regressao_memoria'])
+    return 1 if regressoes.any() else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+backends.py - Caminhos de solução comparados pela suíte de desempenho
+
+Autor: José Brito
+"""
+
+from importlib.util import find_spec
+import numpy as np
+from config import SOLVER_CONFIG, PESO_DIVERSIDADE
+from catalogo import vetores_restricoes
+
+try:
+    from scipy import sparse
+    from scipy.optimize import milp, LinearConstraint, Bounds
+    MILP_DISPONIVEL = True
+except ImportError:
+    MILP_DISPONIVEL = False
+
+AMPL_DISPONIVEL = find_spec("amplpy") is not None
+
+# Modelos comparados (mesma formulação em todos os backends)
+MODELOS = ('basico', 'diversificado')
+
+class BackendAMPL:
+    """AMPL/CBC pelo DietSolver, com o modelo indexado gerado e sem cache de soluções"""
+
+    nome = 'ampl'
+
+    def __init__(self):
+        from solver import DietSolver
+        self.solver = DietSolver(cache=False)
+
+    def resolver(self, catalogo, restricoes, modelo):
+        """
+        Resolve a instância
+
+        Args:
+            catalogo (CatalogoAlimentos): Catálogo de alimentos
+            restricoes (dict): Restrições por nome de nutriente
+            modelo (str): 'basico' ou 'diversificado'
+
+        Returns:
+            dict: Status, objetivo e memória de pico do solver (MB)
+        """
+        self.solver.definir_catalogo(catalogo)
+        resultados = self.solver.resolver_catalogo(restricoes, "dieta_benchmark", modelo == 'diversificado',
+                                                   verbose=False, usar_cache=False)
+        if not resultados:
+            return {'status': 'failure', 'objetivo': None}
+        return {
+            'status': str(resultados['solve_result']),
+            'objetivo': resultados['objetivo'],
+            'memoria_solver_mb': resultados['telemetry']['memoria'].get('solver_mb')
+        }
+
+class BackendSciPy:
+    """HiGHS pelo scipy.optimize.milp, com as mesmas formulações de models.gerar_modelo()"""
+
+    nome = 'scipy'
+
+    def resolver(self, catalogo, restricoes, modelo):
+        """
+        Resolve a instância
+
+        Args:
+            catalogo (CatalogoAlimentos): Catálogo de alimentos
+            restricoes (dict): Restrições por nome de nutriente
+            modelo (str): 'basico' ou 'diversificado'
+
+        Returns:
+            dict: Status e objetivo
+        """
+        n_min, n_max = vetores_restricoes(restricoes, catalogo.nutrientes)
+        restritos = np.isfinite(n_min) | np.isfinite(n_max)
+        # Como no modelo AMPL, nutrientes sem mínimo têm n_min = 0
+        n_min = np.where(np.isfinite(n_min), n_min, 0.0)[restritos]
+        n_max = n_max[restritos]
+        nutrientes = sparse.csr_matrix(catalogo.matriz[:, np.flatnonzero(restritos)].T)
+        n = len(catalogo)
+
+        if modelo == 'diversificado':
+            # Variáveis [Compra, Escolhido]; Compra <= max_porcoes * Escolhido e Compra <= 4
+            custos = np.concatenate([catalogo.precos, np.full(n, -PESO_DIVERSIDADE)])
+            constante = PESO_DIVERSIDADE * n
+            restricoes_lineares = [
+                LinearConstraint(sparse.hstack([nutrientes, sparse.csr_matrix(nutrientes.shape)]), n_min, n_max),
+                LinearConstraint(sparse.hstack([sparse.eye(n), -sparse.diags(catalogo.max_porcoes)]), -np.inf, 0.0),
+            ]
+            limites = Bounds(0, np.concatenate([np.minimum(catalogo.max_porcoes, 4), np.ones(n)]))
+        else:
+            custos = catalogo.precos
+            constante = 0.0
+            restricoes_lineares = [LinearConstraint(nutrientes, n_min, n_max)]
+            limites = Bounds(0, catalogo.max_porcoes)
+
+        resultado = milp(custos, integrality=np.ones(len(custos)), bounds=limites, constraints=restricoes_lineares,
+                         options={'time_limit': SOLVER_CONFIG['time_limit'], 'mip_rel_gap': SOLVER_CONFIG['mip_gap']})
+        if resultado.x is None:
+            return {'status': 'infeasible' if resultado.status == 2 else 'failure', 'objetivo': None}
+        return {
+            'status': 'solved' if resultado.status == 0 else 'limit',
+            'objetivo': float(resultado.fun) + constante
+        }
+
+BACKENDS = {
+    'ampl': BackendAMPL,
+    'scipy': BackendSciPy,
+}
+
+def backends_disponiveis():
+    """
+    Lista os backends cujas dependências estão instaladas
+
+    Returns:
+        list: Nomes dos backends
+    """
+    disponiveis = {'ampl': AMPL_DISPONIVEL, 'scipy': MILP_DISPONIVEL}
+    return [nome for nome in BACKENDS if disponiveis[nome]]
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+instancias.py - Catálogos de alimentos sintéticos e reprodutíveis para a suíte de desempenho
+
+Autor: José Brito
+"""
+
+import numpy as np
+from config import REGISTRO_NUTRIENTES
+from catalogo import CatalogoAlimentos, SCIPY_DISPONIVEL
+
+if SCIPY_DISPONIVEL:
+    from scipy import sparse
+
+# Instâncias da suíte padrão: (alimentos, nutrientes)
+SUITE_PADRAO = (
+    (10, 5),
+    (100, 5),
+    (1000, 10),
+    (10000, 20),
+    (100000, 100),
+)
+
+def _nomes_nutrientes(n_nutrientes):
+    """Usa os nutrientes do registro e completa com nutriente_NNN"""
+    registrados = list(REGISTRO_NUTRIENTES)[:n_nutrientes]
+    return registrados + [f"nutriente_{k:03d}" for k in range(len(registrados) + 1, n_nutrientes + 1)]
+
+def gerar_instancia(n_alimentos, n_nutrientes=5, aperto=0.5, densidade=None, semente=0):
+    """
+    Gera um catálogo sintético e restrições viáveis por construção
+
+    Os conteúdos são log-normais, com uma fração `densidade` de valores
+    não nulos (matriz esparsa quando o SciPy está disponível). Uma dieta de
+    referência aleatória define os totais t de cada nutriente, e os limites
+    são t * (1 -/+ largura), com largura = 0.5 * (1 - aperto): aperto 0 deixa
+    uma faixa de 50% em torno de t, e valores próximos de 1 estreitam a faixa
+    até quase exigir os totais exatos da referência, que continua viável.
+
+    Args:
+        n_alimentos (int): Número de alimentos
+        n_nutrientes (int): Número de nutrientes
+        aperto (float): Aperto das restrições, em [0, 1)
+        densidade (float): Fração de conteúdos não nulos (padrão: 1 até 10 nutrientes, depois 0.3)
+        semente (int): Semente do gerador aleatório
+
+    Returns:
+        tuple: (CatalogoAlimentos, restrições por nome de nutriente)
+    """
+    rng = np.random.default_rng(semente)
+    densidade = densidade if densidade is not None else (1.0 if n_nutrientes <= 10 else 0.3)
+    nutrientes = _nomes_nutrientes(n_nutrientes)
+
+    # Valores com 3 casas decimais, para que o .dat (formato %g) represente os mesmos números
+    conteudo = lambda tamanho: np.round(rng.lognormal(2.0, 1.0, tamanho), 3)
+    if SCIPY_DISPONIVEL and densidade < 1.0:
+        matriz = sparse.random(n_alimentos, n_nutrientes, density=densidade, format='csr',
+                               random_state=rng, data_rvs=conteudo)
+    else:
+        matriz = conteudo((n_alimentos, n_nutrientes))
+        matriz[rng.random((n_alimentos, n_nutrientes)) >= densidade] = 0.0
+
+    precos = np.round(rng.lognormal(0.5, 0.6, n_alimentos), 2)
+    max_porcoes = rng.integers(1, 6, n_alimentos).astype(float)
+
+    # Dieta de referência: alguns alimentos com porções dentro do permitido
+    escolhidos = rng.choice(n_alimentos, size=min(n_alimentos, max(5, n_nutrientes // 2)), replace=False)
+    referencia = np.zeros(n_alimentos)
+    referencia[escolhidos] = np.ceil(rng.random(len(escolhidos)) * max_porcoes[escolhidos])
+    totais = np.asarray(referencia @ matriz).ravel()
+
+    largura = max(0.5 * (1.0 - aperto), 1e-3)
+    restricoes = {'n_min': {}, 'n_max': {}}
+    for nutriente, total in zip(nutrientes, totais):
+        if total > 0:
+            restricoes['n_min'][nutriente] = float(np.floor(total * (1 - largura) * 1000) / 1000)
+            restricoes['n_max'][nutriente] = float(np.ceil(total * (1 + largura) * 1000) / 1000)
+
+    catalogo = CatalogoAlimentos(
+        [f"alimento_{j:06d}" for j in range(n_alimentos)],
+        nutrientes,
+        matriz,
+        precos,
+        max_porcoes
+    )
+    return catalogo, restricoes
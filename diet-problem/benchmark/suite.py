@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+suite.py - Execução da suíte de desempenho e comparação entre execuções
+
+Autor: José Brito
+"""
+
+import gc
+import json
+import time
+import platform
+import tracemalloc
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from config import SOLVER_CONFIG
+from benchmark.instancias import gerar_instancia, SUITE_PADRAO
+from benchmark.backends import BACKENDS, MODELOS, backends_disponiveis
+
+def _versoes():
+    """Versões das bibliotecas que afetam o desempenho"""
+    import scipy
+    return {'python': platform.python_version(), 'numpy': np.__version__,
+            'pandas': pd.__version__, 'scipy': scipy.__version__}
+
+def executar_suite(instancias=SUITE_PADRAO, modelos=MODELOS, backends=None, aperto=0.5, sementes=(0,),
+                   repeticoes=1, arquivo_saida=None, verbose=True):
+    """
+    Resolve cada instância sintética com cada modelo e backend
+
+    Para cada solução são registrados o tempo de parede, o pico de memória
+    alocada no processo Python (tracemalloc), o status e o objetivo. Os
+    objetivos de backends diferentes na mesma instância e modelo são
+    comparados: concordam quando a diferença relativa cabe no mip_gap
+    configurado.
+
+    Args:
+        instancias (tuple): Pares (alimentos, nutrientes)
+        modelos (tuple): Modelos resolvidos ('basico', 'diversificado')
+        backends (list): Backends usados (padrão: todos os disponíveis)
+        aperto (float): Aperto das restrições das instâncias, em [0, 1)
+        sementes (tuple): Sementes de cada tamanho de instância
+        repeticoes (int): Soluções repetidas por combinação (usa-se a mediana na comparação)
+        arquivo_saida (str): Caminho JSON para gravar a execução
+        verbose (bool): Se True, exibe o andamento
+
+    Returns:
+        pd.DataFrame: Uma linha por solução
+    """
+    backends = backends or backends_disponiveis()
+    resolvedores = {nome: BACKENDS[nome]() for nome in backends}
+    linhas = []
+
+    for n_alimentos, n_nutrientes in instancias:
+        for semente in sementes:
+            inicio_geracao = time.perf_counter()
+            catalogo, restricoes = gerar_instancia(n_alimentos, n_nutrientes, aperto, semente=semente)
+            tempo_geracao = time.perf_counter() - inicio_geracao
+            instancia = f"{n_alimentos}x{n_nutrientes}-a{aperto:g}-s{semente}"
+
+            for modelo in modelos:
+                for nome, resolvedor in resolvedores.items():
+                    for repeticao in range(repeticoes):
+                        gc.collect()
+                        tracemalloc.start()
+                        inicio = time.perf_counter()
+                        try:
+                            resultado = resolvedor.resolver(catalogo, restricoes, modelo)
+                        except Exception as e:
+                            print(f"Erro em {instancia}/{modelo}/{nome}: {e}")
+                            resultado = {'status': 'failure', 'objetivo': None}
+                        tempo = time.perf_counter() - inicio
+                        _, pico = tracemalloc.get_traced_memory()
+                        tracemalloc.stop()
+
+                        linhas.append(dict({
+                            'instancia': instancia,
+                            'alimentos': n_alimentos,
+                            'nutrientes': n_nutrientes,
+                            'semente': semente,
+                            'modelo': modelo,
+                            'backend': nome,
+                            'repeticao': repeticao,
+                            'tempo': tempo,
+                            'tempo_geracao': tempo_geracao,
+                            'memoria_mb': pico / (1024 * 1024),
+                        }, **resultado))
+                        if verbose:
+                            objetivo = f"{resultado['objetivo']:.4f}" if resultado['objetivo'] is not None else '-'
+                            print(f"{instancia:<24}{modelo:<15}{nome:<8}{resultado['status']:<14}"
+                                  f"{objetivo:>14}{tempo:>10.3f} s")
+
+    tabela = _marcar_concordancia(pd.DataFrame(linhas))
+
+    if arquivo_saida:
+        execucao = {
+            'timestamp': datetime.now().isoformat(),
+            'plataforma': platform.platform(),
+            'versoes': _versoes(),
+            'solver_config': SOLVER_CONFIG,
+            'linhas': tabela.replace({np.nan: None}).to_dict('records')
+        }
+        with open(arquivo_saida, 'w', encoding='utf-8') as f:
+            json.dump(execucao, f, ensure_ascii=False, indent=1, default=str)
+        print(f"Execução salva em {arquivo_saida}")
+
+    if verbose:
+        discordantes = tabela[tabela['concorda'] == False]  # noqa: E712
+        if not discordantes.empty:
+            print(f"\nAtenção: objetivos discordantes em {discordantes['instancia'].nunique()} instância(s)")
+
+    return tabela
+
+def _marcar_concordancia(tabela):
+    """Compara o objetivo de cada solução com o melhor objetivo da mesma instância e modelo"""
+    if tabela.empty:
+        return tabela.assign(concorda=pd.Series(dtype=object))
+
+    tolerancia = SOLVER_CONFIG.get('mip_gap', 0.0) + 1e-6
+    melhor = tabela.groupby(['instancia', 'modelo'])['objetivo'].transform('min')
+    diferenca = (tabela['objetivo'] - melhor).abs() / melhor.abs().clip(lower=1e-9)
+    concorda = diferenca <= tolerancia
+    # Sem objetivo (inviável ou falha) a concordância não se aplica
+    tabela['concorda'] = concorda.where(tabela['objetivo'].notna(), None)
+    return tabela
+
+def _ler_execucao(origem):
+    """Lê uma execução gravada por executar_suite() (ou usa o DataFrame informado)"""
+    if isinstance(origem, pd.DataFrame):
+        return origem
+    with open(origem, 'r', encoding='utf-8') as f:
+        return pd.DataFrame(json.load(f)['linhas'])
+
+def comparar_execucoes(base, nova, limiar=0.2, tempo_minimo=0.05, memoria_minima=1.0, verbose=True):
+    """
+    Compara duas execuções da suíte e aponta regressões de desempenho
+
+    A comparação usa a mediana das repetições de cada instância, modelo e
+    backend. Um aumento relativo de tempo ou memória acima de `limiar` é
+    regressão (tempos abaixo de `tempo_minimo` segundos e memórias abaixo
+    de `memoria_minima` MB são ruído e não contam); uma queda acima de `limiar` é melhoria. Objetivos diferentes
+    além do mip_gap também são apontados.
+
+    Args:
+        base (str | pd.DataFrame): Execução de referência
+        nova (str | pd.DataFrame): Execução avaliada
+        limiar (float): Variação relativa tolerada
+        tempo_minimo (float): Tempo abaixo do qual variações são ignoradas
+        memoria_minima (float): Memória (MB) abaixo da qual variações são ignoradas
+        verbose (bool): Se True, exibe a comparação
+
+    Returns:
+        pd.DataFrame: Uma linha por combinação, com razões e a coluna 'veredito'
+    """
+    chaves = ['instancia', 'modelo', 'backend']
+    medianas = {
+        nome: _ler_execucao(origem).groupby(chaves)[['tempo', 'memoria_mb', 'objetivo']].median()
+        for nome, origem in (('base', base), ('nova', nova))
+    }
+    tabela = medianas['base'].join(medianas['nova'], lsuffix='_base', rsuffix='_nova', how='inner')
+
+    tabela['razao_tempo'] = tabela['tempo_nova'] / tabela['tempo_base']
+    tabela['razao_memoria'] = tabela['memoria_mb_nova'] / tabela['memoria_mb_base'].clip(lower=1e-9)
+    tolerancia = SOLVER_CONFIG.get('mip_gap', 0.0) + 1e-6
+    objetivo_mudou = ((tabela['objetivo_nova'] - tabela['objetivo_base']).abs()
+                      > tolerancia * tabela['objetivo_base'].abs().clip(lower=1e-9))
+    objetivo_mudou |= tabela['objetivo_nova'].isna() != tabela['objetivo_base'].isna()
+
+    significativo = tabela[['tempo_base', 'tempo_nova']].max(axis=1) >= tempo_minimo
+    memoria_significativa = tabela[['memoria_mb_base', 'memoria_mb_nova']].max(axis=1) >= memoria_minima
+    vereditos = np.select(
+        [objetivo_mudou,
+         significativo & (tabela['razao_tempo'] > 1 + limiar),
+         memoria_significativa & (tabela['razao_memoria'] > 1 + limiar),
+         significativo & (tabela['razao_tempo'] < 1 - limiar)],
+        ['objetivo', 'regressao_tempo', 'regressao_memoria', 'melhoria'],
+        default='estavel'
+    )
+    tabela['veredito'] = vereditos
+    tabela = tabela.reset_index()
+
+    if verbose:
+        exibir_comparacao(tabela, limiar)
+    return tabela
+
+def exibir_comparacao(tabela, limiar):
+    """
+    Exibe o resultado de comparar_execucoes()
+
+    Args:
+        tabela (pd.DataFrame): Comparação
+        limiar (float): Variação relativa tolerada
+    """
+    print("\n" + "="*80)
+    print(f"COMPARAÇÃO DE EXECUÇÕES (limiar de {limiar:.0%})")
+    print("="*80)
+    print(f"{'Instância':<24}{'Modelo':<15}{'Backend':<8}{'Tempo':>10}{'Razão':>8}{'Memória':>9}  Veredito")
+    print("-"*80)
+    for _, linha in tabela.iterrows():
+        print(f"{linha['instancia']:<24}{linha['modelo']:<15}{linha['backend']:<8}"
+              f"{linha['tempo_nova']:>9.3f}s{linha['razao_tempo']:>7.2f}x{linha['razao_memoria']:>8.2f}x  "
+              f"{linha['veredito']}")
+    print("="*80)
+
+    problemas = tabela[tabela['veredito'].isin(['objetivo', 'regressao_tempo', 'regressao_memoria'])]
+    if problemas.empty:
+        print("Nenhuma regressão encontrada.")
+    else:
+        print(f"{len(problemas)} regressão(ões) encontrada(s).")
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+benchmark_formulacao.py - Compara as formulações original e reforçada do modelo diversificado
+
+Autor: José Brito
+"""
+
+import numpy as np
+import pandas as pd
+from config import RESTRICOES_RELAXADAS
+from catalogo import CatalogoAlimentos, catalogo_de_dicionario
+
+# Formulações comparadas: nome -> opções de preparar_catalogo()
+FORMULACOES = {
+    'original': {'reforcado': False, 'cortes': False},
+    'reforcada': {'reforcado': True, 'cortes': False},
+    'reforcada_cortes': {'reforcado': True, 'cortes': True},
+}
+
+def gerar_instancia(n_alimentos, semente=0, base=None):
+    """
+    Gera um catálogo sintético a partir do catálogo padrão
+
+    Cada alimento sintético copia um alimento da base, com ruído
+    multiplicativo log-normal no conteúdo de cada nutriente e no preço.
+
+    Args:
+        n_alimentos (int): Número de alimentos
+        semente (int): Semente do gerador aleatório
+        base (CatalogoAlimentos): Catálogo de origem (padrão: ALIMENTOS_DATA)
+
+    Returns:
+        CatalogoAlimentos: Catálogo sintético
+    """
+    base = base or catalogo_de_dicionario()
+    rng = np.random.default_rng(semente)
+    origem = rng.integers(0, len(base), n_alimentos)
+
+    matriz = base.matriz_densa()[origem] * rng.lognormal(0.0, 0.3, (n_alimentos, len(base.nutrientes)))
+    precos = np.round(base.precos[origem] * rng.lognormal(0.0, 0.25, n_alimentos), 2)
+
+    return CatalogoAlimentos(
+        [f"alimento_{k:04d}" for k in range(n_alimentos)],
+        base.nutrientes,
+        matriz,
+        precos,
+        base.max_porcoes[origem],
+        base.tamanhos[origem]
+    )
+
+def comparar_formulacoes(tamanhos=(25, 50, 100, 200), sementes=(0, 1, 2), restricoes=RESTRICOES_RELAXADAS,
+                         formulacoes=FORMULACOES, solver=None, verbose=True):
+    """
+    Resolve cada instância gerada com cada formulação e compara o esforço
+
+    Para cada formulação são medidos o objetivo inteiro, o limite da
+    relaxação linear (e o gap na raiz), o número de nós do branch-and-bound
+    e o tempo de solução. As soluções não passam pelo cache.
+
+    Args:
+        tamanhos (tuple): Números de alimentos das instâncias
+        sementes (tuple): Sementes das instâncias de cada tamanho
+        restricoes (dict): Restrições nutricionais
+        formulacoes (dict): Formulações comparadas (ver FORMULACOES)
+        solver (DietSolver): Solver reutilizado (padrão: um novo)
+        verbose (bool): Se True, exibe a tabela de resultados
+
+    Returns:
+        pd.DataFrame: Uma linha por instância e formulação
+    """
+    from solver import DietSolver
+
+    solver = solver or DietSolver()
+    if not solver.ampl:
+        print("AMPL não está disponível!")
+        return None
+
+    linhas = []
+    for n_alimentos in tamanhos:
+        for semente in sementes:
+            solver.definir_catalogo(gerar_instancia(n_alimentos, semente))
+            for nome, opcoes in formulacoes.items():
+                arquivo_mod, arquivo_dat = solver.preparar_catalogo(
+                    restricoes, f"dieta_benchmark_{nome}", diversificado=True, **opcoes
+                )
+                relaxacao = solver.resolver_relaxacao(arquivo_mod, arquivo_dat)
+
+                resultados = solver.resolver_modelo(arquivo_mod, arquivo_dat, verbose=False, usar_cache=False)
+                telemetria = resultados['telemetry'] if resultados else {'fases': {}, 'solver': {}}
+
+                objetivo = resultados['objetivo'] if resultados else None
+                limite = relaxacao['objetivo'] if relaxacao else None
+                gap = abs(objetivo - limite) / max(abs(objetivo), 1e-9) if objetivo is not None and limite is not None else None
+
+                linhas.append({
+                    'alimentos': n_alimentos,
+                    'semente': semente,
+                    'formulacao': nome,
+                    'solve_result': resultados['solve_result'] if resultados else 'failure',
+                    'objetivo': objetivo,
+                    'relaxacao': limite,
+                    'gap_raiz': gap,
+                    'nos': telemetria['solver'].get('nos'),
+                    'tempo': telemetria['fases'].get('solve'),
+                    'escolhidos': resultados['estatisticas'].get('alimentos_selecionados') if resultados else None
+                })
+
+    tabela = pd.DataFrame(linhas)
+    if verbose:
+        exibir_comparacao(tabela)
+    return tabela
+
+def exibir_comparacao(tabela):
+    """
+    Exibe as médias por tamanho e formulação
+
+    Args:
+        tabela (pd.DataFrame): Resultado de comparar_formulacoes()
+    """
+    resumo = tabela.groupby(['alimentos', 'formulacao'], sort=False).agg(
+        gap_raiz=('gap_raiz', 'mean'), nos=('nos', 'mean'), tempo=('tempo', 'mean'), objetivo=('objetivo', 'mean')
+    )
+
+    print("\n" + "="*60)
+    print("COMPARAÇÃO DE FORMULAÇÕES DO MODELO DIVERSIFICADO")
+    print("="*60)
+    print(f"{'Alimentos':<10}{'Formulação':<18}{'Gap raiz':>9}{'Nós':>9}{'Tempo (s)':>11}")
+    print("-"*60)
+    for (n_alimentos, nome), linha in resumo.iterrows():
+        gap = f"{linha['gap_raiz'] * 100:8.1f}%" if pd.notna(linha['gap_raiz']) else f"{'-':>9}"
+        nos = f"{linha['nos']:9.0f}" if pd.notna(linha['nos']) else f"{'-':>9}"
+        print(f"{n_alimentos:<10}{nome:<18}{gap}{nos}{linha['tempo']:11.3f}")
+    print("="*60)
+    print("A formulação original permite Escolhido = 1 sem compra; por isso seu")
+    print("objetivo é menor e não é comparável ao das formulações reforçadas.")
+
+if __name__ == "__main__":
+    comparar_formulacoes()
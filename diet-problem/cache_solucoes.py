@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+cache_solucoes.py - Cache em disco de soluções, endereçado pelo conteúdo do modelo e dos dados
+
+Autor: José Brito
+"""
+
+import os
+import re
+import json
+import hashlib
+from config import CACHE_CONFIG
+
+# Comentários de arquivos AMPL (até o fim da linha)
+_COMENTARIO_AMPL = re.compile(r'#[^\n]*')
+
+def canonizar_ampl(texto):
+    """
+    Normaliza o texto de um arquivo .mod/.dat: remove comentários e
+    reduz qualquer sequência de espaços a um único espaço
+
+    Args:
+        texto (str): Conteúdo do arquivo
+
+    Returns:
+        str: Texto canônico
+    """
+    return " ".join(_COMENTARIO_AMPL.sub(" ", texto).split())
+
+def chave_solucao(arquivo_mod, arquivo_dat, opcoes):
+    """
+    Calcula a chave de cache de uma solução
+
+    Args:
+        arquivo_mod (str): Caminho do arquivo .mod
+        arquivo_dat (str): Caminho do arquivo .dat
+        opcoes (dict): Opções do solver que afetam a solução
+
+    Returns:
+        str: Hash SHA-256 do modelo, dos dados e das opções
+    """
+    h = hashlib.sha256()
+    for caminho in (arquivo_mod, arquivo_dat):
+        with open(caminho, 'r', encoding='utf-8') as f:
+            h.update(canonizar_ampl(f.read()).encode('utf-8'))
+        h.update(b"\0")
+    h.update(json.dumps(opcoes, sort_keys=True, default=str).encode('utf-8'))
+    return h.hexdigest()
+
+class DietSolveCache:
+    """
+    Cache de resultados em disco, um arquivo JSON por chave
+
+    O horário de modificação de cada entrada marca seu último uso; quando o
+    tamanho total passa do limite, as entradas usadas há mais tempo são
+    removidas (LRU).
+    """
+
+    def __init__(self, diretorio=CACHE_CONFIG['diretorio'], tamanho_maximo_mb=CACHE_CONFIG['tamanho_maximo_mb']):
+        """
+        Args:
+            diretorio (str): Diretório do cache
+            tamanho_maximo_mb (float): Tamanho máximo do cache em MB
+        """
+        self.diretorio = diretorio
+        self.tamanho_maximo = int(tamanho_maximo_mb * 1024 * 1024)
+        self.acertos = 0
+        self.falhas = 0
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, f"{chave}.json")
+
+    def obter(self, chave):
+        """
+        Busca uma solução no cache
+
+        Args:
+            chave (str): Chave calculada por chave_solucao()
+
+        Returns:
+            dict: Resultados armazenados, ou None se a chave não estiver no cache
+        """
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, 'r', encoding='utf-8') as f:
+                resultados = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.falhas += 1
+            return None
+
+        os.utime(caminho)  # Marca o uso para o LRU
+        self.acertos += 1
+        return resultados
+
+    def guardar(self, chave, resultados):
+        """
+        Guarda uma solução e remove as entradas mais antigas se o limite for excedido
+
+        Args:
+            chave (str): Chave calculada por chave_solucao()
+            resultados (dict): Resultados da otimização
+        """
+        os.makedirs(self.diretorio, exist_ok=True)
+        temporario = self._caminho(chave) + ".tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, ensure_ascii=False, default=float)
+        os.replace(temporario, self._caminho(chave))
+        self._remover_excedente()
+
+    def invalidar(self, chave=None):
+        """
+        Remove uma entrada do cache, ou todas quando a chave é omitida
+
+        Args:
+            chave (str): Chave a remover (padrão: todas)
+
+        Returns:
+            int: Número de entradas removidas
+        """
+        if chave is not None:
+            caminhos = [self._caminho(chave)]
+        elif os.path.isdir(self.diretorio):
+            caminhos = [os.path.join(self.diretorio, a) for a in os.listdir(self.diretorio) if a.endswith('.json')]
+        else:
+            caminhos = []
+
+        removidas = 0
+        for caminho in caminhos:
+            try:
+                os.remove(caminho)
+                removidas += 1
+            except FileNotFoundError:
+                pass
+        return removidas
+
+    def _remover_excedente(self):
+        """Remove as entradas usadas há mais tempo até o cache caber no limite"""
+        entradas = []
+        with os.scandir(self.diretorio) as itens:
+            for item in itens:
+                if item.name.endswith('.json'):
+                    info = item.stat()
+                    entradas.append((info.st_mtime, info.st_size, item.path))
+
+        total = sum(tamanho for _, tamanho, _ in entradas)
+        for _, tamanho, caminho in sorted(entradas):
+            if total <= self.tamanho_maximo:
+                break
+            try:
+                os.remove(caminho)
+                total -= tamanho
+            except FileNotFoundError:
+                pass
+
+    def estatisticas(self):
+        """
+        Retorna os contadores de uso do cache
+
+        Returns:
+            dict: Acertos, falhas e taxa de acerto
+        """
+        consultas = self.acertos + self.falhas
+        return {
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'taxa_acerto': self.acertos / consultas if consultas else 0.0
+        }
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+carga_servico.py - Teste de carga do serviço de otimização (latência p50/p99 e vazão)
+
+Autor: José Brito
+"""
+
+import json
+import time
+import asyncio
+import argparse
+from collections import Counter
+import numpy as np
+from config import ALIMENTOS_DATA, RESTRICOES_RELAXADAS, SERVICO_CONFIG
+from catalogo import normalizar_restricoes
+
+def pedido_dieta(rng):
+    """Pedido de dieta com um subconjunto do catálogo padrão e mínimos perturbados"""
+    nomes = list(ALIMENTOS_DATA)
+    removidos = set(rng.choice(len(nomes), size=rng.integers(0, 3), replace=False).tolist())
+    restricoes = normalizar_restricoes(RESTRICOES_RELAXADAS)
+    return {
+        'alimentos': [n for k, n in enumerate(nomes) if k not in removidos],
+        'restricoes': {
+            'n_min': {n: round(v * rng.uniform(0.8, 1.0), 1) for n, v in restricoes['n_min'].items() if np.isfinite(v)},
+            'n_max': {n: v for n, v in restricoes['n_max'].items() if np.isfinite(v)}
+        },
+        'diversificado': bool(rng.random() < 0.5)
+    }
+
+def pedido_mochila(rng):
+    """Pedido de mochila com 10 a 50 itens aleatórios"""
+    n_itens = int(rng.integers(10, 51))
+    return {
+        'itens': [{'nome': f"item_{k}", 'peso': round(float(rng.uniform(0.5, 6.0)), 1),
+                   'valor': int(rng.integers(100, 3000))} for k in range(n_itens)],
+        'capacidade': int(rng.integers(10, 31))
+    }
+
+GERADORES = {
+    'dieta': pedido_dieta,
+    'mochila': pedido_mochila,
+}
+
+def gerar_pedidos(n_requisicoes, tipo='misto', distintos=20, semente=0):
+    """
+    Gera as requisições do teste
+
+    Sorteia `n_requisicoes` entre `distintos` pedidos diferentes; pedidos
+    repetidos exercitam a união de requisições idênticas no serviço.
+
+    Args:
+        n_requisicoes (int): Total de requisições
+        tipo (str): 'dieta', 'mochila' ou 'misto'
+        distintos (int): Número de pedidos diferentes
+        semente (int): Semente do gerador aleatório
+
+    Returns:
+        list: Pares (rota, corpo JSON em bytes)
+    """
+    rng = np.random.default_rng(semente)
+    tipos = list(GERADORES) if tipo == 'misto' else [tipo]
+    modelos = []
+    for k in range(distintos):
+        rota = tipos[k % len(tipos)]
+        modelos.append((f"/{rota}", json.dumps(GERADORES[rota](rng)).encode('utf-8')))
+    return [modelos[k] for k in rng.integers(0, len(modelos), n_requisicoes)]
+
+async def _ler_resposta(leitor):
+    """Lê uma resposta HTTP e retorna (status, corpo em bytes)"""
+    linha = await leitor.readline()
+    if not linha:
+        raise ConnectionError("Conexão fechada pelo serviço")
+    status = int(linha.split()[1])
+    tamanho = 0
+    while True:
+        linha = await leitor.readline()
+        if linha in (b'\r\n', b'\n', b''):
+            break
+        nome, _, valor = linha.decode('latin-1').partition(':')
+        if nome.strip().lower() == 'content-length':
+            tamanho = int(valor)
+    return status, await leitor.readexactly(tamanho)
+
+async def _requisitar(leitor, escritor, metodo, rota, corpo=b''):
+    escritor.write(
+        f"{metodo} {rota} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(corpo)}\r\n\r\n".encode('latin-1') + corpo
+    )
+    await escritor.drain()
+    return await _ler_resposta(leitor)
+
+async def _cliente(host, porta, fila, latencias, status):
+    """Cliente com uma conexão keep-alive que consome requisições da fila"""
+    leitor, escritor = await asyncio.open_connection(host, porta)
+    try:
+        while True:
+            try:
+                rota, corpo = fila.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            inicio = time.perf_counter()
+            try:
+                codigo, _ = await _requisitar(leitor, escritor, 'POST', rota, corpo)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                status['conexao'] += 1
+                escritor.close()
+                await escritor.wait_closed()
+                leitor, escritor = await asyncio.open_connection(host, porta)
+                continue
+            latencias.append(time.perf_counter() - inicio)
+            status[codigo] += 1
+    finally:
+        escritor.close()
+        await escritor.wait_closed()
+
+async def _saude(host, porta):
+    leitor, escritor = await asyncio.open_connection(host, porta)
+    try:
+        _, corpo = await _requisitar(leitor, escritor, 'GET', '/saude')
+        return json.loads(corpo)
+    finally:
+        escritor.close()
+        await escritor.wait_closed()
+
+async def executar_carga(pedidos, host=SERVICO_CONFIG['host'], porta=SERVICO_CONFIG['porta'], concorrencia=16):
+    """
+    Envia as requisições com `concorrencia` clientes simultâneos
+
+    Args:
+        pedidos (list): Pares (rota, corpo) de gerar_pedidos()
+        host (str): Endereço do serviço
+        porta (int): Porta do serviço
+        concorrencia (int): Número de conexões simultâneas
+
+    Returns:
+        dict: Latências (ms) p50/p90/p99/máx, vazão, contagem por status e contadores do serviço
+    """
+    fila = asyncio.Queue()
+    for pedido in pedidos:
+        fila.put_nowait(pedido)
+
+    latencias, status = [], Counter()
+    inicio = time.perf_counter()
+    await asyncio.gather(*(_cliente(host, porta, fila, latencias, status)
+                           for _ in range(min(concorrencia, len(pedidos)))))
+    duracao = time.perf_counter() - inicio
+
+    ms = np.asarray(latencias) * 1000
+    return {
+        'requisicoes': len(pedidos),
+        'concorrencia': concorrencia,
+        'duracao_s': duracao,
+        'vazao_rps': len(latencias) / duracao if duracao > 0 else 0.0,
+        'p50_ms': float(np.percentile(ms, 50)) if len(ms) else None,
+        'p90_ms': float(np.percentile(ms, 90)) if len(ms) else None,
+        'p99_ms': float(np.percentile(ms, 99)) if len(ms) else None,
+        'max_ms': float(ms.max()) if len(ms) else None,
+        'status': {str(codigo): n for codigo, n in sorted(status.items(), key=lambda x: str(x[0]))},
+        'servico': await _saude(host, porta)
+    }
+
+def exibir_relatorio(relatorio):
+    """
+    Exibe o resultado de executar_carga()
+
+    Args:
+        relatorio (dict): Latências, vazão e status
+    """
+    print("\n" + "="*60)
+    print("TESTE DE CARGA DO SERVIÇO")
+    print("="*60)
+    print(f"Requisições: {relatorio['requisicoes']} | Concorrência: {relatorio['concorrencia']}")
+    print(f"Duração: {relatorio['duracao_s']:.2f} s | Vazão: {relatorio['vazao_rps']:.1f} req/s")
+    if relatorio['p50_ms'] is not None:
+        print(f"Latência (ms): p50={relatorio['p50_ms']:.1f}  p90={relatorio['p90_ms']:.1f}  "
+              f"p99={relatorio['p99_ms']:.1f}  máx={relatorio['max_ms']:.1f}")
+    print(f"Status: {', '.join(f'{codigo}={n}' for codigo, n in relatorio['status'].items())}")
+    servico = relatorio['servico']
+    print(f"Serviço: {servico['solves']} solves, {servico['coalescidas']} unidas, "
+          f"{servico['recusadas']} recusadas, {servico['timeouts']} timeouts")
+    print("="*60)
+
+async def _carga_local(pedidos, config, concorrencia):
+    """Sobe o serviço no mesmo processo, executa a carga e o encerra"""
+    from servico import ServicoOtimizacao
+
+    servico = ServicoOtimizacao(config=config)
+    await servico.iniciar()
+    try:
+        return await executar_carga(pedidos, config['host'], config['porta'], concorrencia)
+    finally:
+        await servico.encerrar()
+
+def main():
+    """Ponto de entrada da linha de comando"""
+    parser = argparse.ArgumentParser(description="Teste de carga do serviço de otimização")
+    parser.add_argument('--host', default=SERVICO_CONFIG['host'])
+    parser.add_argument('--porta', type=int, default=SERVICO_CONFIG['porta'])
+    parser.add_argument('--requisicoes', type=int, default=200)
+    parser.add_argument('--concorrencia', type=int, default=16)
+    parser.add_argument('--tipo', choices=['dieta', 'mochila', 'misto'], default='misto')
+    parser.add_argument('--distintos', type=int, default=20, help="Pedidos diferentes entre as requisições")
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--local', action='store_true', help="Sobe o serviço neste processo durante o teste")
+    parser.add_argument('--workers', type=int, default=SERVICO_CONFIG['workers'], help="Workers do serviço local")
+    parser.add_argument('--saida', help="Arquivo JSON para gravar o relatório")
+    args = parser.parse_args()
+
+    pedidos = gerar_pedidos(args.requisicoes, args.tipo, args.distintos, args.semente)
+    if args.local:
+        config = dict(SERVICO_CONFIG, host=args.host, porta=args.porta, workers=args.workers)
+        relatorio = asyncio.run(_carga_local(pedidos, config, args.concorrencia))
+    else:
+        relatorio = asyncio.run(executar_carga(pedidos, args.host, args.porta, args.concorrencia))
+
+    exibir_relatorio(relatorio)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, indent=2)
+        print(f"Relatório salvo em {args.saida}")
+
+if __name__ == "__main__":
+    main()
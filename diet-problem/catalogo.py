@@ -0,0 +1,500 @@
+# -*- coding: utf-8 -*-
+"""
+catalogo.py - Catálogos de alimentos de tamanho arbitrário
+
+Autor: José Brito
+"""
+
+import csv
+import sys
+from functools import lru_cache
+from multiprocessing import shared_memory
+import numpy as np
+from config import ALIMENTOS_DATA, NUTRIENTES, REGISTRO_NUTRIENTES
+
+try:
+    from scipy import sparse
+    SCIPY_DISPONIVEL = True
+except ImportError:
+    SCIPY_DISPONIVEL = False
+
+# Colunas do catálogo que não são nutrientes
+ATRIBUTOS_ALIMENTO = ('max_porcoes', 'tamanho', 'preco')
+
+# Folga relativa ao preço na comparação de sinais dos custos reduzidos
+TOLERANCIA_SINAIS = 1e-9
+
+class CatalogoAlimentos:
+    """
+    Catálogo de alimentos com atributos em vetores NumPy e matriz de nutrientes
+    (alimentos x nutrientes) esparsa quando o SciPy está disponível
+
+    Os nomes são internados e indexados (nome -> linha) e cada atributo é um
+    vetor contíguo, de modo que solver, data_handler e analyzer leem colunas
+    inteiras em vez de percorrer dicionários. publicar() coloca os vetores
+    em memória compartilhada para que workers de um pool os anexem sem cópia.
+    """
+
+    def __init__(self, nomes, nutrientes, matriz, precos, max_porcoes, tamanhos=None):
+        """
+        Inicializa o catálogo
+
+        Args:
+            nomes (list): Nomes dos alimentos
+            nutrientes (list): Nomes dos nutrientes (colunas da matriz)
+            matriz: Matriz (alimentos x nutrientes), densa ou esparsa
+            precos (array): Preço por porção
+            max_porcoes (array): Quantidade máxima de porções
+            tamanhos (array): Tamanho da porção (opcional)
+        """
+        self.nomes = [sys.intern(str(nome)) for nome in nomes]
+        self.indice = {nome: j for j, nome in enumerate(self.nomes)}
+        self.nutrientes = [sys.intern(str(n)) for n in nutrientes]
+        self.matriz = matriz if SCIPY_DISPONIVEL and sparse.issparse(matriz) else np.ascontiguousarray(matriz, dtype=float)
+        self.precos = np.ascontiguousarray(precos, dtype=float)
+        self.max_porcoes = np.ascontiguousarray(max_porcoes, dtype=float)
+        self.tamanhos = np.zeros(len(self.nomes)) if tamanhos is None else np.ascontiguousarray(tamanhos, dtype=float)
+        # Blocos de memória compartilhada mantidos abertos por um catálogo anexado
+        self._memoria = []
+
+    def __len__(self):
+        return len(self.nomes)
+
+    @property
+    def esparsa(self):
+        """Indica se a matriz de nutrientes está em formato esparso"""
+        return SCIPY_DISPONIVEL and sparse.issparse(self.matriz)
+
+    def matriz_densa(self):
+        """
+        Retorna a matriz de nutrientes como array NumPy denso
+
+        Returns:
+            np.ndarray: Matriz (alimentos x nutrientes)
+        """
+        return self.matriz.toarray() if self.esparsa else np.asarray(self.matriz)
+
+    def coluna(self, nome):
+        """
+        Retorna um atributo ou um nutriente de todos os alimentos como vetor
+
+        Args:
+            nome (str): 'preco', 'max_porcoes', 'tamanho' ou nome de nutriente
+
+        Returns:
+            np.ndarray: Valores alinhados com self.nomes
+        """
+        atributos = {'preco': self.precos, 'max_porcoes': self.max_porcoes, 'tamanho': self.tamanhos}
+        if nome in atributos:
+            return atributos[nome]
+        return self.colunas_densas([nome]).ravel()
+
+    def posicoes(self, nomes):
+        """
+        Converte nomes de alimentos em índices das linhas
+
+        Args:
+            nomes (iterable): Nomes de alimentos
+
+        Returns:
+            np.ndarray: Índices (-1 para nomes fora do catálogo)
+        """
+        return np.fromiter((self.indice.get(nome, -1) for nome in nomes), dtype=np.int64)
+
+    def vetor(self, quantidades):
+        """
+        Converte quantidades por nome em um vetor alinhado com o catálogo
+
+        Args:
+            quantidades (dict): Alimento -> quantidade (nomes fora do catálogo são ignorados)
+
+        Returns:
+            np.ndarray: Quantidades por alimento
+        """
+        vetor = np.zeros(len(self.nomes))
+        indices = self.posicoes(quantidades)
+        valores = np.fromiter(quantidades.values(), dtype=float, count=len(indices))
+        conhecidos = indices >= 0
+        vetor[indices[conhecidos]] = valores[conhecidos]
+        return vetor
+
+    def limites(self, restricoes):
+        """
+        Vetores de requisitos alinhados com self.nutrientes (ver vetores_restricoes)
+
+        Args:
+            restricoes (dict): Restrições por número ou por nome de nutriente
+
+        Returns:
+            tuple: (n_min, n_max), com -inf/+inf nos nutrientes sem limite
+        """
+        return vetores_restricoes(restricoes, self.nutrientes)
+
+    def colunas(self, nutrientes):
+        """
+        Retorna a submatriz com as colunas dos nutrientes informados
+
+        Args:
+            nutrientes (list): Nomes dos nutrientes
+
+        Returns:
+            Submatriz (alimentos x nutrientes informados)
+        """
+        indices = [self.nutrientes.index(n) for n in nutrientes]
+        return self.matriz[:, indices]
+
+    def colunas_densas(self, nutrientes):
+        """
+        Retorna as colunas dos nutrientes informados como array NumPy denso
+
+        Args:
+            nutrientes (list): Nomes dos nutrientes
+
+        Returns:
+            np.ndarray: Matriz (alimentos x nutrientes informados)
+        """
+        submatriz = self.colunas(nutrientes)
+        return submatriz.toarray() if self.esparsa else np.asarray(submatriz, dtype=float)
+
+    def custos_reduzidos(self, duais, precos=None):
+        """
+        Calcula os custos reduzidos c_j - a_j·y de todos os alimentos
+
+        Args:
+            duais (dict | array): Dual de cada nutriente restrito (nutrientes ausentes contam
+                como zero) ou matriz de duais por cenário (cenários x nutrientes do catálogo)
+            precos (array): Preços alternativos; aceita uma matriz (cenários x alimentos)
+
+        Returns:
+            np.ndarray: Custos reduzidos com a mesma forma de `precos`
+        """
+        precos = self.precos if precos is None else np.asarray(precos, dtype=float)
+        if isinstance(duais, dict):
+            y = np.array([duais.get(n, 0.0) for n in self.nutrientes], dtype=float)
+            return precos - np.asarray(self.matriz @ y).ravel()
+        return precos - np.asarray(self.matriz @ np.asarray(duais, dtype=float).T).T
+
+    def limite_lagrangiano(self, duais, restricoes, precos=None):
+        """
+        Limite inferior lagrangiano do custo, relaxando os limites de nutrientes
+
+        Para multiplicadores y quaisquer (positivos no mínimo, negativos no
+        máximo), min c·x sujeito aos limites vale pelo menos
+        sum(max(y,0)·n_min + min(y,0)·n_max) + sum(min(0, c - A·y)·max_porcoes).
+
+        Args:
+            duais (dict): Dual de cada nutriente restrito
+            restricoes (dict): Restrições por número ou por nome de nutriente
+            precos (array): Preços alternativos; aceita uma matriz (cenários x alimentos)
+
+        Returns:
+            float | np.ndarray: Limite inferior (um por cenário quando `precos` é matriz)
+        """
+        y = np.array([duais.get(n, 0.0) for n in self.nutrientes], dtype=float)
+        n_min, n_max = vetores_restricoes(restricoes, self.nutrientes)
+        # Sem limite mínimo declarado o modelo usa n_min = 0
+        n_min = np.where(np.isfinite(n_min), n_min, 0.0)
+        with np.errstate(invalid='ignore'):
+            constante = np.sum(np.where(y > 0, y * n_min, 0.0)) + np.sum(np.where(y < 0, y * n_max, 0.0))
+
+        custos_reduzidos = self.custos_reduzidos(duais, precos)
+        return constante + np.minimum(custos_reduzidos, 0.0) @ self.max_porcoes
+
+    def padrao_sinais(self, duais, plano, precos=None):
+        """
+        Indica, por alimento, se o custo reduzido tem o sinal esperado pela posição no plano
+
+        Esperado: >= 0 para alimentos não comprados, <= 0 para alimentos em
+        max_porcoes e próximo de zero para alimentos comprados entre os limites.
+
+        Args:
+            duais (dict | array): Dual de cada nutriente restrito ou matriz de duais por
+                cenário (ver custos_reduzidos)
+            plano (array): Quantidades por alimento
+            precos (array): Preços alternativos; aceita uma matriz (cenários x alimentos)
+
+        Returns:
+            np.ndarray: Máscara booleana com a mesma forma de `precos`
+        """
+        precos = self.precos if precos is None else np.asarray(precos, dtype=float)
+        reduzidos = self.custos_reduzidos(duais, precos)
+        tolerancia = TOLERANCIA_SINAIS * np.maximum(1.0, np.abs(precos))
+        nulos = np.asarray(plano) <= 0
+        no_limite = ~nulos & (np.asarray(plano) >= self.max_porcoes)
+        return np.where(nulos, reduzidos >= -tolerancia,
+                        np.where(no_limite, reduzidos <= tolerancia, np.abs(reduzidos) <= tolerancia))
+
+    def subconjunto(self, indices):
+        """
+        Cria um novo catálogo apenas com os alimentos informados
+
+        Args:
+            indices (array): Índices dos alimentos mantidos
+
+        Returns:
+            CatalogoAlimentos: Catálogo reduzido
+        """
+        indices = np.asarray(indices, dtype=int)
+        return CatalogoAlimentos(
+            [self.nomes[j] for j in indices],
+            self.nutrientes,
+            self.matriz[indices],
+            self.precos[indices],
+            self.max_porcoes[indices],
+            self.tamanhos[indices]
+        )
+
+    def publicar(self):
+        """
+        Copia os vetores e a matriz para memória compartilhada
+
+        O descritor retornado é pequeno (nomes e referências aos blocos) e
+        pode ser passado a workers de um pool, que chamam anexar() para ler
+        os mesmos arrays sem cópia. Quem publica deve chamar liberar() ao
+        final (ou usar o retorno como gerenciador de contexto).
+
+        Returns:
+            CatalogoPublicado: Blocos publicados e o descritor
+        """
+        return CatalogoPublicado(self)
+
+    @classmethod
+    def anexar(cls, descritor):
+        """
+        Cria um catálogo somente leitura sobre os blocos de um catálogo publicado
+
+        Args:
+            descritor (dict): CatalogoPublicado.descritor
+
+        Returns:
+            CatalogoAlimentos: Catálogo com arrays na memória compartilhada
+        """
+        memoria, arrays = [], {}
+        for nome, (bloco, forma, tipo) in descritor['arrays'].items():
+            shm = shared_memory.SharedMemory(name=bloco)
+            array = np.ndarray(forma, dtype=np.dtype(tipo), buffer=shm.buf)
+            array.flags.writeable = False
+            memoria.append(shm)
+            arrays[nome] = array
+
+        if descritor['esparsa']:
+            matriz = sparse.csr_matrix((arrays['dados'], arrays['colunas'], arrays['ponteiros']),
+                                       shape=descritor['forma'], copy=False)
+        else:
+            matriz = arrays['matriz']
+
+        catalogo = cls(descritor['nomes'], descritor['nutrientes'], matriz,
+                       arrays['precos'], arrays['max_porcoes'], arrays['tamanhos'])
+        catalogo._memoria = memoria
+        return catalogo
+
+class CatalogoPublicado:
+    """
+    Arrays de um catálogo em blocos de multiprocessing.shared_memory
+    """
+
+    def __init__(self, catalogo):
+        """
+        Args:
+            catalogo (CatalogoAlimentos): Catálogo publicado
+        """
+        arrays = {'precos': catalogo.precos, 'max_porcoes': catalogo.max_porcoes, 'tamanhos': catalogo.tamanhos}
+        if catalogo.esparsa:
+            matriz = catalogo.matriz.tocsr()
+            arrays.update(dados=matriz.data, colunas=matriz.indices, ponteiros=matriz.indptr)
+        else:
+            arrays['matriz'] = np.asarray(catalogo.matriz)
+
+        self._blocos = []
+        referencias = {}
+        try:
+            for nome, array in arrays.items():
+                # Blocos vazios não são permitidos; o array anexado continua com tamanho zero
+                shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                self._blocos.append(shm)
+                np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+                referencias[nome] = (shm.name, array.shape, array.dtype.str)
+        except Exception:
+            self.liberar()
+            raise
+
+        self.descritor = {
+            'nomes': catalogo.nomes,
+            'nutrientes': catalogo.nutrientes,
+            'esparsa': catalogo.esparsa,
+            'forma': catalogo.matriz.shape,
+            'arrays': referencias
+        }
+
+    def liberar(self):
+        """Fecha e remove os blocos de memória compartilhada"""
+        for shm in self._blocos:
+            shm.close()
+            shm.unlink()
+        self._blocos = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.liberar()
+
+def abrir_catalogo(origem):
+    """
+    Retorna o catálogo de um worker a partir do próprio catálogo ou de um descritor publicado
+
+    Args:
+        origem (CatalogoAlimentos | dict): Catálogo ou CatalogoPublicado.descritor
+
+    Returns:
+        CatalogoAlimentos: Catálogo pronto para uso
+    """
+    return origem if isinstance(origem, CatalogoAlimentos) else CatalogoAlimentos.anexar(origem)
+
+def _montar_matriz(linhas, colunas, valores, forma):
+    """Monta a matriz de nutrientes a partir de triplas (linha, coluna, valor)"""
+    if SCIPY_DISPONIVEL:
+        return sparse.csr_matrix((valores, (linhas, colunas)), shape=forma)
+
+    matriz = np.zeros(forma)
+    matriz[linhas, colunas] = valores
+    return matriz
+
+def catalogo_de_dicionario(alimentos_data=ALIMENTOS_DATA, nutrientes=None):
+    """
+    Cria um catálogo a partir de um dicionário no formato de ALIMENTOS_DATA
+
+    Args:
+        alimentos_data (dict): Dicionário com dados dos alimentos
+        nutrientes (list): Nutrientes considerados (padrão: REGISTRO_NUTRIENTES)
+
+    Returns:
+        CatalogoAlimentos: Catálogo com os alimentos do dicionário
+    """
+    nutrientes = list(nutrientes or REGISTRO_NUTRIENTES)
+    dados = list(alimentos_data.values())
+
+    matriz = np.array([[d.get(n, 0) for n in nutrientes] for d in dados], dtype=float)
+    matriz = matriz.reshape(len(dados), len(nutrientes))
+    if SCIPY_DISPONIVEL:
+        matriz = sparse.csr_matrix(matriz)
+
+    return CatalogoAlimentos(
+        alimentos_data.keys(),
+        nutrientes,
+        matriz,
+        [d.get('preco', 0) for d in dados],
+        [d.get('max_porcoes', 0) for d in dados],
+        [d.get('tamanho', 0) for d in dados]
+    )
+
+@lru_cache(maxsize=1)
+def catalogo_padrao():
+    """
+    Catálogo de ALIMENTOS_DATA, montado uma única vez por processo
+
+    Returns:
+        CatalogoAlimentos: Catálogo padrão (não deve ser modificado)
+    """
+    return catalogo_de_dicionario(ALIMENTOS_DATA)
+
+def carregar_catalogo_csv(caminho, nutrientes=None, coluna_nome='nome', max_porcoes_padrao=4,
+                          delimitador=','):
+    """
+    Carrega uma tabela de composição de alimentos em CSV
+
+    O arquivo deve ter uma coluna com o nome do alimento, a coluna 'preco' e,
+    opcionalmente, 'max_porcoes' e 'tamanho'. As demais colunas são tratadas
+    como nutrientes (valores vazios contam como zero).
+
+    Args:
+        caminho (str): Caminho para o arquivo CSV
+        nutrientes (list): Colunas de nutrientes a carregar (padrão: todas as demais)
+        coluna_nome (str): Nome da coluna com o nome do alimento
+        max_porcoes_padrao (int): Limite de porções quando a coluna não existe
+        delimitador (str): Separador de campos
+
+    Returns:
+        CatalogoAlimentos: Catálogo carregado
+    """
+    with open(caminho, 'r', encoding='utf-8', newline='') as f:
+        leitor = csv.reader(f, delimiter=delimitador)
+        cabecalho = [c.strip() for c in next(leitor)]
+        posicao = {coluna: k for k, coluna in enumerate(cabecalho)}
+
+        if coluna_nome not in posicao or 'preco' not in posicao:
+            raise ValueError(f"O CSV precisa das colunas '{coluna_nome}' e 'preco'")
+
+        if nutrientes is None:
+            nutrientes = [c for c in cabecalho if c != coluna_nome and c not in ATRIBUTOS_ALIMENTO]
+        colunas_nutrientes = [(i, posicao[n]) for i, n in enumerate(nutrientes)]
+
+        nomes, precos, max_porcoes, tamanhos = [], [], [], []
+        linhas, colunas, valores = [], [], []
+        k_preco = posicao['preco']
+        k_max = posicao.get('max_porcoes')
+        k_tamanho = posicao.get('tamanho')
+
+        for j, registro in enumerate(leitor):
+            nomes.append(registro[posicao[coluna_nome]].strip())
+            precos.append(float(registro[k_preco]))
+            max_porcoes.append(float(registro[k_max]) if k_max is not None and registro[k_max] else max_porcoes_padrao)
+            tamanhos.append(float(registro[k_tamanho]) if k_tamanho is not None and registro[k_tamanho] else 0.0)
+
+            # Apenas valores não nulos entram na matriz
+            for i, k in colunas_nutrientes:
+                texto = registro[k]
+                if texto:
+                    valor = float(texto)
+                    if valor != 0:
+                        linhas.append(j)
+                        colunas.append(i)
+                        valores.append(valor)
+
+    matriz = _montar_matriz(
+        np.array(linhas, dtype=np.int64),
+        np.array(colunas, dtype=np.int64),
+        np.array(valores, dtype=float),
+        (len(nomes), len(nutrientes))
+    )
+
+    return CatalogoAlimentos(nomes, nutrientes, matriz, precos, max_porcoes, tamanhos)
+
+def normalizar_restricoes(restricoes):
+    """
+    Converte restrições indexadas por número (como RESTRICOES_RELAXADAS) para
+    restrições indexadas pelo nome do nutriente
+
+    Args:
+        restricoes (dict): Dicionário com 'n_min' e 'n_max'
+
+    Returns:
+        dict: Restrições com chaves iguais aos nomes dos nutrientes
+    """
+    return {
+        limite: {NUTRIENTES.get(chave, chave): valor for chave, valor in restricoes.get(limite, {}).items()}
+        for limite in ('n_min', 'n_max')
+    }
+
+def vetores_restricoes(restricoes, nutrientes):
+    """
+    Monta os vetores de limites alinhados com uma lista de nutrientes
+
+    Nutrientes sem limite recebem -inf/+inf.
+
+    Args:
+        restricoes (dict): Restrições por número ou por nome de nutriente
+        nutrientes (list): Ordem dos nutrientes
+
+    Returns:
+        tuple: (n_min, n_max) como arrays NumPy
+    """
+    restricoes = normalizar_restricoes(restricoes)
+    n_min = np.array([restricoes['n_min'].get(n, -np.inf) for n in nutrientes], dtype=float)
+    n_max = np.array([restricoes['n_max'].get(n, np.inf) for n in nutrientes], dtype=float)
+    return n_min, n_max
+
+if __name__ == "__main__":
+    catalogo = catalogo_de_dicionario()
+    formato = "esparsa" if catalogo.esparsa else "densa"
+    print(f"Catálogo padrão: {len(catalogo)} alimentos x {len(catalogo.nutrientes)} nutrientes (matriz {formato})")
@@ -155,6 +155,9 @@ RESTRICOES_RELAXADAS = {
     }
 }
 
+# Custo (R$) de cada alimento do catálogo não escolhido nos modelos diversificados
+PESO_DIVERSIDADE = 0.5
+
 # Mapeamento de nutrientes
 NUTRIENTES = {
     1: 'energia',
@@ -164,9 +167,111 @@ NUTRIENTES = {
     5: 'vitaminaC'
 }
 
+# Registro de nutrientes (ordem das colunas da matriz de nutrientes)
+REGISTRO_NUTRIENTES = {
+    'energia': {'rotulo': 'Energia', 'unidade': 'kcal'},
+    'proteina': {'rotulo': 'Proteína', 'unidade': 'g'},
+    'calcio': {'rotulo': 'Cálcio', 'unidade': 'mg'},
+    'magnesio': {'rotulo': 'Magnésio', 'unidade': 'mg'},
+    'vitaminaC': {'rotulo': 'Vitamina C', 'unidade': 'mg'},
+    'ferro': {'rotulo': 'Ferro', 'unidade': 'mg'}
+}
+
 # Configurações do solver
 SOLVER_CONFIG = {
     'solver': 'cbc',
     'time_limit': 300,  # 5 minutos
-    'mip_gap': 0.01     # 1% de gap
+    'mip_gap': 0.01,    # 1% de gap
+    'threads': 0,       # 0 = padrão do solver
+    'opcoes': ''        # Opções adicionais repassadas ao solver (ex.: 'maxNodes=10000' no CBC)
+}
+
+# Configurações da simulação de preços (Monte Carlo)
+SIMULACAO_CONFIG = {
+    'cenarios': 1000,
+    'semente': 42,
+    'volatilidade': 0.15,    # Desvio relativo padrão dos preços
+    'tolerancia_gap': 0.01,  # Aumento aceito sobre o gap certificado da base para manter o plano
+    'workers': 4
+}
+
+# Dieta estocástica: cenários de conteúdo nutricional resolvidos por hedging progressivo
+ESTOCASTICO_CONFIG = {
+    'cenarios': 20,
+    'variabilidade': 0.10,  # Desvio relativo do conteúdo nutricional de cada porção
+    'penalidade': 2.0,      # Custo (R$) de violar em 1% um limite em um cenário (maior: mais cenários atendidos)
+    'rho': 1.0,             # Peso do termo proximal, relativo ao preço de cada alimento
+    'max_iteracoes': 50,
+    'tolerancia': 1e-3,     # Desvio médio das compras (porções) para declarar convergência
+    'workers': 4,
+    'semente': 42
+}
+
+# Planejamento domiciliar: orçamento e disponibilidade compartilhados (relaxação lagrangiana)
+DOMICILIO_CONFIG = {
+    'metodo': 'bundle',        # 'bundle' (região de confiança em caixa) ou 'subgradiente' (passo de Polyak)
+    'max_iteracoes': 50,
+    'passo': 1.0,              # Fator inicial do passo de Polyak
+    'paciencia': 5,            # Iterações sem melhora do limite antes de reduzir o passo pela metade
+    'raio': 0.5,               # Raio inicial da caixa do bundle (relativo à escala de cada multiplicador)
+    'reparar_a_cada': 5,       # Mínimo de iterações entre reparos (feitos quando o limite dual melhora)
+    'tolerancia_gap': 0.01,    # Gap de dualidade relativo para parar
+    'workers': 4
+}
+
+# Fronteira de Pareto custo x diversidade (pareto.py): varredura épsilon e grade de pesos de comparação
+PARETO_CONFIG = {
+    'workers': 4,              # Intervalos de mínimos de alimentos distintos varridos em paralelo
+    'pesos_grade': 41,         # Pesos da grade ingênua usada na comparação
+    'peso_maximo': 10.0,       # Maior peso (R$ por alimento distinto) da grade
+    'tolerancia': 1e-6         # Diferença de custo abaixo da qual dois pontos são iguais
+}
+
+# Monitor de preços ao vivo (monitor_precos.py): triagem por custos reduzidos e re-otimização residente
+MONITOR_CONFIG = {
+    'tolerancia_gap': 0.01,        # Gap total (não o aumento) aceito quando os sinais mudam
+    'atualizar_duais': True,       # Recalcula os duais da relaxação após cada re-otimização
+    'intervalo_leitura': 0.01,     # Espera (s) entre leituras quando o arquivo não tem linhas novas
+    'ocioso': None,                # Encerra após esse tempo (s) sem atualizações (None: segue indefinidamente)
+    'volatilidade': 0.05,          # Feed simulado: desvio relativo de cada mudança de preço
+    'alimentos_por_atualizacao': 2 # Feed simulado: preços alterados por atualização
+}
+
+# Relatórios em lote (relatorios.py): limiares das recomendações e paralelismo
+RELATORIO_CONFIG = {
+    'fracao_diversidade': 0.5,    # Abaixo desta fração do catálogo, recomenda diversificar
+    'custo_elevado': 100,         # Objetivo acima deste valor é considerado caro
+    'porcoes_dependencia': 4,     # Porções de um alimento que indicam dependência excessiva
+    'solucoes_por_tarefa': 64,    # Páginas gravadas por tarefa do pool
+    'workers': None               # Padrão: número de CPUs
+}
+
+# Orçamento de tempo de inicialização do main.py (verificar_inicializacao.py)
+INICIALIZACAO_CONFIG = {
+    'orcamento_ms': 100,   # Tempo máximo de importação do main
+    'repeticoes': 5,       # Medições (usa-se a mediana)
+    'modulos_pesados': ('amplpy', 'matplotlib', 'pandas', 'numpy', 'scipy')  # Não podem ser carregados no início
+}
+
+# Arquivo com as assinaturas da última execução de cada etapa do lote (manifesto.py)
+ARQUIVO_ESTADO = "estado_lote.json"
+
+# Cache de soluções (chave: modelo + dados + opções do solver)
+CACHE_CONFIG = {
+    'ativo': True,
+    'diretorio': 'cache_solucoes',
+    'tamanho_maximo_mb': 100  # Entradas usadas há mais tempo são removidas acima deste tamanho
+}
+
+# Serviço local de otimização (servico.py)
+SERVICO_CONFIG = {
+    'host': '127.0.0.1',
+    'porta': 8765,
+    'workers': 2,                   # Processos com DietSolver/KnapsackDynamicSolver residentes
+    'fila_maxima': 32,              # Solves distintos em andamento; acima disso responde 503
+    'timeout': 30,                  # Segundos por requisição (padrão)
+    'timeout_maximo': 300,          # Maior timeout aceito no corpo da requisição
+    'tamanho_maximo_corpo': 1 << 20,  # Bytes
+    'celulas_mochila_max': 5_000_000,  # Itens x capacidade (em décimos de kg) da tabela da programação dinâmica
+    'diretorio_mochila': '../knapsack-problem'  # Relativo a esta pasta
 }
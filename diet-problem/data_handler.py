@@ -5,70 +5,439 @@ data_handler.py - Manipulação e criação de arquivos de dados para AMPL
 Autor: José Brito
 """
 
-from config import ALIMENTOS_DATA, RESTRICOES_ORIGINAIS, RESTRICOES_RELAXADAS
+import io
+import re
+from itertools import islice
+from config import ALIMENTOS_DATA, RESTRICOES_ORIGINAIS, RESTRICOES_RELAXADAS, NUTRIENTES, REGISTRO_NUTRIENTES
 
-def criar_arquivo_dat(alimentos_data, restricoes, nome_arquivo):
+# numpy e catalogo (que carrega o SciPy) são importados apenas nas funções de
+# catálogo, para que exibir a tabela ou gerar os .dat básicos inicie rápido
+
+# Nomes que podem ser escritos sem aspas em um arquivo .dat
+_NOME_AMPL_SIMPLES = re.compile(r'^[A-Za-z_][A-Za-z0-9_.]*$')
+
+# Linhas montadas por vez e buffer de escrita dos arquivos .dat
+TAMANHO_BLOCO = 10000
+TAMANHO_BUFFER = 1 << 20
+
+_INFINITOS = {'inf': "Infinity", '-inf': "-Infinity"}
+
+def nome_ampl(nome):
+    """
+    Formata o nome de um elemento de conjunto para um arquivo .dat
+    
+    Args:
+        nome (str): Nome do alimento ou nutriente
+        
+    Returns:
+        str: Nome pronto para o AMPL (entre aspas quando necessário)
+    """
+    if _NOME_AMPL_SIMPLES.match(nome):
+        return nome
+    return "'" + nome.replace("'", "''") + "'"
+
+class EscritorDat:
+    """
+    Escreve um arquivo de dados do AMPL em blocos de linhas
+
+    A saída vai direto para um arquivo com buffer ou, sem caminho, para um
+    buffer em memória (ex.: para repassar ao AMPL com ampl.eval("data; ...")).
+    Tabelas e conjuntos são escritos bloco a bloco, sem montar o arquivo
+    inteiro em uma string.
+
+    Uso:
+        with EscritorDat("dieta.dat") as dat:
+            dat.conjunto("ALIMENTO", nomes)
+            dat.tabela(["preco"], zip(nomes, precos))
+    """
+
+    def __init__(self, caminho=None, modo="w", bloco=TAMANHO_BLOCO):
+        """
+        Args:
+            caminho (str): Arquivo de saída (None para escrever em memória)
+            modo (str): 'w' para criar ou 'a' para acrescentar
+            bloco (int): Linhas montadas e escritas por vez
+        """
+        self.caminho = caminho
+        self.bloco = bloco
+        if caminho:
+            self._saida = open(caminho, modo, encoding="utf-8", buffering=TAMANHO_BUFFER)
+        else:
+            self._saida = io.StringIO()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+    def fechar(self):
+        """Fecha o arquivo (o buffer em memória continua disponível em texto())"""
+        if self.caminho:
+            self._saida.close()
+
+    def texto(self):
+        """Conteúdo escrito em memória"""
+        return self._saida.getvalue()
+
+    def escrever(self, *linhas):
+        """Escreve linhas avulsas (comentários, parâmetros escalares, linhas em branco)"""
+        self._saida.write("\n".join(linhas) + "\n")
+
+    def conjunto(self, nome, elementos):
+        """
+        Escreve `set nome := ...;` com `bloco` elementos por linha
+
+        Args:
+            nome (str): Nome do conjunto (pode incluir índice, ex.: ITENS[1])
+            elementos (iterable): Elementos já formatados (ver nome_ampl)
+        """
+        self._saida.write(f"set {nome} :=")
+        for k, parte in enumerate(_em_blocos(elementos, self.bloco)):
+            self._saida.write((" " if k == 0 else "\n") + " ".join(parte))
+        self._saida.write(";\n")
+
+    def linhas(self, cabecalho, linhas):
+        """
+        Escreve um bloco de dados: cabeçalho, linhas (em blocos) e ';'
+
+        Args:
+            cabecalho (str): Ex.: 'param conteudo :='
+            linhas (iterable): Linhas já formatadas
+        """
+        self._saida.write(cabecalho + "\n")
+        for parte in _em_blocos(linhas, self.bloco):
+            self._saida.write("\n".join(parte) + "\n")
+        self._saida.write(";\n")
+
+    def tabela(self, colunas, registros):
+        """
+        Escreve um bloco tabular `param: c1 c2 ... :=`
+
+        Args:
+            colunas (list): Nomes dos parâmetros
+            registros (iterable): Tuplas (chave, valor_1, ..., valor_n); valores
+                None viram '.', o valor padrão do AMPL
+        """
+        self.linhas(
+            f"param: {' '.join(colunas)} :=",
+            (f"{registro[0]} " + " ".join(map(valor_ampl, registro[1:])) for registro in registros)
+        )
+
+    def parametro(self, nome, valores, comentarios=None):
+        """
+        Escreve `param nome := chave valor ...;`, uma chave por linha
+
+        Args:
+            nome (str): Nome do parâmetro
+            valores (dict): Valor por chave (chaves já formatadas)
+            comentarios (dict): Comentário opcional por chave
+        """
+        comentarios = comentarios or {}
+        self.linhas(
+            f"param {nome} :=",
+            (f"{chave} {valor_ampl(valor)}" + (f"  # {comentarios[chave]}" if chave in comentarios else "")
+             for chave, valor in valores.items())
+        )
+
+def _em_blocos(iteravel, tamanho):
+    """Divide um iterável em listas de até `tamanho` itens"""
+    iterador = iter(iteravel)
+    while True:
+        parte = list(islice(iterador, tamanho))
+        if not parte:
+            return
+        yield parte
+
+def valor_ampl(valor):
+    """
+    Formata um número para um arquivo .dat
+
+    Usa 15 algarismos significativos (sem perder precisão de preços ou
+    conteúdos grandes), Infinity para limites infinitos e '.' para ausente.
+    """
+    if valor is None:
+        return "."
+    if type(valor) is int:
+        return str(valor)
+    texto = f"{valor:.15g}"
+    return _INFINITOS.get(texto, texto)
+
+def _comentarios_nutrientes(chaves):
+    """Comentários das linhas de n_min/n_max (ex.: 'Energia (kcal)')"""
+    comentarios = {}
+    for chave in chaves:
+        registro = REGISTRO_NUTRIENTES.get(NUTRIENTES.get(chave, chave))
+        if registro:
+            comentarios[chave] = f"{registro['rotulo']} ({registro['unidade']})"
+    return comentarios
+
+def _textos(vetor):
+    """Formata um vetor NumPy de uma vez para o .dat (mesmo formato de valor_ampl)"""
+    textos = [f"{v:.15g}" for v in vetor.tolist()]
+    if "inf" in textos or "-inf" in textos:
+        textos = [_INFINITOS.get(t, t) for t in textos]
+    return textos
+
+def _nao_nulos(bloco):
+    """
+    Valores não nulos de um bloco de linhas da matriz de nutrientes
+
+    Returns:
+        tuple: (indptr como lista, índices das colunas, valores), no formato CSR
+    """
+    import numpy as np
+    
+    if hasattr(bloco, 'tocsr'):
+        bloco = bloco.tocsr()
+        bloco.eliminate_zeros()
+        return bloco.indptr.tolist(), bloco.indices, bloco.data
+    bloco = np.asarray(bloco)
+    linhas, colunas = np.nonzero(bloco)
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(linhas, minlength=bloco.shape[0]))))
+    return indptr.tolist(), colunas, bloco[linhas, colunas]
+
+def criar_arquivo_dat(alimentos_data, restricoes, nome_arquivo=None, colunas=None):
     """
     Cria um arquivo .dat com os dados dos alimentos e restrições
     
+    Os alimentos são escritos em um bloco tabular com uma coluna por
+    atributo (max_porcoes, tamanho, nutrientes e preço), em blocos de linhas.
+    
     Args:
         alimentos_data (dict): Dicionário com dados dos alimentos
         restricoes (dict): Dicionário com as restrições nutricionais
+        nome_arquivo (str): Nome do arquivo (sem extensão); None gera o texto em memória
+        colunas (list): Atributos escritos (padrão: os do primeiro alimento, na mesma ordem)
+        
+    Returns:
+        str: Conteúdo do .dat quando nome_arquivo é None
+    """
+    if colunas is None:
+        colunas = list(next(iter(alimentos_data.values()), {}))
+    
+    with EscritorDat(f"{nome_arquivo}.dat" if nome_arquivo else None) as dat:
+        dat.escrever("# Definição do conjunto de alimentos")
+        dat.conjunto("ALIMENTO", map(nome_ampl, alimentos_data))
+        dat.escrever("", "# Parâmetros dos alimentos")
+        dat.tabela(colunas, ((nome_ampl(alimento), *(dados.get(c) for c in colunas))
+                             for alimento, dados in alimentos_data.items()))
+        
+        dat.escrever("", "# Limites mínimos e máximos para nutrientes")
+        for limite in ('n_min', 'n_max'):
+            dat.parametro(limite, restricoes[limite], _comentarios_nutrientes(restricoes[limite]))
+    
+    if not nome_arquivo:
+        return dat.texto()
+    print(f"Arquivo de dados salvo em {nome_arquivo}.dat")
+
+def criar_arquivo_dat_catalogo(catalogo, restricoes, nome_arquivo=None):
+    """
+    Cria um arquivo .dat para o modelo indexado gerado por models.gerar_modelo()
+    
+    Apenas os nutrientes com limite em `restricoes` entram no conjunto
+    NUTRIENTE, e apenas os valores não nulos de conteudo são escritos.
+    As linhas são geradas e escritas em blocos, com memória limitada
+    mesmo para milhões de alimentos.
+    
+    Args:
+        catalogo (CatalogoAlimentos): Catálogo de alimentos
+        restricoes (dict): Restrições por número ou por nome de nutriente
+        nome_arquivo (str): Nome do arquivo (sem extensão); None gera o texto em memória
+        
+    Returns:
+        str: Conteúdo do .dat quando nome_arquivo é None
+    """
+    from catalogo import normalizar_restricoes
+    
+    restricoes = normalizar_restricoes(restricoes)
+    restringidos = set(restricoes['n_min']) | set(restricoes['n_max'])
+    nutrientes = [n for n in catalogo.nutrientes if n in restringidos]
+    nomes = [nome_ampl(nome) for nome in catalogo.nomes]
+    rotulos = [nome_ampl(n) for n in nutrientes]
+    matriz = catalogo.colunas(nutrientes)
+    if catalogo.esparsa:
+        matriz = matriz.tocsr()
+    n, bloco = len(nomes), TAMANHO_BLOCO
+    
+    def registros():
+        # Vetores convertidos e formatados bloco a bloco
+        for inicio in range(0, n, bloco):
+            fim = min(inicio + bloco, n)
+            yield from map(" ".join, zip(nomes[inicio:fim], _textos(catalogo.max_porcoes[inicio:fim]),
+                                         _textos(catalogo.tamanhos[inicio:fim]), _textos(catalogo.precos[inicio:fim])))
+    
+    def fatias():
+        # Uma fatia [alimento,*] por alimento com valores não nulos
+        for inicio in range(0, n, bloco):
+            fim = min(inicio + bloco, n)
+            indptr, indices, valores = _nao_nulos(matriz[inicio:fim])
+            pares = [f"{rotulos[i]} {v}" for i, v in zip(indices.tolist(), _textos(valores))]
+            for k, nome in enumerate(nomes[inicio:fim]):
+                if indptr[k + 1] > indptr[k]:
+                    yield f"[{nome},*] " + " ".join(pares[indptr[k]:indptr[k + 1]])
+    
+    with EscritorDat(f"{nome_arquivo}.dat" if nome_arquivo else None) as dat:
+        dat.escrever("# Definição dos conjuntos de alimentos e nutrientes")
+        dat.conjunto("ALIMENTO", nomes)
+        dat.conjunto("NUTRIENTE", rotulos)
+        dat.escrever("", "# Parâmetros dos alimentos")
+        dat.linhas("param: max_porcoes tamanho preco :=", registros())
+        
+        dat.escrever("", "# Conteúdo nutricional por porção")
+        dat.linhas("param conteudo :=", fatias())
+        
+        # Limites por nutriente
+        dat.escrever("", "# Limites mínimos e máximos para nutrientes")
+        for limite in ('n_min', 'n_max'):
+            dat.parametro(limite, {r: restricoes[limite][n] for n, r in zip(nutrientes, rotulos)
+                                   if n in restricoes[limite]})
+    
+    if not nome_arquivo:
+        return dat.texto()
+    print(f"Arquivo de dados salvo em {nome_arquivo}.dat")
+
+def acrescentar_cortes_dat(catalogo, restricoes, nome_arquivo, max_cortes=50):
+    """
+    Acrescenta a um .dat de criar_arquivo_dat_catalogo() os dados dos cortes
+    do modelo diversificado reforçado (gerar_modelo(..., reforcado=True, cortes=True))
+    
+    Args:
+        catalogo (CatalogoAlimentos): Catálogo de alimentos
+        restricoes (dict): Restrições por número ou por nome de nutriente
+        nome_arquivo (str): Nome do arquivo (sem extensão)
+        max_cortes (int): Número máximo de cortes de cobertura
+        
+    Returns:
+        tuple: (cardinalidade mínima, número de coberturas)
+    """
+    from formulacao import tetos_compra, minimo_escolhidos, coberturas_minimas
+    
+    minimo = minimo_escolhidos(catalogo, restricoes, tetos_compra(catalogo, restricoes))
+    coberturas = coberturas_minimas(catalogo, restricoes, max_cortes)
+    
+    linhas = [
+        "",
+        "# Cortes válidos da formulação reforçada",
+        f"param min_escolhidos := {minimo};",
+    ]
+    if coberturas:
+        linhas.append(f"set COBERTURA := {' '.join(str(c) for c in range(1, len(coberturas) + 1))};")
+    for c, itens in enumerate(coberturas, start=1):
+        linhas.append(f"set ITENS_COBERTURA[{c}] := {' '.join(nome_ampl(catalogo.nomes[j]) for j in itens)};")
+    
+    with open(f"{nome_arquivo}.dat", "a", encoding="utf-8") as f:
+        f.write("\n".join(linhas) + "\n")
+    
+    return minimo, len(coberturas)
+
+def acrescentar_penalidades_dat(penalidades, nome_arquivo):
+    """
+    Acrescenta a um .dat a penalidade por unidade de violação de cada nutriente
+    (modelos com folgas elásticas)
+    
+    Args:
+        penalidades (dict): Penalidade por nome de nutriente
         nome_arquivo (str): Nome do arquivo (sem extensão)
     """
+    with EscritorDat(f"{nome_arquivo}.dat", modo="a") as dat:
+        dat.escrever("", "# Penalidade por unidade de violação")
+        dat.parametro("penalidade", {nome_ampl(n): v for n, v in penalidades.items()})
+
+def criar_arquivo_dat_estocastico(catalogo, restricoes, conteudos, nome_arquivo, penalidades, probabilidades=None):
+    """
+    Cria um arquivo .dat para models.MODELO_ESTOCASTICO (forma extensiva)
     
-    # Lista de alimentos
-    alimentos_lista = list(alimentos_data.keys())
-    
-    # Início do arquivo .dat
-    conteudo = "# Definição do conjunto de alimentos\n"
-    conteudo += f"set ALIMENTO := {' '.join(alimentos_lista)};\n\n"
-    
-    # Parâmetros dos alimentos
-    conteudo += "# Parâmetros dos alimentos\n"
-    conteudo += "param: max_porcoes tamanho energia proteina calcio magnesio vitaminaC ferro preco :=\n"
-    
-    for alimento, dados in alimentos_data.items():
-        linha = f"{alimento:15} {dados['max_porcoes']:2} {dados['tamanho']:3} {dados['energia']:3} "
-        linha += f"{dados['proteina']:4} {dados['calcio']:3} {dados['magnesio']:4} "
-        linha += f"{dados['vitaminaC']:4} {dados['ferro']:4} {dados['preco']:5}\n"
-        conteudo += linha
-    
-    conteudo += ";\n\n"
-    
-    # Limites mínimos
-    conteudo += "# Limites mínimos e máximos para nutrientes\n"
-    conteudo += "param n_min :=\n"
-    for i, valor in restricoes['n_min'].items():
-        comentario = {
-            1: "# Energia mínima (kcal)",
-            2: "# Proteína mínima (g)",
-            3: "# Cálcio mínimo (mg)",
-            4: "# Magnésio mínimo (mg)",
-            5: "# Vitamina C mínima (mg)"
-        }
-        conteudo += f"{i} {valor:4}  {comentario[i]}\n"
-    conteudo += ";\n\n"
-    
-    # Limites máximos
-    conteudo += "param n_max :=\n"
-    for i, valor in restricoes['n_max'].items():
-        comentario = {
-            1: "# Energia máxima (kcal)",
-            2: "# Proteína máxima (g)",
-            3: "# Cálcio máximo (mg)",
-            4: "# Magnésio máximo (mg)",
-            5: "# Vitamina C máxima (mg)"
-        }
-        conteudo += f"{i} {valor:4}  {comentario[i]}\n"
-    conteudo += ";\n"
-    
-    # Salvar arquivo
-    with open(f"{nome_arquivo}.dat", "w", encoding="utf-8") as f:
-        f.write(conteudo)
+    Args:
+        catalogo (CatalogoAlimentos): Catálogo de alimentos
+        restricoes (dict): Restrições por número ou por nome de nutriente
+        conteudos (np.ndarray): Conteúdo por cenário (cenários x alimentos x nutrientes restritos)
+        nome_arquivo (str): Nome do arquivo (sem extensão)
+        penalidades (dict): Penalidade por unidade de violação, por nutriente
+        probabilidades (array): Probabilidade de cada cenário (padrão: uniforme)
+    """
+    from catalogo import normalizar_restricoes
+    
+    restricoes = normalizar_restricoes(restricoes)
+    restringidos = set(restricoes['n_min']) | set(restricoes['n_max'])
+    nutrientes = [n for n in catalogo.nutrientes if n in restringidos]
+    nomes = [nome_ampl(nome) for nome in catalogo.nomes]
+    rotulos = [nome_ampl(n) for n in nutrientes]
+    cenarios = range(1, len(conteudos) + 1)
+    
+    def valores():
+        # Formato de lista: alimento nutriente cenário valor (apenas não nulos)
+        for s, conteudo in zip(cenarios, conteudos):
+            for j, i in zip(*conteudo.nonzero()):
+                yield f"{nomes[j]} {rotulos[i]} {s} {valor_ampl(float(conteudo[j, i]))}"
+    
+    with EscritorDat(f"{nome_arquivo}.dat") as dat:
+        dat.escrever("# Definição dos conjuntos")
+        dat.conjunto("ALIMENTO", nomes)
+        dat.conjunto("NUTRIENTE", rotulos)
+        dat.conjunto("CENARIO", map(str, cenarios))
+        dat.escrever("", "# Parâmetros dos alimentos")
+        dat.tabela(["max_porcoes", "tamanho", "preco"],
+                   zip(nomes, catalogo.max_porcoes.tolist(), catalogo.tamanhos.tolist(), catalogo.precos.tolist()))
+        dat.escrever("", "# Conteúdo nutricional por porção em cada cenário")
+        dat.linhas("param conteudo :=", valores())
+        if probabilidades is not None:
+            dat.parametro("prob", dict(zip(cenarios, map(float, probabilidades))))
+        
+        dat.escrever("", "# Limites e penalidades por nutriente")
+        for limite in ('n_min', 'n_max'):
+            dat.parametro(limite, {r: restricoes[limite][n] for n, r in zip(nutrientes, rotulos)
+                                   if n in restricoes[limite]})
+        dat.parametro("penalidade", {r: penalidades[n] for n, r in zip(nutrientes, rotulos)})
     
     print(f"Arquivo de dados salvo em {nome_arquivo}.dat")
 
+def criar_arquivo_dat_horizonte(catalogo, restricoes, dias, nome_arquivo, restricoes_semanais=None,
+                                max_dias_semana=None, porcoes_pacote=None, estoque_inicial=None):
+    """
+    Cria um arquivo .dat para models.MODELO_HORIZONTE
+    
+    Args:
+        catalogo (CatalogoAlimentos): Catálogo de alimentos
+        restricoes (dict): Limites diários por número ou por nome de nutriente
+        dias (int): Número de dias do plano
+        nome_arquivo (str): Nome do arquivo (sem extensão)
+        restricoes_semanais (dict): Limites semanais ('n_min'/'n_max'), opcional
+        max_dias_semana (dict): Dias de uso permitidos a cada 7 dias, por alimento
+        porcoes_pacote (dict): Porções por pacote comprado, por alimento
+        estoque_inicial (dict): Porções em estoque no início, por alimento
+    """
+    from catalogo import normalizar_restricoes
+    
+    diarias = normalizar_restricoes(restricoes)
+    semanais = normalizar_restricoes(restricoes_semanais or {})
+    
+    # Nutrientes só com limite semanal também precisam estar em NUTRIENTE
+    for nutriente in set(semanais['n_min']) | set(semanais['n_max']):
+        if nutriente not in diarias['n_min'] and nutriente not in diarias['n_max']:
+            diarias['n_min'][nutriente] = 0
+    criar_arquivo_dat_catalogo(catalogo, diarias, nome_arquivo)
+    
+    linhas = ["", "# Parâmetros do horizonte de planejamento", f"param horizonte := {int(dias)};"]
+    
+    if restricoes_semanais:
+        for limite, parametro in (('n_min', 'semana_min'), ('n_max', 'semana_max')):
+            valores = [(n, v) for n, v in semanais[limite].items() if n in catalogo.nutrientes]
+            if valores:
+                linhas.append(f"param {parametro} :=")
+                linhas.extend(f"{nome_ampl(n)} {v:g}" for n, v in valores)
+                linhas.append(";")
+    
+    for parametro, valores in (('max_dias_semana', max_dias_semana), ('porcoes_pacote', porcoes_pacote),
+                               ('estoque_inicial', estoque_inicial)):
+        if valores:
+            linhas.append(f"param {parametro} :=")
+            linhas.extend(f"{nome_ampl(nome)} {v:g}" for nome, v in valores.items() if nome in catalogo.indice)
+            linhas.append(";")
+    
+    with open(f"{nome_arquivo}.dat", "a", encoding="utf-8") as f:
+        f.write("\n".join(linhas) + "\n")
+
 def exibir_tabela_alimentos(alimentos_data):
     """
     Exibe uma tabela formatada com os dados dos alimentos
@@ -103,19 +472,11 @@ def comparar_restricoes():
     print("COMPARAÇÃO DE RESTRIÇÕES NUTRICIONAIS")
     print("="*80)
     
-    nutrientes_nomes = {
-        1: 'Energia (kcal)',
-        2: 'Proteína (g)',
-        3: 'Cálcio (mg)',
-        4: 'Magnésio (mg)',
-        5: 'Vitamina C (mg)'
-    }
-    
     print(f"{'Nutriente':<15} {'Original Min':<12} {'Relaxado Min':<12} {'Original Max':<12} {'Relaxado Max':<12}")
     print("-"*80)
     
-    for i in range(1, 6):
-        nome = nutrientes_nomes[i].split(' ')[0]
+    for i, nutriente in NUTRIENTES.items():
+        nome = REGISTRO_NUTRIENTES.get(nutriente, {}).get('rotulo', nutriente)
         orig_min = RESTRICOES_ORIGINAIS['n_min'][i]
         relax_min = RESTRICOES_RELAXADAS['n_min'][i]
         orig_max = RESTRICOES_ORIGINAIS['n_max'][i]
@@ -135,6 +496,10 @@ def criar_todos_arquivos_dat():
     # Arquivo com restrições relaxadas
     criar_arquivo_dat(ALIMENTOS_DATA, RESTRICOES_RELAXADAS, "dieta_relaxado")
     
+    # Dados do modelo indexado (formulação diversificada reforçada)
+    from catalogo import catalogo_padrao
+    criar_arquivo_dat_catalogo(catalogo_padrao(), RESTRICOES_RELAXADAS, "dieta_catalogo_relaxado")
+    
     print("\nTodos os arquivos .dat foram criados com sucesso!")
 
 if __name__ == "__main__":
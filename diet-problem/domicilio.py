@@ -0,0 +1,462 @@
+# -*- coding: utf-8 -*-
+"""
+domicilio.py - Dietas de um domicílio com orçamento e disponibilidade compartilhados (relaxação lagrangiana)
+
+Autor: José Brito
+"""
+
+import os
+import time
+import numpy as np
+import pandas as pd
+from config import RESTRICOES_RELAXADAS, DOMICILIO_CONFIG, PESO_DIVERSIDADE
+from catalogo import abrir_catalogo, catalogo_padrao, normalizar_restricoes, vetores_restricoes
+from paralelo import PoolCatalogo
+
+try:
+    from scipy.optimize import linprog
+    SCIPY_DISPONIVEL = True
+except ImportError:
+    SCIPY_DISPONIVEL = False
+
+def _criar_contexto_domicilio(catalogo, nutrientes, diversificado):
+    """Cria, em cada worker, o modelo de uma pessoa com ajuste de preços e orçamento individual"""
+    from solver import DietSolver
+
+    solver = DietSolver(abrir_catalogo(catalogo), cache=False)
+    restricoes_modelo = {'n_min': {n: 0 for n in nutrientes}, 'n_max': {}}
+    arquivo_mod, arquivo_dat = solver.preparar_catalogo(
+        restricoes_modelo, f"dieta_domicilio_{os.getpid()}",
+        diversificado=diversificado, reforcado=diversificado, compartilhado=True
+    )
+    solver.carregar_modelo(arquivo_mod, arquivo_dat)
+    return {'solver': solver}
+
+def _resolver_pessoa(contexto, item):
+    """Resolve a dieta de uma pessoa com os preços ajustados pelos multiplicadores"""
+    restricoes, ajuste, orcamento, limites, ponto_inicial = item
+    solver = contexto['solver']
+
+    parametros = {
+        'ajuste': dict(zip(solver.alimentos, ajuste.tolist())),
+        'orcamento': orcamento,
+    }
+    if limites:
+        parametros['max_porcoes'] = limites
+
+    resultados = solver.resolver_carregado(restricoes=restricoes, ponto_inicial=ponto_inicial, parametros=parametros)
+    if not resultados or resultados['objetivo'] is None or not str(resultados['solve_result']).startswith('solved'):
+        return None
+    compras = np.array([resultados['compras'].get(nome, 0) for nome in solver.alimentos], dtype=float)
+    return compras, resultados['objetivo']
+
+class PlanejamentoDomiciliar:
+    """
+    Dietas das pessoas de um domicílio que dividem orçamento e estoque
+
+    As pessoas têm restrições nutricionais próprias, mas o gasto total não
+    pode passar do orçamento e o consumo somado de cada alimento não pode
+    passar da sua disponibilidade. Essas restrições de acoplamento são
+    relaxadas com multiplicadores de Lagrange: o multiplicador do orçamento
+    encarece todos os alimentos na proporção do preço e o de cada alimento
+    escasso soma um custo por porção. Cada pessoa é então um modelo
+    independente (resolvido em paralelo, com warm start) e o valor da
+    relaxação é um limite inferior para o custo do domicílio.
+
+    Os multiplicadores são atualizados por passos de subgradiente (passo de
+    Polyak) ou por um método de bundle com região de confiança em caixa. O
+    reparo resolve as pessoas em sequência com o que sobra do orçamento e do
+    estoque, gerando um plano conjunto viável e o limite superior do gap.
+    """
+
+    def __init__(self, pessoas, orcamento=None, disponibilidade=None, catalogo=None, diversificado=True,
+                 config=DOMICILIO_CONFIG):
+        """
+        Args:
+            pessoas (dict): Nome da pessoa -> restrições nutricionais (por número ou nome)
+            orcamento (float): Gasto máximo do domicílio (None = sem limite)
+            disponibilidade (dict): Alimento -> porções disponíveis para todo o domicílio
+            catalogo (CatalogoAlimentos): Catálogo de alimentos (padrão: ALIMENTOS_DATA)
+            diversificado (bool): Se True, cada pessoa usa o modelo diversificado (reforçado)
+            config (dict): Parâmetros (ver DOMICILIO_CONFIG)
+        """
+        if not pessoas:
+            raise ValueError("O domicílio precisa de ao menos uma pessoa")
+        self.catalogo = catalogo if catalogo is not None else catalogo_padrao()
+        self.config = dict(DOMICILIO_CONFIG, **config)
+        self.diversificado = diversificado
+        self.orcamento = orcamento
+
+        disponibilidade = disponibilidade or {}
+        desconhecidos = set(disponibilidade) - set(self.catalogo.nomes)
+        if desconhecidos:
+            raise ValueError(f"Alimentos fora do catálogo: {sorted(desconhecidos)}")
+        self.escassos = np.array([self.catalogo.indice[nome] for nome in disponibilidade], dtype=int)
+        self.disponivel = np.array([float(v) for v in disponibilidade.values()])
+
+        # Nutrientes restritos por alguma pessoa; limites ausentes voltam aos padrões do modelo
+        self.nomes = list(pessoas)
+        normalizadas = [normalizar_restricoes(r) for r in pessoas.values()]
+        self.nutrientes = [n for n in self.catalogo.nutrientes
+                           if any(n in r['n_min'] or n in r['n_max'] for r in normalizadas)]
+        self.restricoes = []
+        for r in pessoas.values():
+            minimos, maximos = vetores_restricoes(r, self.nutrientes)
+            self.restricoes.append({
+                'n_min': {n: float(v) if np.isfinite(v) else 0.0 for n, v in zip(self.nutrientes, minimos)},
+                'n_max': {n: float(v) for n, v in zip(self.nutrientes, maximos)}
+            })
+        self.historico = []
+
+    def valor_plano(self, compras):
+        """
+        Custo de cada pessoa no objetivo do modelo (preço mais a penalidade de pouca variedade)
+
+        Args:
+            compras (np.ndarray): Porções (pessoas x alimentos)
+
+        Returns:
+            np.ndarray: Valor por pessoa
+        """
+        valor = compras @ self.catalogo.precos
+        if self.diversificado:
+            valor = valor + PESO_DIVERSIDADE * (compras.shape[1] - np.count_nonzero(compras, axis=1))
+        return valor
+
+    def violacoes(self, compras):
+        """
+        Excesso de gasto e de consumo dos alimentos escassos (subgradiente da relaxação)
+
+        Args:
+            compras (np.ndarray): Porções (pessoas x alimentos)
+
+        Returns:
+            np.ndarray: Gasto acima do orçamento (se houver) seguido do consumo acima
+                da disponibilidade de cada alimento escasso; negativos indicam folga
+        """
+        partes = []
+        if self.orcamento is not None:
+            partes.append([float(compras.sum(axis=0) @ self.catalogo.precos) - self.orcamento])
+        partes.append(compras[:, self.escassos].sum(axis=0) - self.disponivel)
+        return np.concatenate(partes)
+
+    def _ajuste(self, multiplicadores):
+        """Custo adicional por porção dado pelos multiplicadores (orçamento, alimentos escassos)"""
+        ajuste = np.zeros(len(self.catalogo))
+        if self.orcamento is not None:
+            ajuste += multiplicadores[0] * self.catalogo.precos
+            multiplicadores = multiplicadores[1:]
+        np.add.at(ajuste, self.escassos, multiplicadores)
+        return ajuste
+
+    def _recursos(self):
+        """Orçamento e disponibilidades alinhados com os multiplicadores"""
+        return np.concatenate([[self.orcamento] if self.orcamento is not None else [], self.disponivel])
+
+    def _limites(self, disponivel=None):
+        """Máximo de porções dos alimentos escassos (original ou limitado ao que sobrou)"""
+        maximos = self.catalogo.max_porcoes[self.escassos].astype(float)
+        if disponivel is not None:
+            maximos = np.minimum(maximos, np.floor(disponivel + 1e-9))
+        return {self.catalogo.nomes[j]: float(v) for j, v in zip(self.escassos, maximos)}
+
+    def relaxacao(self, resolver, multiplicadores, compras=None):
+        """
+        Resolve os subproblemas das pessoas e avalia a função dual
+
+        Args:
+            resolver (callable): Resolve uma lista de itens de _resolver_pessoa
+            multiplicadores (np.ndarray): Multiplicadores (orçamento, alimentos escassos)
+            compras (np.ndarray): Soluções anteriores, usadas como ponto inicial
+
+        Returns:
+            tuple: (valor dual, compras por pessoa, subgradiente) ou None se alguma pessoa falhar
+        """
+        ajuste = self._ajuste(multiplicadores)
+        limites = self._limites()
+        itens = [(restricoes, ajuste, float('inf'), limites,
+                  None if compras is None else dict(zip(self.catalogo.nomes, compras[p].tolist())))
+                 for p, restricoes in enumerate(self.restricoes)]
+        solucoes = resolver(itens)
+        if any(s is None for s in solucoes):
+            return None
+
+        compras = np.vstack([s[0] for s in solucoes])
+        objetivos = np.array([s[1] for s in solucoes])
+        dual = float(objetivos.sum() - multiplicadores @ self._recursos())
+        return dual, compras, self.violacoes(compras)
+
+    def gasto_minimo(self, resolver):
+        """
+        Menor gasto possível de cada pessoa, ignorando a disponibilidade
+
+        Com um multiplicador de orçamento muito alto, cada subproblema passa
+        a minimizar apenas o custo das compras.
+
+        Args:
+            resolver (callable): Resolve uma lista de itens de _resolver_pessoa
+
+        Returns:
+            np.ndarray: Gasto mínimo por pessoa (NaN se a pessoa for inviável)
+        """
+        ajuste = 1e3 * self.catalogo.precos
+        solucoes = resolver([(restricoes, ajuste, float('inf'), self._limites(), None) for restricoes in self.restricoes])
+        return np.array([s[0] @ self.catalogo.precos if s is not None else np.nan for s in solucoes])
+
+    def reparar(self, resolver, compras, multiplicadores):
+        """
+        Constrói um plano conjunto viável resolvendo as pessoas em sequência
+
+        Cada pessoa recebe o que resta do estoque e uma parcela do orçamento
+        restante proporcional ao seu gasto na relaxação; se ficar inviável,
+        tenta de novo com todo o orçamento restante. Os preços continuam
+        ajustados pelos multiplicadores, afastando as pessoas dos recursos
+        disputados.
+
+        Args:
+            resolver (callable): Resolve uma lista de itens de _resolver_pessoa
+            compras (np.ndarray): Compras da relaxação (pessoas x alimentos)
+            multiplicadores (np.ndarray): Multiplicadores atuais
+
+        Returns:
+            np.ndarray: Compras viáveis (pessoas x alimentos) ou None se o reparo falhar
+        """
+        ajuste = self._ajuste(multiplicadores)
+        gastos = np.maximum(compras @ self.catalogo.precos, 1e-6)
+        restante = self.orcamento if self.orcamento is not None else float('inf')
+        disponivel = self.disponivel.copy()
+        plano = np.zeros_like(compras)
+
+        # Quem gasta mais escolhe primeiro: é quem tem menos alternativas baratas
+        ordem = np.argsort(-gastos, kind='stable')
+        for k, p in enumerate(ordem):
+            parcela = restante * gastos[p] / gastos[ordem[k:]].sum() if np.isfinite(restante) else restante
+            ponto_inicial = dict(zip(self.catalogo.nomes, compras[p].tolist()))
+            solucao = None
+            for orcamento in ((parcela, restante) if parcela < restante else (restante,)):
+                solucao = resolver([(self.restricoes[p], ajuste, orcamento, self._limites(disponivel), ponto_inicial)])[0]
+                if solucao is not None:
+                    break
+            if solucao is None:
+                return None
+
+            plano[p] = solucao[0]
+            restante -= float(plano[p] @ self.catalogo.precos)
+            disponivel -= plano[p, self.escassos]
+        return plano
+
+    def _passo_bundle(self, cortes, centro, raio, escala):
+        """
+        Maximiza o modelo de planos cortantes da função dual dentro da caixa
+
+        Returns:
+            tuple: (multiplicadores candidatos, valor previsto pelo modelo)
+        """
+        m = len(centro)
+        # Variáveis (u, v): max v  s.a.  v <= L_k + g_k (u - u_k)
+        A = np.array([np.r_[-g, 1.0] for _, g, _ in cortes])
+        b = np.array([L - g @ u for L, g, u in cortes])
+        limites = [(max(0.0, c - raio * e), c + raio * e) for c, e in zip(centro, escala)] + [(None, None)]
+        resultado = linprog(np.r_[np.zeros(m), -1.0], A_ub=A, b_ub=b, bounds=limites, method='highs')
+        if not resultado.success:
+            return centro, cortes[-1][0]
+        return resultado.x[:m], float(resultado.x[m])
+
+    def resolver(self, verbose=True):
+        """
+        Resolve o domicílio por relaxação lagrangiana
+
+        Returns:
+            dict: Planos por pessoa, custos, limites do gap, multiplicadores,
+                histórico (tempo por iteração) e tempo total
+        """
+        inicio = time.perf_counter()
+        cfg = self.config
+        metodo = cfg['metodo']
+        if metodo not in ('subgradiente', 'bundle'):
+            raise ValueError(f"Método desconhecido: {metodo}")
+        if metodo == 'bundle' and not SCIPY_DISPONIVEL:
+            print("SciPy não está instalado; usando passos de subgradiente.")
+            metodo = 'subgradiente'
+
+        workers = min(cfg['workers'], len(self.nomes))
+
+        m = len(self._recursos())
+        multiplicadores = np.zeros(m)
+        escala = np.concatenate([[1.0] if self.orcamento is not None else [],
+                                 np.maximum(self.catalogo.precos[self.escassos], 1e-3)])
+        melhor_dual, melhor_multiplicadores = -np.inf, multiplicadores
+        melhor_plano, limite_superior = None, np.inf
+        passo, sem_melhora, raio = cfg['passo'], 0, cfg['raio']
+        compras, cortes, ultimo_reparo = None, [], 0
+        self.historico = []
+        convergiu = False
+
+        if verbose:
+            print("\n" + "="*60)
+            print(f"PLANEJAMENTO DOMICILIAR - {metodo.upper()}")
+            print("="*60)
+            print(f"Pessoas: {len(self.nomes)} | Alimentos escassos: {len(self.escassos)} | Workers: {workers}")
+            print(f"{'Iter.':>5} {'Dual':>10} {'Melhor dual':>12} {'Viável':>10} {'Gap':>8} {'Tempo (s)':>10}")
+            print("-"*60)
+
+        def atualizar_viavel(plano):
+            nonlocal melhor_plano, limite_superior
+            valor = float(self.valor_plano(plano).sum())
+            if valor < limite_superior:
+                melhor_plano, limite_superior = plano, valor
+
+        with PoolCatalogo(_resolver_pessoa, _criar_contexto_domicilio, self.catalogo,
+                          (self.nutrientes, self.diversificado), workers) as pool:
+            resolver = pool.mapear
+            if self.orcamento is not None:
+                gastos = self.gasto_minimo(resolver)
+                if np.isnan(gastos).any() or gastos.sum() > self.orcamento + 1e-9:
+                    print(f"Orçamento insuficiente: o gasto mínimo do domicílio é R$ {np.nansum(gastos):.2f} "
+                          f"(orçamento: R$ {self.orcamento:.2f}).")
+                    return None
+
+            for iteracao in range(cfg['max_iteracoes']):
+                inicio_iteracao = time.perf_counter()
+                avaliacao = self.relaxacao(resolver, multiplicadores, compras)
+                if avaliacao is None:
+                    print("Falha ao resolver o subproblema de uma pessoa.")
+                    return None
+                dual, compras, subgradiente = avaliacao
+
+                # Melhoras muito pequenas não adiam a redução do passo
+                melhorou = dual > melhor_dual + 1e-4 * max(abs(melhor_dual), 1.0)
+                if dual > melhor_dual:
+                    melhor_dual, melhor_multiplicadores = dual, multiplicadores.copy()
+                    if np.all(subgradiente <= 1e-9):
+                        atualizar_viavel(compras)
+                    elif iteracao - ultimo_reparo >= cfg['reparar_a_cada'] or iteracao == 0:
+                        plano = self.reparar(resolver, compras, multiplicadores)
+                        ultimo_reparo = iteracao
+                        if plano is not None:
+                            atualizar_viavel(plano)
+
+                gap = max(limite_superior - melhor_dual, 0.0) / max(abs(limite_superior), 1e-9)
+                registro = {
+                    'iteracao': iteracao,
+                    'dual': dual,
+                    'melhor_dual': melhor_dual,
+                    'melhor_viavel': limite_superior,
+                    'gap': gap,
+                    'norma_subgradiente': float(np.linalg.norm(subgradiente)),
+                    'tempo': time.perf_counter() - inicio_iteracao
+                }
+                self.historico.append(registro)
+
+                if verbose:
+                    viavel = f"{limite_superior:>10.4f}" if np.isfinite(limite_superior) else f"{'-':>10}"
+                    texto_gap = f"{gap:>8.2%}" if np.isfinite(gap) else f"{'-':>8}"
+                    print(f"{iteracao:>5} {dual:>10.4f} {melhor_dual:>12.4f} {viavel} {texto_gap} "
+                          f"{registro['tempo']:>10.3f}")
+
+                if gap <= cfg['tolerancia_gap'] or m == 0:
+                    convergiu = True
+                    break
+
+                if metodo == 'subgradiente':
+                    sem_melhora = 0 if melhorou else sem_melhora + 1
+                    if sem_melhora >= cfg['paciencia']:
+                        passo, sem_melhora = passo / 2, 0
+                    norma = float(subgradiente @ subgradiente)
+                    if norma <= 1e-12:
+                        break
+                    alvo = limite_superior if np.isfinite(limite_superior) else dual + 0.05 * max(abs(dual), 1.0)
+                    multiplicadores = np.maximum(multiplicadores + passo * (alvo - dual) / norma * subgradiente, 0.0)
+                else:
+                    # Passo sério se o ganho for ao menos 10% do previsto; senão, passo nulo e caixa menor
+                    cortes.append((dual, subgradiente, multiplicadores))
+                    if iteracao == 0:
+                        centro, centro_dual = multiplicadores, dual
+                    elif dual >= centro_dual + 0.1 * (previsto - centro_dual):
+                        centro, centro_dual = multiplicadores, dual
+                        raio = min(2 * raio, 10.0)
+                    else:
+                        raio /= 2
+                    multiplicadores, previsto = self._passo_bundle(cortes, centro, raio, escala)
+                    if previsto - centro_dual <= cfg['tolerancia_gap'] * max(abs(centro_dual), 1.0) / 10:
+                        break
+
+            # Reparo final com os melhores multiplicadores
+            avaliacao = None if convergiu else self.relaxacao(resolver, melhor_multiplicadores, compras)
+            if avaliacao is not None:
+                plano = self.reparar(resolver, avaliacao[1], melhor_multiplicadores)
+                if plano is not None:
+                    atualizar_viavel(plano)
+
+        resultado = {
+            'metodo': metodo,
+            'viavel': melhor_plano is not None,
+            'convergiu': convergiu,
+            'iteracoes': len(self.historico),
+            'limite_inferior': melhor_dual,
+            'limite_superior': limite_superior,
+            'gap': max(limite_superior - melhor_dual, 0.0) / max(abs(limite_superior), 1e-9),
+            'multiplicadores': self._descrever_multiplicadores(melhor_multiplicadores),
+            'historico': pd.DataFrame(self.historico),
+            'tempo': time.perf_counter() - inicio
+        }
+        if melhor_plano is not None:
+            valores = self.valor_plano(melhor_plano)
+            resultado['planos'] = {
+                nome: {self.catalogo.nomes[j]: int(v) for j, v in enumerate(melhor_plano[p]) if v}
+                for p, nome in enumerate(self.nomes)
+            }
+            resultado['custos'] = dict(zip(self.nomes, (melhor_plano @ self.catalogo.precos).tolist()))
+            resultado['valores'] = dict(zip(self.nomes, valores.tolist()))
+            resultado['gasto_total'] = float(sum(resultado['custos'].values()))
+            resultado['folgas'] = -self.violacoes(melhor_plano)
+        if verbose:
+            self._exibir_resultado(resultado)
+        return resultado
+
+    def _descrever_multiplicadores(self, multiplicadores):
+        """Multiplicadores por recurso compartilhado"""
+        descricao = {}
+        if self.orcamento is not None:
+            descricao['orcamento'] = float(multiplicadores[0])
+            multiplicadores = multiplicadores[1:]
+        descricao['disponibilidade'] = {self.catalogo.nomes[j]: float(v) for j, v in zip(self.escassos, multiplicadores)}
+        return descricao
+
+    def _exibir_resultado(self, resultado):
+        print("\n" + "="*60)
+        print("PLANEJAMENTO DOMICILIAR")
+        print("="*60)
+        estado = "convergiu" if resultado['convergiu'] else "não convergiu"
+        print(f"Iterações: {resultado['iteracoes']} ({estado}) | Tempo total: {resultado['tempo']:.2f} s")
+        print(f"Limite inferior (dual): {resultado['limite_inferior']:.4f}")
+        if not resultado['viavel']:
+            print("Nenhum plano conjunto viável encontrado.")
+            print("="*60)
+            return
+        print(f"Plano viável: {resultado['limite_superior']:.4f} | Gap de dualidade: {resultado['gap']:.2%}")
+        orcamento = f" de R$ {self.orcamento:.2f}" if self.orcamento is not None else ""
+        print(f"Gasto total: R$ {resultado['gasto_total']:.2f}{orcamento}")
+        for nome in self.nomes:
+            print(f"\n{nome} (R$ {resultado['custos'][nome]:.2f}):")
+            print("-"*40)
+            for alimento, porcoes in resultado['planos'][nome].items():
+                print(f"{alimento:<20}: {porcoes} porções")
+        if len(self.escassos):
+            print("\nAlimentos escassos (consumo / disponível):")
+            consumo = sum(np.array([resultado['planos'][nome].get(self.catalogo.nomes[j], 0) for j in self.escassos])
+                          for nome in self.nomes)
+            for j, usado, total in zip(self.escassos, consumo, self.disponivel):
+                print(f"{self.catalogo.nomes[j]:<20}: {usado:g} / {total:g}")
+        tempos = resultado['historico']['tempo']
+        print(f"\nTempo por iteração: média {tempos.mean():.3f} s, máx {tempos.max():.3f} s")
+        print("="*60)
+
+if __name__ == "__main__":
+    escala = {'adulto': 1.0, 'adolescente': 0.9, 'crianca': 0.6}
+    restricoes = normalizar_restricoes(RESTRICOES_RELAXADAS)
+    pessoas = {
+        nome: {'n_min': {n: v * fator for n, v in restricoes['n_min'].items()}, 'n_max': restricoes['n_max']}
+        for nome, fator in escala.items()
+    }
+    PlanejamentoDomiciliar(pessoas, orcamento=175.0, disponibilidade={'Ovos': 4, 'Leite_Integral': 3}).resolver()
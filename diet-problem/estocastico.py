@@ -0,0 +1,363 @@
+# -*- coding: utf-8 -*-
+"""
+estocastico.py - Dieta com conteúdo nutricional incerto resolvida por hedging progressivo
+
+Autor: José Brito
+"""
+
+import os
+import time
+import numpy as np
+import pandas as pd
+from config import RESTRICOES_RELAXADAS, ESTOCASTICO_CONFIG
+from catalogo import abrir_catalogo, normalizar_restricoes, vetores_restricoes
+from models import MODELO_ESTOCASTICO, salvar_modelo
+from data_handler import acrescentar_penalidades_dat, criar_arquivo_dat_estocastico
+from paralelo import PoolCatalogo
+
+def amostrar_conteudos(catalogo, nutrientes, n_cenarios, variabilidade=0.10, semente=42):
+    """
+    Amostra cenários de conteúdo nutricional das porções
+
+    Cada valor do catálogo é multiplicado por um ruído lognormal de média 1
+    e desvio relativo `variabilidade`; conteúdos nulos continuam nulos.
+
+    Args:
+        catalogo (CatalogoAlimentos): Catálogo com os conteúdos médios
+        nutrientes (list): Nutrientes amostrados (colunas)
+        n_cenarios (int): Número de cenários
+        variabilidade (float): Desvio relativo do conteúdo
+        semente (int): Semente do gerador aleatório
+
+    Returns:
+        np.ndarray: Conteúdos (cenários x alimentos x nutrientes)
+    """
+    rng = np.random.default_rng(semente)
+    base = catalogo.colunas_densas(nutrientes)
+    sigma = np.sqrt(np.log1p(variabilidade ** 2))
+    return base * rng.lognormal(-sigma ** 2 / 2, sigma, size=(n_cenarios,) + base.shape)
+
+def penalidades_nutrientes(restricoes, nutrientes, penalidade):
+    """
+    Penalidade por unidade de violação de cada nutriente
+
+    A penalidade é escalada pelo limite (mínimo, ou máximo se não houver
+    mínimo), de modo que violar qualquer limite em 1% custe `penalidade`.
+
+    Args:
+        restricoes (dict): Restrições por número ou por nome de nutriente
+        nutrientes (list): Nutrientes restritos
+        penalidade (float): Custo de violar um limite em 1%
+
+    Returns:
+        dict: Penalidade por nutriente
+    """
+    restricoes = normalizar_restricoes(restricoes)
+    penalidades = {}
+    for n in nutrientes:
+        limite = restricoes['n_min'].get(n) or restricoes['n_max'].get(n, 1.0)
+        escala = abs(limite) if np.isfinite(limite) else 1.0
+        penalidades[n] = penalidade * 100 / max(escala, 1.0)
+    return penalidades
+
+def _criar_contexto_ph(catalogo, restricoes, conteudos, penalidades):
+    """Cria, em cada worker, o modelo de cenário com os termos do hedging progressivo"""
+    from solver import DietSolver
+
+    catalogo = abrir_catalogo(catalogo)
+    solver = DietSolver(catalogo, cache=False)
+    nome_base = f"dieta_ph_{os.getpid()}"
+    arquivo_mod, arquivo_dat = solver.preparar_catalogo(restricoes, nome_base, elastico=True, proximal=True)
+    acrescentar_penalidades_dat(penalidades, nome_base)
+    solver.carregar_modelo(arquivo_mod, arquivo_dat)
+
+    restricoes = normalizar_restricoes(restricoes)
+    nutrientes = [n for n in catalogo.nutrientes if n in restricoes['n_min'] or n in restricoes['n_max']]
+    return {'solver': solver, 'conteudos': conteudos, 'nutrientes': nutrientes, 'cenario': None}
+
+def _resolver_subproblema(contexto, item):
+    """Resolve o subproblema de um cenário com os multiplicadores e a média da iteração"""
+    s, w, x_medio, rho = item
+    solver = contexto['solver']
+    alimentos = solver.alimentos
+
+    parametros = {
+        'w': dict(zip(alimentos, w.tolist())),
+        'x_medio': dict(zip(alimentos, x_medio.tolist())),
+        'rho': dict(zip(alimentos, rho.tolist())),
+    }
+    # O conteúdo só muda quando o worker recebe um cenário diferente do anterior
+    if contexto['cenario'] != s:
+        conteudo = contexto['conteudos'][s]
+        linhas, colunas = np.nonzero(conteudo)
+        parametros['conteudo'] = {(alimentos[j], contexto['nutrientes'][i]): float(conteudo[j, i])
+                                  for j, i in zip(linhas, colunas)}
+
+    resultados = solver.resolver_carregado(parametros=parametros)
+    contexto['cenario'] = s
+    if not resultados or resultados['objetivo'] is None:
+        return None
+    return np.array([resultados['compras'].get(nome, 0) for nome in alimentos], dtype=float)
+
+class DietaEstocastica:
+    """
+    Dieta com conteúdo nutricional incerto
+
+    As compras são decididas antes de conhecer o conteúdo real das porções;
+    em cada cenário, faltas e excessos de nutrientes são penalizados. O
+    objetivo é o custo das compras mais a penalidade esperada.
+
+    O hedging progressivo resolve uma cópia do modelo básico (elástico) por
+    cenário, em paralelo, com um preço w para a divergência da compra média
+    e um termo proximal em norma 1 (linear, para manter o subproblema como
+    MIP). A cada iteração os multiplicadores são atualizados até as compras
+    dos cenários coincidirem. A forma extensiva (MODELO_ESTOCASTICO) resolve
+    todos os cenários em um único modelo, para comparação.
+    """
+
+    def __init__(self, solver, catalogo=None, restricoes=RESTRICOES_RELAXADAS, config=ESTOCASTICO_CONFIG):
+        """
+        Args:
+            solver (DietSolver): Solver já inicializado (usado na forma extensiva)
+            catalogo (CatalogoAlimentos): Catálogo de alimentos (padrão: o do solver)
+            restricoes (dict): Restrições nutricionais
+            config (dict): Parâmetros (ver ESTOCASTICO_CONFIG)
+        """
+        self.solver = solver
+        self.catalogo = catalogo if catalogo is not None else solver.catalogo
+        self.restricoes = restricoes
+        self.config = dict(ESTOCASTICO_CONFIG, **config)
+
+        normalizadas = normalizar_restricoes(restricoes)
+        self.nutrientes = [n for n in self.catalogo.nutrientes
+                           if n in normalizadas['n_min'] or n in normalizadas['n_max']]
+        n_min, self.n_max = vetores_restricoes(restricoes, self.nutrientes)
+        self.n_min = np.where(np.isfinite(n_min), n_min, 0.0)
+
+        cfg = self.config
+        self.conteudos = amostrar_conteudos(self.catalogo, self.nutrientes, cfg['cenarios'],
+                                            cfg['variabilidade'], cfg['semente'])
+        self.probabilidades = np.full(cfg['cenarios'], 1.0 / cfg['cenarios'])
+        self.penalidades = penalidades_nutrientes(restricoes, self.nutrientes, cfg['penalidade'])
+        self.historico = []
+
+    def avaliar_plano(self, plano, tolerancia=1e-6):
+        """
+        Avalia um plano de compras em todos os cenários
+
+        Args:
+            plano (np.ndarray): Porções por alimento
+            tolerancia (float): Violação ignorada
+
+        Returns:
+            dict: Custo das compras, penalidade esperada, custo esperado e
+                probabilidade de atender todos os limites (cobertura)
+        """
+        totais = np.einsum('sjn,j->sn', self.conteudos, plano)
+        falta = np.maximum(self.n_min - totais, 0.0)
+        excesso = np.maximum(totais - self.n_max, 0.0)
+        pesos = np.array([self.penalidades[n] for n in self.nutrientes])
+        violacao = (falta + excesso) @ pesos
+
+        custo_compras = float(self.catalogo.precos @ plano)
+        penalidade = float(self.probabilidades @ violacao)
+        atende = np.all((falta <= tolerancia) & (excesso <= tolerancia), axis=1)
+        return {
+            'custo_compras': custo_compras,
+            'penalidade_esperada': penalidade,
+            'custo_esperado': custo_compras + penalidade,
+            'cobertura': float(self.probabilidades @ atende),
+            'violacao_por_cenario': violacao
+        }
+
+    def hedging_progressivo(self, verbose=True):
+        """
+        Resolve o modelo estocástico por hedging progressivo
+
+        Returns:
+            dict: Plano, avaliação, histórico de convergência, iterações e tempo
+        """
+        inicio = time.perf_counter()
+        cfg = self.config
+        n_cenarios, n_alimentos = len(self.conteudos), len(self.catalogo)
+        rho = cfg['rho'] * np.maximum(self.catalogo.precos, 1e-3)
+        argumentos = (self.restricoes, self.conteudos, self.penalidades)
+
+        w = np.zeros((n_cenarios, n_alimentos))
+        x_medio = np.zeros(n_alimentos)
+        self.historico = []
+        convergiu = False
+
+        if verbose:
+            print("\n" + "="*60)
+            print("HEDGING PROGRESSIVO")
+            print("="*60)
+            print(f"Cenários: {n_cenarios} | Workers: {cfg['workers']} | rho: {cfg['rho']}")
+            print(f"{'Iter.':>5} {'Desvio':>10} {'Custo cenários':>15} {'Custo plano':>12} {'Tempo (s)':>10}")
+            print("-"*60)
+
+        with PoolCatalogo(_resolver_subproblema, _criar_contexto_ph, self.catalogo, argumentos,
+                          cfg['workers']) as pool:
+            for iteracao in range(cfg['max_iteracoes'] + 1):
+                inicio_iteracao = time.perf_counter()
+                # Iteração 0: cenários independentes (sem w nem termo proximal)
+                peso = rho if iteracao > 0 else np.zeros(n_alimentos)
+                compras = pool.mapear([(s, w[s], x_medio, peso) for s in range(n_cenarios)])
+                if any(x is None for x in compras):
+                    print("Falha ao resolver um subproblema de cenário.")
+                    return None
+
+                x = np.vstack(compras)
+                x_medio = self.probabilidades @ x
+                desvio = float(self.probabilidades @ np.abs(x - x_medio).sum(axis=1))
+                w += rho * (x - x_medio)
+
+                # Custo médio das soluções de cada cenário (avaliadas no próprio cenário)
+                custos = np.array([self.catalogo.precos @ x[s] + self._violacao(s, x[s]) for s in range(n_cenarios)])
+                custo_cenarios = float(self.probabilidades @ custos)
+                plano = np.rint(x_medio)
+                registro = {
+                    'iteracao': iteracao,
+                    'desvio': desvio,
+                    'custo_cenarios': custo_cenarios,
+                    'custo_plano': self.avaliar_plano(plano)['custo_esperado'],
+                    'tempo': time.perf_counter() - inicio_iteracao
+                }
+                self.historico.append(registro)
+
+                if verbose:
+                    print(f"{iteracao:>5} {desvio:>10.4f} {custo_cenarios:>15.4f} "
+                          f"{registro['custo_plano']:>12.4f} {registro['tempo']:>10.3f}")
+
+                if desvio <= cfg['tolerancia']:
+                    convergiu = True
+                    break
+
+        plano = np.rint(x_medio)
+        resultado = {
+            'metodo': 'hedging_progressivo',
+            'plano': dict(zip(self.catalogo.nomes, plano.astype(int).tolist())),
+            'avaliacao': self.avaliar_plano(plano),
+            'convergiu': convergiu,
+            'iteracoes': len(self.historico),
+            'historico': pd.DataFrame(self.historico),
+            'tempo': time.perf_counter() - inicio
+        }
+        if verbose:
+            self._exibir_resultado(resultado)
+        return resultado
+
+    def _violacao(self, s, plano):
+        """Penalidade das violações de um plano no cenário s"""
+        totais = plano @ self.conteudos[s]
+        violacao = np.maximum(self.n_min - totais, 0.0) + np.maximum(totais - self.n_max, 0.0)
+        return float(violacao @ np.array([self.penalidades[n] for n in self.nutrientes]))
+
+    def forma_extensiva(self, nome_base="dieta_estocastica", verbose=True):
+        """
+        Resolve todos os cenários em um único modelo (MODELO_ESTOCASTICO)
+
+        Args:
+            nome_base (str): Prefixo dos arquivos .mod/.dat gerados
+            verbose (bool): Se True, exibe o resultado
+
+        Returns:
+            dict: Plano, avaliação e tempo (incluindo a geração dos arquivos)
+        """
+        if not self.solver.ampl:
+            print("AMPL não está disponível!")
+            return None
+
+        inicio = time.perf_counter()
+        salvar_modelo(MODELO_ESTOCASTICO, nome_base)
+        criar_arquivo_dat_estocastico(self.catalogo, self.restricoes, self.conteudos, nome_base,
+                                      self.penalidades, self.probabilidades)
+        self.solver.definir_catalogo(self.catalogo)
+        resultados = self.solver.resolver_modelo(f"{nome_base}.mod", f"{nome_base}.dat",
+                                                 verbose=False, usar_cache=False)
+        if not resultados or resultados['objetivo'] is None:
+            print("Falha ao resolver a forma extensiva.")
+            return None
+
+        plano = np.array([resultados['compras'].get(nome, 0) for nome in self.catalogo.nomes], dtype=float)
+        resultado = {
+            'metodo': 'forma_extensiva',
+            'plano': resultados['compras'],
+            'avaliacao': self.avaliar_plano(plano),
+            'objetivo': resultados['objetivo'],
+            'solve_result': resultados['solve_result'],
+            'tempo': time.perf_counter() - inicio
+        }
+        if verbose:
+            self._exibir_resultado(resultado)
+        return resultado
+
+    def _exibir_resultado(self, resultado):
+        avaliacao = resultado['avaliacao']
+        titulo = "HEDGING PROGRESSIVO" if resultado['metodo'] == 'hedging_progressivo' else "FORMA EXTENSIVA"
+        print("\n" + "="*60)
+        print(f"DIETA ESTOCÁSTICA - {titulo}")
+        print("="*60)
+        if 'convergiu' in resultado:
+            estado = "convergiu" if resultado['convergiu'] else "não convergiu"
+            print(f"Iterações: {resultado['iteracoes']} ({estado})")
+        print(f"Custo das compras: R$ {avaliacao['custo_compras']:.2f}")
+        print(f"Penalidade esperada: R$ {avaliacao['penalidade_esperada']:.2f}")
+        print(f"Custo esperado: R$ {avaliacao['custo_esperado']:.2f}")
+        print(f"Cenários atendidos: {avaliacao['cobertura']:.1%}")
+        print("\nCompras:")
+        print("-"*40)
+        for nome, porcoes in resultado['plano'].items():
+            if porcoes:
+                print(f"{nome:<20}: {porcoes} porções")
+        print(f"\nTempo total: {resultado['tempo']:.2f} s")
+        print("="*60)
+
+def comparar_com_extensiva(solver, catalogo=None, restricoes=RESTRICOES_RELAXADAS, cenarios=(5, 10, 20),
+                           config=ESTOCASTICO_CONFIG, verbose=True):
+    """
+    Compara o hedging progressivo com a forma extensiva em poucos cenários
+
+    Args:
+        solver (DietSolver): Solver já inicializado
+        catalogo (CatalogoAlimentos): Catálogo de alimentos (padrão: o do solver)
+        restricoes (dict): Restrições nutricionais
+        cenarios (tuple): Números de cenários comparados
+        config (dict): Demais parâmetros (ver ESTOCASTICO_CONFIG)
+        verbose (bool): Se True, exibe a tabela
+
+    Returns:
+        pd.DataFrame: Uma linha por número de cenários e método
+    """
+    linhas = []
+    for n_cenarios in cenarios:
+        modelo = DietaEstocastica(solver, catalogo, restricoes, dict(config, cenarios=n_cenarios))
+        for resultado in (modelo.hedging_progressivo(verbose=False), modelo.forma_extensiva(verbose=False)):
+            if resultado is None:
+                continue
+            linhas.append({
+                'cenarios': n_cenarios,
+                'metodo': resultado['metodo'],
+                'iteracoes': resultado.get('iteracoes'),
+                'custo_esperado': resultado['avaliacao']['custo_esperado'],
+                'cobertura': resultado['avaliacao']['cobertura'],
+                'tempo': resultado['tempo']
+            })
+
+    tabela = pd.DataFrame(linhas)
+    if verbose:
+        print("\n" + "="*60)
+        print("HEDGING PROGRESSIVO x FORMA EXTENSIVA")
+        print("="*60)
+        print(f"{'Cenários':<9}{'Método':<21}{'Iter.':>6}{'Custo esp.':>11}{'Cobertura':>10}{'Tempo (s)':>10}")
+        print("-"*60)
+        for _, linha in tabela.iterrows():
+            iteracoes = f"{linha['iteracoes']:6.0f}" if pd.notna(linha['iteracoes']) else f"{'-':>6}"
+            print(f"{linha['cenarios']:<9}{linha['metodo']:<21}{iteracoes}{linha['custo_esperado']:11.2f}"
+                  f"{linha['cobertura']:10.1%}{linha['tempo']:10.2f}")
+        print("="*60)
+    return tabela
+
+if __name__ == "__main__":
+    from solver import DietSolver
+    comparar_com_extensiva(DietSolver(cache=False))
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+formulacao.py - Limites e cortes válidos para a formulação reforçada do modelo diversificado
+
+Autor: José Brito
+"""
+
+import numpy as np
+from catalogo import vetores_restricoes
+
+# Máximo de porções por alimento no modelo diversificado (restrição Limite_Individual)
+LIMITE_INDIVIDUAL = 4
+
+def tetos_compra(catalogo, restricoes, limite_individual=LIMITE_INDIVIDUAL):
+    """
+    Calcula o menor limite superior válido de Compra[j] para cada alimento
+
+    É o mesmo valor do parâmetro teto do modelo reforçado:
+    min(max_porcoes, limite individual, floor(n_max / conteudo)) sobre os
+    nutrientes com máximo finito.
+
+    Args:
+        catalogo (CatalogoAlimentos): Catálogo de alimentos
+        restricoes (dict): Restrições por número ou por nome de nutriente
+        limite_individual (int): Máximo de porções por alimento
+
+    Returns:
+        np.ndarray: Teto de porções de cada alimento
+    """
+    _, n_max = vetores_restricoes(restricoes, catalogo.nutrientes)
+    conteudo = catalogo.matriz_densa()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        por_nutriente = np.where(conteudo > 0, np.floor(n_max / conteudo), np.inf)
+    teto_nutrientes = por_nutriente.min(axis=1) if por_nutriente.size else np.full(len(catalogo), np.inf)
+    return np.minimum(np.minimum(catalogo.max_porcoes, limite_individual), teto_nutrientes)
+
+def minimo_escolhidos(catalogo, restricoes, tetos=None):
+    """
+    Número mínimo de alimentos distintos em qualquer dieta viável (corte de cardinalidade)
+
+    Para cada nutriente com mínimo, ordena os alimentos pela maior
+    contribuição possível (conteúdo x teto) e conta quantos são necessários
+    para alcançar o mínimo; o corte usa o maior valor entre os nutrientes.
+
+    Args:
+        catalogo (CatalogoAlimentos): Catálogo de alimentos
+        restricoes (dict): Restrições por número ou por nome de nutriente
+        tetos (np.ndarray): Tetos de compra (padrão: tetos_compra())
+
+    Returns:
+        int: Cardinalidade mínima (0 se nenhum nutriente exigir)
+    """
+    tetos = tetos_compra(catalogo, restricoes) if tetos is None else tetos
+    n_min, _ = vetores_restricoes(restricoes, catalogo.nutrientes)
+    capacidades = catalogo.matriz_densa() * tetos[:, None]
+
+    minimo = 0
+    for i in np.flatnonzero(np.isfinite(n_min) & (n_min > 0)):
+        acumulado = np.cumsum(np.sort(capacidades[:, i])[::-1])
+        necessarios = int(np.searchsorted(acumulado, n_min[i])) + 1
+        if necessarios <= len(acumulado):
+            minimo = max(minimo, necessarios)
+    return minimo
+
+def coberturas_minimas(catalogo, restricoes, max_cortes=50):
+    """
+    Gera coberturas mínimas dos limites máximos de nutrientes
+
+    Com Compra[j] >= Escolhido[j], cada alimento escolhido contribui ao
+    menos com uma porção. Um conjunto C cuja soma de uma porção de cada
+    alimento passa de n_max é uma cobertura, e no máximo |C| - 1 de seus
+    alimentos podem ser escolhidos. As coberturas são montadas de forma
+    gulosa, em ordem decrescente de conteúdo, começando de posições
+    diferentes; remover o último (menor) item desfaz a cobertura, logo ela é
+    mínima.
+
+    Args:
+        catalogo (CatalogoAlimentos): Catálogo de alimentos
+        restricoes (dict): Restrições por número ou por nome de nutriente
+        max_cortes (int): Número máximo de coberturas geradas
+
+    Returns:
+        list: Listas de índices de alimentos, uma por cobertura
+    """
+    _, n_max = vetores_restricoes(restricoes, catalogo.nutrientes)
+    conteudo = catalogo.matriz_densa()
+    disponiveis = catalogo.max_porcoes >= 1
+    coberturas, vistas = [], set()
+
+    for i in np.flatnonzero(np.isfinite(n_max)):
+        ordem = [j for j in np.argsort(-conteudo[:, i], kind='stable') if disponiveis[j] and conteudo[j, i] > 0]
+        for inicio in range(len(ordem)):
+            if len(coberturas) >= max_cortes:
+                return coberturas
+            acumulado = np.cumsum(conteudo[ordem[inicio:], i])
+            fim = int(np.searchsorted(acumulado, n_max[i], side='right'))
+            if fim >= len(acumulado):
+                break  # Os itens restantes não cobrem mais o limite
+            cobertura = tuple(sorted(ordem[inicio:inicio + fim + 1]))
+            if cobertura not in vistas:
+                vistas.add(cobertura)
+                coberturas.append(list(cobertura))
+    return coberturas
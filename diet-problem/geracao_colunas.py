@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+geracao_colunas.py - Geração de colunas para catálogos de alimentos muito grandes
+
+Autor: José Brito
+"""
+
+import time
+import numpy as np
+from config import RESTRICOES_RELAXADAS
+from catalogo import vetores_restricoes
+
+class DietColumnGeneration:
+    """
+    Geração de colunas sobre o DietSolver
+
+    O mestre restrito (relaxação linear do modelo indexado com folgas
+    elásticas, para ser sempre viável) é resolvido sobre um conjunto pequeno
+    de alimentos. Os duais de Limites_Nutrientes precificam o catálogo
+    inteiro de uma vez (c - A·y) e os alimentos com custo reduzido negativo
+    entram no conjunto. Quando nenhum alimento melhora o mestre, o modelo
+    inteiro é resolvido uma única vez sobre o conjunto final.
+
+    O objetivo do mestre só limita a relaxação do catálogo completo por
+    baixo depois da convergência; o limite reportado é o melhor limite
+    lagrangiano dos duais do mestre, válido em qualquer iteração.
+    """
+
+    def __init__(self, solver, catalogo, restricoes=RESTRICOES_RELAXADAS, tamanho_inicial=5,
+                 colunas_por_iteracao=20, max_iteracoes=100, tolerancia=1e-6, nome_base="dieta_mestre"):
+        """
+        Args:
+            solver (DietSolver): Solver já inicializado
+            catalogo (CatalogoAlimentos): Catálogo completo
+            restricoes (dict): Restrições por número ou por nome de nutriente
+            tamanho_inicial (int): Alimentos mais baratos por nutriente no conjunto inicial
+            colunas_por_iteracao (int): Máximo de colunas adicionadas por iteração
+            max_iteracoes (int): Limite de iterações do mestre
+            tolerancia (float): Custo reduzido mínimo (em módulo) para uma coluna entrar
+            nome_base (str): Prefixo dos arquivos .mod/.dat do mestre
+        """
+        self.solver = solver
+        self.catalogo = catalogo
+        self.restricoes = restricoes
+        self.tamanho_inicial = tamanho_inicial
+        self.colunas_por_iteracao = colunas_por_iteracao
+        self.max_iteracoes = max_iteracoes
+        self.tolerancia = tolerancia
+        self.nome_base = nome_base
+        self.historico = []
+
+    def _conjunto_inicial(self):
+        """
+        Escolhe, para cada nutriente com mínimo, os alimentos de menor custo por unidade
+
+        Returns:
+            np.ndarray: Máscara booleana dos alimentos no conjunto inicial
+        """
+        n_min, _ = vetores_restricoes(self.restricoes, self.catalogo.nutrientes)
+        com_minimo = [n for n, v in zip(self.catalogo.nutrientes, n_min) if np.isfinite(v) and v > 0]
+        conteudo = self.catalogo.colunas_densas(com_minimo)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            custo_unitario = np.where(conteudo > 0, self.catalogo.precos[:, None] / conteudo, np.inf)
+
+        ativos = np.zeros(len(self.catalogo), dtype=bool)
+        k = min(self.tamanho_inicial, len(self.catalogo))
+        if k > 0 and custo_unitario.size:
+            melhores = np.argpartition(custo_unitario, k - 1, axis=0)[:k]
+            ativos[np.unique(melhores)] = True
+        if not ativos.any():
+            ativos[:k] = True
+        return ativos
+
+    def _resolver_mestre(self, ativos):
+        """Resolve a relaxação do mestre restrito aos alimentos ativos"""
+        self.solver.definir_catalogo(self.catalogo.subconjunto(np.flatnonzero(ativos)))
+        arquivo_mod, arquivo_dat = self.solver.preparar_catalogo(self.restricoes, self.nome_base, elastico=True)
+        return self.solver.resolver_relaxacao(arquivo_mod, arquivo_dat)
+
+    def resolver(self, verbose=True, usar_cache=True):
+        """
+        Executa a geração de colunas e a solução inteira final
+
+        Args:
+            verbose (bool): Se True, exibe o progresso
+            usar_cache (bool): Se False, a solução inteira final ignora o cache de soluções
+
+        Returns:
+            dict: Resultados no catálogo completo, com o histórico em 'geracao_colunas'
+        """
+        inicio = time.perf_counter()
+        self.historico = []
+        ativos = self._conjunto_inicial()
+        limite_inferior = None
+        convergiu = False
+
+        try:
+            for iteracao in range(1, self.max_iteracoes + 1):
+                inicio_iteracao = time.perf_counter()
+                mestre = self._resolver_mestre(ativos)
+                if mestre is None:
+                    break
+
+                # Limite inferior válido para o catálogo completo mesmo antes da convergência
+                limite = float(self.catalogo.limite_lagrangiano(mestre['duais'], self.restricoes))
+                limite_inferior = limite if limite_inferior is None else max(limite_inferior, limite)
+
+                # Precificação vetorizada sobre todo o catálogo
+                custos_reduzidos = self.catalogo.custos_reduzidos(mestre['duais'])
+                custos_reduzidos[ativos] = np.inf
+                candidatos = np.flatnonzero(custos_reduzidos < -self.tolerancia)
+                if len(candidatos) > self.colunas_por_iteracao:
+                    melhores = np.argpartition(custos_reduzidos[candidatos], self.colunas_por_iteracao - 1)
+                    candidatos = candidatos[melhores[:self.colunas_por_iteracao]]
+
+                self.historico.append({
+                    'iteracao': iteracao,
+                    'objetivo_mestre': mestre['objetivo'],
+                    'limite_lagrangiano': limite,
+                    'colunas_ativas': int(ativos.sum()),
+                    'colunas_adicionadas': len(candidatos),
+                    'menor_custo_reduzido': float(custos_reduzidos.min()) if len(custos_reduzidos) else 0.0,
+                    'tempo': time.perf_counter() - inicio_iteracao
+                })
+                if verbose:
+                    registro = self.historico[-1]
+                    print(f"Iteração {iteracao:3}: mestre = {registro['objetivo_mestre']:.4f}, "
+                          f"ativas = {registro['colunas_ativas']}, adicionadas = {registro['colunas_adicionadas']}")
+
+                if len(candidatos) == 0:
+                    convergiu = True
+                    break
+                ativos[candidatos] = True
+
+            # Solução inteira única sobre as colunas geradas
+            indices = np.flatnonzero(ativos)
+            self.solver.definir_catalogo(self.catalogo.subconjunto(indices))
+            arquivo_mod, arquivo_dat = self.solver.preparar_catalogo(self.restricoes, self.nome_base)
+            resultados = self.solver.resolver_modelo(arquivo_mod, arquivo_dat, verbose, usar_cache)
+        finally:
+            self.solver.definir_catalogo(self.catalogo)
+
+        if resultados:
+            resultados['compras'] = {nome: resultados['compras'].get(nome, 0) for nome in self.catalogo.nomes}
+            gap = None
+            if limite_inferior is not None and limite_inferior > 0 and resultados['objetivo'] is not None:
+                gap = (resultados['objetivo'] - limite_inferior) / abs(limite_inferior)
+            resultados['geracao_colunas'] = {
+                'iteracoes': self.historico,
+                'colunas_finais': len(indices),
+                # Precificação sem colunas de custo reduzido negativo (mestre ótimo no catálogo completo)
+                'convergiu': convergiu,
+                'limite_inferior_lp': limite_inferior,
+                'gap_relaxacao': gap,
+                'tempo_total': time.perf_counter() - inicio
+            }
+        return resultados
+
+    def comparar_com_completo(self, verbose=False):
+        """
+        Compara o tempo da geração de colunas com a solução do catálogo completo
+
+        Returns:
+            dict: Tempos e objetivos das duas abordagens
+        """
+        inicio = time.perf_counter()
+        gerado = self.resolver(verbose, usar_cache=False)
+        tempo_geracao = time.perf_counter() - inicio
+
+        self.solver.definir_catalogo(self.catalogo)
+        inicio = time.perf_counter()
+        completo = self.solver.resolver_catalogo(self.restricoes, "dieta_completo", verbose=verbose, usar_cache=False)
+        tempo_completo = time.perf_counter() - inicio
+
+        comparacao = {
+            'tempo_geracao_colunas': tempo_geracao,
+            'tempo_completo': tempo_completo,
+            'objetivo_geracao_colunas': gerado['objetivo'] if gerado else None,
+            'objetivo_completo': completo['objetivo'] if completo else None,
+            'iteracoes': len(self.historico),
+            'colunas_finais': gerado['geracao_colunas']['colunas_finais'] if gerado else None
+        }
+
+        print("\n" + "="*70)
+        print("GERAÇÃO DE COLUNAS vs MODELO COMPLETO")
+        print("="*70)
+        print(f"{'Iteração':<10} {'Objetivo mestre':<18} {'Ativas':<10} {'Adicionadas':<12}")
+        print("-"*70)
+        for registro in self.historico:
+            print(f"{registro['iteracao']:<10} {registro['objetivo_mestre']:<18.4f} "
+                  f"{registro['colunas_ativas']:<10} {registro['colunas_adicionadas']:<12}")
+        print("-"*70)
+        print(f"Alimentos no catálogo: {len(self.catalogo)} | colunas usadas: {comparacao['colunas_finais']}")
+        if gerado and not gerado['geracao_colunas']['convergiu']:
+            print("Geração de colunas interrompida antes da convergência (limite lagrangiano reportado)")
+        print(f"Tempo geração de colunas: {tempo_geracao:.3f} s | tempo modelo completo: {tempo_completo:.3f} s")
+        if comparacao['objetivo_geracao_colunas'] is not None and comparacao['objetivo_completo'] is not None:
+            print(f"Objetivo: {comparacao['objetivo_geracao_colunas']:.2f} vs {comparacao['objetivo_completo']:.2f}")
+        print("="*70)
+
+        return comparacao
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+lote.py - Solução em lote de dietas personalizadas por perfil de necessidades
+
+Autor: José Brito
+"""
+
+import os
+import time
+from contextlib import nullcontext
+import numpy as np
+import pandas as pd
+from config import RESTRICOES_RELAXADAS
+from catalogo import abrir_catalogo, normalizar_restricoes
+from paralelo import mapear_em_paralelo
+
+def ler_perfis(perfis, nutrientes, coluna_id='perfil'):
+    """
+    Lê uma tabela de perfis de necessidades nutricionais
+
+    Cada linha é uma pessoa; os limites ficam em colunas '<nutriente>_min'
+    e '<nutriente>_max'. Colunas ausentes ou vazias significam sem limite.
+
+    Args:
+        perfis (pd.DataFrame | str): Tabela ou caminho de um CSV
+        nutrientes (list): Nutrientes considerados (ordem das colunas das matrizes)
+        coluna_id (str): Coluna com o identificador do perfil (padrão: índice)
+
+    Returns:
+        tuple: (ids, n_min, n_max) com matrizes (perfis x nutrientes)
+    """
+    if isinstance(perfis, str):
+        perfis = pd.read_csv(perfis)
+
+    ids = perfis[coluna_id].tolist() if coluna_id in perfis.columns else perfis.index.tolist()
+
+    def coluna(sufixo, vazio):
+        valores = [perfis[f"{n}_{sufixo}"].to_numpy(dtype=float) if f"{n}_{sufixo}" in perfis.columns
+                   else np.full(len(perfis), vazio) for n in nutrientes]
+        matriz = np.column_stack(valores) if valores else np.empty((len(perfis), 0))
+        return np.where(np.isnan(matriz), vazio, matriz)
+
+    return ids, coluna('min', -np.inf), coluna('max', np.inf)
+
+def agrupar_perfis(n_min, n_max, tolerancia=0.0):
+    """
+    Agrupa perfis idênticos ou quase idênticos
+
+    Com tolerância > 0, cada limite é arredondado para uma grade de passo
+    `tolerancia` vezes a mediana do nutriente; perfis na mesma célula formam
+    um grupo. O grupo é resolvido com a interseção dos limites (maior mínimo
+    e menor máximo), cuja solução atende a todos os membros.
+
+    Args:
+        n_min (np.ndarray): Limites mínimos (perfis x nutrientes)
+        n_max (np.ndarray): Limites máximos (perfis x nutrientes)
+        tolerancia (float): Diferença relativa considerada igual
+
+    Returns:
+        tuple: (grupo de cada perfil, mínimos do grupo, máximos do grupo)
+    """
+    chaves = np.hstack([n_min, n_max])
+    if tolerancia > 0:
+        finitos = np.where(np.isfinite(chaves), np.abs(chaves), np.nan)
+        finitos[:, np.all(np.isnan(finitos), axis=0)] = 1.0
+        escala = np.nanmedian(finitos, axis=0)
+        passo = np.maximum(tolerancia * escala, 1e-12)
+        chaves = np.where(np.isfinite(chaves), np.round(chaves / passo), chaves)
+
+    _, grupos = np.unique(chaves, axis=0, return_inverse=True)
+    grupos = grupos.ravel()
+    n_grupos = grupos.max() + 1 if len(grupos) else 0
+
+    grupo_min = np.full((n_grupos, n_min.shape[1]), -np.inf)
+    grupo_max = np.full((n_grupos, n_max.shape[1]), np.inf)
+    np.maximum.at(grupo_min, grupos, n_min)
+    np.minimum.at(grupo_max, grupos, n_max)
+    return grupos, grupo_min, grupo_max
+
+def _restricoes_do_perfil(nutrientes, minimos, maximos):
+    """Monta as restrições de um perfil; limites ausentes voltam aos padrões do modelo (0 e Infinity)"""
+    return {
+        'n_min': {n: float(v) if np.isfinite(v) else 0.0 for n, v in zip(nutrientes, minimos)},
+        'n_max': {n: float(v) for n, v in zip(nutrientes, maximos)}
+    }
+
+def _criar_contexto_lote(catalogo, nutrientes):
+    """Cria, em cada worker, o solver com o modelo carregado e a memória de perfis resolvidos"""
+    from solver import DietSolver
+
+    solver = DietSolver(abrir_catalogo(catalogo))
+    restricoes_modelo = {'n_min': {n: 0 for n in nutrientes}, 'n_max': {}}
+    arquivo_mod, arquivo_dat = solver.preparar_catalogo(restricoes_modelo, f"dieta_lote_{os.getpid()}")
+    solver.carregar_modelo(arquivo_mod, arquivo_dat)
+    return {'solver': solver, 'nutrientes': nutrientes, 'limites': [], 'compras': []}
+
+def _resolver_perfil(contexto, item):
+    """Resolve um perfil partindo da solução do perfil mais próximo já resolvido no worker"""
+    minimos, maximos = item
+    solver = contexto['solver']
+    vetor = np.nan_to_num(np.concatenate([minimos, maximos]), posinf=0.0, neginf=0.0)
+
+    ponto_inicial = None
+    if contexto['limites']:
+        distancias = np.linalg.norm(np.asarray(contexto['limites']) - vetor, axis=1)
+        ponto_inicial = contexto['compras'][int(np.argmin(distancias))]
+
+    inicio = time.perf_counter()
+    resultados = solver.resolver_carregado(
+        restricoes=_restricoes_do_perfil(contexto['nutrientes'], minimos, maximos),
+        ponto_inicial=ponto_inicial
+    )
+    tempo = time.perf_counter() - inicio
+
+    if not resultados or not str(resultados['solve_result']).startswith('solved'):
+        return None, resultados['solve_result'] if resultados else 'failure', None, tempo
+
+    contexto['limites'].append(vetor)
+    contexto['compras'].append(resultados['compras'])
+    compras = np.array([resultados['compras'].get(nome, 0) for nome in solver.alimentos])
+    return resultados['objetivo'], resultados['solve_result'], compras, tempo
+
+def resolver_lote(catalogo, perfis, nutrientes=None, tolerancia=0.0, workers=None,
+                  restricoes_base=RESTRICOES_RELAXADAS, arquivo_saida=None, verbose=True):
+    """
+    Resolve a dieta de muitos perfis de necessidades de uma vez
+
+    Perfis iguais (ou quase, conforme `tolerancia`) são resolvidos uma única
+    vez. Os grupos são ordenados pelos limites e distribuídos em blocos
+    contíguos entre os workers, que mantêm o modelo carregado e partem da
+    solução do perfil mais próximo que já resolveram. Grupos cuja interseção
+    de limites é inviável são resolvidos de novo, pessoa a pessoa.
+
+    Args:
+        catalogo (CatalogoAlimentos): Catálogo de alimentos
+        perfis (pd.DataFrame | str): Tabela de perfis (ver ler_perfis)
+        nutrientes (list): Nutrientes dos perfis (padrão: os de restricoes_base)
+        tolerancia (float): Diferença relativa para agrupar perfis quase iguais
+        workers (int): Número de processos
+        restricoes_base (dict): Restrições que definem os nutrientes padrão
+        arquivo_saida (str): Caminho .parquet ou .csv para gravar os resultados
+        verbose (bool): Se True, exibe o resumo
+
+    Returns:
+        pd.DataFrame: Uma linha por perfil, com objetivo, status e porções por alimento
+    """
+    inicio = time.perf_counter()
+    base = normalizar_restricoes(restricoes_base)
+    nutrientes = nutrientes or [n for n in catalogo.nutrientes if n in base['n_min'] or n in base['n_max']]
+
+    ids, n_min, n_max = ler_perfis(perfis, nutrientes)
+    grupos, grupo_min, grupo_max = agrupar_perfis(n_min, n_max, tolerancia)
+
+    # Ordenar grupos para que perfis parecidos caiam no mesmo worker
+    ordem = np.lexsort(np.nan_to_num(grupo_min, neginf=0.0).T[::-1])
+    n_workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(ordem) // (4 * n_workers))
+
+    # Com vários workers, o catálogo vai para a memória compartilhada em vez de ser copiado a cada um
+    with catalogo.publicar() if n_workers > 1 else nullcontext() as publicado:
+        argumentos = (publicado.descritor if publicado else catalogo, nutrientes)
+        solucoes = mapear_em_paralelo(_resolver_perfil, [(grupo_min[g], grupo_max[g]) for g in ordem],
+                                      _criar_contexto_lote, argumentos, workers, chunksize)
+        por_grupo = dict(zip(ordem.tolist(), solucoes))
+        solucoes_por_perfil = [por_grupo[g] for g in grupos]
+        n_solucoes = len(solucoes)
+
+        # Grupos inviáveis com mais de um membro: resolver cada pessoa separadamente
+        tamanhos = np.bincount(grupos, minlength=len(grupo_min))
+        refazer = [p for p, g in enumerate(grupos) if por_grupo[g][2] is None and tamanhos[g] > 1]
+        if refazer:
+            individuais = mapear_em_paralelo(_resolver_perfil, [(n_min[p], n_max[p]) for p in refazer],
+                                             _criar_contexto_lote, argumentos, workers, chunksize)
+            for p, solucao in zip(refazer, individuais):
+                solucoes_por_perfil[p] = solucao
+            n_solucoes += len(refazer)
+
+    tabela = pd.DataFrame({
+        'perfil': ids,
+        'grupo': grupos,
+        'objetivo': [s[0] for s in solucoes_por_perfil],
+        'solve_result': [s[1] for s in solucoes_por_perfil],
+        'tempo_solucao': [s[3] for s in solucoes_por_perfil]
+    })
+    compras = np.vstack([s[2] if s[2] is not None else np.zeros(len(catalogo)) for s in solucoes_por_perfil]) \
+        if solucoes_por_perfil else np.empty((0, len(catalogo)))
+    tabela = pd.concat([tabela, pd.DataFrame(compras.astype(int), columns=catalogo.nomes)], axis=1)
+
+    tempo_total = time.perf_counter() - inicio
+    tabela.attrs['throughput'] = {
+        'perfis': len(ids),
+        'solucoes': n_solucoes,
+        'tempo_total': tempo_total,
+        'solucoes_por_segundo': n_solucoes / tempo_total if tempo_total > 0 else 0.0,
+        'perfis_por_segundo': len(ids) / tempo_total if tempo_total > 0 else 0.0
+    }
+
+    if arquivo_saida:
+        salvar_tabela(tabela, arquivo_saida)
+
+    if verbose:
+        info = tabela.attrs['throughput']
+        print("\n" + "="*60)
+        print("SOLUÇÃO EM LOTE DE PERFIS")
+        print("="*60)
+        print(f"Perfis: {info['perfis']} | grupos: {len(grupo_min)} | soluções: {info['solucoes']}")
+        print(f"Tempo total: {tempo_total:.2f} s")
+        print(f"Vazão: {info['solucoes_por_segundo']:.1f} soluções/s ({info['perfis_por_segundo']:.1f} perfis/s)")
+        print("="*60)
+
+    return tabela
+
+def salvar_tabela(tabela, arquivo_saida):
+    """
+    Grava uma tabela de resultados em Parquet (se houver suporte) ou CSV
+
+    Args:
+        tabela (pd.DataFrame): Resultados
+        arquivo_saida (str): Caminho .parquet ou .csv
+    """
+    if arquivo_saida.endswith('.parquet'):
+        try:
+            tabela.to_parquet(arquivo_saida, index=False)
+            print(f"Resultados salvos em {arquivo_saida}")
+            return
+        except ImportError:
+            arquivo_saida = arquivo_saida[:-len('.parquet')] + '.csv'
+            print("Suporte a Parquet indisponível; gravando CSV.")
+    tabela.to_csv(arquivo_saida, index=False)
+    print(f"Resultados salvos em {arquivo_saida}")
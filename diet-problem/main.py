@@ -12,14 +12,14 @@ até a análise dos resultados.
 
 import os
 import sys
+import shutil
 from datetime import datetime
 
-# Importar módulos do projeto
-from config import ALIMENTOS_DATA, RESTRICOES_ORIGINAIS, RESTRICOES_RELAXADAS
+# Importar módulos do projeto (solver, analyzer e armazenamento, que carregam
+# amplpy, matplotlib e pandas, são importados apenas nas opções que os usam)
+from config import ALIMENTOS_DATA, RESTRICOES_ORIGINAIS, RESTRICOES_RELAXADAS, CACHE_CONFIG, ARQUIVO_ESTADO
 from models import criar_modelos
 from data_handler import criar_todos_arquivos_dat, exibir_tabela_alimentos, comparar_restricoes
-from solver import DietSolver
-from analyzer import DietAnalyzer
 
 def exibir_menu():
     """Exibe o menu principal do programa"""
@@ -34,6 +34,7 @@ def exibir_menu():
     print("6. Comparar restrições nutricionais")
     print("7. Executar estudo completo (opções 1-5)")
     print("8. Limpar arquivos gerados")
+    print("9. Diagnosticar inviabilidade das restrições originais")
     print("0. Sair")
     print("="*60)
 
@@ -44,12 +45,22 @@ def limpar_arquivos():
     
     current_dir = os.getcwd()
     
+    # Armazenamento de resultados (resultados.jsonl, indice.jsonl), cache de soluções e gráficos
+    for diretorio in ('resultados', CACHE_CONFIG['diretorio'], 'graficos'):
+        caminho = os.path.join(current_dir, diretorio)
+        if os.path.isdir(caminho):
+            try:
+                shutil.rmtree(caminho)
+                print(f"Removido diretório: {caminho}")
+                arquivos_removidos += 1
+            except OSError as e:
+                print(f"Erro ao remover diretório {caminho}: {e}")
+    
     for root, dirs, files in os.walk(current_dir):
         # Handle __pycache__ directories
         if '__pycache__' in dirs:
             pycache_path = os.path.join(root, '__pycache__')
             try:
-                import shutil
                 shutil.rmtree(pycache_path)
                 print(f"Removido diretório: {pycache_path}")
                 arquivos_removidos += 1
@@ -60,7 +71,7 @@ def limpar_arquivos():
         for arquivo in files:
             if any(arquivo.endswith(ext) for ext in extensoes):
                 # Only remove files generated by this script, avoiding system files
-                if arquivo.startswith(('dieta', 'resultados', 'relatorio')):
+                if arquivo.startswith(('dieta', 'resultados', 'relatorio')) or arquivo == ARQUIVO_ESTADO:
                     file_path = os.path.join(root, arquivo)
                     try:
                         os.remove(file_path)
@@ -76,6 +87,8 @@ def limpar_arquivos():
 
 def executar_otimizacao_completa():
     """Executa todo o processo de otimização"""
+    from solver import DietSolver
+    
     print("\n" + "="*60)
     print("EXECUTANDO OTIMIZAÇÃO COMPLETA")
     print("="*60)
@@ -103,7 +116,7 @@ def executar_otimizacao_completa():
     try:
         resultados['basico'] = solver.resolver_modelo("dieta_basico.mod", "dieta_relaxado.dat")
         if resultados['basico'] and resultados['basico']['solve_result'] == 'optimal':
-            solver.salvar_resultados(resultados['basico'], "resultados_basico")
+            solver.salvar_resultados(resultados['basico'], "basico")
             print("✓ Modelo básico resolvido com sucesso!")
         else:
             print("✗ Falha ou solução não-ótima ao resolver modelo básico")
@@ -117,7 +130,7 @@ def executar_otimizacao_completa():
     try:
         resultados['diversificado'] = solver.resolver_modelo("dieta_diversificado.mod", "dieta_relaxado.dat")
         if resultados['diversificado'] and resultados['diversificado']['solve_result'] == 'optimal':
-            solver.salvar_resultados(resultados['diversificado'], "resultados_diversificado")
+            solver.salvar_resultados(resultados['diversificado'], "diversificado")
             print("✓ Modelo diversificado resolvido com sucesso!")
         else:
             print("✗ Falha ou solução não-ótima ao resolver modelo diversificado")
@@ -139,35 +152,57 @@ def executar_otimizacao_completa():
         )
     else:
         print("\nNão foi possível comparar soluções, pois uma ou ambas não foram resolvidas otimamente.")
+    
+    if solver.cache:
+        estatisticas = solver.cache.estatisticas()
+        print(f"\nCache de soluções: {estatisticas['acertos']} acerto(s), {estatisticas['falhas']} falha(s)")
+    
+    # Tempo de cada fase (inicialização, leitura, solve, extração) das soluções desta execução
+    from telemetria import resumir_telemetria, exibir_telemetria
+    exibir_telemetria(resumir_telemetria(resultados.values()))
         
     return bool(resultados)
 
+def diagnosticar_restricoes_originais():
+    """Mostra o menor afrouxamento das restrições originais que torna a dieta viável"""
+    from solver import DietSolver
+    
+    solver = DietSolver()
+    if not solver.ampl:
+        print("Erro: AMPL não está disponível. Verifique a instalação.")
+        return None
+    
+    return solver.diagnosticar_inviabilidade(RESTRICOES_ORIGINAIS, calcular_iis=True)
+
 def analisar_resultados():
     """Analisa resultados existentes"""
+    from analyzer import DietAnalyzer, sem_display
+    from armazenamento import DietResultStore
+    
     print("\n" + "="*60)
     print("ANALISANDO RESULTADOS")
     print("="*60)
     
-    analyzer = DietAnalyzer()
+    # Sem display, os gráficos são gravados em arquivo em vez de abrir janelas
+    analyzer = DietAnalyzer("graficos") if sem_display() else DietAnalyzer()
     
-    # Verificar quais arquivos de resultado existem
-    arquivos_resultado = []
-    if os.path.exists("resultados_basico.json"):
-        arquivos_resultado.append(("resultados_basico.json", "Solução Ótima"))
-    if os.path.exists("resultados_diversificado.json"):
-        arquivos_resultado.append(("resultados_diversificado.json", "Solução Diversificada"))
+    # Modelos com soluções no armazenamento (a mais recente de cada um)
+    armazenamento = DietResultStore()
+    nomes_modelos = {'basico': "Solução Ótima", 'diversificado': "Solução Diversificada"}
+    modelos = armazenamento.modelos()
     
-    if not arquivos_resultado:
-        print("Nenhum arquivo de resultado encontrado!")
+    if not modelos:
+        print("Nenhum resultado encontrado!")
         print("Execute primeiro a otimização (opção 4) para gerar resultados.")
         return
     
     resultados_carregados = []
     nomes_solucoes = []
     
-    for arquivo, nome in arquivos_resultado:
+    for modelo in modelos:
+        nome = nomes_modelos.get(modelo, f"Solução {modelo}")
         print(f"\nAnalisando {nome}...")
-        resultado = analyzer.carregar_resultados(arquivo)
+        resultado = analyzer.carregar_resultados(armazenamento, modelo)
         if resultado:
             resultados_carregados.append(resultado)
             nomes_solucoes.append(nome)
@@ -183,7 +218,7 @@ def analisar_resultados():
                 print(f"✗ Erro na análise de {nome}: {e}")
                 print("   Verifique se os dados nos resultados são válidos para geração de gráficos.")
     
-    if len(resultados_carregados) == 2:
+    if len(resultados_carregados) >= 2:
         print("\nComparando múltiplas soluções...")
         analyzer.comparar_multiplas_solucoes(
             resultados_carregados,
@@ -225,6 +260,8 @@ def main():
             print("="*60)
         elif escolha == '8':
             limpar_arquivos()
+        elif escolha == '9':
+            diagnosticar_restricoes_originais()
         elif escolha == '0':
             print("Saindo do programa. Até mais!")
             sys.exit()
@@ -232,4 +269,8 @@ def main():
             print("Opção inválida. Por favor, tente novamente.")
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # Modo em lote: python main.py --manifesto estudo.yaml
+        from manifesto import executar_linha_de_comando
+        sys.exit(executar_linha_de_comando())
     main()
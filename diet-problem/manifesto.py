@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*-
+"""
+manifesto.py - Execução não interativa de estudos da dieta a partir de um manifesto
+
+Autor: José Brito
+
+O manifesto (JSON ou YAML) descreve modelos, conjuntos de dados, conjuntos de
+restrições, estudos (modelo + dados + restrições) e análises:
+
+    {
+      "diretorio": "estudo",
+      "workers": 4,
+      "modelos": {"basico": {}, "diversificado": {"diversificado": true}},
+      "dados": {"padrao": {}, "tabela": {"csv": "alimentos.csv"}},
+      "restricoes": {"relaxadas": "RESTRICOES_RELAXADAS",
+                     "proteica": {"n_min": {"proteina": 80}, "n_max": {"energia": 2500}}},
+      "estudos": [{"nome": "otima", "modelo": "basico", "dados": "padrao", "restricoes": "relaxadas"}],
+      "analises": [{"nome": "comparacao", "estudos": ["otima"], "graficos": true, "relatorio": true}]
+    }
+
+Cada item vira uma etapa de um grafo (modelo → dados → solução → análise).
+Etapas independentes rodam em processos separados e etapas cuja assinatura
+(especificação + entradas) não mudou desde a última execução são puladas.
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import contextlib
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import config
+from config import ALIMENTOS_DATA, SOLVER_CONFIG, ARQUIVO_ESTADO
+
+try:
+    import yaml
+    YAML_DISPONIVEL = True
+except ImportError:
+    YAML_DISPONIVEL = False
+
+def carregar_manifesto(caminho):
+    """
+    Lê um manifesto em JSON ou YAML
+
+    Args:
+        caminho (str): Caminho do manifesto (.json, .yaml ou .yml)
+
+    Returns:
+        dict: Manifesto
+    """
+    with open(caminho, 'r', encoding='utf-8') as f:
+        if caminho.endswith(('.yaml', '.yml')):
+            if not YAML_DISPONIVEL:
+                raise ImportError("PyYAML não está instalado. Use 'pip install pyyaml' ou um manifesto JSON.")
+            return yaml.safe_load(f)
+        return json.load(f)
+
+def _assinatura(*partes):
+    """Hash estável de objetos serializáveis em JSON"""
+    texto = json.dumps(partes, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()[:16]
+
+def _resolver_restricoes(especificacao):
+    """Aceita o nome de uma constante de config (ex.: 'RESTRICOES_RELAXADAS') ou um dicionário"""
+    from catalogo import normalizar_restricoes
+
+    if isinstance(especificacao, str):
+        if not hasattr(config, especificacao):
+            raise ValueError(f"Conjunto de restrições desconhecido: {especificacao}")
+        especificacao = getattr(config, especificacao)
+    return normalizar_restricoes(especificacao)
+
+def _conteudo_dados(especificacao, base):
+    """Conteúdo que identifica um conjunto de dados (hash do CSV ou os dados de config)"""
+    from armazenamento import hash_arquivo
+
+    if 'csv' in especificacao:
+        return {'csv': hash_arquivo(os.path.join(base, especificacao['csv'])),
+                'opcoes': especificacao}
+    return {'alimentos': ALIMENTOS_DATA, 'opcoes': especificacao}
+
+def montar_grafo(manifesto, base="."):
+    """
+    Monta as etapas do manifesto com dependências e assinaturas
+
+    Args:
+        manifesto (dict): Manifesto carregado
+        base (str): Diretório do manifesto (caminhos relativos de CSV partem dele)
+
+    Returns:
+        dict: Etapas por identificador, em ordem topológica
+    """
+    from models import gerar_modelo
+
+    diretorio = os.path.abspath(os.path.join(base, manifesto.get('diretorio', 'estudo_lote')))
+    etapas = {}
+
+    def adicionar(identificador, tipo, dependencias, parametros, *conteudo):
+        assinatura = _assinatura(tipo, parametros, conteudo, [etapas[d]['assinatura'] for d in dependencias])
+        etapas[identificador] = {'id': identificador, 'tipo': tipo, 'dependencias': dependencias,
+                                 'parametros': parametros, 'assinatura': assinatura}
+
+    for nome, opcoes in (manifesto.get('modelos') or {}).items():
+        opcoes = opcoes or {}
+        texto = gerar_modelo(None, diversificado=opcoes.get('diversificado', False),
+                             elastico=opcoes.get('elastico', False), reforcado=opcoes.get('reforcado', False))
+        adicionar(f"modelo:{nome}", 'modelo', [],
+                  {'texto': texto, 'arquivo': os.path.join(diretorio, f"modelo_{nome}")})
+
+    restricoes = {nome: _resolver_restricoes(r) for nome, r in (manifesto.get('restricoes') or {}).items()}
+    dados = manifesto.get('dados') or {}
+
+    for estudo in manifesto.get('estudos') or []:
+        nome = estudo['nome']
+        for chave, conjunto in (('modelo', manifesto.get('modelos') or {}), ('dados', dados),
+                                ('restricoes', restricoes)):
+            if estudo[chave] not in conjunto:
+                raise ValueError(f"Estudo '{nome}': {chave} '{estudo[chave]}' não declarado no manifesto")
+
+        id_dados = f"dados:{estudo['dados']}:{estudo['restricoes']}"
+        if id_dados not in etapas:
+            especificacao = dict(dados[estudo['dados']] or {})
+            if 'csv' in especificacao:
+                especificacao['csv'] = os.path.abspath(os.path.join(base, especificacao['csv']))
+            adicionar(id_dados, 'dados', [], {
+                'dados': especificacao,
+                'restricoes': restricoes[estudo['restricoes']],
+                'arquivo': os.path.join(diretorio, f"dados_{estudo['dados']}_{estudo['restricoes']}")
+            }, _conteudo_dados(especificacao, base))
+
+        adicionar(f"resolver:{nome}", 'resolver', [f"modelo:{estudo['modelo']}", id_dados], {
+            'nome': nome,
+            'dados': etapas[id_dados]['parametros']['dados'],
+            'arquivo_mod': etapas[f"modelo:{estudo['modelo']}"]['parametros']['arquivo'] + ".mod",
+            'arquivo_dat': etapas[id_dados]['parametros']['arquivo'] + ".dat",
+            'armazenamento': os.path.join(diretorio, "resultados")
+        }, SOLVER_CONFIG)
+
+    for analise in manifesto.get('analises') or []:
+        dependencias = []
+        for estudo in analise.get('estudos', []):
+            if f"resolver:{estudo}" not in etapas:
+                raise ValueError(f"Análise '{analise['nome']}': estudo '{estudo}' não declarado no manifesto")
+            dependencias.append(f"resolver:{estudo}")
+        adicionar(f"analise:{analise['nome']}", 'analise', dependencias, {
+            'nome': analise['nome'],
+            'estudos': analise.get('estudos', []),
+            'graficos': analise.get('graficos', True),
+            'relatorio': analise.get('relatorio', True),
+            'diretorio': os.path.join(diretorio, "analises", analise['nome']),
+            'armazenamento': os.path.join(diretorio, "resultados")
+        })
+
+    return etapas
+
+def _carregar_catalogo(especificacao):
+    """Catálogo de um conjunto de dados do manifesto"""
+    from catalogo import catalogo_de_dicionario, carregar_catalogo_csv
+
+    if 'csv' in especificacao:
+        return carregar_catalogo_csv(especificacao['csv'], especificacao.get('nutrientes'),
+                                     especificacao.get('coluna_nome', 'nome'))
+    return catalogo_de_dicionario(ALIMENTOS_DATA, especificacao.get('nutrientes'))
+
+def _executar_etapa(etapa, arquivo_log):
+    """
+    Executa uma etapa (em um processo do pool), com a saída redirecionada para o log
+
+    Returns:
+        dict: 'saidas' (arquivos gerados) e, nas soluções, 'run_id'
+    """
+    parametros = etapa['parametros']
+    os.makedirs(os.path.dirname(arquivo_log), exist_ok=True)
+
+    with open(arquivo_log, 'w', encoding='utf-8') as log, contextlib.redirect_stdout(log):
+        if etapa['tipo'] == 'modelo':
+            from models import salvar_modelo
+            os.makedirs(os.path.dirname(parametros['arquivo']), exist_ok=True)
+            salvar_modelo(parametros['texto'], parametros['arquivo'])
+            return {'saidas': [parametros['arquivo'] + ".mod"]}
+
+        if etapa['tipo'] == 'dados':
+            from data_handler import criar_arquivo_dat_catalogo
+            os.makedirs(os.path.dirname(parametros['arquivo']), exist_ok=True)
+            criar_arquivo_dat_catalogo(_carregar_catalogo(parametros['dados']),
+                                       parametros['restricoes'], parametros['arquivo'])
+            return {'saidas': [parametros['arquivo'] + ".dat"]}
+
+        if etapa['tipo'] == 'resolver':
+            from solver import DietSolver
+            from armazenamento import DietResultStore
+
+            solver = DietSolver(_carregar_catalogo(parametros['dados']))
+            resultados = solver.resolver_modelo(parametros['arquivo_mod'], parametros['arquivo_dat'], verbose=True)
+            if not resultados or resultados['objetivo'] is None:
+                raise RuntimeError(f"Solução não encontrada ({resultados['solve_result'] if resultados else 'erro'})")
+            run_id = solver.salvar_resultados(resultados, parametros['nome'],
+                                              DietResultStore(parametros['armazenamento']))
+            return {'saidas': [], 'run_id': run_id, 'objetivo': resultados['objetivo'],
+                    'solve_result': resultados['solve_result']}
+
+        if etapa['tipo'] == 'analise':
+            from analyzer import DietAnalyzer
+            from armazenamento import DietResultStore
+
+            armazenamento = DietResultStore(parametros['armazenamento'])
+            analyzer = DietAnalyzer(parametros['diretorio'])
+            lista = [analyzer.carregar_resultados(armazenamento, estudo) for estudo in parametros['estudos']]
+            saidas = []
+            if parametros['graficos']:
+                for caminhos in analyzer.renderizar_lote(lista, parametros['estudos'], workers=1):
+                    saidas.extend(caminhos)
+                if len(lista) > 1:
+                    saidas.append(analyzer.comparar_multiplas_solucoes(lista, parametros['estudos']))
+            if parametros['relatorio']:
+                for estudo, resultados in zip(parametros['estudos'], lista):
+                    nome = os.path.join(parametros['diretorio'], f"relatorio_{estudo}")
+                    analyzer.criar_relatorio_completo(resultados, nome)
+                    saidas.append(nome + ".txt")
+            return {'saidas': [s for s in saidas if s]}
+
+    raise ValueError(f"Tipo de etapa desconhecido: {etapa['tipo']}")
+
+def _atualizada(etapa, estado_anterior):
+    """Indica se a etapa já foi executada com a mesma assinatura e suas saídas ainda existem"""
+    if not estado_anterior or estado_anterior.get('assinatura') != etapa['assinatura']:
+        return False
+    if not all(os.path.exists(s) for s in estado_anterior.get('saidas', [])):
+        return False
+    if estado_anterior.get('run_id'):
+        from armazenamento import DietResultStore
+        armazenamento = DietResultStore(etapa['parametros']['armazenamento'])
+        return not armazenamento.selecionar(run_ids=[estado_anterior['run_id']]).empty
+    return True
+
+def executar_manifesto(caminho, forcar=False, workers=None):
+    """
+    Executa todas as etapas de um manifesto respeitando as dependências
+
+    Args:
+        caminho (str): Caminho do manifesto
+        forcar (bool): Se True, executa todas as etapas mesmo que atualizadas
+        workers (int): Número de processos (padrão: 'workers' do manifesto ou número de CPUs)
+
+    Returns:
+        dict: Resumo com status ('executada', 'atualizada', 'erro', 'bloqueada') e tempo de cada etapa
+    """
+    inicio = time.perf_counter()
+    manifesto = carregar_manifesto(caminho)
+    base = os.path.dirname(os.path.abspath(caminho))
+    etapas = montar_grafo(manifesto, base)
+
+    diretorio = os.path.abspath(os.path.join(base, manifesto.get('diretorio', 'estudo_lote')))
+    os.makedirs(diretorio, exist_ok=True)
+    arquivo_estado = os.path.join(diretorio, ARQUIVO_ESTADO)
+    estado = {}
+    if os.path.exists(arquivo_estado):
+        with open(arquivo_estado, 'r', encoding='utf-8') as f:
+            estado = json.load(f)
+
+    resumo = {nome: {'id': nome, 'tipo': e['tipo'], 'status': 'pendente', 'tempo': 0.0}
+              for nome, e in etapas.items()}
+    pendentes = dict(etapas)
+    em_execucao = {}
+    workers = workers or manifesto.get('workers') or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while pendentes or em_execucao:
+            for nome, etapa in list(pendentes.items()):
+                status_dependencias = [resumo[d]['status'] for d in etapa['dependencias']]
+                if any(s in ('erro', 'bloqueada') for s in status_dependencias):
+                    resumo[nome]['status'] = 'bloqueada'
+                    del pendentes[nome]
+                elif all(s in ('executada', 'atualizada') for s in status_dependencias):
+                    del pendentes[nome]
+                    if not forcar and _atualizada(etapa, estado.get(nome)):
+                        resumo[nome]['status'] = 'atualizada'
+                        continue
+                    arquivo_log = os.path.join(diretorio, "logs", nome.replace(':', '_') + ".log")
+                    futuro = executor.submit(_executar_etapa, etapa, arquivo_log)
+                    em_execucao[futuro] = (nome, time.perf_counter())
+                    resumo[nome].update(status='executando', log=arquivo_log)
+
+            if not em_execucao:
+                # As etapas estão em ordem topológica: cada passada sem nada em
+                # execução resolve ao menos uma etapa pendente
+                continue
+
+            concluidos, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+            for futuro in concluidos:
+                nome, inicio_etapa = em_execucao.pop(futuro)
+                resumo[nome]['tempo'] = time.perf_counter() - inicio_etapa
+                try:
+                    saida = futuro.result()
+                    resumo[nome].update(status='executada', **saida)
+                    estado[nome] = dict(saida, assinatura=etapas[nome]['assinatura'])
+                except Exception as e:
+                    resumo[nome].update(status='erro', erro=str(e))
+                    estado.pop(nome, None)
+
+    with open(arquivo_estado, 'w', encoding='utf-8') as f:
+        json.dump(estado, f, indent=2, ensure_ascii=False)
+
+    contagem = {}
+    for etapa in resumo.values():
+        contagem[etapa['status']] = contagem.get(etapa['status'], 0) + 1
+
+    return {
+        'manifesto': os.path.abspath(caminho),
+        'timestamp': datetime.now().isoformat(),
+        'sucesso': all(e['status'] in ('executada', 'atualizada') for e in resumo.values()),
+        'tempo_total': time.perf_counter() - inicio,
+        'contagem': contagem,
+        'etapas': list(resumo.values())
+    }
+
+def executar_linha_de_comando(argumentos=None):
+    """
+    Ponto de entrada do modo em lote (python main.py --manifesto estudo.yaml)
+
+    Args:
+        argumentos (list): Argumentos da linha de comando (padrão: sys.argv[1:])
+
+    Returns:
+        int: Código de saída (0 se todas as etapas terminaram bem)
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Executa estudos da dieta a partir de um manifesto")
+    parser.add_argument("--manifesto", required=True, help="Manifesto JSON ou YAML")
+    parser.add_argument("--forcar", action="store_true", help="Executa também as etapas atualizadas")
+    parser.add_argument("--workers", type=int, default=None, help="Número de processos")
+    parser.add_argument("--resumo", default=None, help="Arquivo JSON para gravar o resumo")
+    opcoes = parser.parse_args(argumentos)
+
+    try:
+        resumo = executar_manifesto(opcoes.manifesto, opcoes.forcar, opcoes.workers)
+    except (OSError, ValueError, ImportError) as e:
+        resumo = {'manifesto': opcoes.manifesto, 'sucesso': False, 'erro': str(e), 'etapas': []}
+
+    texto = json.dumps(resumo, indent=2, ensure_ascii=False, default=str)
+    if opcoes.resumo:
+        with open(opcoes.resumo, 'w', encoding='utf-8') as f:
+            f.write(texto)
+    print(texto)
+    return 0 if resumo['sucesso'] else 1
+
+if __name__ == "__main__":
+    sys.exit(executar_linha_de_comando())
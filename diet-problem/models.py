@@ -5,6 +5,8 @@ models.py - Definições dos modelos AMPL para o problema da dieta
 Autor: José Brito
 """
 
+from config import PESO_DIVERSIDADE, REGISTRO_NUTRIENTES
+
 # Modelo básico da dieta
 MODELO_BASICO = """
 # Definição do conjunto de alimentos
@@ -72,7 +74,7 @@ subject to Ativa_Escolhido {j in ALIMENTO}:
 # Função objetivo: minimizar o custo total da dieta, incentivando a diversidade
 minimize Custo_Total:
     sum{j in ALIMENTO} preco[j] * Compra[j]
-    + 0.5 * (card(ALIMENTO) - sum{j in ALIMENTO} Escolhido[j]);  # Penaliza poucas escolhas
+    + """ + f"{PESO_DIVERSIDADE:g}" + """ * (card(ALIMENTO) - sum{j in ALIMENTO} Escolhido[j]);  # Penaliza poucas escolhas
 
 # Restrições de nutrientes
 subject to Energia:    n_min[1] <= sum{j in ALIMENTO} energia[j] * Compra[j]    <= n_max[1];
@@ -86,6 +88,295 @@ subject to Limite_Individual {j in ALIMENTO}:
     Compra[j] <= 4;
 """
 
+def gerar_modelo(registro=None, *, diversificado=False, elastico=False, reforcado=False, cortes=False,
+                 proximal=False, compartilhado=False, pareto=False, limite_individual=True):
+    """
+    Gera um modelo AMPL indexado pelo conjunto NUTRIENTE
+    
+    Em vez de uma restrição por nutriente, o conteúdo nutricional é um
+    parâmetro conteudo{ALIMENTO, NUTRIENTE} (esparso, padrão 0) e há uma
+    única restrição indexada. Os nutrientes efetivos vêm do arquivo .dat.
+    As variantes são escolhidas apenas por palavra-chave.
+    
+    Args:
+        registro (dict): Registro de nutrientes (nome -> rótulo/unidade), usado para documentar o modelo
+        diversificado (bool): Se True, inclui as variáveis e restrições de diversidade
+        elastico (bool): Se True, adiciona folgas Falta/Excesso penalizadas em cada nutriente
+        reforcado (bool): Se True (com diversificado), usa big-M apertado e Compra >= Escolhido
+        cortes (bool): Se True (com reforcado), inclui os cortes de cardinalidade e de cobertura
+            cujos dados são acrescentados ao .dat por data_handler.acrescentar_cortes_dat()
+        proximal (bool): Se True, acrescenta ao objetivo o preço dual w e o termo proximal
+            (norma 1) em torno de x_medio, usados no hedging progressivo (estocastico.py)
+        compartilhado (bool): Se True, acrescenta o preço dual dos recursos compartilhados
+            (ajuste) e um orçamento individual, usados no planejamento domiciliar (domicilio.py)
+        pareto (bool): Se True (com reforcado), troca o peso fixo da diversidade pelo parâmetro
+            peso_diversidade e exige min_distintos alimentos, usados na fronteira de Pareto (pareto.py)
+        limite_individual (bool): Se False (com diversificado), omite Limite_Individual porque o
+            teto de 4 porções já foi incorporado a max_porcoes (presolve.py)
+        
+    Returns:
+        str: Modelo AMPL
+    """
+    linhas = [
+        "",
+        "# Definição dos conjuntos de alimentos e nutrientes",
+        "set ALIMENTO;",
+        "set NUTRIENTE;",
+    ]
+    
+    if registro:
+        linhas.append("")
+        linhas.append("# Nutrientes do registro:")
+        for nome, info in registro.items():
+            linhas.append(f"#   {nome:<12} {info.get('rotulo', nome)} ({info.get('unidade', '')})")
+    
+    linhas += [
+        "",
+        "# Parâmetros dos alimentos",
+        "param max_porcoes{ALIMENTO};             # Quantidade máxima permitida de cada alimento",
+        "param tamanho{ALIMENTO} default 0;       # Tamanho da porção (em gramas ou mL)",
+        "param preco{ALIMENTO};                   # Preço (unidade monetária)",
+        "param conteudo{ALIMENTO, NUTRIENTE} default 0;  # Nutriente por porção",
+        "",
+        "# Limites mínimos e máximos para nutrientes",
+        "param n_min{NUTRIENTE} default 0;         # Valores mínimos recomendados",
+        "param n_max{NUTRIENTE} default Infinity;  # Valores máximos permitidos",
+        "",
+        "# Variáveis de decisão",
+        "var Compra{j in ALIMENTO} integer >= 0, <= max_porcoes[j];",
+    ]
+    
+    # Termo de penalidade das folgas elásticas na função objetivo
+    penalidade = ""
+    if elastico:
+        linhas += [
+            "",
+            "# Folgas elásticas: violação abaixo do mínimo e acima do máximo de cada nutriente",
+            "param penalidade{NUTRIENTE} default 100000;",
+            "var Falta{NUTRIENTE} >= 0;",
+            "var Excesso{NUTRIENTE} >= 0;",
+        ]
+        penalidade = "\n    + sum{i in NUTRIENTE} penalidade[i] * (Falta[i] + Excesso[i])"
+    
+    if proximal:
+        linhas += [
+            "",
+            "# Hedging progressivo: preço da não antecipatividade e termo proximal em norma 1",
+            "param w{ALIMENTO} default 0;             # Multiplicador do cenário",
+            "param x_medio{ALIMENTO} default 0;       # Compra média entre os cenários",
+            "param rho{ALIMENTO} default 0;           # Peso do termo proximal",
+            "var Acima{ALIMENTO} >= 0;",
+            "var Abaixo{ALIMENTO} >= 0;",
+            "",
+            "subject to Desvio_Media {j in ALIMENTO}:",
+            "    Compra[j] - x_medio[j] = Acima[j] - Abaixo[j];",
+        ]
+        penalidade += "\n    + sum{j in ALIMENTO} (w[j] * Compra[j] + rho[j] * (Acima[j] + Abaixo[j]))"
+    
+    if compartilhado:
+        linhas += [
+            "",
+            "# Recursos compartilhados: preço dual (multiplicadores) e orçamento individual",
+            "param ajuste{ALIMENTO} default 0;        # Custo adicional por porção",
+            "param orcamento default Infinity;         # Gasto máximo com as compras",
+            "",
+            "subject to Orcamento:",
+            "    sum{j in ALIMENTO} preco[j] * Compra[j] <= orcamento;",
+        ]
+        penalidade += "\n    + sum{j in ALIMENTO} ajuste[j] * Compra[j]"
+    
+    reforcado = reforcado and diversificado
+    if reforcado:
+        # Os limites de nutrientes só limitam as compras quando não há folgas elásticas
+        teto_nutrientes = "" if elastico else (
+            ",\n    min{i in NUTRIENTE: conteudo[j,i] > 0 and n_max[i] < Infinity} floor(n_max[i] / conteudo[j,i])"
+        )
+        linhas += [
+            "",
+            "# Menor limite válido de Compra[j]: porções máximas, limite individual e nutrientes",
+            "param teto{j in ALIMENTO} := min(max_porcoes[j], 4" + teto_nutrientes + ");",
+            "",
+            "# Variável auxiliar para indicar se um alimento foi escolhido",
+            "var Escolhido{j in ALIMENTO} binary;",
+            "",
+            "# Escolhido vale 1 se e somente se o alimento é comprado (big-M = teto)",
+            "subject to Ativa_Escolhido {j in ALIMENTO}:",
+            "    Compra[j] <= teto[j] * Escolhido[j];",
+            "subject to Compra_Escolhido {j in ALIMENTO}:",
+            "    Compra[j] >= Escolhido[j];",
+            "",
+        ]
+        if pareto:
+            linhas += [
+                "# Fronteira de Pareto: peso da diversidade e restrição épsilon de alimentos distintos",
+                "param peso_diversidade default 0;",
+                "param min_distintos default 0;",
+                "",
+                "subject to Diversidade_Minima:",
+                "    sum{j in ALIMENTO} Escolhido[j] >= min_distintos;",
+                "",
+            ]
+    elif diversificado:
+        linhas += [
+            "",
+            "# Variável auxiliar para indicar se um alimento foi escolhido",
+            "var Escolhido{j in ALIMENTO} binary;",
+            "",
+            "# Restrição para ativar Escolhido apenas se Compra[j] for maior que zero",
+            "subject to Ativa_Escolhido {j in ALIMENTO}:",
+            "    Compra[j] <= max_porcoes[j] * Escolhido[j];",
+            "",
+        ]
+    
+    if diversificado:
+        peso = "peso_diversidade" if reforcado and pareto else f"{PESO_DIVERSIDADE:g}"
+        linhas += [
+            "# Função objetivo: minimizar o custo total da dieta, incentivando a diversidade",
+            "minimize Custo_Total:",
+            "    sum{j in ALIMENTO} preco[j] * Compra[j]",
+            "    # Penaliza poucas escolhas",
+            "    + " + peso + " * (card(ALIMENTO) - sum{j in ALIMENTO} Escolhido[j])" + penalidade + ";",
+        ]
+    else:
+        linhas += [
+            "",
+            "# Função objetivo: minimizar o custo total da dieta",
+            "minimize Custo_Total: sum{j in ALIMENTO} preco[j] * Compra[j]" + penalidade + ";",
+        ]
+    
+    linhas += [
+        "",
+        "# Restrições de nutrientes (uma por elemento de NUTRIENTE)",
+        "subject to Limites_Nutrientes {i in NUTRIENTE}:",
+        "    n_min[i] <= sum{j in ALIMENTO} conteudo[j,i] * Compra[j]"
+        + (" + Falta[i] - Excesso[i]" if elastico else "") + " <= n_max[i];",
+    ]
+    
+    if diversificado and not reforcado and limite_individual:
+        linhas += [
+            "",
+            "# Restrição para evitar que um único alimento seja dominante (máximo de 4 porções por alimento)",
+            "subject to Limite_Individual {j in ALIMENTO}:",
+            "    Compra[j] <= 4;",
+        ]
+    
+    # Cortes válidos apenas para a formulação reforçada sem folgas elásticas
+    if reforcado and cortes and not elastico:
+        linhas += [
+            "",
+            "# Cortes válidos (dados gerados por formulacao.py)",
+            "param min_escolhidos default 0;           # Alimentos distintos necessários",
+            "set COBERTURA default {};                 # Coberturas mínimas dos limites máximos",
+            "set ITENS_COBERTURA{COBERTURA} within ALIMENTO;",
+            "",
+            "subject to Corte_Cardinalidade:",
+            "    sum{j in ALIMENTO} Escolhido[j] >= min_escolhidos;",
+            "subject to Corte_Cobertura {c in COBERTURA}:",
+            "    sum{j in ITENS_COBERTURA[c]} Escolhido[j] <= card(ITENS_COBERTURA[c]) - 1;",
+        ]
+    
+    return "\n".join(linhas) + "\n"
+
+# Forma extensiva do modelo estocástico: compras únicas, folgas por cenário de conteúdo nutricional
+MODELO_ESTOCASTICO = """
+# Definição dos conjuntos
+set ALIMENTO;
+set NUTRIENTE;
+set CENARIO;
+
+# Parâmetros dos alimentos
+param max_porcoes{ALIMENTO};               # Quantidade máxima permitida de cada alimento
+param tamanho{ALIMENTO} default 0;         # Tamanho da porção (em gramas ou mL)
+param preco{ALIMENTO};                     # Preço (unidade monetária)
+param conteudo{ALIMENTO, NUTRIENTE, CENARIO} default 0;  # Nutriente por porção em cada cenário
+param prob{CENARIO} default 1 / card(CENARIO);           # Probabilidade do cenário
+
+# Limites e penalidade por unidade de violação
+param n_min{NUTRIENTE} default 0;
+param n_max{NUTRIENTE} default Infinity;
+param penalidade{NUTRIENTE} default 100000;
+
+# Compras decididas antes de conhecer o cenário; folgas por cenário
+var Compra{j in ALIMENTO} integer >= 0, <= max_porcoes[j];
+var Falta{NUTRIENTE, CENARIO} >= 0;
+var Excesso{NUTRIENTE, CENARIO} >= 0;
+
+# Função objetivo: custo das compras mais a penalidade esperada das violações
+minimize Custo_Total:
+    sum{j in ALIMENTO} preco[j] * Compra[j]
+    + sum{s in CENARIO} prob[s] * sum{i in NUTRIENTE} penalidade[i] * (Falta[i,s] + Excesso[i,s]);
+
+# Restrições de nutrientes em cada cenário
+subject to Limites_Nutrientes {i in NUTRIENTE, s in CENARIO}:
+    n_min[i] <= sum{j in ALIMENTO} conteudo[j,i,s] * Compra[j] + Falta[i,s] - Excesso[i,s] <= n_max[i];
+"""
+
+# Modelo de planejamento para vários dias (indexado por ALIMENTO, NUTRIENTE e DIA)
+MODELO_HORIZONTE = """
+# Definição dos conjuntos
+set ALIMENTO;
+set NUTRIENTE;
+
+param horizonte integer > 0;               # Número total de dias do plano
+param dias integer > 0, <= horizonte default horizonte;  # Último dia considerado (janela)
+param dia_inicio integer >= 1 default 1;   # Dias anteriores já estão fixados
+set DIA := 1..dias;
+set SEMANA := 1..floor(dias / 7);          # Apenas semanas completas
+
+# Parâmetros dos alimentos
+param max_porcoes{ALIMENTO};               # Porções máximas consumidas por dia
+param tamanho{ALIMENTO} default 0;
+param preco{ALIMENTO};                     # Preço por pacote
+param porcoes_pacote{ALIMENTO} default 1;  # Porções obtidas em cada pacote comprado
+param estoque_inicial{ALIMENTO} default 0;
+param max_estoque{ALIMENTO} default Infinity;
+param max_dias_semana{ALIMENTO} default 7; # Repetição máxima em qualquer janela de 7 dias
+param conteudo{ALIMENTO, NUTRIENTE} default 0;
+
+# Limites diários e semanais de nutrientes
+param n_min{NUTRIENTE} default 0;
+param n_max{NUTRIENTE} default Infinity;
+param semana_min{NUTRIENTE} default 0;
+param semana_max{NUTRIENTE} default Infinity;
+
+# Valores fixados dos dias anteriores a dia_inicio (horizonte rolante)
+param compra_fixada{ALIMENTO, DIA} default 0;
+param consumo_fixado{ALIMENTO, DIA} default 0;
+
+# Variáveis de decisão
+var Compra{ALIMENTO, DIA} integer >= 0;
+var Consumo{j in ALIMENTO, DIA} integer >= 0, <= max_porcoes[j];
+var Usa{ALIMENTO, DIA} binary;
+var Estoque{j in ALIMENTO, 0..dias} >= 0, <= max_estoque[j];
+
+# Função objetivo: minimizar o custo total das compras no horizonte
+minimize Custo_Total: sum{j in ALIMENTO, d in DIA} preco[j] * Compra[j,d];
+
+# Estoque transportado de um dia para o outro
+subject to Estoque_Inicial {j in ALIMENTO}:
+    Estoque[j,0] = estoque_inicial[j];
+subject to Balanco {j in ALIMENTO, d in DIA}:
+    Estoque[j,d] = Estoque[j,d-1] + porcoes_pacote[j] * Compra[j,d] - Consumo[j,d];
+
+# Limites diários e semanais de nutrientes
+subject to Nutrientes_Diarios {i in NUTRIENTE, d in DIA}:
+    n_min[i] <= sum{j in ALIMENTO} conteudo[j,i] * Consumo[j,d] <= n_max[i];
+subject to Nutrientes_Semanais {i in NUTRIENTE, s in SEMANA}:
+    semana_min[i] <= sum{j in ALIMENTO, d in 7*(s-1)+1..7*s} conteudo[j,i] * Consumo[j,d] <= semana_max[i];
+
+# Limite de repetição de cada alimento em qualquer janela de 7 dias
+subject to Ativa_Uso {j in ALIMENTO, d in DIA}:
+    Consumo[j,d] <= max_porcoes[j] * Usa[j,d];
+subject to Repeticao {j in ALIMENTO, d in DIA: d >= 7}:
+    sum{k in d-6..d} Usa[j,k] <= max_dias_semana[j];
+
+# Dias já decididos em janelas anteriores
+subject to Fixa_Compra {j in ALIMENTO, d in DIA: d < dia_inicio}:
+    Compra[j,d] = compra_fixada[j,d];
+subject to Fixa_Consumo {j in ALIMENTO, d in DIA: d < dia_inicio}:
+    Consumo[j,d] = consumo_fixado[j,d];
+"""
+
 def salvar_modelo(modelo_str, nome_arquivo):
     """
     Salva o modelo AMPL em um arquivo .mod
@@ -104,6 +395,10 @@ def criar_modelos():
     """
     salvar_modelo(MODELO_BASICO, "dieta_basico")
     salvar_modelo(MODELO_DIVERSIFICADO, "dieta_diversificado")
+    # A formulação reforçada usa o modelo indexado (dados em dieta_catalogo_relaxado.dat)
+    salvar_modelo(gerar_modelo(REGISTRO_NUTRIENTES, diversificado=True, reforcado=True),
+                  "dieta_diversificado_reforcado")
+    salvar_modelo(MODELO_HORIZONTE, "dieta_horizonte")
     print("Todos os modelos foram criados com sucesso!")
 
 if __name__ == "__main__":
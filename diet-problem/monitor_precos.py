@@ -0,0 +1,416 @@
+# -*- coding: utf-8 -*-
+"""
+monitor_precos.py - Acompanhamento de um feed de preços com re-otimização sob demanda
+
+Autor: José Brito
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import numpy as np
+from config import RESTRICOES_RELAXADAS, MONITOR_CONFIG
+from catalogo import catalogo_padrao, normalizar_restricoes
+
+# Ações registradas para cada atualização de preços
+ACOES = ('sem_mudanca', 'mantido', 'reotimizado', 'falha')
+
+
+def ler_atualizacao(linha):
+    """
+    Interpreta uma linha do feed de preços
+
+    Cada linha é um objeto JSON com os preços alterados e, opcionalmente,
+    o instante (epoch, em segundos) em que o fornecedor publicou a mudança:
+        {"ts": 1735689600.25, "precos": {"Aveia": 0.62, "Frango": 2.45}}
+
+    Args:
+        linha (str): Linha do arquivo ou stream
+
+    Returns:
+        tuple: (preços por alimento, instante de publicação ou None); None para linhas vazias
+    """
+    linha = linha.strip()
+    if not linha:
+        return None
+    dados = json.loads(linha)
+    precos = dados.get('precos')
+    if not isinstance(precos, dict):
+        raise ValueError("Atualização sem o objeto 'precos'")
+    return {str(nome): float(preco) for nome, preco in precos.items()}, dados.get('ts')
+
+def seguir_arquivo(caminho, intervalo=MONITOR_CONFIG['intervalo_leitura'], do_inicio=True, ocioso=None):
+    """
+    Lê as linhas de um arquivo à medida que são acrescentadas (como tail -f)
+
+    Args:
+        caminho (str): Arquivo de preços
+        intervalo (float): Espera (s) entre leituras sem linhas novas
+        do_inicio (bool): Se False, ignora as linhas já existentes
+        ocioso (float): Encerra após esse tempo (s) sem linhas novas (None: segue indefinidamente)
+
+    Yields:
+        str: Linhas completas
+    """
+    with open(caminho, 'r', encoding='utf-8') as f:
+        if not do_inicio:
+            f.seek(0, os.SEEK_END)
+        pendente, ultima = '', time.monotonic()
+        while True:
+            linha = f.readline()
+            if linha:
+                # Uma linha ainda sendo escrita só é entregue quando termina
+                pendente += linha
+                if pendente.endswith('\n'):
+                    yield pendente
+                    pendente, ultima = '', time.monotonic()
+                continue
+            if ocioso is not None and time.monotonic() - ultima > ocioso:
+                if pendente:
+                    yield pendente
+                return
+            time.sleep(intervalo)
+
+def gerar_feed(caminho, catalogo=None, n_atualizacoes=100, intervalo=0.1, config=MONITOR_CONFIG, semente=42):
+    """
+    Escreve um feed simulado: a cada atualização, alguns preços mudam em passeio aleatório
+
+    Args:
+        caminho (str): Arquivo de saída (as linhas são acrescentadas)
+        catalogo (CatalogoAlimentos): Catálogo com os preços iniciais (padrão: ALIMENTOS_DATA)
+        n_atualizacoes (int): Número de atualizações
+        intervalo (float): Espera (s) entre atualizações
+        config (dict): Volatilidade e alimentos por atualização (ver MONITOR_CONFIG)
+        semente (int): Semente do gerador aleatório
+    """
+    config = dict(MONITOR_CONFIG, **config)
+    catalogo = catalogo if catalogo is not None else catalogo_padrao()
+    rng = np.random.default_rng(semente)
+    precos = catalogo.precos.copy()
+    por_atualizacao = min(config['alimentos_por_atualizacao'], len(catalogo))
+
+    with open(caminho, 'a', encoding='utf-8') as f:
+        for _ in range(n_atualizacoes):
+            alterados = rng.choice(len(precos), size=por_atualizacao, replace=False)
+            precos[alterados] *= rng.lognormal(0.0, config['volatilidade'], size=por_atualizacao)
+            f.write(json.dumps({
+                'ts': time.time(),
+                'precos': {catalogo.nomes[j]: round(float(precos[j]), 4) for j in alterados}
+            }) + "\n")
+            f.flush()
+            time.sleep(intervalo)
+
+class MonitorPrecos:
+    """
+    Mantém a dieta ótima enquanto os preços chegam de um feed
+
+    O modelo fica carregado no solver. A cada atualização, o plano atual é
+    triado pelos custos reduzidos c_j - λ·a_j dos preços novos (duais da
+    relaxação da última solução). O plano é mantido sem resolver quando o
+    padrão de sinais continua o da última solução (alimentos não comprados
+    com custo reduzido >= 0, alimentos em max_porcoes com custo reduzido
+    <= 0, alimentos comprados entre os limites com custo reduzido próximo de
+    zero) sem que o gap passe do gap de referência e da tolerância ou, se o
+    padrão mudou, quando o gap absoluto entre o custo do plano e o limite
+    lagrangiano fica dentro da tolerância. Caso contrário, o modelo
+    residente é re-otimizado partindo do plano atual.
+
+    Um plano mantido não é re-certificado como ótimo: ele fica garantido
+    apenas dentro do gap informado no evento.
+    """
+
+    def __init__(self, solver=None, catalogo=None, restricoes=RESTRICOES_RELAXADAS, config=MONITOR_CONFIG):
+        """
+        Args:
+            solver (DietSolver): Solver já inicializado (padrão: um novo, sem cache)
+            catalogo (CatalogoAlimentos): Catálogo de alimentos (padrão: o do solver)
+            restricoes (dict): Restrições nutricionais
+            config (dict): Tolerância e leitura do feed (ver MONITOR_CONFIG)
+        """
+        if solver is None:
+            from solver import DietSolver
+            solver = DietSolver(catalogo, cache=False)
+        elif catalogo is not None:
+            solver.definir_catalogo(catalogo)
+
+        self.solver = solver
+        self.catalogo = solver.catalogo
+        self.restricoes = normalizar_restricoes(restricoes)
+        self.config = dict(MONITOR_CONFIG, **config)
+
+        self.precos = self.catalogo.precos.copy()
+        self.compras = None
+        self.plano = None
+        self.duais = None
+        self.gap_referencia = None
+        self.padrao_referencia = None
+        self.eventos = []
+
+    def _gap(self, precos):
+        """Gap relativo entre o custo do plano e o limite lagrangiano com os preços informados"""
+        custo = float(precos @ self.plano)
+        limite = float(self.catalogo.limite_lagrangiano(self.duais, self.restricoes, precos))
+        return max(0.0, (custo - limite) / max(abs(custo), 1e-9))
+
+    def _padrao_sinais(self, precos):
+        """
+        Padrão de sinais dos custos reduzidos frente ao plano atual
+
+        Returns:
+            np.ndarray: Para cada alimento, True se o sinal é o esperado pela sua
+                posição no plano (ver CatalogoAlimentos.padrao_sinais)
+        """
+        return self.catalogo.padrao_sinais(self.duais, self.plano, precos)
+
+    def _aceitar_solucao(self, resultados):
+        """Adota a solução do modelo residente e atualiza duais e gap de referência"""
+        self.compras = resultados['compras']
+        self.plano = self.catalogo.vetor(self.compras)
+        if self.config['atualizar_duais'] or self.duais is None:
+            self.duais = self.solver.duais_carregado() or self.duais or {}
+        self.gap_referencia = self._gap(self.precos)
+        self.padrao_referencia = self._padrao_sinais(self.precos)
+
+    def iniciar(self, verbose=True):
+        """
+        Carrega o modelo e resolve a dieta com os preços do catálogo
+
+        Args:
+            verbose (bool): Se True, exibe o plano inicial
+
+        Returns:
+            bool: True se o plano inicial foi obtido
+        """
+        arquivo_mod, arquivo_dat = self.solver.preparar_catalogo(self.restricoes, "dieta_monitor")
+        if not self.solver.carregar_modelo(arquivo_mod, arquivo_dat):
+            return False
+
+        self.duais = self.solver.duais_carregado()
+        resultados = self.solver.resolver_carregado(self.precos)
+        if not resultados or not str(resultados['solve_result']).startswith('solved'):
+            print("Não foi possível resolver a dieta inicial do monitor.")
+            return False
+        self._aceitar_solucao(resultados)
+
+        if verbose:
+            print(f"Plano inicial: R$ {self.custo:.2f} | gap certificado: {self.gap_referencia:.2%}")
+            self._exibir_plano()
+        return True
+
+    @property
+    def custo(self):
+        """Custo do plano atual com os preços atuais"""
+        return float(self.precos @ self.plano)
+
+    def aplicar(self, precos, publicado=None):
+        """
+        Aplica uma atualização de preços e decide se o plano precisa ser re-otimizado
+
+        O plano é mantido se o padrão de sinais dos custos reduzidos não muda
+        e o gap não passa do maior entre o de referência e tolerancia_gap ou,
+        caso contrário, se o gap absoluto não passa de tolerancia_gap. Em ambos
+        os casos o plano mantido só é garantido dentro do gap do evento.
+
+        Args:
+            precos (dict): Novos preços por alimento (nomes fora do catálogo são ignorados)
+            publicado (float): Instante (epoch) da publicação no feed; padrão: agora
+
+        Returns:
+            dict: Ação, critério de manutenção, custo, gap, latência desde a publicação
+                e compras (quando o plano muda)
+        """
+        recebido = time.time()
+        origem = publicado if publicado is not None else recebido
+
+        indices = self.catalogo.posicoes(precos)
+        conhecidos = indices >= 0
+        novos = self.precos.copy()
+        novos[indices[conhecidos]] = np.fromiter(precos.values(), dtype=float, count=len(indices))[conhecidos]
+
+        evento = {'atualizacao': len(self.eventos) + 1, 'ignorados': int(np.count_nonzero(~conhecidos))}
+        if np.array_equal(novos, self.precos):
+            evento['acao'] = 'sem_mudanca'
+        else:
+            self.precos = novos
+            gap = self._gap(novos)
+            # O padrão de sinais nunca mantém um plano cujo gap passou do de referência e da tolerância
+            gap_aceito = gap <= max(self.config['tolerancia_gap'], self.gap_referencia)
+            if gap_aceito and np.array_equal(self._padrao_sinais(novos), self.padrao_referencia):
+                evento['acao'], evento['criterio'] = 'mantido', 'sinais'
+            elif gap <= self.config['tolerancia_gap']:
+                evento['acao'], evento['criterio'] = 'mantido', 'gap'
+            else:
+                anterior = self.plano
+                resultados = self.solver.resolver_carregado(novos, ponto_inicial=self.compras)
+                if resultados and str(resultados['solve_result']).startswith('solved'):
+                    evento['acao'] = 'reotimizado'
+                    self._aceitar_solucao(resultados)
+                    if not np.array_equal(anterior, self.plano):
+                        evento['compras'] = {nome: q for nome, q in self.compras.items() if q > 0}
+                else:
+                    # Sem nova solução, o plano atual continua válido (preços não afetam a viabilidade)
+                    evento['acao'] = 'falha'
+
+        evento['custo'] = self.custo
+        evento['gap'] = self._gap(self.precos) if evento['acao'] != 'sem_mudanca' else None
+        evento['latencia_ms'] = (time.time() - origem) * 1000
+        self.eventos.append(evento)
+        return evento
+
+    def acompanhar(self, linhas, saida=None, verbose=True):
+        """
+        Processa as atualizações de um iterável de linhas (arquivo seguido ou stream)
+
+        Args:
+            linhas (iterable): Linhas do feed (ver seguir_arquivo e ler_atualizacao)
+            saida (str): Arquivo JSON Lines onde cada evento é acrescentado
+            verbose (bool): Se True, exibe cada atualização e o resumo final
+
+        Returns:
+            dict: Resumo (ver resumo())
+        """
+        if self.plano is None and not self.iniciar(verbose):
+            return None
+
+        arquivo = open(saida, 'a', encoding='utf-8') if saida else None
+        try:
+            for linha in linhas:
+                try:
+                    atualizacao = ler_atualizacao(linha)
+                except ValueError as e:
+                    print(f"Linha do feed ignorada: {e}")
+                    continue
+                if atualizacao is None:
+                    continue
+
+                evento = self.aplicar(*atualizacao)
+                if arquivo:
+                    arquivo.write(json.dumps(evento) + "\n")
+                    arquivo.flush()
+                if verbose:
+                    self._exibir_evento(evento)
+        except KeyboardInterrupt:
+            print("\nMonitor interrompido.")
+        finally:
+            if arquivo:
+                arquivo.close()
+
+        resumo = self.resumo()
+        if verbose:
+            self.exibir_resumo(resumo)
+        return resumo
+
+    def resumo(self):
+        """
+        Resume as atualizações processadas
+
+        Returns:
+            dict: Contagem por ação, atualizações absorvidas sem resolver, maior gap
+                entre os planos mantidos (a única garantia que eles têm) e latências (ms)
+        """
+        acoes = {acao: sum(e['acao'] == acao for e in self.eventos) for acao in ACOES}
+        latencias = np.array([e['latencia_ms'] for e in self.eventos])
+
+        def quantil(q, selecao=None):
+            valores = latencias if selecao is None else latencias[selecao]
+            return float(np.percentile(valores, q)) if len(valores) else None
+
+        reotimizados = np.array([e['acao'] == 'reotimizado' for e in self.eventos], dtype=bool)
+        gaps_mantidos = [e['gap'] for e in self.eventos if e['acao'] == 'mantido']
+        return {
+            'atualizacoes': len(self.eventos),
+            'acoes': acoes,
+            'absorvidas': acoes['sem_mudanca'] + acoes['mantido'],
+            'mantidas_por_sinais': sum(e.get('criterio') == 'sinais' for e in self.eventos),
+            'gap_maximo_mantidos': max(gaps_mantidos) if gaps_mantidos else None,
+            'mudancas_plano': sum('compras' in e for e in self.eventos),
+            'custo_final': self.custo if self.plano is not None else None,
+            'latencia_p50_ms': quantil(50),
+            'latencia_p99_ms': quantil(99),
+            'latencia_max_ms': float(latencias.max()) if len(latencias) else None,
+            'latencia_p50_triagem_ms': quantil(50, ~reotimizados),
+            'latencia_p50_reotimizacao_ms': quantil(50, reotimizados)
+        }
+
+    def _exibir_evento(self, evento):
+        descricao = {
+            'sem_mudanca': "preços inalterados",
+            'mantido': "plano mantido (" + ("sinais" if evento.get('criterio') == 'sinais' else "gap") + ")",
+            'reotimizado': "re-otimizado" + ("" if 'compras' in evento else " (mesmo plano)"),
+            'falha': "falha ao re-otimizar; plano mantido"
+        }[evento['acao']]
+        print(f"[{evento['atualizacao']:>5}] {descricao:<34} custo R$ {evento['custo']:7.2f} "
+              f"| {evento['latencia_ms']:7.1f} ms")
+        if 'compras' in evento:
+            print("        novo plano: " + ", ".join(f"{nome}={q}" for nome, q in evento['compras'].items()))
+
+    def _exibir_plano(self):
+        for nome, porcoes in self.compras.items():
+            if porcoes > 0:
+                print(f"{nome:<20}: {porcoes} porções")
+
+    def exibir_resumo(self, resumo=None):
+        """Exibe o resumo do acompanhamento"""
+        resumo = resumo or self.resumo()
+
+        def ms(valor):
+            return f"{valor:.1f}" if valor is not None else "-"
+
+        print("\n" + "="*60)
+        print("MONITOR DE PREÇOS")
+        print("="*60)
+        print(f"Atualizações: {resumo['atualizacoes']} | absorvidas sem resolver: {resumo['absorvidas']} "
+              f"| re-otimizações: {resumo['acoes']['reotimizado']}")
+        print(f"Mudanças de plano: {resumo['mudancas_plano']} | falhas: {resumo['acoes']['falha']}")
+        if resumo['gap_maximo_mantidos'] is not None:
+            print(f"Planos mantidos ({resumo['mantidas_por_sinais']} pelos sinais) certificados apenas "
+                  f"dentro do gap: até {resumo['gap_maximo_mantidos']:.2%}")
+        if resumo['custo_final'] is not None:
+            print(f"Custo final: R$ {resumo['custo_final']:.2f}")
+        print(f"Latência (ms): p50={ms(resumo['latencia_p50_ms'])}  p99={ms(resumo['latencia_p99_ms'])}  "
+              f"máx={ms(resumo['latencia_max_ms'])}")
+        print(f"Latência p50 (ms): triagem={ms(resumo['latencia_p50_triagem_ms'])}  "
+              f"re-otimização={ms(resumo['latencia_p50_reotimizacao_ms'])}")
+        print("="*60)
+
+def main():
+    """Ponto de entrada da linha de comando"""
+    parser = argparse.ArgumentParser(description="Re-otimiza a dieta a cada atualização de um feed de preços")
+    parser.add_argument('--arquivo', default='precos.jsonl',
+                        help="Arquivo JSON Lines seguido como tail -f ('-' lê da entrada padrão)")
+    parser.add_argument('--saida', help="Arquivo JSON Lines com os eventos")
+    parser.add_argument('--novas', action='store_true', help="Ignora as linhas já existentes no arquivo")
+    parser.add_argument('--ocioso', type=float, default=MONITOR_CONFIG['ocioso'],
+                        help="Encerra após esse tempo (s) sem atualizações")
+    parser.add_argument('--tolerancia', type=float, default=MONITOR_CONFIG['tolerancia_gap'])
+    parser.add_argument('--simular', type=int, metavar='N',
+                        help="Escreve N atualizações simuladas no arquivo enquanto o segue")
+    parser.add_argument('--intervalo', type=float, default=0.1, help="Intervalo (s) do feed simulado")
+    parser.add_argument('--quieto', action='store_true', help="Exibe apenas o resumo")
+    args = parser.parse_args()
+
+    config = dict(MONITOR_CONFIG, tolerancia_gap=args.tolerancia)
+    monitor = MonitorPrecos(config=config)
+    if not monitor.iniciar(verbose=not args.quieto):
+        return
+
+    if args.arquivo == '-':
+        linhas = sys.stdin
+    else:
+        ocioso = args.ocioso
+        if args.simular:
+            open(args.arquivo, 'a', encoding='utf-8').close()
+            threading.Thread(target=gerar_feed, daemon=True,
+                             args=(args.arquivo, monitor.catalogo, args.simular, args.intervalo, config)).start()
+            ocioso = ocioso if ocioso is not None else max(1.0, 10 * args.intervalo)
+        linhas = seguir_arquivo(args.arquivo, config['intervalo_leitura'], not args.novas, ocioso)
+
+    monitor.acompanhar(linhas, args.saida, verbose=not args.quieto)
+    if args.quieto:
+        monitor.exibir_resumo()
+
+if __name__ == "__main__":
+    main()
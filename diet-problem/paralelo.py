@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+paralelo.py - Execução de tarefas em processos com estado residente por worker
+
+Autor: José Brito
+"""
+
+import os
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+# Estado criado uma vez por processo pelo inicializador (ex.: DietSolver com modelo carregado)
+_CONTEXTO = None
+
+def _inicializar_worker(inicializador, argumentos):
+    """Cria o contexto residente do processo worker"""
+    global _CONTEXTO
+    _CONTEXTO = inicializador(*argumentos)
+
+def _executar_tarefa(tarefa, item):
+    """Executa uma tarefa com o contexto residente do processo"""
+    return tarefa(_CONTEXTO, item)
+
+def mapear_em_paralelo(tarefa, itens, inicializador, argumentos=(), workers=None, chunksize=1):
+    """
+    Aplica `tarefa(contexto, item)` a cada item usando um pool de processos
+
+    Cada worker chama `inicializador(*argumentos)` uma única vez e reutiliza
+    o contexto retornado em todas as tarefas que recebe. Com um único worker
+    (ou um único item) tudo roda no processo atual.
+
+    Args:
+        tarefa (callable): Função de nível de módulo (contexto, item) -> resultado
+        itens (list): Itens a processar
+        inicializador (callable): Função de nível de módulo que cria o contexto
+        argumentos (tuple): Argumentos do inicializador
+        workers (int): Número de processos (padrão: número de CPUs)
+        chunksize (int): Itens enviados por vez a cada worker
+
+    Returns:
+        list: Resultados na mesma ordem dos itens
+    """
+    itens = list(itens)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(itens) <= 1:
+        contexto = inicializador(*argumentos)
+        return [tarefa(contexto, item) for item in itens]
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(itens)),
+                             initializer=_inicializar_worker,
+                             initargs=(inicializador, argumentos)) as executor:
+        return list(executor.map(partial(_executar_tarefa, tarefa), itens, chunksize=chunksize))
+
+def criar_pool(inicializador, argumentos=(), workers=None):
+    """
+    Cria um pool de processos persistente com contexto residente por worker
+
+    Diferente de mapear_em_paralelo(), o pool continua ativo entre as
+    chamadas (ex.: em um serviço); use submeter() para enviar tarefas e
+    shutdown() para encerrar.
+
+    Args:
+        inicializador (callable): Função de nível de módulo que cria o contexto
+        argumentos (tuple): Argumentos do inicializador
+        workers (int): Número de processos (padrão: número de CPUs)
+
+    Returns:
+        ProcessPoolExecutor: Pool de processos
+    """
+    return ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                               initializer=_inicializar_worker,
+                               initargs=(inicializador, argumentos))
+
+def submeter(executor, tarefa, item):
+    """
+    Envia `tarefa(contexto, item)` a um pool criado por criar_pool()
+
+    Returns:
+        concurrent.futures.Future: Resultado da tarefa
+    """
+    return executor.submit(_executar_tarefa, tarefa, item)
+
+class PoolCatalogo:
+    """
+    Pool persistente de uma tarefa sobre um catálogo compartilhado
+
+    Com mais de um worker, o catálogo é publicado em memória compartilhada e
+    cada worker chama `inicializador(descritor, *argumentos)` uma única vez
+    (o inicializador anexa o catálogo com abrir_catalogo()). Com um único
+    worker, o contexto é criado neste processo. Use como gerenciador de
+    contexto: ao sair, o pool é encerrado e a memória publicada é liberada.
+    """
+
+    def __init__(self, tarefa, inicializador, catalogo, argumentos=(), workers=None):
+        """
+        Args:
+            tarefa (callable): Função de nível de módulo (contexto, item) -> resultado
+            inicializador (callable): Função de nível de módulo (catálogo ou descritor, *argumentos)
+            catalogo (CatalogoAlimentos): Catálogo passado ao inicializador
+            argumentos (tuple): Demais argumentos do inicializador
+            workers (int): Número de processos (padrão: número de CPUs)
+        """
+        self.tarefa = tarefa
+        self.inicializador = inicializador
+        self.catalogo = catalogo
+        self.argumentos = tuple(argumentos)
+        self.workers = workers or os.cpu_count() or 1
+        self.publicado = None
+        self.executor = None
+        self.contexto = None
+
+    def __enter__(self):
+        if self.workers > 1:
+            self.publicado = self.catalogo.publicar()
+            self.executor = criar_pool(self.inicializador, (self.publicado.descritor,) + self.argumentos,
+                                       self.workers)
+        else:
+            self.contexto = self.inicializador(self.catalogo, *self.argumentos)
+        return self
+
+    def mapear(self, itens):
+        """
+        Aplica a tarefa a cada item, nos workers ou neste processo
+
+        Returns:
+            list: Resultados na mesma ordem dos itens
+        """
+        if self.executor is None:
+            return [self.tarefa(self.contexto, item) for item in itens]
+        futuros = [submeter(self.executor, self.tarefa, item) for item in itens]
+        return [futuro.result() for futuro in futuros]
+
+    def __exit__(self, *excecao):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        if self.publicado is not None:
+            self.publicado.liberar()
+            self.publicado = None
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""
+pareto.py - Fronteira de Pareto entre custo e diversidade da dieta
+
+Autor: José Brito
+"""
+
+import os
+import time
+from contextlib import nullcontext
+import numpy as np
+import pandas as pd
+from config import RESTRICOES_RELAXADAS, PARETO_CONFIG
+from catalogo import abrir_catalogo, catalogo_padrao, normalizar_restricoes
+from paralelo import mapear_em_paralelo
+
+def limite_distintos(catalogo, restricoes):
+    """
+    Limite superior do número de alimentos distintos de uma dieta viável
+
+    Um alimento só pode ser escolhido se uma porção cabe nos limites
+    máximos de todos os nutrientes e se max_porcoes permite comprá-lo.
+
+    Args:
+        catalogo (CatalogoAlimentos): Catálogo de alimentos
+        restricoes (dict): Restrições por número ou por nome de nutriente
+
+    Returns:
+        int: Número de alimentos que podem ser escolhidos
+    """
+    _, n_max = catalogo.limites(restricoes)
+    possiveis = catalogo.max_porcoes >= 1
+    for nutriente, maximo in zip(catalogo.nutrientes, n_max):
+        if np.isfinite(maximo):
+            possiveis &= catalogo.coluna(nutriente) <= maximo
+    return int(np.count_nonzero(possiveis))
+
+def podar_dominados(tabela, tolerancia=PARETO_CONFIG['tolerancia']):
+    """
+    Remove pontos dominados ou repetidos da fronteira
+
+    Um ponto é dominado se outro tem custo menor ou igual com pelo menos
+    tantos alimentos distintos. Entre pontos iguais, fica o primeiro.
+
+    Args:
+        tabela (pd.DataFrame): Pontos com as colunas 'custo' e 'distintos'
+        tolerancia (float): Diferença de custo abaixo da qual dois pontos são iguais
+
+    Returns:
+        pd.DataFrame: Pontos não dominados, em ordem crescente de diversidade
+    """
+    if tabela.empty:
+        return tabela
+    ordem = tabela.sort_values(['distintos', 'custo'], ascending=[False, True], kind='stable')
+    melhor, manter = np.inf, []
+    for indice, custo in zip(ordem.index, ordem['custo'].to_numpy()):
+        if custo < melhor - tolerancia:
+            manter.append(indice)
+            melhor = custo
+    return tabela.loc[manter[::-1]].reset_index(drop=True)
+
+def _criar_contexto_pareto(catalogo, restricoes):
+    """Cria, em cada worker, o modelo diversificado com peso e mínimo de alimentos distintos"""
+    from solver import DietSolver
+
+    catalogo = abrir_catalogo(catalogo)
+    solver = DietSolver(catalogo, cache=False)
+    arquivo_mod, arquivo_dat = solver.preparar_catalogo(
+        restricoes, f"dieta_pareto_{os.getpid()}", diversificado=True, reforcado=True, pareto=True
+    )
+    solver.carregar_modelo(arquivo_mod, arquivo_dat)
+    return {'solver': solver, 'compras': None}
+
+def _resolver_ponto(contexto, parametros):
+    """Resolve um ponto partindo da última solução do worker; retorna None se inviável"""
+    solver = contexto['solver']
+    inicio = time.perf_counter()
+    resultados = solver.resolver_carregado(ponto_inicial=contexto['compras'], parametros=parametros)
+    tempo = time.perf_counter() - inicio
+
+    if not resultados or not str(resultados['solve_result']).startswith('solved'):
+        return None
+    contexto['compras'] = resultados['compras']
+    compras = solver.catalogo.vetor(resultados['compras'])
+    return {
+        'custo': float(solver.catalogo.precos @ compras),
+        'distintos': int(np.count_nonzero(compras)),
+        'porcoes': int(compras.sum()),
+        'tempo_solucao': tempo,
+        'compras': compras
+    }
+
+def _varrer_intervalo(contexto, item):
+    """
+    Varre um intervalo de mínimos de alimentos distintos (restrição épsilon)
+
+    Quando a solução já tem mais alimentos que o mínimo pedido, os mínimos
+    intermediários são pulados, pois levariam à mesma solução. Um mínimo
+    inviável encerra o intervalo: os maiores também são inviáveis.
+    """
+    primeiro, ultimo = item
+    pontos, solucoes, minimo = [], 0, primeiro
+    while minimo <= ultimo:
+        ponto = _resolver_ponto(contexto, {'peso_diversidade': 0, 'min_distintos': minimo})
+        solucoes += 1
+        if ponto is None:
+            break
+        pontos.append(dict(ponto, minimo_distintos=minimo))
+        minimo = max(minimo, ponto['distintos']) + 1
+    return pontos, solucoes
+
+def _resolver_peso(contexto, peso):
+    """Resolve a soma ponderada custo + peso * (alimentos não escolhidos)"""
+    ponto = _resolver_ponto(contexto, {'peso_diversidade': peso, 'min_distintos': 0})
+    return dict(ponto, peso=peso) if ponto else None
+
+def _tabela_pontos(pontos, catalogo, colunas):
+    """Monta a tabela de pontos com uma coluna de porções por alimento"""
+    tabela = pd.DataFrame([{c: p[c] for c in colunas} for p in pontos], columns=colunas)
+    compras = np.vstack([p['compras'] for p in pontos]) if pontos else np.empty((0, len(catalogo)))
+    return pd.concat([tabela, pd.DataFrame(compras.astype(int), columns=catalogo.nomes)], axis=1)
+
+def _executar(tarefa, itens, catalogo, restricoes, workers):
+    """Distribui os itens entre os workers, com o catálogo publicado em memória compartilhada"""
+    n_workers = min(workers or os.cpu_count() or 1, len(itens))
+    with catalogo.publicar() if n_workers > 1 else nullcontext() as publicado:
+        argumentos = (publicado.descritor if publicado else catalogo, restricoes)
+        return mapear_em_paralelo(tarefa, itens, _criar_contexto_pareto, argumentos, n_workers,
+                                  max(1, len(itens) // n_workers))
+
+def fronteira_pareto(catalogo=None, restricoes=RESTRICOES_RELAXADAS, config=PARETO_CONFIG,
+                     arquivo_saida=None, verbose=True):
+    """
+    Calcula a fronteira de Pareto entre custo e número de alimentos distintos
+
+    Usa o método épsilon-restrito: minimiza o custo exigindo pelo menos k
+    alimentos distintos, para k de 0 até o limite de limite_distintos().
+    Os valores de k são divididos em intervalos contíguos, varridos em
+    paralelo; dentro de cada intervalo, cada passo parte da solução do
+    vizinho e pula os k já atendidos. Pontos dominados ou repetidos
+    (inclusive entre intervalos) são removidos.
+
+    Args:
+        catalogo (CatalogoAlimentos): Catálogo de alimentos (padrão: ALIMENTOS_DATA)
+        restricoes (dict): Restrições nutricionais
+        config (dict): Paralelismo e tolerância (ver PARETO_CONFIG)
+        arquivo_saida (str): Caminho .parquet ou .csv para gravar a fronteira
+        verbose (bool): Se True, exibe a fronteira
+
+    Returns:
+        pd.DataFrame: Um ponto por linha (minimo_distintos, distintos, custo, porcoes,
+            tempo_solucao e porções por alimento), em ordem crescente de diversidade
+    """
+    from lote import salvar_tabela
+
+    config = dict(PARETO_CONFIG, **config)
+    catalogo = catalogo if catalogo is not None else catalogo_padrao()
+    restricoes = normalizar_restricoes(restricoes)
+    inicio = time.perf_counter()
+
+    maximo = limite_distintos(catalogo, restricoes)
+    n_intervalos = max(1, min(config['workers'] or os.cpu_count() or 1, maximo + 1))
+    intervalos = [(int(k[0]), int(k[-1])) for k in np.array_split(np.arange(maximo + 1), n_intervalos)]
+
+    varreduras = _executar(_varrer_intervalo, intervalos, catalogo, restricoes, config['workers'])
+    pontos = [ponto for pontos_intervalo, _ in varreduras for ponto in pontos_intervalo]
+    colunas = ['minimo_distintos', 'distintos', 'custo', 'porcoes', 'tempo_solucao']
+    tabela = podar_dominados(_tabela_pontos(pontos, catalogo, colunas), config['tolerancia'])
+
+    tabela.attrs['solucoes'] = sum(n for _, n in varreduras)
+    tabela.attrs['tempo_total'] = time.perf_counter() - inicio
+
+    if arquivo_saida:
+        salvar_tabela(tabela, arquivo_saida)
+    if verbose:
+        exibir_fronteira(tabela)
+    return tabela
+
+def grade_pesos(catalogo=None, restricoes=RESTRICOES_RELAXADAS, pesos=None, config=PARETO_CONFIG):
+    """
+    Aproxima a fronteira resolvendo a soma ponderada para uma grade de pesos
+
+    Serve de referência para fronteira_pareto(): só encontra os pontos do
+    fecho convexo da fronteira, e pesos vizinhos costumam repetir soluções.
+
+    Args:
+        catalogo (CatalogoAlimentos): Catálogo de alimentos (padrão: ALIMENTOS_DATA)
+        restricoes (dict): Restrições nutricionais
+        pesos (list): Pesos da diversidade (padrão: conforme PARETO_CONFIG)
+        config (dict): Paralelismo, grade e tolerância (ver PARETO_CONFIG)
+
+    Returns:
+        pd.DataFrame: Pontos não dominados encontrados, com o peso que gerou cada um
+    """
+    config = dict(PARETO_CONFIG, **config)
+    catalogo = catalogo if catalogo is not None else catalogo_padrao()
+    restricoes = normalizar_restricoes(restricoes)
+    if pesos is None:
+        pesos = np.linspace(0.0, config['peso_maximo'], config['pesos_grade']).tolist()
+    inicio = time.perf_counter()
+
+    pontos = [p for p in _executar(_resolver_peso, pesos, catalogo, restricoes, config['workers']) if p]
+    colunas = ['peso', 'distintos', 'custo', 'porcoes', 'tempo_solucao']
+    tabela = podar_dominados(_tabela_pontos(pontos, catalogo, colunas), config['tolerancia'])
+
+    tabela.attrs['solucoes'] = len(pesos)
+    tabela.attrs['tempo_total'] = time.perf_counter() - inicio
+    return tabela
+
+def comparar_com_grade(catalogo=None, restricoes=RESTRICOES_RELAXADAS, pesos=None, config=PARETO_CONFIG,
+                       verbose=True):
+    """
+    Compara a varredura épsilon com a grade de pesos
+
+    Args:
+        catalogo (CatalogoAlimentos): Catálogo de alimentos (padrão: ALIMENTOS_DATA)
+        restricoes (dict): Restrições nutricionais
+        pesos (list): Pesos da grade (padrão: conforme PARETO_CONFIG)
+        config (dict): Paralelismo, grade e tolerância (ver PARETO_CONFIG)
+        verbose (bool): Se True, exibe a tabela
+
+    Returns:
+        pd.DataFrame: Uma linha por método, com soluções, pontos da fronteira e tempo
+    """
+    fronteira = fronteira_pareto(catalogo, restricoes, config, verbose=verbose)
+    grade = grade_pesos(catalogo, restricoes, pesos, config)
+
+    encontrados = set(zip(grade['distintos'], grade['custo'].round(6)))
+    ausentes = [d for d, c in zip(fronteira['distintos'], fronteira['custo'].round(6)) if (d, c) not in encontrados]
+    tabela = pd.DataFrame([
+        {'metodo': 'epsilon_restrito', 'solucoes': fronteira.attrs['solucoes'], 'pontos': len(fronteira),
+         'tempo': fronteira.attrs['tempo_total']},
+        {'metodo': 'grade_pesos', 'solucoes': grade.attrs['solucoes'], 'pontos': len(grade),
+         'tempo': grade.attrs['tempo_total']}
+    ])
+
+    if verbose:
+        print("\n" + "="*60)
+        print("VARREDURA ÉPSILON x GRADE DE PESOS")
+        print("="*60)
+        print(f"{'Método':<20}{'Soluções':>10}{'Pontos':>10}{'Tempo (s)':>12}")
+        print("-"*60)
+        for _, linha in tabela.iterrows():
+            print(f"{linha['metodo']:<20}{linha['solucoes']:>10}{linha['pontos']:>10}{linha['tempo']:>12.2f}")
+        if ausentes:
+            print(f"\nPontos sem peso correspondente na grade (alimentos distintos): "
+                  f"{', '.join(map(str, ausentes))}")
+        print("="*60)
+    return tabela
+
+def exibir_fronteira(tabela):
+    """
+    Exibe os pontos de fronteira_pareto()
+
+    Args:
+        tabela (pd.DataFrame): Fronteira de Pareto
+    """
+    print("\n" + "="*60)
+    print("FRONTEIRA DE PARETO: CUSTO x DIVERSIDADE")
+    print("="*60)
+    print(f"{'Distintos':>10}{'Custo (R$)':>12}{'Acréscimo':>12}{'Porções':>10}")
+    print("-"*60)
+    anterior = None
+    for _, linha in tabela.iterrows():
+        acrescimo = f"{linha['custo'] - anterior:12.2f}" if anterior is not None else f"{'-':>12}"
+        print(f"{int(linha['distintos']):>10}{linha['custo']:12.2f}{acrescimo}{int(linha['porcoes']):>10}")
+        anterior = linha['custo']
+    print(f"\nPontos: {len(tabela)} | soluções: {tabela.attrs.get('solucoes', '-')} | "
+          f"tempo total: {tabela.attrs.get('tempo_total', 0.0):.2f} s")
+    print("="*60)
+
+if __name__ == "__main__":
+    comparar_com_grade()
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+"""
+presolve.py - Redução de instâncias da dieta antes do envio ao solver
+
+Autor: José Brito
+"""
+
+import time
+import numpy as np
+from config import RESTRICOES_RELAXADAS, PESO_DIVERSIDADE
+from catalogo import vetores_restricoes
+
+# Limite de porções imposto por Limite_Individual no modelo diversificado
+LIMITE_INDIVIDUAL = 4
+
+class ResultadoPresolve:
+    """
+    Resultado do presolve: catálogo reduzido e registro do que foi removido
+    """
+
+    def __init__(self, catalogo_original, catalogo_reduzido, indices_mantidos, removidos, estatisticas):
+        """
+        Args:
+            catalogo_original (CatalogoAlimentos): Catálogo antes da redução
+            catalogo_reduzido (CatalogoAlimentos): Catálogo com limites apertados
+            indices_mantidos (array): Índices (no original) dos alimentos mantidos
+            removidos (dict): Nome do alimento removido -> motivo
+            estatisticas (dict): Contagens e tempo do presolve
+        """
+        self.catalogo_original = catalogo_original
+        self.catalogo = catalogo_reduzido
+        self.indices_mantidos = indices_mantidos
+        self.removidos = removidos
+        self.estatisticas = estatisticas
+
+    def expandir_compras(self, compras):
+        """
+        Mapeia as compras do problema reduzido para o catálogo original
+
+        Args:
+            compras (dict): Quantidades por alimento do catálogo reduzido
+
+        Returns:
+            dict: Quantidades para todos os alimentos do original (removidos = 0)
+        """
+        return {nome: compras.get(nome, 0) for nome in self.catalogo_original.nomes}
+
+    def exibir_resumo(self):
+        """Exibe o resumo da redução"""
+        stats = self.estatisticas
+        print("\n" + "="*60)
+        print("PRESOLVE DA INSTÂNCIA")
+        print("="*60)
+        print(f"Variáveis Compra: {stats['variaveis_originais']} -> {stats['variaveis_reduzidas']}")
+        print(f"Limites apertados pelos nutrientes: {stats['limites_apertados']}")
+        print(f"Removidos (limite zero): {stats['removidos_limite_zero']}")
+        print(f"Removidos (sem nutrientes): {stats['removidos_sem_nutrientes']}")
+        print(f"Removidos (dominados): {stats['removidos_dominados']}")
+        if stats['limite_individual_incorporado'] is not None:
+            print(f"Limite_Individual incorporado a max_porcoes (restrição omitida): "
+                  f"{stats['limite_individual_incorporado']} limites apertados")
+        print(f"Tempo do presolve: {stats['tempo']:.4f} s")
+        print("="*60)
+
+def _limites_por_nutriente(conteudo, n_max):
+    """
+    Calcula, para cada alimento, quantas porções cabem sob os limites máximos
+
+    Args:
+        conteudo (np.ndarray): Matriz densa (alimentos x nutrientes restritos)
+        n_max (np.ndarray): Limites máximos (inf quando não há limite)
+
+    Returns:
+        np.ndarray: Limite de porções por alimento (inf quando nenhum nutriente limita)
+    """
+    limitado = np.isfinite(n_max)
+    if not limitado.any():
+        return np.full(conteudo.shape[0], np.inf)
+
+    a = conteudo[:, limitado]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        razoes = np.where(a > 0, n_max[limitado] / a, np.inf)
+    # Pequena folga para não cortar porções exatas por erro de arredondamento
+    return np.floor(razoes.min(axis=1) + 1e-9)
+
+def _marcar_dominados(conteudo, precos, max_porcoes, limite_nutrientes, limitado, candidatos):
+    """
+    Marca alimentos dominados dentro de grupos com conteúdo igual nos nutrientes com máximo
+
+    O alimento k é dominado por d quando custa no máximo o mesmo, tem conteúdo
+    igual em todo nutriente com limite máximo e ao menos o mesmo conteúdo nos
+    nutrientes só com mínimo. A troca de k por d só é segura se d comportar
+    sozinho todas as porções que caberiam do grupo, isto é, se max_porcoes[d]
+    for pelo menos o limite derivado dos nutrientes.
+
+    Args:
+        conteudo (np.ndarray): Matriz densa (alimentos x nutrientes restritos)
+        precos (np.ndarray): Preços
+        max_porcoes (np.ndarray): Limites declarados de porções
+        limite_nutrientes (np.ndarray): Limites derivados dos nutrientes
+        limitado (np.ndarray): Máscara dos nutrientes com limite máximo
+        candidatos (np.ndarray): Índices ainda não removidos
+
+    Returns:
+        np.ndarray: Máscara booleana (sobre todos os alimentos) dos dominados
+    """
+    dominado = np.zeros(len(precos), dtype=bool)
+    if len(candidatos) < 2:
+        return dominado
+
+    # Agrupar por conteúdo idêntico nos nutrientes com máximo
+    chaves = conteudo[candidatos][:, limitado]
+    _, grupos = np.unique(chaves, axis=0, return_inverse=True)
+    grupos = grupos.ravel()
+    ordem = np.argsort(grupos, kind='stable')
+    fronteiras = np.flatnonzero(np.diff(grupos[ordem])) + 1
+
+    so_minimo = ~limitado
+    for membros in np.split(candidatos[ordem], fronteiras):
+        if len(membros) < 2 or not np.isfinite(limite_nutrientes[membros[0]]):
+            continue
+
+        c = precos[membros]
+        a = conteudo[membros][:, so_minimo]
+        pode_dominar = max_porcoes[membros] >= limite_nutrientes[membros]
+
+        # domina[d, k]: d domina k (empates resolvidos pelo índice)
+        custo_ok = c[:, None] <= c[None, :]
+        conteudo_ok = np.all(a[:, None, :] >= a[None, :, :], axis=2)
+        estrito = (c[:, None] < c[None, :]) | np.any(a[:, None, :] > a[None, :, :], axis=2)
+        empate = membros[:, None] < membros[None, :]
+        domina = custo_ok & conteudo_ok & (estrito | empate) & pode_dominar[:, None]
+        np.fill_diagonal(domina, False)
+
+        dominado[membros[domina.any(axis=0)]] = True
+
+    return dominado
+
+def presolve(catalogo, restricoes=RESTRICOES_RELAXADAS, diversificado=False, verbose=True):
+    """
+    Aplica reduções baratas à instância antes de gerar o arquivo .dat
+
+    - aperta max_porcoes pelos limites máximos de nutrientes
+      (ex.: Arroz com 500 kcal não passa de 7 porções com teto de 3500 kcal);
+    - no modelo diversificado, incorpora o teto de Limite_Individual a max_porcoes
+      (o modelo reduzido é gerado sem essa restrição, ver resolver_com_presolve);
+    - remove alimentos com limite zero;
+    - no modelo básico, remove alimentos sem nutrientes restritos e alimentos dominados.
+
+    Remoções que mudam o número de alimentos escolhidos não são aplicadas ao
+    modelo diversificado, pois o objetivo dele premia a diversidade.
+
+    Args:
+        catalogo (CatalogoAlimentos): Catálogo de alimentos
+        restricoes (dict): Restrições por número ou por nome de nutriente
+        diversificado (bool): Se True, aplica apenas reduções válidas para o modelo diversificado
+        verbose (bool): Se True, exibe o resumo
+
+    Returns:
+        ResultadoPresolve: Catálogo reduzido e registro das remoções
+    """
+    inicio = time.perf_counter()
+
+    n_min, n_max = vetores_restricoes(restricoes, catalogo.nutrientes)
+    restritos = np.isfinite(n_min) | np.isfinite(n_max)
+    n_min, n_max = n_min[restritos], n_max[restritos]
+    conteudo = catalogo.colunas_densas([n for n, r in zip(catalogo.nutrientes, restritos) if r])
+
+    # Aperto de limites
+    limite_nutrientes = _limites_por_nutriente(conteudo, n_max)
+    novos_limites = np.minimum(catalogo.max_porcoes, limite_nutrientes)
+    limites_apertados = int(np.count_nonzero(novos_limites < catalogo.max_porcoes))
+    limite_individual_incorporado = None
+    if diversificado:
+        limite_individual_incorporado = int(np.count_nonzero(novos_limites > LIMITE_INDIVIDUAL))
+        novos_limites = np.minimum(novos_limites, LIMITE_INDIVIDUAL)
+
+    removidos = {}
+    ativo = np.ones(len(catalogo), dtype=bool)
+
+    limite_zero = novos_limites <= 0
+    ativo &= ~limite_zero
+
+    sem_nutrientes = np.zeros(len(catalogo), dtype=bool)
+    dominados = np.zeros(len(catalogo), dtype=bool)
+    if not diversificado:
+        sem_nutrientes = ativo & ~np.any(conteudo != 0, axis=1) & (catalogo.precos >= 0)
+        ativo &= ~sem_nutrientes
+
+        dominados = _marcar_dominados(conteudo, catalogo.precos, catalogo.max_porcoes,
+                                      limite_nutrientes, np.isfinite(n_max), np.flatnonzero(ativo))
+        ativo &= ~dominados
+
+    for mascara, motivo in ((limite_zero, 'limite_zero'), (sem_nutrientes, 'sem_nutrientes'),
+                            (dominados, 'dominado')):
+        for j in np.flatnonzero(mascara):
+            removidos[catalogo.nomes[j]] = motivo
+
+    indices_mantidos = np.flatnonzero(ativo)
+    reduzido = catalogo.subconjunto(indices_mantidos)
+    reduzido.max_porcoes = novos_limites[indices_mantidos]
+
+    estatisticas = {
+        'variaveis_originais': len(catalogo),
+        'variaveis_reduzidas': len(reduzido),
+        'limites_apertados': limites_apertados,
+        'removidos_limite_zero': int(limite_zero.sum()),
+        'removidos_sem_nutrientes': int(sem_nutrientes.sum()),
+        'removidos_dominados': int(dominados.sum()),
+        'limite_individual_incorporado': limite_individual_incorporado,
+        'tempo': time.perf_counter() - inicio
+    }
+
+    resultado = ResultadoPresolve(catalogo, reduzido, indices_mantidos, removidos, estatisticas)
+    if verbose:
+        resultado.exibir_resumo()
+    return resultado
+
+def resolver_com_presolve(solver, catalogo, restricoes=RESTRICOES_RELAXADAS, diversificado=False,
+                          nome_base="dieta_presolve", verbose=True, usar_cache=True):
+    """
+    Aplica o presolve, resolve a instância reduzida e mapeia o resultado de volta
+
+    Args:
+        solver (DietSolver): Solver já inicializado
+        catalogo (CatalogoAlimentos): Catálogo completo
+        restricoes (dict): Restrições nutricionais
+        diversificado (bool): Se True, usa a variante com diversidade
+        nome_base (str): Prefixo dos arquivos .mod/.dat gerados
+        verbose (bool): Se True, exibe informações detalhadas
+        usar_cache (bool): Se False, ignora o cache de soluções
+
+    Returns:
+        dict: Resultados no catálogo original, com o resumo em 'presolve'
+    
+    No modelo diversificado, cada alimento removido entraria em card(ALIMENTO)
+    sem ser escolhido; essa parcela constante é somada de volta ao objetivo.
+    """
+    reducao = presolve(catalogo, restricoes, diversificado, verbose)
+
+    solver.definir_catalogo(reducao.catalogo)
+    try:
+        # O teto de Limite_Individual já está em max_porcoes do catálogo reduzido
+        resultados = solver.resolver_catalogo(restricoes, nome_base, diversificado, verbose, usar_cache,
+                                              limite_individual=False)
+    finally:
+        solver.definir_catalogo(catalogo)
+
+    if resultados:
+        resultados['compras'] = reducao.expandir_compras(resultados['compras'])
+        if diversificado and resultados.get('objetivo') is not None:
+            resultados['objetivo'] += PESO_DIVERSIDADE * len(reducao.removidos)
+        resultados['presolve'] = dict(reducao.estatisticas, removidos=reducao.removidos)
+    return resultados
+
+def comparar_tempo_presolve(solver, catalogo, restricoes=RESTRICOES_RELAXADAS, diversificado=False):
+    """
+    Compara o tempo de solução com e sem presolve no mesmo catálogo
+
+    Args:
+        solver (DietSolver): Solver já inicializado
+        catalogo (CatalogoAlimentos): Catálogo completo
+        restricoes (dict): Restrições nutricionais
+        diversificado (bool): Se True, usa a variante com diversidade
+
+    Returns:
+        dict: Tempos, objetivos e redução de variáveis
+    """
+    solver.definir_catalogo(catalogo)
+    inicio = time.perf_counter()
+    # Sem cache, para medir o tempo real de solução nos dois casos
+    completo = solver.resolver_catalogo(restricoes, "dieta_sem_presolve", diversificado, verbose=False,
+                                        usar_cache=False)
+    tempo_completo = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    reduzido = resolver_com_presolve(solver, catalogo, restricoes, diversificado, verbose=False, usar_cache=False)
+    tempo_reduzido = time.perf_counter() - inicio
+
+    comparacao = {
+        'tempo_sem_presolve': tempo_completo,
+        'tempo_com_presolve': tempo_reduzido,
+        'economia_tempo': tempo_completo - tempo_reduzido,
+        'objetivo_sem_presolve': completo['objetivo'] if completo else None,
+        'objetivo_com_presolve': reduzido['objetivo'] if reduzido else None,
+        'variaveis_originais': len(catalogo),
+        'variaveis_reduzidas': reduzido['presolve']['variaveis_reduzidas'] if reduzido else None
+    }
+
+    print("\n" + "="*60)
+    print("COMPARAÇÃO COM E SEM PRESOLVE")
+    print("="*60)
+    print(f"Variáveis: {comparacao['variaveis_originais']} -> {comparacao['variaveis_reduzidas']}")
+    print(f"Tempo sem presolve: {tempo_completo:.3f} s")
+    print(f"Tempo com presolve: {tempo_reduzido:.3f} s")
+    print(f"Economia: {comparacao['economia_tempo']:.3f} s")
+    print("="*60)
+
+    return comparacao
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+progresso.py - Opções do solver por backend e acompanhamento do progresso durante a solução
+
+Autor: José Brito
+"""
+
+import re
+import time
+import threading
+
+# Nome das opções de limite em cada família de solvers do AMPL
+_OPCOES_CBC = {'time_limit': 'seconds', 'mip_gap': 'ratioGap', 'threads': 'threads', 'log': 'logLevel'}
+_OPCOES_MP = {'time_limit': 'lim:time', 'mip_gap': 'mip:gap', 'threads': 'tech:threads', 'log': 'outlev'}
+
+OPCOES_POR_SOLVER = {
+    'cbc': _OPCOES_CBC,
+    'highs': _OPCOES_MP,
+    'gurobi': _OPCOES_MP,
+    'cplex': _OPCOES_MP,
+    'xpress': _OPCOES_MP,
+    'copt': _OPCOES_MP,
+    'mosek': _OPCOES_MP,
+    'scip': _OPCOES_MP,
+}
+
+def opcoes_solver(config, acompanhar=False):
+    """
+    Monta a string de opções do solver (ex.: cbc_options) a partir da configuração
+
+    Args:
+        config (dict): Configuração no formato de SOLVER_CONFIG
+        acompanhar (bool): Se True, liga o log do solver para acompanhar o progresso
+
+    Returns:
+        tuple: (nome da opção AMPL, valor) ou (None, None) se o solver não for conhecido
+    """
+    solver = config['solver']
+    nomes = OPCOES_POR_SOLVER.get(solver)
+    if nomes is None:
+        return None, None
+
+    opcoes = []
+    for chave in ('time_limit', 'mip_gap', 'threads'):
+        valor = config.get(chave)
+        if valor:
+            opcoes.append(f"{nomes[chave]}={valor:g}")
+    if acompanhar:
+        opcoes.append(f"{nomes['log']}=1")
+    if config.get('opcoes'):
+        opcoes.append(config['opcoes'])
+    return f"{solver}_options", " ".join(opcoes)
+
+# Linhas de progresso do CBC
+_CBC_NOS = re.compile(
+    r'Cbc0010I After (?P<nos>\d+) nodes, \d+ on tree, (?P<incumbente>[-\d.e+]+) best solution, '
+    r'best possible (?P<limite>[-\d.e+]+)'
+)
+_CBC_SOLUCAO = re.compile(
+    r'Cbc00(?:04|12)I Integer solution of (?P<incumbente>[-\d.e+]+) found.*?(?P<nos>\d+) nodes'
+)
+# Linha do log de nós do Gurobi: Expl Unexpl | Obj Depth IntInf | Incumbent BestBd Gap | It/Node Time
+_GUROBI_NOS = re.compile(
+    r'^[ H*]\s*(?P<nos>\d+)\s+\d+\s+.*?(?P<incumbente>[-\d.e+]+)\s+(?P<limite>[-\d.e+]+)\s+[\d.]+%\s+\S+\s+\d+s$'
+)
+
+PADROES_PROGRESSO = {
+    'cbc': (_CBC_NOS, _CBC_SOLUCAO),
+    'gurobi': (_GUROBI_NOS,),
+}
+
+class AcompanhamentoSolver:
+    """
+    Recebe a saída do AMPL durante o solve (interface OutputHandler do amplpy)
+    e registra cada novo incumbente ou limite como um evento de progresso
+
+    Cada evento tem tempo (s desde o início), incumbente, limite, gap
+    relativo e nós explorados. Se a função `parar_quando` retornar True
+    para um evento, o solve é interrompido pelo DietSolver e a melhor
+    solução encontrada até ali é usada.
+    """
+
+    def __init__(self, solver="cbc", parar_quando=None, verbose=False):
+        """
+        Args:
+            solver (str): Nome do solver, que define o formato do log
+            parar_quando (callable): Recebe o evento e retorna True para parar
+            verbose (bool): Se True, exibe cada evento
+        """
+        self.padroes = PADROES_PROGRESSO.get(solver, ())
+        self.parar_quando = parar_quando
+        self.verbose = verbose
+        self.eventos = []
+        self.parar = threading.Event()
+        self.inicio = time.perf_counter()
+        self._incumbente = None
+        self._limite = None
+
+    def output(self, kind, msg):
+        """Chamado pelo amplpy com cada trecho da saída do AMPL/solver"""
+        for linha in str(msg).splitlines():
+            self._ler_linha(linha)
+
+    def _ler_linha(self, linha):
+        for padrao in self.padroes:
+            encontrado = padrao.search(linha)
+            if not encontrado:
+                continue
+            valores = encontrado.groupdict()
+            incumbente = _numero(valores.get('incumbente'))
+            limite = _numero(valores.get('limite'))
+            if incumbente is not None and abs(incumbente) < 1e49:  # 1e50 = sem incumbente no CBC
+                self._incumbente = incumbente
+            if limite is not None:
+                self._limite = limite
+            self._registrar(int(valores['nos']))
+            return
+
+    def _registrar(self, nos):
+        gap = None
+        if self._incumbente is not None and self._limite is not None:
+            gap = abs(self._incumbente - self._limite) / max(abs(self._incumbente), 1e-9)
+
+        evento = {
+            'tempo': round(time.perf_counter() - self.inicio, 4),
+            'incumbente': self._incumbente,
+            'limite': self._limite,
+            'gap': gap,
+            'nos': nos
+        }
+        if self.eventos and all(self.eventos[-1][c] == evento[c] for c in ('incumbente', 'limite', 'nos')):
+            return
+        self.eventos.append(evento)
+
+        if self.verbose:
+            texto_gap = f"{gap * 100:.2f}%" if gap is not None else "-"
+            print(f"  [{evento['tempo']:7.2f} s] incumbente={self._incumbente} limite={self._limite} "
+                  f"gap={texto_gap} nós={nos}")
+        if self.parar_quando is not None and self.parar_quando(evento):
+            self.parar.set()
+
+def _numero(texto):
+    """Converte um número do log (None se ausente ou inválido)"""
+    try:
+        return float(texto) if texto is not None else None
+    except ValueError:
+        return None
+
+def parar_com_gap(gap_alvo):
+    """
+    Critério de parada para AcompanhamentoSolver: gap relativo menor ou igual ao alvo
+
+    Args:
+        gap_alvo (float): Gap relativo aceito (ex.: 0.05)
+
+    Returns:
+        callable: Função evento -> bool
+    """
+    return lambda evento: evento['gap'] is not None and evento['gap'] <= gap_alvo
@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+"""
+relatorios.py - Relatórios em lote (HTML/CSV) de muitas soluções da dieta
+
+Autor: José Brito
+"""
+
+import os
+import argparse
+from html import escape
+from string import Template
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from config import RESTRICOES_RELAXADAS, REGISTRO_NUTRIENTES, RELATORIO_CONFIG
+from catalogo import catalogo_padrao
+from armazenamento import achatar
+from paralelo import mapear_em_paralelo
+
+# Recomendações, na ordem em que aparecem nos relatórios
+RECOMENDACOES = {
+    'baixa_diversidade': "Considere aumentar a diversidade de alimentos para uma dieta mais equilibrada.",
+    'custo_elevado': "Custo elevado - considere buscar alternativas mais econômicas.",
+    'dependencia': "Alguns alimentos estão em alta quantidade - verifique se há dependência excessiva.",
+}
+
+STATUS_NUTRIENTE = {-1: "⚠ BAIXO", 0: "✓ OK", 1: "⚠ ALTO"}
+
+ESTILO = """
+body { font-family: 'DejaVu Sans', Arial, sans-serif; margin: 2em; color: #222; }
+table { border-collapse: collapse; margin: 1em 0; }
+th, td { border: 1px solid #bbb; padding: 4px 10px; text-align: right; }
+th { background: #eee; }
+td.texto, th.texto { text-align: left; }
+.baixo, .alto { color: #b00; font-weight: bold; }
+"""
+
+MODELO_INDICE = Template("""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<title>Relatório das dietas otimizadas</title>
+<style>$estilo</style>
+</head>
+<body>
+<h1>Relatório das dietas otimizadas</h1>
+<p>Gerado em $gerado | $n_solucoes soluções | <a href="resumo.csv">resumo.csv</a> |
+<a href="compras.csv">compras.csv</a> | <a href="nutrientes.csv">nutrientes.csv</a></p>
+<h2>Resumo</h2>
+<table>
+<tr><th class="texto">Indicador</th><th>Mínimo</th><th>Média</th><th>Máximo</th></tr>
+$agregados
+</table>
+<p>Soluções com todos os nutrientes dentro dos limites: $atendem ($fracao_atendem)</p>
+<h2>Soluções</h2>
+<table>
+<tr><th class="texto">Solução</th><th class="texto">Modelo</th><th class="texto">Status</th><th>Objetivo (R$$)</th>
+<th>Compras (R$$)</th><th>Porções</th><th>Alimentos</th><th>Nutrientes fora</th><th>Recomendações</th></tr>
+$linhas
+</table>
+</body>
+</html>
+""")
+
+MODELO_SOLUCAO = Template("""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<title>$nome</title>
+<style>$estilo</style>
+</head>
+<body>
+<p><a href="../index.html">Voltar ao resumo</a></p>
+<h1>$nome</h1>
+<p>Modelo: $modelo | Data de geração: $timestamp | Status da solução: $status</p>
+<h2>Resumo financeiro</h2>
+<p>Custo total da dieta: R$$ $objetivo<br>
+Custo das compras: R$$ $custo_compras<br>
+Custo médio por porção: R$$ $custo_medio_porcao</p>
+<h2>Alimentos selecionados</h2>
+<table>
+<tr><th class="texto">Alimento</th><th>Porções</th><th>Preço (R$$)</th><th>Custo (R$$)</th></tr>
+$alimentos
+</table>
+<p>Total de porções: $porcoes | Diversidade: $diversidade alimentos únicos</p>
+<h2>Análise nutricional</h2>
+<table>
+<tr><th class="texto">Nutriente</th><th>Obtido</th><th>Mínimo</th><th>Máximo</th><th class="texto">Status</th></tr>
+$nutrientes
+</table>
+<h2>Recomendações</h2>
+<ul>
+$recomendacoes
+</ul>
+</body>
+</html>
+""")
+
+def tabela_resultados(resultados):
+    """
+    Converte os resultados para uma tabela com colunas achatadas
+
+    Args:
+        resultados (pd.DataFrame | list): Tabela de DietResultStore.ler() ou lista de
+            dicionários de resultados de DietSolver
+
+    Returns:
+        pd.DataFrame: Uma linha por solução ('compras.Aveia', 'estatisticas...', ...)
+    """
+    if isinstance(resultados, pd.DataFrame):
+        return resultados.reset_index(drop=True)
+    return pd.DataFrame([achatar(r) for r in resultados])
+
+def calcular_metricas(tabela, catalogo=None, restricoes=RESTRICOES_RELAXADAS, config=RELATORIO_CONFIG):
+    """
+    Calcula as métricas de todas as soluções de uma vez
+
+    Compras, custos, nutrientes, status e recomendações são operações
+    matriciais sobre a tabela (soluções x alimentos), sem laço por solução.
+    Os nutrientes são recalculados pelo catálogo a partir das compras.
+
+    Args:
+        tabela (pd.DataFrame): Resultado de tabela_resultados()
+        catalogo (CatalogoAlimentos): Catálogo de alimentos (padrão: ALIMENTOS_DATA)
+        restricoes (dict): Restrições nutricionais usadas no status
+        config (dict): Limiares das recomendações (ver RELATORIO_CONFIG)
+
+    Returns:
+        dict: 'resumo' (DataFrame por solução), matrizes 'compras', 'custos',
+            'nutrientes' e 'status', e os vetores do catálogo alinhados a elas
+    """
+    config = dict(RELATORIO_CONFIG, **config)
+    catalogo = catalogo if catalogo is not None else catalogo_padrao()
+
+    colunas = [c for c in tabela.columns if c.startswith('compras.')]
+    alimentos = [c[len('compras.'):] for c in colunas]
+    compras = tabela[colunas].fillna(0).to_numpy(dtype=float) if colunas else np.zeros((len(tabela), 0))
+
+    # Alimentos fora do catálogo contam com preço e conteúdo zero
+    indices = np.array([catalogo.indice.get(nome, -1) for nome in alimentos], dtype=int)
+    conhecidos = indices >= 0
+    precos = np.zeros(len(alimentos))
+    precos[conhecidos] = catalogo.precos[indices[conhecidos]]
+    conteudo = np.zeros((len(alimentos), len(catalogo.nutrientes)))
+    conteudo[conhecidos] = catalogo.matriz_densa()[indices[conhecidos]]
+
+    custos = compras * precos
+    custo_compras = custos.sum(axis=1)
+    porcoes = compras.sum(axis=1)
+    diversidade = np.count_nonzero(compras, axis=1)
+    nutrientes = compras @ conteudo
+
+    n_min, n_max = catalogo.limites(restricoes)
+    status = np.where(nutrientes < n_min - 1e-6, -1, np.where(nutrientes > n_max + 1e-6, 1, 0))
+
+    objetivo = pd.to_numeric(tabela.get('objetivo', pd.Series(custo_compras)), errors='coerce').to_numpy(dtype=float)
+    sinais = pd.DataFrame({
+        'baixa_diversidade': diversidade < len(catalogo) * config['fracao_diversidade'],
+        'custo_elevado': objetivo > config['custo_elevado'],
+        'dependencia': (compras >= config['porcoes_dependencia']).any(axis=1),
+    })
+
+    resumo = pd.DataFrame({
+        'solucao': tabela['run_id'].astype(str) if 'run_id' in tabela else [f"solucao_{k:05d}" for k in range(len(tabela))],
+        'modelo': tabela['modelo'] if 'modelo' in tabela else '',
+        'timestamp': tabela['timestamp'] if 'timestamp' in tabela else '',
+        'solve_result': tabela['solve_result'] if 'solve_result' in tabela else '',
+        'objetivo': objetivo,
+        'custo_compras': custo_compras,
+        'porcoes': porcoes,
+        'diversidade': diversidade,
+        'custo_medio_porcao': np.divide(custo_compras, porcoes, out=np.zeros_like(custo_compras), where=porcoes > 0),
+        'nutrientes_baixos': (status < 0).sum(axis=1),
+        'nutrientes_altos': (status > 0).sum(axis=1),
+    })
+    for n, nome in enumerate(catalogo.nutrientes):
+        resumo[nome] = nutrientes[:, n]
+    resumo = pd.concat([resumo, sinais], axis=1)
+    resumo['recomendacoes'] = sinais.sum(axis=1)
+
+    return {
+        'resumo': resumo,
+        'alimentos': alimentos,
+        'precos': precos,
+        'compras': compras,
+        'custos': custos,
+        'nutrientes_catalogo': list(catalogo.nutrientes),
+        'n_min': n_min,
+        'n_max': n_max,
+        'nutrientes': nutrientes,
+        'status': status
+    }
+
+def _tabela_longa(metricas, nomes):
+    """Tabelas longas de compras (só as não nulas) e de nutrientes, sem laço por solução"""
+    solucoes = metricas['resumo']['solucao'].to_numpy()
+    linhas, colunas = np.nonzero(metricas['compras'])
+    compras = pd.DataFrame({
+        'solucao': solucoes[linhas],
+        'nome': np.asarray(nomes, dtype=object)[linhas],
+        'alimento': np.asarray(metricas['alimentos'], dtype=object)[colunas],
+        'porcoes': metricas['compras'][linhas, colunas],
+        'preco': metricas['precos'][colunas],
+        'custo': metricas['custos'][linhas, colunas],
+    })
+
+    n_solucoes, n_nutrientes = metricas['nutrientes'].shape
+    nutrientes = pd.DataFrame({
+        'solucao': np.repeat(solucoes, n_nutrientes),
+        'nome': np.repeat(np.asarray(nomes, dtype=object), n_nutrientes),
+        'nutriente': np.tile(metricas['nutrientes_catalogo'], n_solucoes),
+        'valor': metricas['nutrientes'].ravel(),
+        'minimo': np.tile(np.where(np.isfinite(metricas['n_min']), metricas['n_min'], np.nan), n_solucoes),
+        'maximo': np.tile(np.where(np.isfinite(metricas['n_max']), metricas['n_max'], np.nan), n_solucoes),
+        'status': pd.Series(metricas['status'].ravel()).map({-1: 'baixo', 0: 'ok', 1: 'alto'}).to_numpy(),
+    })
+    return compras, nutrientes
+
+def _limite(valor):
+    return f"{valor:g}" if np.isfinite(valor) else "-"
+
+def _linhas_indice(resumo, nomes, paginas):
+    """Linhas da tabela de soluções do índice"""
+    celulas = zip(nomes, paginas, resumo['modelo'], resumo['solve_result'], resumo['objetivo'],
+                  resumo['custo_compras'], resumo['porcoes'], resumo['diversidade'],
+                  resumo['nutrientes_baixos'] + resumo['nutrientes_altos'], resumo['recomendacoes'])
+    return "\n".join(
+        f'<tr><td class="texto"><a href="{pagina}">{escape(nome)}</a></td><td class="texto">{escape(str(modelo))}</td>'
+        f'<td class="texto">{escape(str(status))}</td><td>{objetivo:.2f}</td><td>{custo:.2f}</td><td>{porcoes:g}</td>'
+        f'<td>{diversidade}</td><td>{fora}</td><td>{recomendacoes}</td></tr>'
+        for nome, pagina, modelo, status, objetivo, custo, porcoes, diversidade, fora, recomendacoes in celulas
+    )
+
+def _agregados(resumo):
+    """Linhas de mínimo/média/máximo dos principais indicadores"""
+    indicadores = {
+        'Objetivo (R$)': 'objetivo',
+        'Compras (R$)': 'custo_compras',
+        'Custo por porção (R$)': 'custo_medio_porcao',
+        'Porções': 'porcoes',
+        'Alimentos únicos': 'diversidade',
+    }
+    estatisticas = resumo[list(indicadores.values())].agg(['min', 'mean', 'max'])
+    return "\n".join(
+        f'<tr><td class="texto">{rotulo}</td><td>{estatisticas.at["min", coluna]:.2f}</td>'
+        f'<td>{estatisticas.at["mean", coluna]:.2f}</td><td>{estatisticas.at["max", coluna]:.2f}</td></tr>'
+        for rotulo, coluna in indicadores.items()
+    )
+
+def _criar_contexto_paginas(diretorio, alimentos, precos, nutrientes, n_min, n_max):
+    """Dados comuns a todas as páginas, enviados uma vez a cada worker"""
+    rotulos = [f"{REGISTRO_NUTRIENTES.get(n, {}).get('rotulo', n)} ({REGISTRO_NUTRIENTES.get(n, {}).get('unidade', '')})"
+               for n in nutrientes]
+    return {
+        'diretorio': diretorio,
+        'alimentos': [escape(a) for a in alimentos],
+        'precos': precos,
+        'nutrientes': [escape(r) for r in rotulos],
+        'minimos': [_limite(v) for v in n_min],
+        'maximos': [_limite(v) for v in n_max],
+    }
+
+def _gravar_paginas(contexto, lote):
+    """Grava as páginas de um lote de soluções; retorna os caminhos"""
+    registros, compras, nutrientes, status = lote
+    caminhos = []
+    for k, registro in enumerate(registros):
+        selecionados = np.flatnonzero(compras[k])
+        linhas_alimentos = "\n".join(
+            f'<tr><td class="texto">{contexto["alimentos"][j]}</td><td>{compras[k, j]:g}</td>'
+            f'<td>{contexto["precos"][j]:.2f}</td><td>{compras[k, j] * contexto["precos"][j]:.2f}</td></tr>'
+            for j in selecionados
+        )
+        linhas_nutrientes = "\n".join(
+            f'<tr><td class="texto">{rotulo}</td><td>{valor:.1f}</td><td>{minimo}</td><td>{maximo}</td>'
+            f'<td class="texto {("baixo", "", "alto")[s + 1]}">{STATUS_NUTRIENTE[s]}</td></tr>'
+            for rotulo, valor, minimo, maximo, s in zip(contexto['nutrientes'], nutrientes[k], contexto['minimos'],
+                                                        contexto['maximos'], status[k].tolist())
+        )
+        recomendacoes = "\n".join(f"<li>{texto}</li>" for sinal, texto in RECOMENDACOES.items() if registro[sinal])
+
+        caminho = os.path.join(contexto['diretorio'], registro['pagina'])
+        with open(caminho, 'w', encoding='utf-8') as f:
+            f.write(MODELO_SOLUCAO.substitute(
+                estilo=ESTILO,
+                nome=escape(registro['nome']),
+                modelo=escape(str(registro['modelo'])),
+                timestamp=escape(str(registro['timestamp'])),
+                status=escape(str(registro['solve_result'])),
+                objetivo=f"{registro['objetivo']:.2f}",
+                custo_compras=f"{registro['custo_compras']:.2f}",
+                custo_medio_porcao=f"{registro['custo_medio_porcao']:.2f}",
+                alimentos=linhas_alimentos,
+                porcoes=f"{registro['porcoes']:g}",
+                diversidade=registro['diversidade'],
+                nutrientes=linhas_nutrientes,
+                recomendacoes=recomendacoes or "<li>Nenhuma.</li>"
+            ))
+        caminhos.append(caminho)
+    return caminhos
+
+def gerar_relatorios_lote(resultados, diretorio="relatorios", nomes=None, catalogo=None,
+                          restricoes=RESTRICOES_RELAXADAS, config=RELATORIO_CONFIG):
+    """
+    Gera o conjunto indexado de relatórios de muitas soluções
+
+    Grava index.html (resumo com links), resumo.csv, compras.csv,
+    nutrientes.csv e uma página HTML por solução em `solucoes/`. As métricas
+    são calculadas de uma vez por calcular_metricas() e as páginas são
+    gravadas em paralelo, em lotes; nada é exibido no console além do
+    caminho gerado.
+
+    Args:
+        resultados (pd.DataFrame | list): Tabela de DietResultStore.ler() ou lista de resultados
+        diretorio (str): Diretório de saída
+        nomes (list): Nomes das soluções (padrão: run_id ou 'solucao_00001', ...)
+        catalogo (CatalogoAlimentos): Catálogo de alimentos (padrão: ALIMENTOS_DATA)
+        restricoes (dict): Restrições nutricionais usadas no status
+        config (dict): Limiares e paralelismo (ver RELATORIO_CONFIG)
+
+    Returns:
+        dict: Caminhos do índice, dos CSVs e das páginas por solução
+    """
+    config = dict(RELATORIO_CONFIG, **config)
+    tabela = tabela_resultados(resultados)
+    if tabela.empty:
+        print("Nenhuma solução para gerar relatórios!")
+        return None
+
+    metricas = calcular_metricas(tabela, catalogo, restricoes, config)
+    resumo = metricas['resumo']
+    nomes = list(nomes) if nomes is not None else resumo['solucao'].tolist()
+    if len(nomes) != len(resumo):
+        raise ValueError("Número de nomes deve ser igual ao número de soluções")
+    paginas = [f"solucoes/solucao_{k:05d}.html" for k in range(len(resumo))]
+
+    os.makedirs(os.path.join(diretorio, 'solucoes'), exist_ok=True)
+    saidas = {nome: os.path.join(diretorio, f"{nome}.csv") for nome in ('resumo', 'compras', 'nutrientes')}
+    compras, nutrientes = _tabela_longa(metricas, nomes)
+    resumo.assign(nome=nomes, pagina=paginas).to_csv(saidas['resumo'], index=False)
+    compras.to_csv(saidas['compras'], index=False)
+    nutrientes.to_csv(saidas['nutrientes'], index=False)
+
+    atendem = int(((resumo['nutrientes_baixos'] + resumo['nutrientes_altos']) == 0).sum())
+    saidas['indice'] = os.path.join(diretorio, "index.html")
+    with open(saidas['indice'], 'w', encoding='utf-8') as f:
+        f.write(MODELO_INDICE.substitute(
+            estilo=ESTILO,
+            gerado=datetime.now().strftime("%Y-%m-%d %H:%M"),
+            n_solucoes=len(resumo),
+            agregados=_agregados(resumo),
+            atendem=atendem,
+            fracao_atendem=f"{atendem / len(resumo):.1%}",
+            linhas=_linhas_indice(resumo, nomes, paginas)
+        ))
+
+    # Páginas por solução: lotes com os registros e as linhas das matrizes correspondentes
+    registros = resumo.assign(nome=nomes, pagina=[os.path.basename(p) for p in paginas]).to_dict('records')
+    tamanho = max(1, config['solucoes_por_tarefa'])
+    lotes = [
+        (registros[inicio:inicio + tamanho],
+         metricas['compras'][inicio:inicio + tamanho],
+         metricas['nutrientes'][inicio:inicio + tamanho],
+         metricas['status'][inicio:inicio + tamanho])
+        for inicio in range(0, len(registros), tamanho)
+    ]
+    argumentos = (os.path.join(diretorio, 'solucoes'), metricas['alimentos'], metricas['precos'],
+                  metricas['nutrientes_catalogo'], metricas['n_min'], metricas['n_max'])
+    gravadas = mapear_em_paralelo(_gravar_paginas, lotes, _criar_contexto_paginas, argumentos, config['workers'])
+    saidas['paginas'] = [caminho for caminhos in gravadas for caminho in caminhos]
+
+    print(f"Relatórios de {len(resumo)} soluções salvos em {saidas['indice']}")
+    return saidas
+
+def main():
+    """Gera os relatórios em lote das soluções do armazenamento"""
+    from armazenamento import DietResultStore
+
+    parser = argparse.ArgumentParser(description="Relatórios em lote das soluções armazenadas")
+    parser.add_argument('--armazenamento', default="resultados", help="Diretório do armazenamento de resultados")
+    parser.add_argument('--modelo', default=None, help="Filtra as soluções de um modelo")
+    parser.add_argument('--saida', default="relatorios", help="Diretório dos relatórios")
+    parser.add_argument('--workers', type=int, default=RELATORIO_CONFIG['workers'])
+    args = parser.parse_args()
+
+    tabela = DietResultStore(args.armazenamento).ler(['objetivo', 'solve_result', 'compras'], modelo=args.modelo)
+    gerar_relatorios_lote(tabela, args.saida, config={'workers': args.workers})
+
+if __name__ == "__main__":
+    main()
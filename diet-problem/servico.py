@@ -0,0 +1,554 @@
+# -*- coding: utf-8 -*-
+"""
+servico.py - Serviço HTTP/JSON local para dietas e mochilas com workers residentes
+
+Autor: José Brito
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import asyncio
+import hashlib
+import argparse
+from concurrent.futures.process import BrokenProcessPool
+from config import RESTRICOES_RELAXADAS, SERVICO_CONFIG
+from catalogo import abrir_catalogo, catalogo_padrao, carregar_catalogo_csv, normalizar_restricoes
+from paralelo import criar_pool, submeter
+
+STATUS_HTTP = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable',
+    504: 'Gateway Timeout',
+}
+
+def _criar_contexto_servico(catalogo, diretorio_mochila):
+    """Cria, em cada worker, o DietSolver (AMPL já inicializado) e o KnapsackDynamicSolver"""
+    catalogo = abrir_catalogo(catalogo)
+    try:
+        from solver import DietSolver
+        dieta = DietSolver(catalogo)
+        dieta = dieta if dieta.ampl else None
+    except ImportError as e:
+        print(f"DietSolver indisponível no worker {os.getpid()}: {e}")
+        dieta = None
+
+    if diretorio_mochila not in sys.path:
+        sys.path.append(diretorio_mochila)
+    from alternative_solver import KnapsackDynamicSolver
+
+    return {
+        'dieta': dieta,
+        'mochila': KnapsackDynamicSolver(),
+        'catalogo': catalogo,
+        'nome_base': f"dieta_servico_{os.getpid()}"
+    }
+
+def _aquecer(contexto, _):
+    """Tarefa vazia usada para iniciar os workers antes da primeira requisição"""
+    return os.getpid()
+
+def _resolver_dieta(contexto, pedido):
+    """Resolve uma dieta com o solver residente do worker"""
+    solver = contexto['dieta']
+    if solver is None:
+        return 503, {'erro': "AMPL não está disponível no worker"}
+
+    catalogo = contexto['catalogo']
+    indices = pedido['indices']
+    solver.definir_catalogo(catalogo.subconjunto(indices) if indices is not None else catalogo)
+
+    inicio = time.perf_counter()
+    resultados = solver.resolver_catalogo(pedido['restricoes'], contexto['nome_base'],
+                                          pedido['diversificado'], verbose=False)
+    if resultados is None:
+        return 500, {'erro': "Falha ao resolver o modelo da dieta"}
+
+    return 200, {
+        'solve_result': str(resultados['solve_result']),
+        'objetivo': resultados['objetivo'],
+        'compras': {alimento: q for alimento, q in resultados['compras'].items() if q},
+        'nutrientes_totais': resultados['nutrientes_totais'],
+        'estatisticas': resultados['estatisticas'],
+        'cache': resultados.get('cache', {}).get('acerto', False),
+        'tempo_worker': round(time.perf_counter() - inicio, 6),
+        'worker': os.getpid()
+    }
+
+def _resolver_mochila(contexto, pedido):
+    """Resolve uma mochila reaproveitando o KnapsackDynamicSolver do worker"""
+    mochila = contexto['mochila']
+    mochila.items = [item['nome'] for item in pedido['itens']]
+    mochila.weights = [item['peso'] for item in pedido['itens']]
+    mochila.values = [item['valor'] for item in pedido['itens']]
+    mochila.capacity = int(round(pedido['capacidade'] * 10))  # Décimos de kg, como no solver
+    mochila.solution = None
+
+    inicio = time.perf_counter()
+    valor = mochila.solve()
+    return 200, {
+        'valor_maximo': valor,
+        'itens_selecionados': mochila.get_selected_items(),
+        'peso_total': round(mochila.get_total_weight(), 1),
+        'capacidade': pedido['capacidade'],
+        'tempo_worker': round(time.perf_counter() - inicio, 6),
+        'worker': os.getpid()
+    }
+
+TAREFAS = {
+    'dieta': _resolver_dieta,
+    'mochila': _resolver_mochila,
+}
+
+def _numero(valor, nome, positivo=False):
+    """Valida um número finito e não negativo (ou positivo) vindo do JSON"""
+    if isinstance(valor, bool) or not isinstance(valor, (int, float)) or not math.isfinite(valor):
+        raise ValueError(f"{nome} deve ser um número finito")
+    if valor < 0 or (positivo and valor == 0):
+        raise ValueError(f"{nome} deve ser {'positivo' if positivo else 'não negativo'}")
+    return float(valor)
+
+def _campos_conhecidos(corpo, campos):
+    desconhecidos = sorted(set(corpo) - set(campos))
+    if desconhecidos:
+        raise ValueError(f"Campos desconhecidos: {', '.join(desconhecidos)}")
+
+def _uma_casa_decimal(valor, nome):
+    if abs(valor * 10 - round(valor * 10)) > 1e-9:
+        raise ValueError(f"{nome} aceita no máximo uma casa decimal")
+
+def validar_dieta(corpo, catalogo):
+    """
+    Valida uma requisição de dieta
+
+    Formato:
+        {"alimentos": ["Aveia", ...],          (opcional; padrão: catálogo inteiro)
+         "restricoes": {"n_min": {"energia": 2000}, "n_max": {...}},
+                                               (opcional; padrão: RESTRICOES_RELAXADAS)
+         "diversificado": false,
+         "timeout": 30}
+
+    Args:
+        corpo (dict): JSON recebido
+        catalogo (CatalogoAlimentos): Catálogo carregado nos workers
+
+    Returns:
+        dict: Pedido normalizado (índices ordenados, restrições por nome, diversificado)
+    """
+    _campos_conhecidos(corpo, ('alimentos', 'restricoes', 'diversificado', 'timeout'))
+
+    nomes = corpo.get('alimentos')
+    indices = None
+    if nomes is not None:
+        if not isinstance(nomes, list) or not nomes or not all(isinstance(n, str) for n in nomes):
+            raise ValueError("'alimentos' deve ser uma lista não vazia de nomes")
+        desconhecidos = [n for n in nomes if n not in catalogo.indice]
+        if desconhecidos:
+            raise ValueError(f"Alimentos desconhecidos: {', '.join(desconhecidos[:10])}")
+        if len(set(nomes)) != len(nomes):
+            raise ValueError("'alimentos' contém nomes repetidos")
+        # A ordem não muda o modelo; ordenar faz pedidos equivalentes terem a mesma chave
+        indices = sorted(catalogo.indice[n] for n in nomes)
+        if len(indices) == len(catalogo):
+            indices = None
+
+    restricoes = corpo.get('restricoes')
+    if restricoes is None:
+        restricoes = {limite: {n: v for n, v in valores.items() if math.isfinite(v)}
+                      for limite, valores in normalizar_restricoes(RESTRICOES_RELAXADAS).items()}
+    if not isinstance(restricoes, dict):
+        raise ValueError("'restricoes' deve ser um objeto com 'n_min' e/ou 'n_max'")
+    _campos_conhecidos(restricoes, ('n_min', 'n_max'))
+
+    nutrientes = set(catalogo.nutrientes)
+    normalizadas = {}
+    for limite in ('n_min', 'n_max'):
+        valores = restricoes.get(limite, {})
+        if not isinstance(valores, dict):
+            raise ValueError(f"'{limite}' deve ser um objeto nutriente -> valor")
+        desconhecidos = sorted(set(valores) - nutrientes)
+        if desconhecidos:
+            raise ValueError(f"Nutrientes desconhecidos em '{limite}': {', '.join(desconhecidos)}")
+        normalizadas[limite] = {n: _numero(v, f"{limite}['{n}']") for n, v in valores.items()}
+
+    conflitos = [n for n, v in normalizadas['n_min'].items() if v > normalizadas['n_max'].get(n, math.inf)]
+    if conflitos:
+        raise ValueError(f"n_min maior que n_max para: {', '.join(sorted(conflitos))}")
+
+    diversificado = corpo.get('diversificado', False)
+    if not isinstance(diversificado, bool):
+        raise ValueError("'diversificado' deve ser true ou false")
+
+    return {'indices': indices, 'restricoes': normalizadas, 'diversificado': diversificado}
+
+def validar_mochila(corpo, config=SERVICO_CONFIG):
+    """
+    Valida uma requisição de mochila
+
+    Formato:
+        {"itens": [{"nome": "Diamond", "peso": 2.0, "valor": 1500}, ...],
+         "capacidade": 10,
+         "timeout": 30}
+
+    Pesos e capacidade em kg com no máximo uma casa decimal, como no
+    KnapsackDynamicSolver (que trabalha em décimos de kg).
+
+    Args:
+        corpo (dict): JSON recebido
+        config (dict): Configuração no formato de SERVICO_CONFIG
+
+    Returns:
+        dict: Pedido normalizado (itens e capacidade)
+    """
+    _campos_conhecidos(corpo, ('itens', 'capacidade', 'timeout'))
+
+    itens = corpo.get('itens')
+    if not isinstance(itens, list) or not itens:
+        raise ValueError("'itens' deve ser uma lista não vazia")
+
+    normalizados = []
+    for k, item in enumerate(itens):
+        if not isinstance(item, dict):
+            raise ValueError(f"Item {k} deve ser um objeto com nome, peso e valor")
+        _campos_conhecidos(item, ('nome', 'peso', 'valor'))
+        nome = item.get('nome', f"item_{k}")
+        if not isinstance(nome, str) or not nome:
+            raise ValueError(f"Item {k}: 'nome' deve ser um texto não vazio")
+        peso = _numero(item.get('peso'), f"Item {k}: 'peso'", positivo=True)
+        _uma_casa_decimal(peso, f"Item {k}: 'peso'")
+        normalizados.append({'nome': nome, 'peso': peso, 'valor': _numero(item.get('valor'), f"Item {k}: 'valor'")})
+
+    if len({item['nome'] for item in normalizados}) != len(normalizados):
+        raise ValueError("'itens' contém nomes repetidos")
+
+    capacidade = _numero(corpo.get('capacidade'), "'capacidade'", positivo=True)
+    _uma_casa_decimal(capacidade, "'capacidade'")
+
+    celulas = len(normalizados) * int(round(capacidade * 10))
+    if celulas > config['celulas_mochila_max']:
+        raise ValueError(f"Instância grande demais: {celulas} células na tabela (máximo {config['celulas_mochila_max']})")
+
+    return {'itens': normalizados, 'capacidade': capacidade}
+
+VALIDADORES = {
+    'dieta': lambda corpo, servico: validar_dieta(corpo, servico.catalogo),
+    'mochila': lambda corpo, servico: validar_mochila(corpo, servico.config),
+}
+
+def ler_timeout(corpo, config=SERVICO_CONFIG):
+    """Timeout da requisição: campo 'timeout' (s) limitado a config['timeout_maximo']"""
+    if corpo.get('timeout') is None:
+        return config['timeout']
+    timeout = _numero(corpo['timeout'], "'timeout'", positivo=True)
+    if timeout > config['timeout_maximo']:
+        raise ValueError(f"'timeout' deve ser no máximo {config['timeout_maximo']} s")
+    return timeout
+
+def chave_pedido(tipo, pedido):
+    """Chave que identifica pedidos idênticos (usada para unir requisições em andamento)"""
+    texto = json.dumps([tipo, pedido], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+def _json_padrao(valor):
+    """Converte escalares/arrays do NumPy para JSON"""
+    if hasattr(valor, 'tolist'):
+        return valor.tolist()
+    return str(valor)
+
+def resposta_http(status, corpo, manter_conexao=True, cabecalhos=None):
+    """
+    Monta uma resposta HTTP/1.1 com corpo JSON
+
+    Args:
+        status (int): Código HTTP
+        corpo (dict): Conteúdo serializado em JSON
+        manter_conexao (bool): Se False, envia Connection: close
+        cabecalhos (dict): Cabeçalhos adicionais
+
+    Returns:
+        bytes: Resposta completa
+    """
+    dados = json.dumps(corpo, ensure_ascii=False, default=_json_padrao).encode('utf-8')
+    linhas = [
+        f"HTTP/1.1 {status} {STATUS_HTTP.get(status, '')}",
+        "Content-Type: application/json; charset=utf-8",
+        f"Content-Length: {len(dados)}",
+        f"Connection: {'keep-alive' if manter_conexao else 'close'}",
+    ]
+    linhas += [f"{nome}: {valor}" for nome, valor in (cabecalhos or {}).items()]
+    return ("\r\n".join(linhas) + "\r\n\r\n").encode('latin-1') + dados
+
+class ServicoOtimizacao:
+    """
+    Serviço HTTP/JSON (asyncio) que resolve dietas e mochilas em um pool de
+    processos com os solvers residentes
+
+    Rotas:
+        POST /dieta    Dieta para um subconjunto do catálogo e um perfil de necessidades
+        POST /mochila  Mochila para uma lista de itens e uma capacidade
+        GET  /saude    Contadores do serviço
+
+    Cada worker inicializa o AMPL (DietSolver) e o KnapsackDynamicSolver uma
+    única vez. Requisições idênticas que chegam enquanto a primeira está em
+    andamento aguardam o mesmo solve. Com `fila_maxima` solves distintos em
+    andamento, novas requisições recebem 503 (com Retry-After); a que passa
+    do seu timeout recebe 504, mas o solve continua e atende as demais
+    requisições unidas a ele.
+    """
+
+    def __init__(self, catalogo=None, config=SERVICO_CONFIG):
+        """
+        Args:
+            catalogo (CatalogoAlimentos): Catálogo dos pedidos de dieta (padrão: ALIMENTOS_DATA)
+            config (dict): Configuração no formato de SERVICO_CONFIG
+        """
+        self.catalogo = catalogo if catalogo is not None else catalogo_padrao()
+        self.config = dict(config)
+        self.executor = None
+        self._publicado = None
+        self.servidor = None
+        self._em_andamento = {}
+        self.contadores = {'requisicoes': 0, 'solves': 0, 'coalescidas': 0,
+                           'recusadas': 0, 'timeouts': 0, 'erros': 0}
+
+    def _diretorio_mochila(self):
+        diretorio = self.config['diretorio_mochila']
+        if not os.path.isabs(diretorio):
+            diretorio = os.path.join(os.path.dirname(os.path.abspath(__file__)), diretorio)
+        return os.path.normpath(diretorio)
+
+    def _criar_pool(self):
+        # Os workers anexam o catálogo publicado em memória compartilhada, sem cópia
+        if self._publicado is None:
+            self._publicado = self.catalogo.publicar()
+        return criar_pool(_criar_contexto_servico, (self._publicado.descritor, self._diretorio_mochila()),
+                          self.config['workers'])
+
+    async def iniciar(self):
+        """
+        Inicia os workers (aguardando a inicialização dos solvers) e o servidor
+
+        Returns:
+            asyncio.Server: Servidor em execução
+        """
+        self.executor = self._criar_pool()
+        await asyncio.gather(*(asyncio.wrap_future(submeter(self.executor, _aquecer, None))
+                               for _ in range(self.config['workers'])))
+        self.servidor = await asyncio.start_server(self._atender_conexao, self.config['host'], self.config['porta'])
+        return self.servidor
+
+    async def encerrar(self):
+        """Fecha o servidor e o pool de workers"""
+        if self.servidor is not None:
+            self.servidor.close()
+            await self.servidor.wait_closed()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        if self._publicado is not None:
+            self._publicado.liberar()
+            self._publicado = None
+
+    def saude(self):
+        """Estado e contadores do serviço"""
+        return {
+            'workers': self.config['workers'],
+            'em_andamento': len(self._em_andamento),
+            'fila_maxima': self.config['fila_maxima'],
+            'alimentos': len(self.catalogo),
+            **self.contadores
+        }
+
+    async def _ler_requisicao(self, leitor):
+        """
+        Lê uma requisição HTTP/1.1
+
+        Returns:
+            tuple: (método, caminho, cabeçalhos, corpo) ou None no fim da conexão;
+                corpo None indica corpo acima do tamanho máximo
+        """
+        linha = await leitor.readline()
+        if not linha:
+            return None
+        partes = linha.decode('latin-1').split()
+        if len(partes) != 3:
+            raise ValueError("Linha de requisição inválida")
+        metodo, caminho, _ = partes
+
+        cabecalhos = {}
+        while True:
+            linha = await leitor.readline()
+            if linha in (b'\r\n', b'\n', b''):
+                break
+            nome, _, valor = linha.decode('latin-1').partition(':')
+            cabecalhos[nome.strip().lower()] = valor.strip()
+
+        tamanho = int(cabecalhos.get('content-length', 0))
+        if tamanho > self.config['tamanho_maximo_corpo']:
+            return metodo, caminho, cabecalhos, None
+        corpo = await leitor.readexactly(tamanho) if tamanho > 0 else b''
+        return metodo, caminho, cabecalhos, corpo
+
+    async def _atender_conexao(self, leitor, escritor):
+        """Atende as requisições de uma conexão (keep-alive) até o cliente fechar"""
+        try:
+            while True:
+                try:
+                    requisicao = await self._ler_requisicao(leitor)
+                except (ValueError, asyncio.LimitOverrunError):
+                    escritor.write(resposta_http(400, {'erro': "Requisição HTTP inválida"}, False))
+                    break
+                if requisicao is None:
+                    break
+
+                metodo, caminho, cabecalhos, corpo = requisicao
+                if corpo is None:
+                    escritor.write(resposta_http(413, {'erro': "Corpo da requisição grande demais"}, False))
+                    break
+
+                status, resposta, extras = await self._rotear(metodo, caminho, corpo)
+                manter = cabecalhos.get('connection', '').lower() != 'close'
+                escritor.write(resposta_http(status, resposta, manter, extras))
+                await escritor.drain()
+                if not manter:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    async def _rotear(self, metodo, caminho, corpo):
+        """
+        Despacha a requisição para a rota
+
+        Returns:
+            tuple: (status, corpo da resposta, cabeçalhos adicionais)
+        """
+        self.contadores['requisicoes'] += 1
+        caminho = caminho.split('?', 1)[0].rstrip('/') or '/'
+
+        if caminho == '/saude':
+            if metodo != 'GET':
+                return 405, {'erro': "Use GET em /saude"}, {'Allow': 'GET'}
+            return 200, self.saude(), None
+
+        tipo = caminho[1:]
+        if tipo not in TAREFAS:
+            return 404, {'erro': f"Rota desconhecida: {caminho}"}, None
+        if metodo != 'POST':
+            return 405, {'erro': f"Use POST em {caminho}"}, {'Allow': 'POST'}
+
+        try:
+            dados = json.loads(corpo or b'null')
+            if not isinstance(dados, dict):
+                raise ValueError("O corpo deve ser um objeto JSON")
+            pedido = VALIDADORES[tipo](dados, self)
+            timeout = ler_timeout(dados, self.config)
+        except ValueError as e:
+            return 400, {'erro': str(e)}, None
+
+        return await self._resolver(tipo, pedido, timeout)
+
+    def _concluir(self, chave, futuro):
+        """Remove o solve concluído dos pedidos em andamento"""
+        if self._em_andamento.get(chave) is futuro:
+            del self._em_andamento[chave]
+        # Marca a exceção como lida mesmo que todos os clientes tenham desistido (timeout)
+        if not futuro.cancelled():
+            futuro.exception()
+
+    async def _resolver(self, tipo, pedido, timeout):
+        """Une o pedido a um solve idêntico em andamento ou envia um novo ao pool"""
+        chave = chave_pedido(tipo, pedido)
+        futuro = self._em_andamento.get(chave)
+        coalescida = futuro is not None
+
+        if coalescida:
+            self.contadores['coalescidas'] += 1
+        else:
+            if len(self._em_andamento) >= self.config['fila_maxima']:
+                self.contadores['recusadas'] += 1
+                return 503, {'erro': "Serviço ocupado; tente novamente"}, {'Retry-After': '1'}
+            futuro = asyncio.wrap_future(submeter(self.executor, TAREFAS[tipo], pedido))
+            self._em_andamento[chave] = futuro
+            futuro.add_done_callback(lambda f: self._concluir(chave, f))
+            self.contadores['solves'] += 1
+
+        extras = {'X-Coalescida': '1' if coalescida else '0'}
+        try:
+            # shield: o timeout de um cliente não cancela o solve compartilhado
+            status, resposta = await asyncio.wait_for(asyncio.shield(futuro), timeout)
+        except asyncio.TimeoutError:
+            self.contadores['timeouts'] += 1
+            return 504, {'erro': f"Tempo limite de {timeout:g} s excedido"}, extras
+        except BrokenProcessPool:
+            self.contadores['erros'] += 1
+            self._reiniciar_pool()
+            return 503, {'erro': "Worker encerrado inesperadamente; pool reiniciado"}, {'Retry-After': '1'}
+        except Exception as e:
+            self.contadores['erros'] += 1
+            return 500, {'erro': str(e)}, extras
+        return status, resposta, extras
+
+    def _reiniciar_pool(self):
+        """Substitui um pool quebrado (ex.: worker morto) por um novo"""
+        if self.executor is not None and getattr(self.executor, '_broken', False):
+            print("Pool de workers quebrado; criando um novo")
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = self._criar_pool()
+
+async def executar_servico(catalogo=None, config=SERVICO_CONFIG):
+    """
+    Inicia o serviço e atende requisições até ser interrompido
+
+    Args:
+        catalogo (CatalogoAlimentos): Catálogo dos pedidos de dieta
+        config (dict): Configuração no formato de SERVICO_CONFIG
+    """
+    servico = ServicoOtimizacao(catalogo, config)
+    print("Iniciando workers...")
+    servidor = await servico.iniciar()
+
+    print("\n" + "="*60)
+    print("SERVIÇO DE OTIMIZAÇÃO")
+    print("="*60)
+    print(f"Endereço: http://{config['host']}:{config['porta']}")
+    print(f"Workers: {config['workers']} | Fila máxima: {config['fila_maxima']} | Timeout: {config['timeout']} s")
+    print(f"Catálogo: {len(servico.catalogo)} alimentos x {len(servico.catalogo.nutrientes)} nutrientes")
+    print("Rotas: POST /dieta, POST /mochila, GET /saude")
+    print("="*60)
+
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        await servico.encerrar()
+
+def main():
+    """Ponto de entrada da linha de comando"""
+    parser = argparse.ArgumentParser(description="Serviço HTTP/JSON local para dietas e mochilas")
+    parser.add_argument('--host', default=SERVICO_CONFIG['host'])
+    parser.add_argument('--porta', type=int, default=SERVICO_CONFIG['porta'])
+    parser.add_argument('--workers', type=int, default=SERVICO_CONFIG['workers'])
+    parser.add_argument('--fila-maxima', type=int, default=SERVICO_CONFIG['fila_maxima'])
+    parser.add_argument('--timeout', type=float, default=SERVICO_CONFIG['timeout'])
+    parser.add_argument('--catalogo', help="CSV com a tabela de alimentos (padrão: ALIMENTOS_DATA)")
+    args = parser.parse_args()
+
+    config = dict(SERVICO_CONFIG, host=args.host, porta=args.porta, workers=args.workers,
+                  fila_maxima=args.fila_maxima, timeout=args.timeout)
+    catalogo = carregar_catalogo_csv(args.catalogo) if args.catalogo else None
+
+    try:
+        asyncio.run(executar_servico(catalogo, config))
+    except KeyboardInterrupt:
+        print("\nServiço encerrado.")
+
+if __name__ == "__main__":
+    main()
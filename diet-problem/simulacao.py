@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""
+simulacao.py - Simulação Monte Carlo do custo da dieta sob incerteza de preços
+
+Autor: José Brito
+"""
+
+import os
+import time
+import numpy as np
+from config import RESTRICOES_RELAXADAS, SIMULACAO_CONFIG
+from paralelo import mapear_em_paralelo
+from solver import DietSolver
+
+# Quantis reportados para a distribuição de custo
+QUANTIS = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# Folga para classificar compras da relaxação como básicas e duais como não nulos
+TOLERANCIA_BASE = 1e-7
+
+def amostrar_precos(catalogo, n_cenarios, distribuicoes=None, volatilidade=0.15, semente=42):
+    """
+    Amostra cenários de preços a partir de distribuições por alimento
+
+    Por padrão cada preço segue uma lognormal com média igual ao preço do
+    catálogo e desvio relativo `volatilidade`. Alimentos em `distribuicoes`
+    podem usar outra distribuição:
+        {'tipo': 'lognormal', 'volatilidade': 0.3}
+        {'tipo': 'normal', 'desvio': 1.5}
+        {'tipo': 'uniforme', 'min': 2.0, 'max': 5.0}
+
+    Args:
+        catalogo (CatalogoAlimentos): Catálogo com os preços de referência
+        n_cenarios (int): Número de cenários
+        distribuicoes (dict): Distribuição específica por nome de alimento
+        volatilidade (float): Desvio relativo padrão
+        semente (int): Semente do gerador aleatório
+
+    Returns:
+        np.ndarray: Matriz de preços (cenários x alimentos), sem valores negativos
+    """
+    rng = np.random.default_rng(semente)
+    base = catalogo.precos
+
+    sigma = np.sqrt(np.log1p(volatilidade ** 2))
+    precos = base * rng.lognormal(-sigma ** 2 / 2, sigma, size=(n_cenarios, len(base)))
+
+    for nome, dist in (distribuicoes or {}).items():
+        j = catalogo.indice.get(nome)
+        if j is None:
+            continue
+        tipo = dist.get('tipo', 'lognormal')
+        if tipo == 'lognormal':
+            s = np.sqrt(np.log1p(dist.get('volatilidade', volatilidade) ** 2))
+            precos[:, j] = base[j] * rng.lognormal(-s ** 2 / 2, s, size=n_cenarios)
+        elif tipo == 'normal':
+            precos[:, j] = rng.normal(dist.get('media', base[j]), dist['desvio'], size=n_cenarios)
+        elif tipo == 'uniforme':
+            precos[:, j] = rng.uniform(dist['min'], dist['max'], size=n_cenarios)
+        else:
+            raise ValueError(f"Distribuição desconhecida para {nome}: {tipo}")
+
+    return np.maximum(precos, 0.0)
+
+def duais_por_cenario(catalogo, duais, compras_relaxacao, precos):
+    """
+    Recalcula os duais de cada cenário mantendo a base ótima da relaxação base
+
+    Os alimentos básicos (estritamente entre os limites na relaxação) têm
+    custo reduzido zero, a_j·y = c_j, nos nutrientes com dual não nulo. Com
+    uma base não degenerada (tantos básicos quanto nutrientes ativos) esse
+    sistema é quadrado e dá os duais de cada cenário; caso contrário os
+    duais base são repetidos e a triagem re-otimiza os cenários que mudam o
+    preço de algum alimento básico.
+
+    Args:
+        catalogo (CatalogoAlimentos): Catálogo de alimentos
+        duais (dict): Duais da relaxação base por nutriente
+        compras_relaxacao (np.ndarray): Compras fracionárias da relaxação base
+        precos (np.ndarray): Matriz de preços (cenários x alimentos)
+
+    Returns:
+        np.ndarray: Duais por cenário (cenários x nutrientes do catálogo)
+    """
+    y = np.array([duais.get(n, 0.0) for n in catalogo.nutrientes], dtype=float)
+    por_cenario = np.tile(y, (len(precos), 1))
+    basicos = np.flatnonzero((compras_relaxacao > TOLERANCIA_BASE)
+                             & (compras_relaxacao < catalogo.max_porcoes - TOLERANCIA_BASE))
+    ativos = np.flatnonzero(np.abs(y) > TOLERANCIA_BASE)
+    if len(basicos) and len(basicos) == len(ativos):
+        base = catalogo.matriz_densa()[np.ix_(basicos, ativos)]
+        try:
+            por_cenario[:, ativos] = np.linalg.solve(base, precos[:, basicos].T).T
+        except np.linalg.LinAlgError:
+            pass
+    return por_cenario
+
+def _criar_solver_cenarios(catalogo, restricoes):
+    """Cria, em cada worker, um DietSolver com o modelo do catálogo já carregado"""
+    solver = DietSolver(catalogo)
+    arquivo_mod, arquivo_dat = solver.preparar_catalogo(restricoes, f"dieta_cenario_{os.getpid()}")
+    solver.carregar_modelo(arquivo_mod, arquivo_dat)
+    return solver
+
+def _resolver_cenario(solver, precos):
+    """Re-otimiza um cenário no modelo residente do worker"""
+    resultados = solver.resolver_carregado(precos)
+    if not resultados or resultados['objetivo'] is None:
+        return np.nan, None
+    compras = np.array([resultados['compras'].get(nome, 0) for nome in solver.alimentos])
+    return resultados['objetivo'], compras
+
+class DietMonteCarlo:
+    """
+    Distribuição do custo da dieta sob volatilidade de preços
+
+    Cada cenário é primeiro triado de forma vetorizada pela base ótima da
+    relaxação base: com os duais recalculados para os preços do cenário
+    (duais_por_cenario), a base continua ótima se os sinais dos duais e o
+    padrão de sinais dos custos reduzidos frente à relaxação base não mudam.
+    Nesse caso o ótimo da relaxação do cenário é conhecido sem resolver, e o
+    plano incumbente é mantido quando seu gap até ele não passa do gap
+    certificado da própria base mais `tolerancia_gap`. O custo registrado é
+    então um limite superior, certificado dentro desse gap. Os demais
+    cenários são re-otimizados em paralelo, com o modelo residente em cada
+    worker.
+    """
+
+    def __init__(self, solver, catalogo, restricoes=RESTRICOES_RELAXADAS, config=SIMULACAO_CONFIG,
+                 distribuicoes=None):
+        """
+        Args:
+            solver (DietSolver): Solver já inicializado (usado na solução base)
+            catalogo (CatalogoAlimentos): Catálogo de alimentos
+            restricoes (dict): Restrições nutricionais
+            config (dict): Parâmetros da simulação (ver SIMULACAO_CONFIG)
+            distribuicoes (dict): Distribuição específica por alimento
+        """
+        self.solver = solver
+        self.catalogo = catalogo
+        self.restricoes = restricoes
+        self.config = dict(SIMULACAO_CONFIG, **config)
+        self.distribuicoes = distribuicoes
+        self.resumo = None
+
+    def executar(self, verbose=True):
+        """
+        Executa a simulação
+
+        Returns:
+            dict: Quantis de custo, frequência de seleção por alimento e contagens
+                (re-otimizados e falhas, cenários que ficaram com o custo do incumbente)
+        """
+        inicio = time.perf_counter()
+        cfg = self.config
+        precos = amostrar_precos(self.catalogo, cfg['cenarios'], self.distribuicoes,
+                                 cfg['volatilidade'], cfg['semente'])
+
+        # Solução base e duais da relaxação
+        self.solver.definir_catalogo(self.catalogo)
+        arquivo_mod, arquivo_dat = self.solver.preparar_catalogo(self.restricoes, "dieta_simulacao_base")
+        base = self.solver.resolver_modelo(arquivo_mod, arquivo_dat, verbose=False)
+        relaxacao = self.solver.resolver_relaxacao(arquivo_mod, arquivo_dat)
+        if not base or not relaxacao:
+            print("Não foi possível resolver a instância base da simulação.")
+            return None
+
+        incumbente = np.array([base['compras'].get(nome, 0) for nome in self.catalogo.nomes], dtype=float)
+
+        # Triagem vetorizada: a base da relaxação continua ótima no cenário?
+        duais, fracionario = relaxacao['duais'], relaxacao['compras']
+        y_base = np.array([duais.get(n, 0.0) for n in self.catalogo.nutrientes], dtype=float)
+        y_cenarios = duais_por_cenario(self.catalogo, duais, fracionario, precos)
+        padrao_base = self.catalogo.padrao_sinais(duais, fracionario)
+        mesmo_padrao = (np.all(self.catalogo.padrao_sinais(y_cenarios, fracionario, precos) == padrao_base, axis=1)
+                        & np.all(np.sign(y_cenarios) == np.sign(y_base), axis=1))
+
+        # Com a base mantida, o ótimo da relaxação do cenário é o custo das compras fracionárias
+        custo_base = float(self.catalogo.precos @ incumbente)
+        limite_base = float(self.catalogo.precos @ fracionario)
+        gap_base = max(0.0, (custo_base - limite_base) / max(abs(custo_base), 1e-9))
+        custos = precos @ incumbente
+        gaps = np.where(mesmo_padrao, (custos - precos @ fracionario) / np.maximum(np.abs(custos), 1e-9), np.inf)
+        mantidos = gaps <= gap_base + cfg['tolerancia_gap']
+        reotimizar = np.flatnonzero(~mantidos)
+
+        selecoes = np.zeros(len(self.catalogo))
+        selecoes += (len(custos) - len(reotimizar)) * (incumbente > 0)
+
+        if verbose:
+            print(f"Cenários: {len(custos)} | mantidos pela triagem: {len(custos) - len(reotimizar)} "
+                  f"| a re-otimizar: {len(reotimizar)}")
+
+        falhas = 0
+        if len(reotimizar):
+            workers = cfg['workers']
+            solucoes = mapear_em_paralelo(
+                _resolver_cenario,
+                [precos[s] for s in reotimizar],
+                _criar_solver_cenarios,
+                (self.catalogo, self.restricoes),
+                workers=workers,
+                chunksize=max(1, len(reotimizar) // (4 * max(workers, 1)))
+            )
+            for s, (objetivo, compras) in zip(reotimizar, solucoes):
+                if compras is None:
+                    # Sem solução: mantém o custo do incumbente para o cenário e conta a falha
+                    falhas += 1
+                    selecoes += incumbente > 0
+                    continue
+                custos[s] = objetivo
+                selecoes += compras > 0
+
+        self.resumo = {
+            'cenarios': len(custos),
+            'reotimizados': len(reotimizar),
+            # Re-otimizações sem solução: o cenário fica com o custo do incumbente
+            'falhas': falhas,
+            'gap_base': gap_base,
+            # Custos mantidos pela triagem são limites superiores, certificados dentro deste gap
+            'gap_maximo_mantidos': float(np.max(np.maximum(gaps[mantidos], 0.0))) if mantidos.any() else 0.0,
+            'custo_base': base['objetivo'],
+            'custo_medio': float(np.mean(custos)),
+            'custo_desvio': float(np.std(custos)),
+            'quantis': {q: float(v) for q, v in zip(QUANTIS, np.quantile(custos, QUANTIS))},
+            'frequencia_selecao': dict(zip(self.catalogo.nomes, (selecoes / len(custos)).tolist())),
+            'tempo': time.perf_counter() - inicio
+        }
+
+        if verbose:
+            self.exibir_resumo()
+        return self.resumo
+
+    def exibir_resumo(self):
+        """Exibe o resumo da simulação"""
+        resumo = self.resumo
+        if not resumo:
+            print("Nenhuma simulação executada.")
+            return
+
+        print("\n" + "="*60)
+        print("SIMULAÇÃO MONTE CARLO DE PREÇOS")
+        print("="*60)
+        print(f"Cenários: {resumo['cenarios']} (re-otimizados: {resumo['reotimizados']}, "
+              f"falhas: {resumo['falhas']})")
+        if resumo['falhas']:
+            print("Cenários com falha ao re-otimizar ficaram com o custo do plano base")
+        if resumo['reotimizados'] < resumo['cenarios']:
+            print(f"Custos dos cenários mantidos são limites superiores "
+                  f"(gap certificado de até {resumo['gap_maximo_mantidos']:.2%}; "
+                  f"gap da base: {resumo['gap_base']:.2%})")
+        print(f"Custo base: R$ {resumo['custo_base']:.2f}")
+        print(f"Custo médio: R$ {resumo['custo_medio']:.2f} (desvio R$ {resumo['custo_desvio']:.2f})")
+        print("\nQuantis do custo:")
+        print("-"*40)
+        for q, valor in resumo['quantis'].items():
+            print(f"P{int(q * 100):<3}: R$ {valor:7.2f}")
+        print("\nFrequência de seleção por alimento:")
+        print("-"*40)
+        for nome, freq in sorted(resumo['frequencia_selecao'].items(), key=lambda item: -item[1]):
+            if freq > 0:
+                print(f"{nome:<20}: {freq:6.1%}")
+        print(f"\nTempo total: {resumo['tempo']:.2f} s")
+        print("="*60)
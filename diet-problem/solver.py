@@ -6,29 +6,149 @@ Autor: José Brito
 """
 
 import os
-import json
+import time
+import threading
 from datetime import datetime
+import numpy as np
 from amplpy import AMPL, ampl_notebook
-from config import ALIMENTOS_DATA, NUTRIENTES, SOLVER_CONFIG
+from config import NUTRIENTES, RESTRICOES_ORIGINAIS, RESTRICOES_RELAXADAS, SOLVER_CONFIG, REGISTRO_NUTRIENTES, CACHE_CONFIG
+from catalogo import catalogo_padrao, normalizar_restricoes
+from models import gerar_modelo, salvar_modelo
+from data_handler import criar_arquivo_dat_catalogo, acrescentar_cortes_dat
+from armazenamento import DietResultStore, hash_arquivo
+from cache_solucoes import DietSolveCache, chave_solucao
+from progresso import AcompanhamentoSolver, opcoes_solver
+from telemetria import TelemetriaSolve, estatisticas_solver, perfil
 
 class DietSolver:
     """
     Classe para resolver o problema da dieta usando AMPL
     """
     
-    def __init__(self):
-        """Inicializa o solver AMPL"""
+    def __init__(self, catalogo=None, cache=None):
+        """
+        Inicializa o solver AMPL
+        
+        Args:
+            catalogo (CatalogoAlimentos): Catálogo de alimentos (padrão: ALIMENTOS_DATA)
+            cache (DietSolveCache | bool): Cache de soluções (padrão: conforme CACHE_CONFIG; False desativa)
+        """
+        self._carregar_tabela(catalogo if catalogo is not None else catalogo_padrao())
+        self.armazenamento = None
+        self._ultimo_dat = None
+        if cache is None:
+            cache = DietSolveCache() if CACHE_CONFIG['ativo'] else None
+        self.cache = cache if cache is not False else None
+        
+        # Tempo de inicialização do AMPL, atribuído à telemetria da primeira solução
+        inicio = time.perf_counter()
         try:
             self.ampl = ampl_notebook(
                 modules=["coin"],
                 license_uuid="default",
             )
+            self._tempo_inicializacao = time.perf_counter() - inicio
             print("AMPL inicializado com sucesso!")
         except Exception as e:
             print(f"Erro ao inicializar AMPL: {e}")
             self.ampl = None
+            self._tempo_inicializacao = None
+    
+    def _carregar_tabela(self, catalogo):
+        """
+        Guarda em cache os vetores de preço e a matriz de nutrientes do catálogo
+        
+        Args:
+            catalogo (CatalogoAlimentos): Catálogo de alimentos
+        """
+        self.catalogo = catalogo
+        self.alimentos = catalogo.nomes
+        self.nutrientes = catalogo.nutrientes
+        self._indice_alimentos = catalogo.indice
+        
+        # Matriz (alimentos x nutrientes) e vetores alinhados com self.alimentos
+        self._matriz_nutrientes = catalogo.matriz
+        self._precos = catalogo.precos
+        self._max_porcoes = catalogo.max_porcoes
+    
+    def definir_catalogo(self, catalogo):
+        """
+        Troca o catálogo usado na extração e avaliação dos resultados
+        
+        Args:
+            catalogo (CatalogoAlimentos): Novo catálogo de alimentos
+        """
+        self._carregar_tabela(catalogo)
+    
+    def _vetor_compras(self, compras):
+        """
+        Converte as compras para um vetor alinhado com a tabela de alimentos
+        
+        Args:
+            compras (dict | array): Quantidades por alimento ou vetor já alinhado
+            
+        Returns:
+            np.ndarray: Vetor de quantidades
+        """
+        if isinstance(compras, dict):
+            return self.catalogo.vetor(compras)
+        return np.asarray(compras, dtype=float)
     
-    def resolver_modelo(self, arquivo_mod, arquivo_dat, verbose=True):
+    def _configurar_solver(self, acompanhar=False):
+        """
+        Seleciona o solver e repassa os limites de SOLVER_CONFIG (tempo, gap, threads)
+        
+        Args:
+            acompanhar (bool): Se True, liga o log de progresso do solver
+        """
+        self.ampl.option['solver'] = SOLVER_CONFIG['solver']
+        nome, valor = opcoes_solver(SOLVER_CONFIG, acompanhar)
+        if nome is None:
+            print(f"Limites não repassados: opções do solver '{SOLVER_CONFIG['solver']}' desconhecidas")
+        elif valor:
+            self.ampl.option[nome] = valor
+    
+    def _resolver_acompanhado(self, acompanhamento):
+        """
+        Resolve o modelo carregado registrando o progresso do solver
+        
+        O solve roda em uma thread; a thread principal interrompe o AMPL
+        quando o critério de parada do acompanhamento é atingido.
+        
+        Args:
+            acompanhamento (AcompanhamentoSolver): Receptor da saída do solver
+            
+        Returns:
+            bool: True se o solve foi interrompido pelo critério de parada
+        """
+        anterior = self.ampl.get_output_handler()
+        self.ampl.set_output_handler(acompanhamento)
+        erros = []
+        
+        def executar():
+            try:
+                self.ampl.solve()
+            except Exception as e:
+                erros.append(e)
+        
+        interrompido = False
+        tarefa = threading.Thread(target=executar, daemon=True)
+        try:
+            tarefa.start()
+            while tarefa.is_alive():
+                tarefa.join(0.1)
+                if acompanhamento.parar.is_set() and not interrompido:
+                    self.ampl.interrupt()
+                    interrompido = True
+        finally:
+            self.ampl.set_output_handler(anterior)
+        
+        if erros:
+            raise erros[0]
+        return interrompido
+    
+    def resolver_modelo(self, arquivo_mod, arquivo_dat, verbose=True, usar_cache=True, invalidar_cache=False,
+                        acompanhar=None, perfilar=False):
         """
         Resolve um modelo específico
         
@@ -36,30 +156,87 @@ class DietSolver:
             arquivo_mod (str): Caminho para o arquivo .mod
             arquivo_dat (str): Caminho para o arquivo .dat
             verbose (bool): Se True, exibe informações detalhadas
+            usar_cache (bool): Se False, ignora o cache de soluções e sempre resolve
+            invalidar_cache (bool): Se True, descarta a entrada em cache antes de resolver
+            acompanhar (bool | callable): True registra o progresso (incumbente, limite, gap
+                e nós) em resultados['progresso']; uma função evento -> bool também
+                interrompe o solve quando retornar True (ver progresso.parar_com_gap)
+            perfilar (bool | str): Se verdadeiro, perfila a solução com cProfile e tracemalloc
+                (uma string é usada como caminho do arquivo .prof)
             
         Returns:
-            dict: Resultados da otimização
+            dict: Resultados da otimização, com tempos por fase e estatísticas do
+                solver em resultados['telemetry']
         """
+        if perfilar:
+            arquivo_perfil = perfilar if isinstance(perfilar, str) else None
+            with perfil(arquivo_perfil) as resumo_perfil:
+                resultados = self.resolver_modelo(arquivo_mod, arquivo_dat, verbose, usar_cache,
+                                                  invalidar_cache, acompanhar)
+            if resultados is not None:
+                resultados['telemetry']['perfil'] = resumo_perfil
+                if verbose:
+                    print(resumo_perfil['funcoes'])
+            return resultados
+        
+        telemetria = TelemetriaSolve()
+        if self._tempo_inicializacao is not None:
+            telemetria.registrar('inicializacao', self._tempo_inicializacao)
+            self._tempo_inicializacao = None
+        
+        chave = None
+        resultados = None
+        if self.cache is not None and usar_cache:
+            with telemetria.fase('cache'):
+                try:
+                    chave = chave_solucao(arquivo_mod, arquivo_dat, SOLVER_CONFIG)
+                except OSError as e:
+                    print(f"Erro ao ler arquivos para o cache: {e}")
+                if chave and invalidar_cache:
+                    self.cache.invalidar(chave)
+                elif chave:
+                    resultados = self.cache.obter(chave)
+            if resultados is not None:
+                self._ultimo_dat = arquivo_dat
+                resultados['cache'] = {'chave': chave[:16], 'acerto': True}
+                resultados['telemetry'] = telemetria.resumo()
+                if verbose:
+                    print(f"\nSolução de {arquivo_mod} + {arquivo_dat} recuperada do cache")
+                    self._exibir_resultados(resultados)
+                return resultados
+        
         if not self.ampl:
             print("AMPL não está disponível!")
             return None
         
         try:
             # Reset e carregamento do modelo
-            self.ampl.reset()
-            self.ampl.read(arquivo_mod)
-            self.ampl.read_data(arquivo_dat)
+            with telemetria.fase('reset'):
+                self.ampl.reset()
+            with telemetria.fase('leitura_modelo'):
+                self.ampl.read(arquivo_mod)
+            with telemetria.fase('leitura_dados'):
+                self.ampl.read_data(arquivo_dat)
+            self._ultimo_dat = arquivo_dat
             
             # Configurar solver
-            self.ampl.option['solver'] = SOLVER_CONFIG['solver']
+            self._configurar_solver(acompanhar=bool(acompanhar))
             
             if verbose:
                 print(f"\nResolvendo modelo: {arquivo_mod}")
                 print(f"Dados de entrada: {arquivo_dat}")
                 print(f"Solver utilizado: {SOLVER_CONFIG['solver']}")
             
-            # Resolver
-            self.ampl.solve()
+            # Resolver (com o progresso do solver registrado no modo anytime)
+            acompanhamento = None
+            with telemetria.fase('solve'):
+                if acompanhar:
+                    acompanhamento = AcompanhamentoSolver(
+                        SOLVER_CONFIG['solver'], acompanhar if callable(acompanhar) else None, verbose
+                    )
+                    interrompido = self._resolver_acompanhado(acompanhamento)
+                else:
+                    self.ampl.solve()
             
             # Verificar status da solução
             solve_result = self.ampl.get_value("solve_result")
@@ -68,7 +245,19 @@ class DietSolver:
                 print(f"Status da solução: {solve_result}")
             
             # Extrair resultados
-            resultados = self._extrair_resultados(verbose)
+            with telemetria.fase('extracao'):
+                resultados = self._extrair_resultados(verbose)
+            if acompanhamento is not None:
+                resultados['progresso'] = acompanhamento.eventos
+                resultados['interrompido'] = interrompido
+            resultados['telemetry'] = telemetria.resumo(
+                estatisticas_solver(self.ampl, progresso=resultados.get('progresso'))
+            )
+            
+            # Guardar no cache apenas soluções conclusivas (não falhas ou limites atingidos)
+            if chave and str(solve_result).startswith(('solved', 'optimal', 'infeasible')):
+                resultados['cache'] = {'chave': chave[:16], 'acerto': False}
+                self.cache.guardar(chave, resultados)
             
             return resultados
             
@@ -76,6 +265,516 @@ class DietSolver:
             print(f"Erro ao resolver modelo: {e}")
             return None
     
+    def preparar_catalogo(self, restricoes=RESTRICOES_RELAXADAS, nome_base="dieta_catalogo", *,
+                          diversificado=False, elastico=False, reforcado=False, cortes=False, proximal=False,
+                          compartilhado=False, pareto=False, limite_individual=True):
+        """
+        Gera os arquivos .mod/.dat do modelo indexado para o catálogo carregado
+        
+        Args:
+            restricoes (dict): Restrições por número ou por nome de nutriente
+            nome_base (str): Prefixo dos arquivos gerados
+            diversificado (bool): Se True, usa a variante com diversidade
+            elastico (bool): Se True, usa a variante com folgas elásticas
+            reforcado (bool): Se True, usa a formulação diversificada reforçada
+            cortes (bool): Se True, acrescenta os cortes de cardinalidade e cobertura
+            proximal (bool): Se True, inclui os termos do hedging progressivo (w, x_medio, rho)
+            compartilhado (bool): Se True, inclui o ajuste de preços e o orçamento individual
+            pareto (bool): Se True, inclui o peso da diversidade e o mínimo de alimentos distintos
+            limite_individual (bool): Se False, omite Limite_Individual (teto já em max_porcoes)
+            
+        Returns:
+            tuple: (arquivo_mod, arquivo_dat)
+        """
+        registro = {n: REGISTRO_NUTRIENTES.get(n, {}) for n in self.nutrientes}
+        modelo = gerar_modelo(registro, diversificado=diversificado, elastico=elastico, reforcado=reforcado,
+                              cortes=cortes, proximal=proximal, compartilhado=compartilhado, pareto=pareto,
+                              limite_individual=limite_individual)
+        salvar_modelo(modelo, nome_base)
+        criar_arquivo_dat_catalogo(self.catalogo, restricoes, nome_base)
+        if diversificado and reforcado and cortes and not elastico:
+            acrescentar_cortes_dat(self.catalogo, restricoes, nome_base)
+        return f"{nome_base}.mod", f"{nome_base}.dat"
+    
+    def resolver_catalogo(self, restricoes=RESTRICOES_RELAXADAS, nome_base="dieta_catalogo",
+                          diversificado=False, verbose=True, usar_cache=True, *, reforcado=False, cortes=False,
+                          limite_individual=True):
+        """
+        Gera o modelo indexado e os dados do catálogo carregado e resolve
+        
+        Args:
+            restricoes (dict): Restrições por número ou por nome de nutriente
+            nome_base (str): Prefixo dos arquivos .mod/.dat gerados
+            diversificado (bool): Se True, usa a variante com diversidade
+            verbose (bool): Se True, exibe informações detalhadas
+            usar_cache (bool): Se False, ignora o cache de soluções
+            reforcado (bool): Se True, usa a formulação diversificada reforçada
+            cortes (bool): Se True, acrescenta os cortes de cardinalidade e cobertura
+            limite_individual (bool): Se False, omite Limite_Individual (teto já em max_porcoes)
+            
+        Returns:
+            dict: Resultados da otimização
+        """
+        arquivo_mod, arquivo_dat = self.preparar_catalogo(restricoes, nome_base, diversificado=diversificado,
+                                                          reforcado=reforcado, cortes=cortes,
+                                                          limite_individual=limite_individual)
+        return self.resolver_modelo(arquivo_mod, arquivo_dat, verbose, usar_cache)
+    
+    def carregar_modelo(self, arquivo_mod, arquivo_dat):
+        """
+        Carrega um modelo e seus dados e o mantém residente para várias soluções
+        
+        Args:
+            arquivo_mod (str): Caminho para o arquivo .mod
+            arquivo_dat (str): Caminho para o arquivo .dat
+            
+        Returns:
+            bool: True se o modelo foi carregado
+        """
+        if not self.ampl:
+            print("AMPL não está disponível!")
+            return False
+        
+        try:
+            self.ampl.reset()
+            self.ampl.read(arquivo_mod)
+            self.ampl.read_data(arquivo_dat)
+            self._configurar_solver()
+            return True
+        except Exception as e:
+            print(f"Erro ao carregar modelo: {e}")
+            return False
+    
+    def resolver_carregado(self, precos=None, verbose=False, restricoes=None, ponto_inicial=None, parametros=None):
+        """
+        Resolve novamente o modelo residente, opcionalmente com novos dados
+        
+        Os valores da solução anterior continuam nas variáveis e são
+        repassados ao solver como ponto inicial (warm start), a menos que
+        `ponto_inicial` informe outro.
+        
+        Args:
+            precos (array): Preços alinhados com self.alimentos (None mantém os atuais)
+            verbose (bool): Se True, exibe informações detalhadas
+            restricoes (dict): Novos limites n_min/n_max por número ou nome de nutriente
+            ponto_inicial (dict): Compras usadas como ponto inicial
+            parametros (dict): Outros parâmetros do modelo, nome -> valores por índice
+                (ex.: {'w': {...}}) ou valor escalar
+            
+        Returns:
+            dict: Resultados da otimização
+        """
+        precos_catalogo = self._precos
+        try:
+            if precos is not None:
+                self._precos = np.asarray(precos, dtype=float)
+                self.ampl.get_parameter("preco").set_values(dict(zip(self.alimentos, self._precos.tolist())))
+            
+            if restricoes is not None:
+                restricoes = normalizar_restricoes(restricoes)
+                for limite in ('n_min', 'n_max'):
+                    if restricoes[limite]:
+                        self.ampl.get_parameter(limite).set_values(restricoes[limite])
+            
+            for nome, valores in (parametros or {}).items():
+                if isinstance(valores, dict):
+                    self.ampl.get_parameter(nome).set_values(valores)
+                else:
+                    self.ampl.get_parameter(nome).set(valores)
+            
+            if ponto_inicial is not None:
+                self.ampl.get_variable("Compra").set_values(ponto_inicial)
+            
+            self.ampl.solve()
+            return self._extrair_resultados(verbose)
+        except Exception as e:
+            print(f"Erro ao resolver modelo carregado: {e}")
+            return None
+        finally:
+            self._precos = precos_catalogo
+    
+    def resolver_relaxacao(self, arquivo_mod, arquivo_dat, restricao="Limites_Nutrientes"):
+        """
+        Resolve a relaxação linear de um modelo indexado e lê os duais dos nutrientes
+        
+        Args:
+            arquivo_mod (str): Caminho para o arquivo .mod (gerado por gerar_modelo)
+            arquivo_dat (str): Caminho para o arquivo .dat
+            restricao (str): Nome da restrição indexada por NUTRIENTE
+            
+        Returns:
+            dict: Objetivo, status, duais por nutriente e compras fracionárias
+        """
+        if not self.ampl:
+            print("AMPL não está disponível!")
+            return None
+        
+        try:
+            self.ampl.reset()
+            self.ampl.read(arquivo_mod)
+            self.ampl.read_data(arquivo_dat)
+            self._configurar_solver()
+            self.ampl.option['relax_integrality'] = 1
+            self.ampl.solve()
+            
+            duais = self.ampl.get_constraint(restricao).get_values(["dual"]).to_pandas().iloc[:, 0]
+            compras = self.ampl.get_variable("Compra").get_values().to_pandas().iloc[:, 0]
+            
+            return {
+                'solve_result': self.ampl.get_value("solve_result"),
+                'objetivo': self.ampl.get_objective("Custo_Total").value(),
+                'duais': {str(nutriente): float(valor) for nutriente, valor in duais.items()},
+                'compras': compras.reindex(self.alimentos, fill_value=0).to_numpy(dtype=float)
+            }
+        except Exception as e:
+            print(f"Erro ao resolver relaxação: {e}")
+            return None
+        finally:
+            self.ampl.option['relax_integrality'] = 0
+
+    def duais_carregado(self, restricao="Limites_Nutrientes"):
+        """
+        Resolve a relaxação linear do modelo residente e lê os duais dos nutrientes
+
+        Ao contrário de resolver_relaxacao(), usa os dados já carregados (com
+        os preços atuais) e mantém o modelo residente.
+
+        Args:
+            restricao (str): Nome da restrição indexada por NUTRIENTE
+
+        Returns:
+            dict: Dual por nutriente (None em caso de erro)
+        """
+        try:
+            self.ampl.option['relax_integrality'] = 1
+            self.ampl.solve()
+            duais = self.ampl.get_constraint(restricao).get_values(["dual"]).to_pandas().iloc[:, 0]
+            return {str(nutriente): float(valor) for nutriente, valor in duais.items()}
+        except Exception as e:
+            print(f"Erro ao resolver relaxação do modelo carregado: {e}")
+            return None
+        finally:
+            self.ampl.option['relax_integrality'] = 0
+
+    def _violacao_elastica(self):
+        """Lê as folgas Falta/Excesso do modelo elástico carregado, por nutriente"""
+        faltas = self.ampl.get_variable("Falta").get_values().to_pandas().iloc[:, 0]
+        excessos = self.ampl.get_variable("Excesso").get_values().to_pandas().iloc[:, 0]
+        return {str(n): (float(faltas.get(n, 0.0)), float(excessos.get(n, 0.0))) for n in faltas.index}
+
+    def diagnosticar_inviabilidade(self, restricoes=RESTRICOES_ORIGINAIS, nome_base="dieta_diagnostico",
+                                   pesos=None, calcular_iis=False, tolerancia=1e-6, verbose=True):
+        """
+        Diagnostica uma instância inviável com o modelo elástico
+
+        Cada restrição de nutriente recebe folgas Falta/Excesso penalizadas
+        pela violação relativa (folga dividida pelo limite), de modo que uma
+        única solução encontra o menor afrouxamento ponderado dos limites que
+        torna a dieta viável. Opcionalmente, um filtro de remoção sobre os
+        limites de nutrientes encontra um subconjunto irredutível inviável
+        (IIS): retirando qualquer limite dele, a instância fica viável. O
+        filtro resolve o modelo uma vez por limite, sem exigir suporte a IIS
+        do solver (o CBC não tem).
+
+        Args:
+            restricoes (dict): Restrições por número ou por nome de nutriente
+            nome_base (str): Prefixo dos arquivos .mod/.dat gerados
+            pesos (dict): Peso da violação por nutriente (padrão: 1 para todos)
+            calcular_iis (bool): Se True, calcula um IIS dos limites de nutrientes
+            tolerancia (float): Folga abaixo da qual o limite é considerado atendido
+            verbose (bool): Se True, exibe o diagnóstico
+
+        Returns:
+            dict: Viabilidade, violações por nutriente, restrições sugeridas e IIS (se pedido)
+        """
+        if not self.ampl:
+            print("AMPL não está disponível!")
+            return None
+
+        restricoes = normalizar_restricoes(restricoes)
+        pesos = pesos or {}
+        arquivo_mod, arquivo_dat = self.preparar_catalogo(restricoes, nome_base, elastico=True)
+        if not self.carregar_modelo(arquivo_mod, arquivo_dat):
+            return None
+
+        try:
+            # Penalidade relativa: violar 1% de um limite custa o mesmo em qualquer nutriente;
+            # só os nutrientes restritos estão no conjunto NUTRIENTE do .dat
+            restringidos = set(restricoes['n_min']) | set(restricoes['n_max'])
+            penalidades = {}
+            for nutriente in (n for n in self.nutrientes if n in restringidos):
+                limites = [abs(restricoes[l][nutriente]) for l in ('n_min', 'n_max')
+                           if np.isfinite(restricoes[l].get(nutriente, np.inf))]
+                escala = max(max(limites, default=1.0), 1.0)
+                penalidades[nutriente] = 100000 * pesos.get(nutriente, 1.0) / escala
+            self.ampl.get_parameter("penalidade").set_values(penalidades)
+
+            self.ampl.solve()
+            solve_result = self.ampl.get_value("solve_result")
+            folgas = self._violacao_elastica()
+        except Exception as e:
+            print(f"Erro ao resolver modelo elástico: {e}")
+            return None
+
+        violacoes = {}
+        sugeridas = {'n_min': dict(restricoes['n_min']), 'n_max': dict(restricoes['n_max'])}
+        for nutriente, (falta, excesso) in folgas.items():
+            if falta <= tolerancia and excesso <= tolerancia:
+                continue
+            violacoes[nutriente] = {'falta': falta, 'excesso': excesso}
+            if falta > tolerancia and nutriente in sugeridas['n_min']:
+                sugeridas['n_min'][nutriente] = restricoes['n_min'][nutriente] - falta
+            if excesso > tolerancia and nutriente in sugeridas['n_max']:
+                sugeridas['n_max'][nutriente] = restricoes['n_max'][nutriente] + excesso
+
+        compras = self.ampl.get_variable("Compra").get_values().to_pandas().iloc[:, 0]
+        quantidades = np.rint(compras.reindex(self.alimentos, fill_value=0).to_numpy(dtype=float))
+
+        diagnostico = {
+            'timestamp': datetime.now().isoformat(),
+            'solve_result': solve_result,
+            'viavel': not violacoes,
+            'violacoes': violacoes,
+            'restricoes_sugeridas': sugeridas,
+            'custo_relaxado': float(self._precos @ quantidades),
+            'compras': dict(zip(self.alimentos, quantidades.astype(int).tolist())),
+            'iis': None
+        }
+
+        if calcular_iis and violacoes:
+            diagnostico['iis'] = self._filtro_remocao(restricoes, tolerancia)
+
+        if verbose:
+            self._exibir_diagnostico(diagnostico, restricoes)
+
+        return diagnostico
+
+    def _filtro_remocao(self, restricoes, tolerancia):
+        """
+        Filtro de remoção sobre os limites de nutrientes do modelo elástico carregado
+
+        Cada limite é retirado (n_min = -Infinity ou n_max = Infinity); se a
+        instância continua inviável sem ele, o limite fica de fora, senão é
+        restaurado. Os limites que sobram formam um IIS.
+
+        Args:
+            restricoes (dict): Restrições normalizadas por nome de nutriente
+            tolerancia (float): Folga abaixo da qual a instância é considerada viável
+
+        Returns:
+            list: Pares (limite, nutriente) do IIS
+        """
+        sem_limite = {'n_min': -np.inf, 'n_max': np.inf}
+        candidatos = [(limite, nutriente) for limite in ('n_min', 'n_max')
+                      for nutriente, valor in restricoes[limite].items()
+                      if nutriente in self.nutrientes and np.isfinite(valor)]
+        iis = list(candidatos)
+
+        try:
+            for limite, nutriente in candidatos:
+                parametro = self.ampl.get_parameter(limite)
+                parametro.set_values({nutriente: sem_limite[limite]})
+                self.ampl.solve()
+                violacao = sum(f + e for f, e in self._violacao_elastica().values())
+                if violacao > tolerancia:
+                    iis.remove((limite, nutriente))
+                else:
+                    parametro.set_values({nutriente: restricoes[limite][nutriente]})
+        except Exception as e:
+            print(f"Erro no cálculo do IIS: {e}")
+            return None
+
+        return iis
+
+    def _exibir_diagnostico(self, diagnostico, restricoes):
+        """
+        Exibe o diagnóstico de inviabilidade
+
+        Args:
+            diagnostico (dict): Resultado de diagnosticar_inviabilidade()
+            restricoes (dict): Restrições normalizadas originais
+        """
+        print("\n" + "="*60)
+        print("DIAGNÓSTICO DE INVIABILIDADE")
+        print("="*60)
+
+        if diagnostico['viavel']:
+            print("A instância é viável: nenhum limite precisou ser afrouxado.")
+            print("="*60)
+            return
+
+        print(f"{'Nutriente':<13}{'Limite':<8}{'Original':>10}{'Sugerido':>12}{'Violação':>10}")
+        print("-"*60)
+        for nutriente, folgas in diagnostico['violacoes'].items():
+            rotulo = REGISTRO_NUTRIENTES.get(nutriente, {}).get('rotulo', nutriente)
+            for limite, folga in (('n_min', folgas['falta']), ('n_max', folgas['excesso'])):
+                if nutriente in restricoes[limite] and folga > 0:
+                    original = restricoes[limite][nutriente]
+                    sugerido = diagnostico['restricoes_sugeridas'][limite][nutriente]
+                    relativa = folga / abs(original) * 100 if original else float('inf')
+                    print(f"{rotulo:<13}{limite:<8}{original:>10.1f}{sugerido:>12.1f}{relativa:>9.1f}%")
+
+        print(f"\nCusto da dieta com os limites sugeridos: R$ {diagnostico['custo_relaxado']:.2f}")
+
+        if diagnostico['iis']:
+            print("\nSubconjunto irredutível inviável (IIS):")
+            print("-"*40)
+            for limite, nutriente in diagnostico['iis']:
+                print(f"{limite}[{nutriente}] = {restricoes[limite][nutriente]}")
+
+        print("="*60)
+
+    def _ler_variavel_diaria(self, nome, dias):
+        """
+        Lê uma variável indexada por (ALIMENTO, DIA) para uma matriz alimentos x dias
+        
+        Args:
+            nome (str): Nome da variável AMPL
+            dias (int): Número de dias carregados
+            
+        Returns:
+            np.ndarray: Matriz de valores arredondados
+        """
+        matriz = np.zeros((len(self.alimentos), dias))
+        valores = self.ampl.get_variable(nome).get_values().to_pandas().iloc[:, 0]
+        for (alimento, dia), valor in valores.items():
+            matriz[self._indice_alimentos[alimento], int(dia) - 1] = valor
+        return np.rint(matriz)
+    
+    def _valores_fixados(self, matriz, ate_dia):
+        """Converte as colunas dos dias 1..ate_dia-1 para o formato {(alimento, dia): valor}"""
+        return {
+            (alimento, dia + 1): float(matriz[j, dia])
+            for j, alimento in enumerate(self.alimentos)
+            for dia in range(ate_dia - 1)
+        }
+    
+    def resolver_horizonte(self, arquivo_mod, arquivo_dat, janela=None, passo=None, verbose=True):
+        """
+        Resolve o modelo de vários dias (models.MODELO_HORIZONTE)
+        
+        Sem `janela` o horizonte inteiro é resolvido de uma vez. Com `janela`,
+        usa horizonte rolante: resolve os dias [t, t+janela-1], fixa os
+        primeiros `passo` dias e avança, de modo que cada MIP tem o tamanho
+        de uma janela e os dias fixados são eliminados pelo presolve do AMPL.
+        
+        Args:
+            arquivo_mod (str): Caminho para o arquivo .mod
+            arquivo_dat (str): Caminho para o arquivo .dat (criar_arquivo_dat_horizonte)
+            janela (int): Dias por janela (None = monolítico)
+            passo (int): Dias fixados por janela (padrão: metade da janela)
+            verbose (bool): Se True, exibe o andamento
+            
+        Returns:
+            dict: Plano de compras e consumo por dia, custo e tempos por janela
+        """
+        if not self.carregar_modelo(arquivo_mod, arquivo_dat):
+            return None
+        
+        inicio_total = time.perf_counter()
+        horizonte = int(self.ampl.get_parameter("horizonte").value())
+        janela = horizonte if not janela else min(janela, horizonte)
+        passo = passo or max(1, janela // 2)
+        
+        compra = np.zeros((len(self.alimentos), horizonte))
+        consumo = np.zeros((len(self.alimentos), horizonte))
+        janelas = []
+        solve_result = None
+        
+        try:
+            t = 1
+            while t <= horizonte:
+                fim = min(horizonte, t + janela - 1)
+                self.ampl.get_parameter("dias").set(fim)
+                self.ampl.get_parameter("dia_inicio").set(t)
+                if t > 1:
+                    self.ampl.get_parameter("compra_fixada").set_values(self._valores_fixados(compra, t))
+                    self.ampl.get_parameter("consumo_fixado").set_values(self._valores_fixados(consumo, t))
+                
+                inicio = time.perf_counter()
+                self.ampl.solve()
+                tempo = time.perf_counter() - inicio
+                solve_result = self.ampl.get_value("solve_result")
+                
+                if not str(solve_result).startswith("solved"):
+                    print(f"Janela {t}-{fim} sem solução ({solve_result}); horizonte interrompido.")
+                    break
+                
+                # Fixa os primeiros dias da janela (ou todos, na última)
+                ultimo = fim if fim == horizonte else min(fim, t + passo - 1)
+                compra[:, t - 1:ultimo] = self._ler_variavel_diaria("Compra", fim)[:, t - 1:ultimo]
+                consumo[:, t - 1:ultimo] = self._ler_variavel_diaria("Consumo", fim)[:, t - 1:ultimo]
+                
+                janelas.append({'inicio': t, 'fim': fim, 'fixados_ate': ultimo,
+                                'solve_result': solve_result, 'tempo': tempo})
+                if verbose:
+                    print(f"Janela dias {t:3}-{fim:3}: {solve_result} em {tempo:.2f} s (fixados até o dia {ultimo})")
+                t = ultimo + 1
+        except Exception as e:
+            print(f"Erro ao resolver horizonte: {e}")
+            return None
+        
+        nutrientes_diarios = np.asarray(consumo.T @ self._matriz_nutrientes)
+        resultados = {
+            'timestamp': datetime.now().isoformat(),
+            'solve_result': solve_result,
+            'completo': bool(janelas) and janelas[-1]['fim'] == horizonte,
+            'objetivo': float(self._precos @ compra.sum(axis=1)),
+            'dias': horizonte,
+            'plano_compra': {a: compra[j].astype(int).tolist() for j, a in enumerate(self.alimentos)},
+            'plano_consumo': {a: consumo[j].astype(int).tolist() for j, a in enumerate(self.alimentos)},
+            'nutrientes_diarios': {n: nutrientes_diarios[:, i].tolist() for i, n in enumerate(self.nutrientes)},
+            'janelas': janelas,
+            'tempo_total': time.perf_counter() - inicio_total
+        }
+        
+        if verbose:
+            print(f"Custo do plano de {horizonte} dias: R$ {resultados['objetivo']:.2f} "
+                  f"({len(janelas)} janela(s), {resultados['tempo_total']:.2f} s)")
+        return resultados
+    
+    def comparar_horizonte(self, arquivo_mod, arquivo_dat, janela, passo=None):
+        """
+        Compara o horizonte rolante com a solução monolítica (para horizontes pequenos)
+        
+        Args:
+            arquivo_mod (str): Caminho para o arquivo .mod
+            arquivo_dat (str): Caminho para o arquivo .dat
+            janela (int): Dias por janela
+            passo (int): Dias fixados por janela
+            
+        Returns:
+            dict: Custos, gap relativo e tempos das duas abordagens
+        """
+        monolitico = self.resolver_horizonte(arquivo_mod, arquivo_dat, verbose=False)
+        rolante = self.resolver_horizonte(arquivo_mod, arquivo_dat, janela, passo, verbose=False)
+        if not monolitico or not rolante:
+            print("Não foi possível comparar: uma das soluções falhou.")
+            return None
+        
+        custo_mono = monolitico['objetivo']
+        custo_rol = rolante['objetivo']
+        gap = (custo_rol - custo_mono) / custo_mono if custo_mono else 0.0
+        
+        print("\n" + "="*60)
+        print("HORIZONTE ROLANTE vs MONOLÍTICO")
+        print("="*60)
+        print(f"{'Critério':<20} {'Monolítico':<18} {'Rolante':<18}")
+        print("-"*60)
+        print(f"{'Custo Total (R$)':<20} {custo_mono:<18.2f} {custo_rol:<18.2f}")
+        print(f"{'Tempo (s)':<20} {monolitico['tempo_total']:<18.2f} {rolante['tempo_total']:<18.2f}")
+        print(f"{'Janelas':<20} {len(monolitico['janelas']):<18} {len(rolante['janelas']):<18}")
+        print(f"Gap do horizonte rolante: {gap:.2%}")
+        print("="*60)
+        
+        return {
+            'custo_monolitico': custo_mono,
+            'custo_rolante': custo_rol,
+            'gap': gap,
+            'tempo_monolitico': monolitico['tempo_total'],
+            'tempo_rolante': rolante['tempo_total']
+        }
+    
     def _extrair_resultados(self, verbose=True):
         """
         Extrai os resultados da otimização
@@ -99,18 +798,18 @@ class DietSolver:
             # Valor da função objetivo
             resultados['objetivo'] = self.ampl.get_objective("Custo_Total").value()
             
-            # Variáveis de compra
-            compras_df = self.ampl.get_variable("Compra").get_values()
-            for index, row in compras_df.iterrows():
-                alimento = index[0] if isinstance(index, tuple) else index
-                quantidade = row.iloc[0]
-                resultados['compras'][alimento] = int(quantidade)
+            # Variáveis de compra (uma única leitura, reindexada na ordem da tabela)
+            compras_df = self.ampl.get_variable("Compra").get_values().to_pandas()
+            quantidades = np.rint(
+                compras_df.iloc[:, 0].reindex(self.alimentos, fill_value=0).to_numpy(dtype=float)
+            )
+            resultados['compras'] = dict(zip(self.alimentos, quantidades.astype(int).tolist()))
             
             # Calcular nutrientes totais
-            resultados['nutrientes_totais'] = self._calcular_nutrientes_totais(resultados['compras'])
+            resultados['nutrientes_totais'] = self._calcular_nutrientes_totais(quantidades)
             
             # Estatísticas
-            resultados['estatisticas'] = self._calcular_estatisticas(resultados['compras'])
+            resultados['estatisticas'] = self._calcular_estatisticas(quantidades)
             
             if verbose:
                 self._exibir_resultados(resultados)
@@ -125,45 +824,30 @@ class DietSolver:
         Calcula o total de nutrientes consumidos
         
         Args:
-            compras (dict): Dicionário com as quantidades compradas
+            compras (dict | array): Quantidades compradas por alimento
             
         Returns:
             dict: Nutrientes totais
         """
-        nutrientes_totais = {
-            'energia': 0,
-            'proteina': 0,
-            'calcio': 0,
-            'magnesio': 0,
-            'vitaminaC': 0,
-            'ferro': 0
-        }
-        
-        for alimento, quantidade in compras.items():
-            if quantidade > 0 and alimento in ALIMENTOS_DATA:
-                dados = ALIMENTOS_DATA[alimento]
-                for nutriente in nutrientes_totais:
-                    nutrientes_totais[nutriente] += dados.get(nutriente, 0) * quantidade # Use .get with default 0 to handle missing keys gracefully
-        
-        return nutrientes_totais
+        totais = np.asarray(self._vetor_compras(compras) @ self._matriz_nutrientes).ravel()
+        return dict(zip(self.nutrientes, totais.tolist()))
     
     def _calcular_estatisticas(self, compras):
         """
         Calcula estatísticas da solução
         
         Args:
-            compras (dict): Dicionário com as quantidades compradas
+            compras (dict | array): Quantidades compradas por alimento
             
         Returns:
             dict: Estatísticas
         """
-        alimentos_selecionados = sum(1 for q in compras.values() if q > 0)
-        porcoes_totais = sum(compras.values())
+        quantidades = self._vetor_compras(compras)
+        alimentos_selecionados = int(np.count_nonzero(quantidades > 0))
+        porcoes_totais = float(quantidades.sum())
         
         # Custo total dos alimentos selecionados para a dieta
-        custo_total_alimentos_selecionados = sum(ALIMENTOS_DATA.get(alimento, {}).get('preco', 0) * quantidade
-                                                 for alimento, quantidade in compras.items()
-                                                 if quantidade > 0 and alimento in ALIMENTOS_DATA)
+        custo_total_alimentos_selecionados = float(self._precos @ quantidades)
         
         custo_medio_porcao = custo_total_alimentos_selecionados / porcoes_totais if porcoes_totais > 0 else 0
         
@@ -173,6 +857,35 @@ class DietSolver:
             'custo_medio_porcao': round(custo_medio_porcao, 2)
         }
     
+    def avaliar_planos(self, planos, restricoes=RESTRICOES_RELAXADAS, tolerancia=1e-6):
+        """
+        Avalia em lote vários planos de compra candidatos
+        
+        Args:
+            planos (array): Matriz (planos x alimentos) alinhada com self.alimentos
+            restricoes (dict): Restrições nutricionais por número ou por nome de nutriente
+            tolerancia (float): Folga numérica aceita nas restrições
+            
+        Returns:
+            dict: Custos, nutrientes totais (planos x self.nutrientes) e indicadores de viabilidade
+        """
+        planos = np.atleast_2d(np.asarray(planos, dtype=float))
+        
+        # Vetores de limites alinhados com as colunas da matriz (nutrientes sem limite ficam livres)
+        n_min, n_max = self.catalogo.limites(restricoes)
+        
+        totais = np.asarray(planos @ self._matriz_nutrientes)
+        custos = planos @ self._precos
+        
+        atende_nutrientes = np.all((totais >= n_min - tolerancia) & (totais <= n_max + tolerancia), axis=1)
+        atende_porcoes = np.all((planos >= -tolerancia) & (planos <= self._max_porcoes + tolerancia), axis=1)
+        
+        return {
+            'custos': custos,
+            'nutrientes_totais': totais,
+            'viavel': atende_nutrientes & atende_porcoes
+        }
+    
     def _exibir_resultados(self, resultados):
         """
         Exibe os resultados formatados
@@ -192,19 +905,15 @@ class DietSolver:
         
         for alimento, quantidade in resultados['compras'].items():
             if quantidade > 0:
-                preco_unitario = ALIMENTOS_DATA.get(alimento, {}).get('preco', 0)
+                preco_unitario = self._precos[self._indice_alimentos[alimento]]
                 custo_total_alimento = preco_unitario * quantidade
                 print(f"{alimento:<20}: {quantidade:2} porções (R$ {custo_total_alimento:5.2f})")
         
         print(f"\nNutrientes Totais:")
         print("-"*40)
-        nutrientes = resultados['nutrientes_totais']
-        print(f"Energia:     {nutrientes['energia']:7.1f} kcal")
-        print(f"Proteína:    {nutrientes['proteina']:7.1f} g")
-        print(f"Cálcio:      {nutrientes['calcio']:7.1f} mg")
-        print(f"Magnésio:    {nutrientes['magnesio']:7.1f} mg")
-        print(f"Vitamina C:  {nutrientes['vitaminaC']:7.1f} mg")
-        print(f"Ferro:       {nutrientes['ferro']:7.1f} mg")
+        for nutriente, valor in resultados['nutrientes_totais'].items():
+            info = REGISTRO_NUTRIENTES.get(nutriente, {})
+            print(f"{info.get('rotulo', nutriente) + ':':<13}{valor:7.1f} {info.get('unidade', '')}")
         
         print(f"\nEstatísticas:")
         print("-"*40)
@@ -214,21 +923,33 @@ class DietSolver:
         
         print("="*60)
     
-    def salvar_resultados(self, resultados, nome_arquivo):
+    def salvar_resultados(self, resultados, modelo, armazenamento=None, hash_dados=None):
         """
-        Salva os resultados em arquivo JSON
+        Acrescenta os resultados ao armazenamento de resultados
         
         Args:
             resultados (dict): Resultados da otimização
-            nome_arquivo (str): Nome do arquivo (sem extensão)
+            modelo (str): Nome do modelo (ex.: 'basico', 'diversificado')
+            armazenamento (DietResultStore): Armazenamento de destino (padrão: diretório 'resultados')
+            hash_dados (str): Hash dos dados (padrão: hash do último .dat resolvido)
+            
+        Returns:
+            str: run_id da solução gravada (None em caso de erro)
         """
         if resultados:
             try:
-                with open(f"{nome_arquivo}.json", "w", encoding="utf-8") as f:
-                    json.dump(resultados, f, indent=2, ensure_ascii=False)
-                print(f"Resultados salvos em {nome_arquivo}.json")
+                if armazenamento is None:
+                    if self.armazenamento is None:
+                        self.armazenamento = DietResultStore()
+                    armazenamento = self.armazenamento
+                if hash_dados is None and self._ultimo_dat and os.path.exists(self._ultimo_dat):
+                    hash_dados = hash_arquivo(self._ultimo_dat)
+                run_id = armazenamento.adicionar(resultados, modelo, hash_dados)
+                print(f"Resultados de '{modelo}' salvos em {armazenamento.diretorio} (run {run_id[:8]})")
+                return run_id
             except Exception as e:
-                print(f"Erro ao salvar resultados em {nome_arquivo}.json: {e}")
+                print(f"Erro ao salvar resultados de '{modelo}': {e}")
+        return None
     
     def comparar_solucoes(self, resultados1, resultados2, nome1="Solução 1", nome2="Solução 2"):
         """
@@ -306,14 +1027,14 @@ def exemplo_uso():
         resultados_basico = solver.resolver_modelo("dieta_basico.mod", "dieta_relaxado.dat")
         
         if resultados_basico:
-            solver.salvar_resultados(resultados_basico, "resultados_basico")
+            solver.salvar_resultados(resultados_basico, "basico")
         
         # Resolver modelo diversificado
         print("\nResolvendo modelo diversificado...")
         resultados_diversificado = solver.resolver_modelo("dieta_diversificado.mod", "dieta_relaxado.dat")
         
         if resultados_diversificado:
-            solver.salvar_resultados(resultados_diversificado, "resultados_diversificado")
+            solver.salvar_resultados(resultados_diversificado, "diversificado")
         
         # Comparar soluções
         if resultados_basico and resultados_diversificado:
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+telemetria.py - Tempos por fase, estatísticas do solver e perfil das soluções da dieta
+
+Autor: José Brito
+"""
+
+import re
+import io
+import time
+import pstats
+import cProfile
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+    RESOURCE_DISPONIVEL = True
+except ImportError:
+    RESOURCE_DISPONIVEL = False
+
+# Contadores na mensagem do solver (ex.: CBC "12 nodes, 340 iterations", Gurobi "12 branching nodes")
+_NOS = re.compile(r'(\d+)\s+(?:branching\s+)?nodes?', re.IGNORECASE)
+_ITERACOES = re.compile(r'(\d+)\s+(?:simplex\s+|MIP\s+simplex\s+)?iterations?', re.IGNORECASE)
+
+# Percentis calculados por resumir_telemetria()
+PERCENTIS = (0.5, 0.9, 0.99)
+
+class TelemetriaSolve:
+    """
+    Acumula o tempo de cada fase de uma solução com relógio monotônico
+
+    Uso:
+        telemetria = TelemetriaSolve()
+        with telemetria.fase('solve'):
+            ampl.solve()
+        resultados['telemetry'] = telemetria.resumo(estatisticas)
+    """
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.fases = {}
+
+    @contextmanager
+    def fase(self, nome):
+        """Mede o bloco e soma o tempo à fase `nome`"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(nome, time.perf_counter() - inicio)
+
+    def registrar(self, nome, segundos):
+        """
+        Soma um tempo já medido a uma fase
+
+        Args:
+            nome (str): Nome da fase
+            segundos (float): Duração em segundos
+        """
+        self.fases[nome] = self.fases.get(nome, 0.0) + segundos
+
+    def resumo(self, solver=None, **extras):
+        """
+        Monta o dicionário gravado em resultados['telemetry']
+
+        Args:
+            solver (dict): Estatísticas do solver (ver estatisticas_solver)
+            **extras: Outras entradas (ex.: perfil)
+
+        Returns:
+            dict: Fases (s), total, estatísticas do solver e memória de pico
+        """
+        fases = {nome: round(segundos, 6) for nome, segundos in self.fases.items()}
+        fases['total'] = round(time.perf_counter() - self.inicio, 6)
+        telemetria = {'fases': fases, 'solver': solver or {}, 'memoria': memoria_pico()}
+        telemetria.update(extras)
+        return telemetria
+
+def memoria_pico():
+    """
+    Memória residente de pico do processo Python e dos processos do solver
+
+    Returns:
+        dict: Picos em MB (vazio quando o módulo resource não está disponível)
+    """
+    if not RESOURCE_DISPONIVEL:
+        return {}
+    # ru_maxrss em KB no Linux
+    return {
+        'processo_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'solver_mb': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1)
+    }
+
+def _contador(padrao, texto):
+    encontrado = padrao.search(str(texto))
+    return int(encontrado.group(1)) if encontrado else None
+
+def _valor_ampl(ampl, expressao):
+    """Avalia uma expressão do AMPL (None se não estiver definida para o solver usado)"""
+    try:
+        valor = ampl.get_value(expressao)
+        return float(valor) if valor is not None else None
+    except Exception:
+        return None
+
+def _valor_texto(ampl, expressao):
+    try:
+        return str(ampl.get_value(expressao))
+    except Exception:
+        return ""
+
+def estatisticas_solver(ampl, objetivo="Custo_Total", progresso=None):
+    """
+    Lê as estatísticas da última solução do AMPL
+
+    Iterações e nós vêm da mensagem do solver; o gap vem do último evento
+    de progresso (modo anytime) ou do sufixo relmipgap, quando o solver o
+    informa. As reduções do presolve são a diferença entre o tamanho do
+    modelo e o que foi enviado ao solver.
+
+    Args:
+        ampl (AMPL): Instância com o modelo resolvido
+        objetivo (str): Nome do objetivo
+        progresso (list): Eventos de progresso do solve (opcional)
+
+    Returns:
+        dict: Iterações, nós, gap, tempo do solver e reduções do presolve
+    """
+    mensagem = _valor_texto(ampl, "solve_message")
+    variaveis, restricoes = _valor_ampl(ampl, "_nvars"), _valor_ampl(ampl, "_ncons")
+    enviadas_var, enviadas_res = _valor_ampl(ampl, "_snvars"), _valor_ampl(ampl, "_sncons")
+
+    gap = progresso[-1]['gap'] if progresso else _valor_ampl(ampl, f"{objetivo}.relmipgap")
+
+    return {
+        'iteracoes': _contador(_ITERACOES, mensagem),
+        'nos': _contador(_NOS, mensagem),
+        'gap': gap,
+        'tempo_solver': _valor_ampl(ampl, "_solve_elapsed_time"),
+        'variaveis': variaveis,
+        'restricoes': restricoes,
+        'presolve_variaveis': variaveis - enviadas_var if None not in (variaveis, enviadas_var) else None,
+        'presolve_restricoes': restricoes - enviadas_res if None not in (restricoes, enviadas_res) else None
+    }
+
+@contextmanager
+def perfil(arquivo=None, top=15):
+    """
+    Perfil opcional (cProfile + tracemalloc) de um bloco de código
+
+    O dicionário produzido é preenchido ao sair do bloco com as funções de
+    maior tempo acumulado e o pico de memória alocada pelo Python.
+
+    Args:
+        arquivo (str): Caminho .prof para gravar as estatísticas completas (opcional)
+        top (int): Número de funções listadas
+
+    Yields:
+        dict: Resumo do perfil
+    """
+    resumo = {}
+    perfilador = cProfile.Profile()
+    ja_rastreando = tracemalloc.is_tracing()
+    if not ja_rastreando:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    perfilador.enable()
+    try:
+        yield resumo
+    finally:
+        perfilador.disable()
+        _, pico = tracemalloc.get_traced_memory()
+        if not ja_rastreando:
+            tracemalloc.stop()
+
+        saida = io.StringIO()
+        estatisticas = pstats.Stats(perfilador, stream=saida).sort_stats('cumulative')
+        estatisticas.print_stats(top)
+        if arquivo:
+            estatisticas.dump_stats(arquivo)
+            resumo['arquivo'] = arquivo
+        resumo['python_pico_mb'] = round(pico / (1024 * 1024), 2)
+        resumo['funcoes'] = saida.getvalue()
+
+def resumir_telemetria(registros, percentis=PERCENTIS):
+    """
+    Resume a telemetria de muitas soluções em percentis
+
+    Args:
+        registros: Lista de resultados (com 'telemetry') ou DataFrame de
+            DietResultStore.ler(colunas=['telemetry'])
+        percentis (tuple): Percentis calculados
+
+    Returns:
+        pd.DataFrame: Uma linha por métrica (fases, solver, memória) com n, média, percentis e máximo
+    """
+    import pandas as pd
+    from armazenamento import achatar
+
+    if isinstance(registros, pd.DataFrame):
+        colunas = [c for c in registros.columns if c.startswith('telemetry.')]
+        tabela = registros[colunas].rename(columns=lambda c: c[len('telemetry.'):])
+    else:
+        tabela = pd.DataFrame([achatar(r['telemetry']) for r in registros if r and r.get('telemetry')])
+
+    tabela = tabela.apply(pd.to_numeric, errors='coerce').dropna(axis=1, how='all')
+    if tabela.empty:
+        return pd.DataFrame()
+
+    resumo = pd.DataFrame({'n': tabela.count(), 'media': tabela.mean()})
+    for p in percentis:
+        resumo[f"p{p * 100:g}"] = tabela.quantile(p)
+    resumo['max'] = tabela.max()
+    return resumo
+
+def exibir_telemetria(resumo):
+    """
+    Exibe o resumo de resumir_telemetria()
+
+    Args:
+        resumo (pd.DataFrame): Percentis por métrica
+    """
+    print("\n" + "="*60)
+    print("TELEMETRIA DAS SOLUÇÕES")
+    print("="*60)
+    if resumo.empty:
+        print("Nenhum resultado com telemetria.")
+    else:
+        print(resumo.to_string(float_format=lambda v: f"{v:.4g}"))
+    print("="*60)
@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+"""
+conftest.py - Configuração dos testes: os módulos do estudo ficam na pasta acima
+
+Autor: José Brito
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
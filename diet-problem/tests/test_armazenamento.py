@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+test_armazenamento.py - Testes de gravação e leitura do DietResultStore
+
+Autor: José Brito
+"""
+
+import pytest
+from armazenamento import DietResultStore, achatar, aninhar
+
+def _resultado(objetivo, arroz, timestamp):
+    return {
+        'objetivo': objetivo,
+        'solve_result': 'solved',
+        'compras': {'Arroz': arroz, 'Feijão': 1.0},
+        'timestamp': timestamp
+    }
+
+def test_achatar_e_aninhar_sao_inversas():
+    registro = {'objetivo': 3.5, 'compras': {'Arroz': 2.0, 'Feijão': 1.0}}
+
+    assert achatar(registro) == {'objetivo': 3.5, 'compras.Arroz': 2.0, 'compras.Feijão': 1.0}
+    assert aninhar(achatar(registro)) == registro
+
+def test_ida_e_volta_de_um_resultado(tmp_path):
+    armazenamento = DietResultStore(str(tmp_path / "resultados"))
+    resultado = _resultado(3.5, 2.0, "2024-01-01T10:00:00")
+
+    run_id = armazenamento.adicionar(resultado, 'basico', hash_dados='abc')
+    registro = next(armazenamento.iterar(run_ids=[run_id]))
+
+    assert registro['run_id'] == run_id
+    assert registro['modelo'] == 'basico'
+    assert registro['hash_dados'] == 'abc'
+    assert registro['compras'] == resultado['compras']
+    assert registro['objetivo'] == resultado['objetivo']
+
+def test_indice_e_relido_do_disco(tmp_path):
+    diretorio = str(tmp_path / "resultados")
+    armazenamento = DietResultStore(diretorio)
+    armazenamento.adicionar(_resultado(3.5, 2.0, "2024-01-01T10:00:00"), 'basico')
+    armazenamento.adicionar(_resultado(4.0, 1.0, "2024-01-01T11:00:00"), 'diversificado')
+
+    reaberto = DietResultStore(diretorio)
+
+    assert reaberto.modelos() == ['basico', 'diversificado']
+    assert reaberto.ultimo('diversificado')['objetivo'] == 4.0
+
+def test_ultimo_retorna_a_solucao_mais_recente(tmp_path):
+    armazenamento = DietResultStore(str(tmp_path / "resultados"))
+    armazenamento.adicionar(_resultado(5.0, 3.0, "2024-01-02T10:00:00"), 'basico')
+    armazenamento.adicionar(_resultado(3.5, 2.0, "2024-01-01T10:00:00"), 'basico')
+
+    ultimo = armazenamento.ultimo('basico')
+
+    assert ultimo['objetivo'] == 5.0
+    assert ultimo['compras']['Arroz'] == 3.0
+
+def test_ler_apenas_as_colunas_pedidas(tmp_path):
+    armazenamento = DietResultStore(str(tmp_path / "resultados"))
+    armazenamento.adicionar(_resultado(3.5, 2.0, "2024-01-01T10:00:00"), 'basico')
+
+    tabela = armazenamento.ler(['compras'])
+
+    assert 'compras.Arroz' in tabela.columns
+    assert 'objetivo' not in tabela.columns
+    assert tabela['compras.Arroz'].tolist() == [2.0]
+
+def test_compactar_preserva_os_registros(tmp_path):
+    pytest.importorskip("pyarrow")
+    armazenamento = DietResultStore(str(tmp_path / "resultados"))
+    run_id = armazenamento.adicionar(_resultado(3.5, 2.0, "2024-01-01T10:00:00"), 'basico')
+
+    assert armazenamento.compactar()
+
+    assert armazenamento.ultimo('basico')['compras']['Arroz'] == 2.0
+    assert DietResultStore(armazenamento.diretorio).ultimo_run_id('basico') == run_id
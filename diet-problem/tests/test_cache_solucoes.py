@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+test_cache_solucoes.py - Testes da chave de cache de soluções (sem AMPL)
+
+Autor: José Brito
+"""
+
+from cache_solucoes import canonizar_ampl, chave_solucao
+
+MODELO = """# Modelo de teste
+set ALIMENTO;
+param preco{ALIMENTO};
+var Compra{ALIMENTO} >= 0;
+minimize Custo: sum{j in ALIMENTO} preco[j] * Compra[j];  # custo total
+"""
+
+DADOS = "set ALIMENTO := Arroz Feijao;\nparam preco := Arroz 1.5 Feijao 2.0;\n"
+
+def _gravar(pasta, nome, texto):
+    caminho = pasta / nome
+    caminho.write_text(texto, encoding='utf-8')
+    return str(caminho)
+
+def test_canonizar_remove_comentarios_e_espacos():
+    texto = "var  x >= 0;   # comentário\n\n\tminimize C:\n x;"
+
+    assert canonizar_ampl(texto) == "var x >= 0; minimize C: x;"
+
+def test_chave_ignora_comentarios_e_formatacao(tmp_path):
+    reformatado = "\n".join("  " + linha for linha in MODELO.replace("# custo total", "").splitlines())
+
+    chave = chave_solucao(_gravar(tmp_path, "a.mod", MODELO), _gravar(tmp_path, "a.dat", DADOS), {})
+    outra = chave_solucao(_gravar(tmp_path, "b.mod", reformatado), _gravar(tmp_path, "b.dat", DADOS), {})
+
+    assert chave == outra
+
+def test_chave_muda_com_os_dados(tmp_path):
+    arquivo_mod = _gravar(tmp_path, "a.mod", MODELO)
+
+    chave = chave_solucao(arquivo_mod, _gravar(tmp_path, "a.dat", DADOS), {})
+    outra = chave_solucao(arquivo_mod, _gravar(tmp_path, "b.dat", DADOS.replace("2.0", "2.5")), {})
+
+    assert chave != outra
+
+def test_chave_muda_com_as_opcoes_mas_nao_com_a_ordem(tmp_path):
+    arquivo_mod = _gravar(tmp_path, "a.mod", MODELO)
+    arquivo_dat = _gravar(tmp_path, "a.dat", DADOS)
+
+    chave = chave_solucao(arquivo_mod, arquivo_dat, {'solver': 'highs', 'relaxado': False})
+
+    assert chave == chave_solucao(arquivo_mod, arquivo_dat, {'relaxado': False, 'solver': 'highs'})
+    assert chave != chave_solucao(arquivo_mod, arquivo_dat, {'solver': 'cbc', 'relaxado': False})
+
+def test_modelo_e_dados_nao_se_confundem(tmp_path):
+    # O separador entre modelo e dados impede que o conteúdo passe de um para o outro
+    chave = chave_solucao(_gravar(tmp_path, "a.mod", "var x;"), _gravar(tmp_path, "a.dat", "param p;"), {})
+    outra = chave_solucao(_gravar(tmp_path, "b.mod", "var x; param"), _gravar(tmp_path, "b.dat", "p;"), {})
+
+    assert chave != outra
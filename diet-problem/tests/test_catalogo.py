@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+test_catalogo.py - Testes das operações vetoriais do catálogo (sem AMPL)
+
+Autor: José Brito
+"""
+
+import numpy as np
+from catalogo import CatalogoAlimentos
+
+def _catalogo_pequeno():
+    """Três alimentos e dois nutrientes, com matriz densa"""
+    matriz = np.array([[2.0, 1.0],
+                       [1.0, 3.0],
+                       [0.0, 1.0]])
+    return CatalogoAlimentos(['Arroz', 'Feijao', 'Alface'], ['energia', 'proteina'], matriz,
+                             precos=[4.0, 5.0, 1.0], max_porcoes=[4, 4, 4])
+
+def test_custos_reduzidos_com_duais_por_nome():
+    catalogo = _catalogo_pequeno()
+
+    reduzidos = catalogo.custos_reduzidos({'energia': 1.0, 'proteina': 0.5})
+
+    assert np.allclose(reduzidos, [4 - 2 - 0.5, 5 - 1 - 1.5, 1 - 0.5])
+
+def test_custos_reduzidos_nutriente_ausente_conta_como_zero():
+    catalogo = _catalogo_pequeno()
+
+    reduzidos = catalogo.custos_reduzidos({'energia': 1.0})
+
+    assert np.allclose(reduzidos, catalogo.precos - catalogo.matriz[:, 0])
+
+def test_custos_reduzidos_com_matriz_de_precos():
+    catalogo = _catalogo_pequeno()
+    precos = np.array([[4.0, 5.0, 1.0],
+                       [8.0, 5.0, 2.0]])
+
+    reduzidos = catalogo.custos_reduzidos({'energia': 1.0}, precos)
+
+    assert reduzidos.shape == (2, 3)
+    assert np.allclose(reduzidos[1], [6.0, 4.0, 2.0])
+
+def test_custos_reduzidos_com_duais_por_cenario():
+    catalogo = _catalogo_pequeno()
+    duais = np.array([[1.0, 0.0],
+                      [0.0, 1.0]])
+    precos = np.tile(catalogo.precos, (2, 1))
+
+    reduzidos = catalogo.custos_reduzidos(duais, precos)
+
+    assert np.allclose(reduzidos[0], catalogo.custos_reduzidos({'energia': 1.0}))
+    assert np.allclose(reduzidos[1], catalogo.custos_reduzidos({'proteina': 1.0}))
+
+def test_limite_lagrangiano_nao_excede_o_otimo():
+    # Energia >= 4: o ótimo compra 2 porções de Arroz (custo 8)
+    catalogo = _catalogo_pequeno()
+    restricoes = {'n_min': {'energia': 4}, 'n_max': {}}
+
+    limites = [catalogo.limite_lagrangiano({'energia': y}, restricoes) for y in (0.5, 1.0, 2.0, 3.0)]
+
+    assert all(limite <= 8 + 1e-9 for limite in limites)
+    assert np.isclose(limites[2], 8.0)
+
+def test_limite_lagrangiano_por_cenario():
+    catalogo = _catalogo_pequeno()
+    restricoes = {'n_min': {'energia': 4}, 'n_max': {}}
+    precos = np.array([[4.0, 5.0, 1.0],
+                       [2.0, 5.0, 1.0]])
+
+    limites = catalogo.limite_lagrangiano({'energia': 2.0}, restricoes, precos)
+
+    # No segundo cenário o Arroz fica com custo reduzido -2 e pode chegar a 4 porções
+    assert np.allclose(limites, [8.0, 8.0 - 2.0 * 4])
+
+def test_padrao_sinais_do_plano_otimo():
+    catalogo = _catalogo_pequeno()
+    plano = np.array([2.0, 0.0, 0.0])
+
+    assert catalogo.padrao_sinais({'energia': 2.0}, plano).all()
+
+def test_padrao_sinais_alimento_comprado_exige_custo_reduzido_nulo():
+    catalogo = _catalogo_pequeno()
+    plano = np.array([2.0, 0.0, 0.0])
+    precos = catalogo.precos * np.array([[1.0, 1.0, 1.0],
+                                         [1.5, 1.0, 1.0],
+                                         [0.5, 1.0, 1.0]])
+
+    padrao = catalogo.padrao_sinais({'energia': 2.0}, plano, precos)
+
+    assert padrao[0].all()
+    assert not padrao[1, 0]
+    assert not padrao[2, 0]
+
+def test_padrao_sinais_alimento_no_maximo_aceita_custo_reduzido_negativo():
+    catalogo = _catalogo_pequeno()
+    plano = np.array([4.0, 0.0, 0.0])
+
+    # Com dual 3 o Arroz tem custo reduzido -2: correto no máximo, incorreto fora do plano
+    assert catalogo.padrao_sinais({'energia': 3.0}, plano).all()
+    assert not catalogo.padrao_sinais({'energia': 3.0}, np.zeros(3))[0]
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+test_data_handler.py - Testes da escrita de arquivos .dat em blocos
+
+Autor: José Brito
+"""
+
+from data_handler import EscritorDat, valor_ampl
+
+def test_conjunto_em_blocos():
+    with EscritorDat(bloco=2) as dat:
+        dat.conjunto("ALIMENTO", ["Arroz", "Feijao", "Ovo"])
+
+    assert dat.texto() == "set ALIMENTO := Arroz Feijao\nOvo;\n"
+
+def test_conjunto_vazio():
+    dat = EscritorDat()
+    dat.conjunto("ALIMENTO", [])
+
+    assert dat.texto() == "set ALIMENTO :=;\n"
+
+def test_tabela_com_valores_ausentes():
+    dat = EscritorDat()
+    dat.tabela(["preco", "max_porcoes"], [("Arroz", 1.5, 4), ("Ovo", 0.1 + 0.2, None)])
+
+    assert dat.texto() == (
+        "param: preco max_porcoes :=\n"
+        "Arroz 1.5 4\n"
+        "Ovo 0.3 .\n"
+        ";\n"
+    )
+
+def test_parametro_com_comentarios():
+    dat = EscritorDat()
+    dat.parametro("n_max", {'energia': float('inf'), 'proteina': 60.0}, {'proteina': "Proteína (g)"})
+
+    assert dat.texto() == (
+        "param n_max :=\n"
+        "energia Infinity\n"
+        "proteina 60  # Proteína (g)\n"
+        ";\n"
+    )
+
+def test_valor_ampl():
+    assert valor_ampl(3) == "3"
+    assert valor_ampl(float('-inf')) == "-Infinity"
+    assert valor_ampl(1234567.891) == "1234567.891"
+    assert valor_ampl(None) == "."
+
+def test_arquivo_igual_ao_texto_em_memoria(tmp_path):
+    caminho = tmp_path / "dieta.dat"
+
+    with EscritorDat(str(caminho), bloco=1) as dat:
+        dat.escrever("# Dados de teste", "")
+        dat.conjunto("ALIMENTO", ["Arroz", "Ovo"])
+        dat.tabela(["preco"], [("Arroz", 1.5), ("Ovo", 0.75)])
+
+    memoria = EscritorDat(bloco=1)
+    memoria.escrever("# Dados de teste", "")
+    memoria.conjunto("ALIMENTO", ["Arroz", "Ovo"])
+    memoria.tabela(["preco"], [("Arroz", 1.5), ("Ovo", 0.75)])
+
+    assert caminho.read_text(encoding='utf-8') == memoria.texto()
+
+def test_modo_acrescentar(tmp_path):
+    caminho = str(tmp_path / "dieta.dat")
+
+    with EscritorDat(caminho) as dat:
+        dat.escrever("param a := 1;")
+    with EscritorDat(caminho, modo="a") as dat:
+        dat.escrever("param b := 2;")
+
+    with open(caminho, encoding='utf-8') as f:
+        assert f.read() == "param a := 1;\nparam b := 2;\n"
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+test_lote.py - Testes do agrupamento de perfis do lote (sem AMPL)
+
+Autor: José Brito
+"""
+
+import numpy as np
+from lote import agrupar_perfis
+
+def test_perfis_identicos_formam_um_grupo():
+    n_min = np.array([[10.0, 2.0], [10.0, 2.0], [12.0, 2.0]])
+    n_max = np.array([[50.0, np.inf], [50.0, np.inf], [50.0, np.inf]])
+
+    grupos, grupo_min, grupo_max = agrupar_perfis(n_min, n_max)
+
+    assert grupos[0] == grupos[1] != grupos[2]
+    assert grupo_min.shape == (2, 2)
+    assert np.array_equal(grupo_max[grupos[0]], [50.0, np.inf])
+
+def test_sem_tolerancia_perfis_proximos_ficam_separados():
+    n_min = np.array([[100.0], [101.0]])
+    n_max = np.full((2, 1), np.inf)
+
+    grupos, _, _ = agrupar_perfis(n_min, n_max)
+
+    assert grupos[0] != grupos[1]
+
+def test_grupo_usa_a_intersecao_dos_limites():
+    n_min = np.array([[100.0], [101.0]])
+    n_max = np.array([[300.0], [299.0]])
+
+    grupos, grupo_min, grupo_max = agrupar_perfis(n_min, n_max, tolerancia=0.05)
+
+    assert grupos[0] == grupos[1]
+    assert np.array_equal(grupo_min[grupos[0]], [101.0])
+    assert np.array_equal(grupo_max[grupos[0]], [299.0])
+
+def test_limites_infinitos_nao_afetam_a_grade():
+    n_min = np.array([[-np.inf, 10.0], [-np.inf, 10.2]])
+    n_max = np.full((2, 2), np.inf)
+
+    grupos, grupo_min, _ = agrupar_perfis(n_min, n_max, tolerancia=0.1)
+
+    assert grupos[0] == grupos[1]
+    assert grupo_min[grupos[0], 0] == -np.inf
+    assert grupo_min[grupos[0], 1] == 10.2
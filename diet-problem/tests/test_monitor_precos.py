@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+test_monitor_precos.py - Testes da triagem de preços do monitor (sem AMPL)
+
+Autor: José Brito
+"""
+
+import numpy as np
+from catalogo import catalogo_padrao
+from monitor_precos import MonitorPrecos
+
+class SolverFalso:
+    """Solver mínimo: devolve sempre o mesmo plano e conta as re-otimizações"""
+
+    def __init__(self, catalogo, compras, duais):
+        self.catalogo = catalogo
+        self.compras = compras
+        self.duais = duais
+        self.solucoes = 0
+
+    def preparar_catalogo(self, restricoes, nome_base):
+        return f"{nome_base}.mod", f"{nome_base}.dat"
+
+    def carregar_modelo(self, arquivo_mod, arquivo_dat):
+        return True
+
+    def duais_carregado(self):
+        return dict(self.duais)
+
+    def resolver_carregado(self, precos, ponto_inicial=None):
+        self.solucoes += 1
+        return {'compras': dict(self.compras), 'solve_result': 'solved'}
+
+def _monitor_so_aveia():
+    """Monitor cujo plano compra só Aveia, entre os limites, com custo reduzido zero"""
+    catalogo = catalogo_padrao()
+    j = catalogo.indice['Aveia']
+    energia = catalogo.nutrientes.index('energia')
+    dual = catalogo.precos[j] / catalogo.matriz[j, energia]
+    compras = {nome: (2 if nome == 'Aveia' else 0) for nome in catalogo.nomes}
+    solver = SolverFalso(catalogo, compras, {'energia': float(dual)})
+    monitor = MonitorPrecos(solver)
+    assert monitor.iniciar(verbose=False)
+    return monitor, solver
+
+def test_alimento_comprado_entre_limites_muda_o_padrao():
+    monitor, _ = _monitor_so_aveia()
+    assert monitor.padrao_referencia[monitor.catalogo.indice['Aveia']]
+
+    precos = monitor.precos.copy()
+    precos[monitor.catalogo.indice['Aveia']] *= 50
+    assert not monitor._padrao_sinais(precos)[monitor.catalogo.indice['Aveia']]
+
+def test_alta_no_alimento_comprado_reotimiza():
+    monitor, solver = _monitor_so_aveia()
+    solucoes = solver.solucoes
+    preco = float(monitor.precos[monitor.catalogo.indice['Aveia']])
+
+    evento = monitor.aplicar({'Aveia': 50 * preco})
+
+    assert evento['acao'] == 'reotimizado'
+    assert solver.solucoes == solucoes + 1
+
+def test_alta_em_alimento_fora_do_plano_e_absorvida():
+    monitor, solver = _monitor_so_aveia()
+    solucoes = solver.solucoes
+    preco = float(monitor.precos[monitor.catalogo.indice['Carne']])
+
+    evento = monitor.aplicar({'Carne': 2 * preco})
+
+    assert evento['acao'] == 'mantido'
+    assert evento['criterio'] == 'sinais'
+    assert solver.solucoes == solucoes
+    assert np.isclose(evento['custo'], monitor.custo)
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+test_pareto.py - Testes da poda da fronteira custo x diversidade (sem AMPL)
+
+Autor: José Brito
+"""
+
+import pandas as pd
+from pareto import podar_dominados
+
+def test_remove_pontos_dominados():
+    tabela = pd.DataFrame({'custo': [5.0, 7.0, 6.0, 9.0],
+                           'distintos': [2, 3, 3, 4]})
+
+    fronteira = podar_dominados(tabela, tolerancia=1e-6)
+
+    assert fronteira['custo'].tolist() == [5.0, 6.0, 9.0]
+    assert fronteira['distintos'].tolist() == [2, 3, 4]
+
+def test_ponto_mais_caro_com_menos_diversidade_e_removido():
+    tabela = pd.DataFrame({'custo': [8.0, 6.0],
+                           'distintos': [2, 3]})
+
+    fronteira = podar_dominados(tabela, tolerancia=1e-6)
+
+    assert fronteira['distintos'].tolist() == [3]
+
+def test_custos_dentro_da_tolerancia_sao_iguais():
+    tabela = pd.DataFrame({'custo': [6.0, 6.0 + 1e-9, 6.0],
+                           'distintos': [3, 2, 3],
+                           'origem': ['a', 'b', 'c']})
+
+    fronteira = podar_dominados(tabela, tolerancia=1e-6)
+
+    # Entre os pontos iguais fica o primeiro
+    assert fronteira['origem'].tolist() == ['a']
+
+def test_tabela_vazia():
+    tabela = pd.DataFrame({'custo': [], 'distintos': []})
+
+    assert podar_dominados(tabela).empty
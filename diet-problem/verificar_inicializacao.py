@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+verificar_inicializacao.py - Mede o tempo de inicialização do main.py e
+verifica se nenhuma dependência pesada é importada no início
+
+Autor: José Brito
+
+Uso: python verificar_inicializacao.py  (código de saída 1 se o orçamento for excedido)
+"""
+
+import os
+import sys
+import subprocess
+from statistics import median
+from config import INICIALIZACAO_CONFIG
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+def medir_importacao(modulo="main", repeticoes=INICIALIZACAO_CONFIG['repeticoes']):
+    """
+    Mede o tempo de importação de um módulo em processos novos (python -X importtime)
+
+    Args:
+        modulo (str): Módulo medido
+        repeticoes (int): Número de medições
+
+    Returns:
+        tuple: (mediana do tempo acumulado em ms, módulos mais lentos da última medição)
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        saida = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+            cwd=DIRETORIO, capture_output=True, text=True
+        ).stderr
+
+        # Linhas no formato "import time: self [us] | cumulative | nome"
+        medidas = []
+        for linha in saida.splitlines():
+            if linha.startswith("import time:") and "|" in linha and "cumulative" not in linha:
+                _, acumulado, nome = linha[len("import time:"):].split("|")
+                medidas.append((int(acumulado) / 1000, nome.strip()))
+        tempos.append(next((t for t, nome in medidas if nome == modulo), 0.0))
+
+    return median(tempos), sorted(medidas, reverse=True)[:10]
+
+def modulos_carregados(modulo="main", pesados=INICIALIZACAO_CONFIG['modulos_pesados']):
+    """
+    Lista as dependências pesadas carregadas ao importar um módulo
+
+    Args:
+        modulo (str): Módulo importado
+        pesados (tuple): Pacotes que não deveriam ser carregados
+
+    Returns:
+        list: Pacotes pesados presentes em sys.modules após a importação
+    """
+    codigo = (f"import sys, {modulo}; "
+              f"print(' '.join(p for p in {tuple(pesados)!r} if p in sys.modules))")
+    saida = subprocess.run([sys.executable, "-c", codigo], cwd=DIRETORIO, capture_output=True, text=True)
+    return saida.stdout.split()
+
+def verificar_inicializacao(modulo="main", orcamento_ms=INICIALIZACAO_CONFIG['orcamento_ms']):
+    """
+    Compara o tempo de importação com o orçamento e procura importações pesadas
+
+    Args:
+        modulo (str): Módulo verificado
+        orcamento_ms (float): Tempo máximo permitido em milissegundos
+
+    Returns:
+        bool: True se a inicialização está dentro do orçamento
+    """
+    tempo, mais_lentos = medir_importacao(modulo)
+    carregados = modulos_carregados(modulo)
+
+    print("\n" + "="*60)
+    print(f"TEMPO DE INICIALIZAÇÃO - {modulo}.py")
+    print("="*60)
+    print(f"Importação: {tempo:.1f} ms (orçamento: {orcamento_ms} ms)")
+    print("\nMódulos mais lentos:")
+    print("-"*40)
+    for acumulado, nome in mais_lentos:
+        print(f"{nome:<30}: {acumulado:7.1f} ms")
+
+    aprovado = tempo <= orcamento_ms and not carregados
+    if carregados:
+        print(f"\n✗ Dependências pesadas importadas no início: {', '.join(carregados)}")
+    print(f"\n{'✓ Dentro do orçamento' if aprovado else '✗ Orçamento de inicialização excedido'}")
+    print("="*60)
+    return aprovado
+
+if __name__ == "__main__":
+    sys.exit(0 if verificar_inicializacao() else 1)
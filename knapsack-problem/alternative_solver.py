@@ -25,7 +25,7 @@ class KnapsackDynamicSolver:
         Solves the knapsack problem using dynamic programming
         """
         n = len(self.items)
-        weights_int = [int(w * 10) for w in self.weights]  # Convert to integers
+        weights_int = [int(round(w * 10)) for w in self.weights]  # Convert to integers (round: 2.3 * 10 = 22.999...)
         
         # DP table
         dp = [[0 for _ in range(self.capacity + 1)] for _ in range(n + 1)]
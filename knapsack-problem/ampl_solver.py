@@ -12,16 +12,22 @@ except ImportError:
 
 from knapsack_data import ITENS_DATA, MAX_KNAPSACK_WEIGHT, print_dataset_info
 from ampl_files_generator import generate_all_ampl_files
+from solve_cache import SolveCache, solve_key
+
+# Solver options that affect the solution (part of the cache key)
+SOLVER_OPTIONS = {'solver': 'cbc'}
 
 class KnapsackAMPLSolver:
     """
     Class to solve the knapsack problem using AMPL
     """
     
-    def __init__(self):
+    def __init__(self, cache=None):
         self.ampl = None
         self.solution = None
         self.objective_value = None
+        self.cache = cache if cache is not None else SolveCache()
+        self.cache_hit = False
         
     def setup_ampl_environment(self):
         """
@@ -41,10 +47,34 @@ class KnapsackAMPLSolver:
             print(f"Error configuring AMPL: {e}")
             raise
     
-    def solve_knapsack(self, model_file="mochila.mod", data_file="mochila.dat"):
+    def solve_knapsack(self, model_file="mochila.mod", data_file="mochila.dat", use_cache=True,
+                       invalidate_cache=False):
         """
         Solves the knapsack problem using AMPL
+        
+        A previous solution of the same model, data and solver options is
+        returned from the cache without starting AMPL. Use use_cache=False to
+        bypass the cache or invalidate_cache=True to drop the stored entry
+        and solve again.
         """
+        key = None
+        self.cache_hit = False
+        if self.cache is not None and use_cache:
+            try:
+                key = solve_key(model_file, data_file, SOLVER_OPTIONS)
+            except OSError as e:
+                print(f"Could not read files for the cache: {e}")
+            if key and invalidate_cache:
+                self.cache.invalidate(key)
+            elif key:
+                entry = self.cache.get(key)
+                if entry is not None:
+                    self.solution = entry['solution']
+                    self.objective_value = entry['objective_value']
+                    self.cache_hit = True
+                    print("Solution loaded from cache.")
+                    return True
+        
         if not self.ampl:
             self.setup_ampl_environment()
         
@@ -54,7 +84,7 @@ class KnapsackAMPLSolver:
             self.ampl.read_data(data_file)
             
             # Set the solver
-            self.ampl.option['solver'] = 'cbc'
+            self.ampl.option['solver'] = SOLVER_OPTIONS['solver']
             
             # Solve the problem
             self.ampl.solve()
@@ -63,6 +93,9 @@ class KnapsackAMPLSolver:
             self.solution = self.ampl.get_variable('Include').get_values().to_dict()
             self.objective_value = self.ampl.get_objective('Total_value').value()
             
+            if key:
+                self.cache.put(key, {'solution': self.solution, 'objective_value': self.objective_value})
+            
             print("Problem solved successfully!")
             return True
             
@@ -5,10 +5,20 @@ Main file to run different solvers
 """
 
 import sys
+import json
+import time
+from importlib.util import find_spec
 from knapsack_data import print_dataset_info
-from ampl_solver import KnapsackAMPLSolver, AMPL_AVAILABLE
 from alternative_solver import KnapsackDynamicSolver, compare_with_greedy
 
+# amplpy is only located here; ampl_solver is imported by the options that use it
+AMPL_AVAILABLE = find_spec("amplpy") is not None
+
+# Step statuses returned by the options (None counts as STATUS_OK)
+STATUS_OK = 'ok'
+STATUS_SKIPPED = 'skipped'
+STATUS_ERROR = 'error'
+
 def show_menu():
     """
     Displays the options menu
@@ -31,14 +41,20 @@ def option_1():
     print_dataset_info()
 
 def option_2():
-    """Solves with AMPL"""
+    """
+    Solves with AMPL
+    
+    Returns:
+        str: STATUS_OK, STATUS_SKIPPED (AMPL not installed) or STATUS_ERROR
+    """
     if not AMPL_AVAILABLE:
         print("\n❌ AMPL is not available.")
         print("To use the AMPL solver, install with: pip install amplpy")
-        return
+        return STATUS_SKIPPED
     
     try:
         from ampl_files_generator import generate_all_ampl_files
+        from ampl_solver import KnapsackAMPLSolver
         
         print("\nSolving with AMPL...")
         generate_all_ampl_files()
@@ -46,10 +62,11 @@ def option_2():
         solver = KnapsackAMPLSolver()
         if solver.solve_knapsack():
             solver.print_solution()
-        else:
-            print("Failed to solve with AMPL.")
+            return STATUS_OK
+        print("Failed to solve with AMPL.")
     except Exception as e:
         print(f"Error running AMPL solver: {e}")
+    return STATUS_ERROR
 
 def option_3():
     """Solves with Dynamic Programming"""
@@ -64,16 +81,28 @@ def option_4():
     compare_with_greedy()
 
 def option_5():
-    """Generates AMPL files"""
+    """
+    Generates AMPL files
+    
+    Returns:
+        str: STATUS_OK or STATUS_ERROR
+    """
     try:
         from ampl_files_generator import generate_all_ampl_files
         print("\nGenerating AMPL files...")
         generate_all_ampl_files()
+        return STATUS_OK
     except Exception as e:
         print(f"Error generating AMPL files: {e}")
+        return STATUS_ERROR
 
 def option_6():
-    """Runs a full analysis"""
+    """
+    Runs a full analysis
+    
+    Returns:
+        str: STATUS_OK, STATUS_SKIPPED (AMPL part not run) or STATUS_ERROR (AMPL part failed)
+    """
     print("\n" + "="*80)
     print("FULL KNAPSACK PROBLEM ANALYSIS")
     print("="*80)
@@ -92,9 +121,11 @@ def option_6():
     compare_with_greedy()
     
     # 4. Try AMPL if available
+    status = STATUS_OK
     if AMPL_AVAILABLE:
         try:
             from ampl_files_generator import generate_all_ampl_files
+            from ampl_solver import KnapsackAMPLSolver
             print("\n🔍 SOLVING WITH AMPL...")
             generate_all_ampl_files()
             
@@ -104,14 +135,70 @@ def option_6():
                 ampl_solver.print_solution()
             else:
                 print("❌ Failed to solve with AMPL.")
+                status = STATUS_ERROR
         except Exception as e:
             print(f"❌ Error with AMPL: {e}")
+            status = STATUS_ERROR
     else:
         print("\n⚠️  AMPL not available. Install with: pip install amplpy")
+        status = STATUS_SKIPPED
     
     print("\n" + "="*80)
     print("FULL ANALYSIS COMPLETE")
     print("="*80)
+    return status
+
+OPTIONS = {
+    '1': option_1,
+    '2': option_2,
+    '3': option_3,
+    '4': option_4,
+    '5': option_5,
+    '6': option_6
+}
+
+def run_batch(args=None):
+    """
+    Runs menu options without interaction and prints a JSON summary
+    
+    Usage: python main.py --run 1 3 4 [--summary summary.json]
+    
+    Options that report STATUS_SKIPPED or STATUS_ERROR (or raise) make the
+    batch fail.
+    
+    Returns:
+        int: Exit code (0 only if every option finished with STATUS_OK)
+    """
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Run Knapsack menu options in batch mode")
+    parser.add_argument("--run", nargs="+", required=True, choices=sorted(OPTIONS), help="Options to run, in order")
+    parser.add_argument("--summary", default=None, help="JSON file to write the summary to")
+    options = parser.parse_args(args)
+    
+    steps = []
+    start = time.perf_counter()
+    for choice in options.run:
+        step_start = time.perf_counter()
+        step = {'option': choice, 'function': OPTIONS[choice].__name__}
+        try:
+            step['status'] = OPTIONS[choice]() or STATUS_OK
+        except Exception as e:
+            step.update(status=STATUS_ERROR, error=str(e))
+        step['time'] = time.perf_counter() - step_start
+        steps.append(step)
+    
+    summary = {
+        'success': all(step['status'] == STATUS_OK for step in steps),
+        'total_time': time.perf_counter() - start,
+        'steps': steps
+    }
+    text = json.dumps(summary, indent=2)
+    if options.summary:
+        with open(options.summary, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+    return 0 if summary['success'] else 1
 
 def main():
     """
@@ -127,18 +214,8 @@ def main():
             if choice == '0':
                 print("Exiting... Thanks for using the program!")
                 sys.exit(0)
-            elif choice == '1':
-                option_1()
-            elif choice == '2':
-                option_2()
-            elif choice == '3':
-                option_3()
-            elif choice == '4':
-                option_4()
-            elif choice == '5':
-                option_5()
-            elif choice == '6':
-                option_6()
+            elif choice in OPTIONS:
+                OPTIONS[choice]()
             else:
                 print("❌ Invalid option. Please try again.")
             
@@ -152,4 +229,6 @@ def main():
             input("Press Enter to continue...")
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(run_batch())
     main()
\ No newline at end of file
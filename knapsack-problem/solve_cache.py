@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Content-addressed solve cache for the Knapsack Problem
+Solutions are stored on disk, keyed by a hash of the model, the canonical data and the solver options
+"""
+
+import os
+import re
+import json
+import hashlib
+
+# Default cache location and size limit
+CACHE_DIR = "solve_cache"
+MAX_CACHE_MB = 20
+
+# AMPL comments (up to the end of the line)
+_AMPL_COMMENT = re.compile(r'#[^\n]*')
+
+def canonical_ampl(text):
+    """
+    Removes comments and collapses whitespace so formatting changes do not change the key
+    """
+    return " ".join(_AMPL_COMMENT.sub(" ", text).split())
+
+def solve_key(model_file, data_file, options):
+    """
+    Computes the cache key of a solve from the model, the data and the solver options
+    """
+    digest = hashlib.sha256()
+    for path in (model_file, data_file):
+        with open(path, 'r', encoding='utf-8') as f:
+            digest.update(canonical_ampl(f.read()).encode('utf-8'))
+        digest.update(b"\0")
+    digest.update(json.dumps(options, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+class SolveCache:
+    """
+    On-disk cache with one JSON file per key and size-based LRU eviction
+    (the modification time of an entry marks its last use)
+    """
+    
+    def __init__(self, directory=CACHE_DIR, max_size_mb=MAX_CACHE_MB):
+        self.directory = directory
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+    
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+    
+    def get(self, key):
+        """
+        Returns the stored entry for a key, or None on a miss
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+        
+        os.utime(path)  # Mark as recently used
+        self.hits += 1
+        return entry
+    
+    def put(self, key, entry):
+        """
+        Stores an entry and evicts the least recently used ones above the size limit
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        temporary = self._path(key) + ".tmp"
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(temporary, self._path(key))
+        self._evict()
+    
+    def invalidate(self, key=None):
+        """
+        Removes one entry, or every entry when no key is given
+        
+        Returns:
+            int: Number of entries removed
+        """
+        if key is not None:
+            paths = [self._path(key)]
+        elif os.path.isdir(self.directory):
+            paths = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith('.json')]
+        else:
+            paths = []
+        
+        removed = 0
+        for path in paths:
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+    
+    def _evict(self):
+        """Removes least recently used entries until the cache fits the size limit"""
+        entries = []
+        with os.scandir(self.directory) as items:
+            for item in items:
+                if item.name.endswith('.json'):
+                    info = item.stat()
+                    entries.append((info.st_mtime, info.st_size, item.path))
+        
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+    
+    def stats(self):
+        """
+        Returns hit/miss counters
+        """
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / lookups if lookups else 0.0}
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Startup time check for the Knapsack entry point
+Measures how long importing main.py takes and verifies that amplpy is not loaded at startup
+
+Usage: python startup_check.py  (exit code 1 if the budget is exceeded)
+"""
+
+import os
+import sys
+import subprocess
+from statistics import median
+
+# Maximum import time of main.py in milliseconds
+STARTUP_BUDGET_MS = 50
+
+# Number of measurements (the median is used)
+REPETITIONS = 5
+
+# Packages that must only be imported by the options that need them
+HEAVY_MODULES = ('amplpy',)
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def measure_import(module="main", repetitions=REPETITIONS):
+    """
+    Measures the import time of a module in fresh processes (python -X importtime)
+    
+    Returns:
+        tuple: (median cumulative time in ms, slowest modules of the last run)
+    """
+    times = []
+    for _ in range(repetitions):
+        output = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=PROJECT_DIR, capture_output=True, text=True
+        ).stderr
+        
+        # Lines look like "import time: self [us] | cumulative | name"
+        entries = []
+        for line in output.splitlines():
+            if line.startswith("import time:") and "|" in line and "cumulative" not in line:
+                _, cumulative, name = line[len("import time:"):].split("|")
+                entries.append((int(cumulative) / 1000, name.strip()))
+        times.append(next((t for t, name in entries if name == module), 0.0))
+    
+    return median(times), sorted(entries, reverse=True)[:10]
+
+def loaded_heavy_modules(module="main", heavy=HEAVY_MODULES):
+    """
+    Lists heavy packages present in sys.modules after importing a module
+    """
+    code = f"import sys, {module}; print(' '.join(p for p in {tuple(heavy)!r} if p in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_DIR, capture_output=True, text=True)
+    return output.stdout.split()
+
+def check_startup(module="main", budget_ms=STARTUP_BUDGET_MS):
+    """
+    Compares the import time with the budget and looks for heavy imports
+    
+    Returns:
+        bool: True if startup is within budget
+    """
+    elapsed, slowest = measure_import(module)
+    loaded = loaded_heavy_modules(module)
+    
+    print("\n" + "="*60)
+    print(f"STARTUP TIME - {module}.py")
+    print("="*60)
+    print(f"Import time: {elapsed:.1f} ms (budget: {budget_ms} ms)")
+    print("\nSlowest modules:")
+    print("-"*40)
+    for cumulative, name in slowest:
+        print(f"{name:<30}: {cumulative:7.1f} ms")
+    
+    passed = elapsed <= budget_ms and not loaded
+    if loaded:
+        print(f"\n❌ Heavy dependencies imported at startup: {', '.join(loaded)}")
+    print(f"\n{'✅ Within budget' if passed else '❌ Startup budget exceeded'}")
+    print("="*60)
+    return passed
+
+if __name__ == "__main__":
+    sys.exit(0 if check_startup() else 1)